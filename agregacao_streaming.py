@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+"""
+Agregação em blocos (streaming) para as estatísticas descritivas dos temas.
+
+Em vez de carregar a tabela inteira, os dados são lidos em blocos e cada bloco gera
+agregados parciais que podem ser mesclados: contagem, soma, soma dos quadrados,
+mínimo e máximo por grupo, histogramas de faixas fixas (de um valor ou de pares de
+valores) e cubos de contagens e momentos por combinação de dimensões categóricas. Assim
+a memória usada depende do tamanho do bloco e do número de grupos, e não do número de linhas.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import TAMANHO_BLOCO, ler_em_blocos
+
+
+class AgregadoGrupos:
+    """
+    Contagem, soma, soma dos quadrados, mínimo e máximo de colunas numéricas por grupo.
+
+    Dois agregados das mesmas colunas podem ser mesclados com `combinar`, o que permite
+    processar os blocos em qualquer ordem (ou em processos diferentes).
+    """
+
+    def __init__(self, grupos, colunas):
+        """
+        Args:
+            grupos (str | list): Coluna(s) usadas no agrupamento.
+            colunas (list): Colunas numéricas a agregar.
+        """
+        self.grupos = [grupos] if isinstance(grupos, str) else list(grupos)
+        self.colunas = list(colunas)
+        self.parciais = None
+
+    def atualizar(self, bloco):
+        """Acumula as estatísticas de um bloco de linhas."""
+        # Acumula em float64 para não perder precisão nas somas de milhões de notas float32.
+        valores = bloco[self.colunas].astype('float64')
+        chaves = [bloco[g] for g in self.grupos]
+        agrupado = valores.groupby(chaves, observed=True)
+        parciais = {
+            'n': agrupado.count(),
+            'soma': agrupado.sum(),
+            'soma_q': (valores ** 2).groupby(chaves, observed=True).sum(),
+            'min': agrupado.min(),
+            'max': agrupado.max(),
+        }
+        self._mesclar(parciais)
+        return self
+
+    def combinar(self, outro):
+        """Mescla os agregados parciais de outro `AgregadoGrupos` neste."""
+        if outro.parciais is not None:
+            self._mesclar(outro.parciais)
+        return self
+
+    def _mesclar(self, parciais):
+        if self.parciais is None:
+            self.parciais = parciais
+            return
+        atual = self.parciais
+        niveis = list(range(len(self.grupos)))
+        self.parciais = {
+            'n': atual['n'].add(parciais['n'], fill_value=0),
+            'soma': atual['soma'].add(parciais['soma'], fill_value=0),
+            'soma_q': atual['soma_q'].add(parciais['soma_q'], fill_value=0),
+            'min': pd.concat([atual['min'], parciais['min']]).groupby(level=niveis, observed=True).min(),
+            'max': pd.concat([atual['max'], parciais['max']]).groupby(level=niveis, observed=True).max(),
+        }
+
+    def contagens(self):
+        """Número de valores não nulos por grupo e coluna."""
+        return self.parciais['n'].sort_index()
+
+    def medias(self):
+        """Médias por grupo, no mesmo formato de `df.groupby(grupos)[colunas].mean()`."""
+        return (self.parciais['soma'] / self.parciais['n']).sort_index()
+
+    def desvios(self):
+        """Desvios-padrão amostrais (ddof=1) por grupo, como `groupby(...).std()`."""
+        n = self.parciais['n']
+        media = self.parciais['soma'] / n
+        variancia = (self.parciais['soma_q'] - n * media ** 2) / (n - 1)
+        # Erros de arredondamento podem gerar variâncias levemente negativas em grupos constantes.
+        return np.sqrt(variancia.clip(lower=0)).sort_index()
+
+    def resumo(self):
+        """Tabela com n, média, desvio, mínimo e máximo de cada coluna por grupo."""
+        partes = {
+            'n': self.contagens(), 'media': self.medias(), 'desvio': self.desvios(),
+            'min': self.parciais['min'].sort_index(), 'max': self.parciais['max'].sort_index(),
+        }
+        resumo = pd.concat(partes, axis=1)
+        # Organiza as colunas como (coluna, estatística).
+        return resumo.swaplevel(axis=1)[self.colunas]
+
+
+class HistogramaMesclavel:
+    """
+    Histograma de faixas fixas, por grupo, que pode ser somado entre blocos.
+
+    As faixas são fixas (ex: 0 a 1000 de 10 em 10), então os histogramas de blocos
+    diferentes são somados diretamente, sem precisar rever os dados.
+    """
+
+    def __init__(self, inicio=0.0, fim=1000.0, largura=10.0):
+        self.inicio = inicio
+        self.largura = largura
+        self.n_faixas = int(round((fim - inicio) / largura))
+        self.bordas = inicio + largura * np.arange(self.n_faixas + 1)
+        self.contagens = {}
+
+    def atualizar(self, valores, grupos=None):
+        """
+        Acumula os valores de um bloco.
+
+        Args:
+            valores (array-like): Valores numéricos (NaN são ignorados).
+            grupos (array-like): Grupo de cada valor. None acumula tudo em um único grupo.
+        """
+        valores = np.asarray(valores, dtype='float64')
+        validos = ~np.isnan(valores)
+        # Valores fora do intervalo vão para a primeira ou a última faixa.
+        faixa = np.clip(((valores[validos] - self.inicio) / self.largura).astype(np.int64), 0, self.n_faixas - 1)
+        if grupos is None:
+            self._somar(None, np.bincount(faixa, minlength=self.n_faixas))
+            return self
+        codigos, unicos = pd.factorize(np.asarray(grupos)[validos])
+        faixa, codigos = faixa[codigos >= 0], codigos[codigos >= 0]  # ignora grupos nulos
+        contagens = np.bincount(codigos * self.n_faixas + faixa, minlength=len(unicos) * self.n_faixas)
+        for i, grupo in enumerate(unicos):
+            self._somar(grupo, contagens[i * self.n_faixas:(i + 1) * self.n_faixas])
+        return self
+
+    def combinar(self, outro):
+        """Soma as contagens de outro histograma com as mesmas faixas."""
+        if not np.array_equal(self.bordas, outro.bordas):
+            raise ValueError("Os histogramas precisam ter as mesmas faixas para serem combinados.")
+        for grupo, contagens in outro.contagens.items():
+            self._somar(grupo, contagens)
+        return self
+
+    def _somar(self, grupo, contagens):
+        if grupo in self.contagens:
+            self.contagens[grupo] = self.contagens[grupo] + contagens
+        else:
+            self.contagens[grupo] = np.asarray(contagens, dtype=np.int64).copy()
+
+    def reagrupar(self, fator):
+        """
+        Novo histograma com faixas `fator` vezes mais largas, somando faixas vizinhas.
+
+        Permite acumular uma vez em faixas finas (ex: 1 ponto, usadas na densidade) e
+        exibir faixas mais largas sem rever os dados.
+        """
+        fator = max(1, int(fator))
+        n_faixas = -(-self.n_faixas // fator)  # divisão arredondada para cima
+        novo = HistogramaMesclavel(self.inicio, self.inicio + n_faixas * fator * self.largura, self.largura * fator)
+        for grupo, contagens in self.contagens.items():
+            completas = np.zeros(n_faixas * fator, dtype=np.int64)
+            completas[:self.n_faixas] = contagens
+            novo.contagens[grupo] = completas.reshape(n_faixas, fator).sum(axis=1)
+        return novo
+
+    def recortar(self):
+        """Novo histograma sem as faixas vazias no início e no fim (considerando todos os grupos)."""
+        total = sum(self.contagens.values(), np.zeros(self.n_faixas, dtype=np.int64))
+        ocupadas = np.flatnonzero(total)
+        if len(ocupadas) == 0:
+            return self
+        primeira, ultima = ocupadas[0], ocupadas[-1] + 1
+        novo = HistogramaMesclavel(self.bordas[primeira], self.bordas[ultima], self.largura)
+        novo.contagens = {g: c[primeira:ultima].copy() for g, c in self.contagens.items()}
+        return novo
+
+    def tabela(self, ordem=None):
+        """
+        Contagens em um DataFrame: uma linha por faixa (borda esquerda) e uma coluna por grupo.
+
+        Args:
+            ordem (list): Ordem das colunas (grupos). None usa a ordem de aparição.
+        """
+        grupos = ordem if ordem is not None else list(self.contagens)
+        dados = {g: self.contagens.get(g, np.zeros(self.n_faixas, dtype=np.int64)) for g in grupos}
+        return pd.DataFrame(dados, index=pd.Index(self.bordas[:-1], name='faixa'))
+
+
+class Histograma2DMesclavel:
+    """
+    Histograma 2D de faixas fixas (contagem de pares de valores por célula), por grupo, que pode ser somado entre blocos.
+
+    Equivale a `np.histogram2d` com faixas de largura fixa em cada eixo, mas o índice da
+    célula é calculado direto (sem busca nas bordas) e contado com `np.bincount`. Substitui os
+    gráficos de dispersão: a contagem usa todos os pares, e o desenho depende só do número de células.
+    """
+
+    def __init__(self, inicio=0.0, fim=1000.0, largura=5.0, largura_y=None):
+        """
+        Args:
+            inicio, fim (float): Intervalo dos dois eixos.
+            largura (float): Largura das faixas do eixo x.
+            largura_y (float): Largura das faixas do eixo y (None = a mesma do eixo x). Valores com
+                passo fixo (ex: a redação, de 20 em 20) devem usar um múltiplo do passo, para não deixar faixas vazias.
+        """
+        self.inicio = inicio
+        self.largura = largura
+        self.largura_y = largura if largura_y is None else largura_y
+        self.n_faixas = int(round((fim - inicio) / largura))
+        self.n_faixas_y = int(round((fim - inicio) / self.largura_y))
+        self.bordas = inicio + largura * np.arange(self.n_faixas + 1)
+        self.bordas_y = inicio + self.largura_y * np.arange(self.n_faixas_y + 1)
+        # {grupo: contagens (n_faixas x n_faixas_y), com o eixo x nas linhas}.
+        self.contagens = {}
+
+    def atualizar(self, x, y, grupos=None):
+        """
+        Acumula os pares de um bloco.
+
+        Args:
+            x, y (array-like): Valores de cada eixo (pares com algum NaN são ignorados).
+            grupos (array-like): Grupo de cada par. None acumula tudo em um único grupo.
+        """
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        validos = ~(np.isnan(x) | np.isnan(y))
+        n, n_y = self.n_faixas, self.n_faixas_y
+        # Valores fora do intervalo vão para a primeira ou a última faixa de cada eixo.
+        celula = (np.clip(((x[validos] - self.inicio) / self.largura).astype(np.int64), 0, n - 1) * n_y
+                  + np.clip(((y[validos] - self.inicio) / self.largura_y).astype(np.int64), 0, n_y - 1))
+        if grupos is None:
+            self._somar(None, np.bincount(celula, minlength=n * n_y).reshape(n, n_y))
+            return self
+        codigos, unicos = pd.factorize(np.asarray(grupos)[validos])
+        celula, codigos = celula[codigos >= 0], codigos[codigos >= 0]  # ignora grupos nulos
+        contagens = np.bincount(codigos * n * n_y + celula, minlength=len(unicos) * n * n_y).reshape(len(unicos), n, n_y)
+        for i, grupo in enumerate(unicos):
+            self._somar(grupo, contagens[i])
+        return self
+
+    def combinar(self, outro):
+        """Soma as contagens de outro histograma 2D com as mesmas faixas."""
+        if not (np.array_equal(self.bordas, outro.bordas) and np.array_equal(self.bordas_y, outro.bordas_y)):
+            raise ValueError("Os histogramas precisam ter as mesmas faixas para serem combinados.")
+        for grupo, contagens in outro.contagens.items():
+            self._somar(grupo, contagens)
+        return self
+
+    def _somar(self, grupo, contagens):
+        if grupo in self.contagens:
+            self.contagens[grupo] = self.contagens[grupo] + contagens
+        else:
+            self.contagens[grupo] = np.asarray(contagens, dtype=np.int64).copy()
+
+    def ocupadas(self):
+        """
+        Faixas de cada eixo entre a primeira e a última célula não vazia (considerando todos os grupos).
+
+        Returns:
+            tuple: (slice do eixo x, slice do eixo y).
+        """
+        total = sum(self.contagens.values(), np.zeros((self.n_faixas, self.n_faixas_y), dtype=np.int64))
+        linhas, colunas = np.flatnonzero(total.any(axis=1)), np.flatnonzero(total.any(axis=0))
+        if len(linhas) == 0:
+            return slice(0, self.n_faixas), slice(0, self.n_faixas_y)
+        return slice(linhas[0], linhas[-1] + 1), slice(colunas[0], colunas[-1] + 1)
+
+
+class QuantisMesclaveis(HistogramaMesclavel):
+    """
+    Contagem exata de cada valor possível (ex: notas de 0 a 1000 com uma casa decimal), por grupo.
+
+    Com as notas em uma escala limitada e de precisão fixa, contar quantas vezes cada valor
+    aparece substitui a ordenação: medianas, quartis e estatísticas do boxplot saem das
+    contagens acumuladas em O(n), com memória fixa por grupo (10 001 contadores para
+    0 a 1000 em passos de 0,1). Os quantis são exatos para valores múltiplos de `resolucao`;
+    para os demais (ex: médias de várias notas), o erro é de no máximo meia resolução.
+    """
+
+    def __init__(self, inicio=0.0, fim=1000.0, resolucao=0.1):
+        # Cada faixa é centrada em um valor possível, então o valor é arredondado para o mais próximo.
+        super().__init__(inicio - resolucao / 2, fim + resolucao / 2, resolucao)
+        # O arredondamento deixa cada valor igual ao float do decimal correspondente (ex: 250.4, e não 250.40000000000003).
+        self.valores = np.round(inicio + resolucao * np.arange(self.n_faixas), 10)
+
+    def quantizar(self, valores):
+        """Arredonda valores para os valores possíveis (os mesmos usados na contagem)."""
+        indices = np.rint((np.asarray(valores, dtype='float64') - self.valores[0]) / self.largura)
+        return np.round(self.valores[0] + self.largura * indices, 10)
+
+    def n(self, grupo=None):
+        """Número de valores acumulados no grupo."""
+        return int(self.contagens[grupo].sum()) if grupo in self.contagens else 0
+
+    def _ordem(self, acumulado, k):
+        """Valor da k-ésima observação (a partir de 0) na ordem crescente."""
+        return self.valores[np.searchsorted(acumulado, k, side='right')]
+
+    def quantis(self, probabilidades, grupo=None):
+        """
+        Quantis do grupo com interpolação linear (o mesmo critério de `np.percentile` e `pd.qcut`).
+
+        Args:
+            probabilidades (float | list): Probabilidades entre 0 e 1.
+            grupo: Grupo a consultar (None quando não há agrupamento).
+
+        Returns:
+            np.ndarray: Um quantil por probabilidade.
+        """
+        acumulado = np.cumsum(self.contagens[grupo])
+        posicoes = (acumulado[-1] - 1) * np.atleast_1d(np.asarray(probabilidades, dtype='float64'))
+        abaixo = np.floor(posicoes)
+        v_abaixo = self._ordem(acumulado, abaixo)
+        v_acima = self._ordem(acumulado, np.minimum(abaixo + 1, acumulado[-1] - 1))
+        return v_abaixo + (posicoes - abaixo) * (v_acima - v_abaixo)
+
+    def resumo_boxplot(self, grupo=None, whis=1.5):
+        """
+        Estatísticas de um boxplot, no formato de `matplotlib.cbook.boxplot_stats` (aceito por `ax.bxp`).
+
+        Os bigodes vão até o valor mais extremo dentro de `whis` vezes a distância interquartil;
+        os valores além deles são outliers. Como valores repetidos ficam no mesmo ponto do
+        gráfico, 'fliers' traz cada valor distinto uma vez e 'n_outliers' a contagem total.
+        """
+        contagens = self.contagens[grupo]
+        q1, mediana, q3 = self.quantis([0.25, 0.5, 0.75], grupo)
+        iqr = q3 - q1
+        presentes = contagens > 0
+        dentro = presentes & (self.valores >= q1 - whis * iqr) & (self.valores <= q3 + whis * iqr)
+        fora = presentes & ~dentro
+        n = contagens.sum()
+        return {
+            'label': grupo, 'med': mediana, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'whislo': self.valores[dentro].min(), 'whishi': self.valores[dentro].max(),
+            'fliers': self.valores[fora], 'n_outliers': int(contagens[fora].sum()),
+            'mean': np.dot(contagens, self.valores) / n, 'n': int(n),
+        }
+
+
+class CuboMesclavel:
+    """
+    Cubo de contagens e momentos das notas por combinação de dimensões categóricas (OLAP).
+
+    Cada cuboide (uma combinação de dimensões) é um array denso com uma célula por combinação
+    de categorias, mais uma posição por dimensão para os valores ausentes, e guarda o número de
+    linhas e, para cada medida, a contagem de valores não nulos, a soma e a soma dos quadrados.
+    Todos os cuboides são atualizados na mesma passada sobre os dados (`np.bincount` do índice
+    da célula), e qualquer agrupamento pelas dimensões de um cuboide sai dele por soma dos
+    eixos restantes, sem reler as linhas. Dois cubos com as mesmas dimensões são mesclados com
+    `combinar` (soma dos arrays).
+    """
+
+    def __init__(self, dimensoes, medidas=(), cuboides=None):
+        """
+        Args:
+            dimensoes (dict): {nome: categorias (lista ou `pd.CategoricalDtype`)}; a ordem das
+                categorias é a ordem das linhas e colunas das tabelas.
+            medidas (list): Colunas numéricas com contagem, soma e soma dos quadrados por célula.
+            cuboides (list): Combinações de dimensões guardadas. None guarda só a combinação de todas.
+        """
+        self.dimensoes = {nome: tipo if isinstance(tipo, pd.CategoricalDtype) else pd.CategoricalDtype(list(tipo))
+                          for nome, tipo in dimensoes.items()}
+        self.medidas = list(medidas)
+        self.cuboides = [tuple(c) for c in cuboides] if cuboides is not None else [tuple(self.dimensoes)]
+        self.celulas = {cuboide: self._vazio(cuboide) for cuboide in self.cuboides}
+
+    def _forma(self, cuboide):
+        # A última posição de cada eixo recebe os valores ausentes (ou fora das categorias).
+        return tuple(len(self.dimensoes[d].categories) + 1 for d in cuboide)
+
+    def _vazio(self, cuboide):
+        forma = self._forma(cuboide)
+        celulas = {'n': np.zeros(forma, dtype=np.int64)}
+        if self.medidas:
+            momentos = forma + (len(self.medidas),)
+            celulas.update({'n_medida': np.zeros(momentos, dtype=np.int64), 'soma': np.zeros(momentos),
+                            'soma_q': np.zeros(momentos)})
+        return celulas
+
+    @staticmethod
+    def codigos(serie):
+        """Códigos de uma coluna categórica (-1 = ausente), no formato de `atualizar`."""
+        return serie.cat.codes.to_numpy()
+
+    def atualizar(self, codigos, valores=None):
+        """
+        Acumula um bloco de linhas em todos os cuboides.
+
+        Args:
+            codigos (dict): {dimensão: posição da categoria de cada linha (-1 = ausente)}.
+            valores (np.ndarray): Medidas de cada linha (linhas x medidas, NaN = ausente).
+        """
+        linhas = len(next(iter(codigos.values())))
+        if self.medidas:
+            valores = np.asarray(valores, dtype=np.float64).reshape(linhas, len(self.medidas))
+            validos = ~np.isnan(valores)
+            valores = np.where(validos, valores, 0.0)
+        for cuboide, celulas in self.celulas.items():
+            forma = self._forma(cuboide)
+            posicoes = [np.where(np.asarray(codigos[d]) < 0, n - 1, codigos[d]) for d, n in zip(cuboide, forma)]
+            chave = np.ravel_multi_index(posicoes, forma) if cuboide else np.zeros(linhas, dtype=np.int64)
+            tamanho = int(np.prod(forma))
+            celulas['n'] += np.bincount(chave, minlength=tamanho).reshape(forma)
+            for j in range(len(self.medidas)):
+                celulas['n_medida'][..., j] += np.bincount(chave, validos[:, j], tamanho).reshape(forma).astype(np.int64)
+                celulas['soma'][..., j] += np.bincount(chave, valores[:, j], tamanho).reshape(forma)
+                celulas['soma_q'][..., j] += np.bincount(chave, valores[:, j] ** 2, tamanho).reshape(forma)
+        return self
+
+    def combinar(self, outro):
+        """Soma as células de outro cubo com as mesmas dimensões, medidas e cuboides."""
+        if outro.dimensoes != self.dimensoes or outro.medidas != self.medidas or outro.cuboides != self.cuboides:
+            raise ValueError("Os cubos precisam ter as mesmas dimensões, medidas e cuboides para serem combinados.")
+        for cuboide, celulas in outro.celulas.items():
+            for chave, valores in celulas.items():
+                self.celulas[cuboide][chave] += valores
+        return self
+
+    @classmethod
+    def de_dataframe(cls, df, dimensoes, medidas=(), cuboides=None):
+        """
+        Monta o cubo das colunas categóricas de um DataFrame em uma única passada.
+
+        Args:
+            df (pd.DataFrame): Dados com as dimensões como colunas categóricas.
+            dimensoes (list): Colunas categóricas usadas como dimensões.
+            medidas (list): Colunas numéricas agregadas em cada célula.
+            cuboides (list): Combinações de dimensões guardadas (None = todas as dimensões juntas).
+
+        Returns:
+            CuboMesclavel: O cubo dos dados.
+        """
+        cubo = cls({d: df[d].dtype for d in dimensoes}, medidas, cuboides)
+        valores = df[list(medidas)].to_numpy(dtype=np.float64, na_value=np.nan) if medidas else None
+        return cubo.atualizar({d: cls.codigos(df[d]) for d in dimensoes}, valores)
+
+    def recortar(self, filtros):
+        """
+        Cubo só com as linhas cujas dimensões filtradas estão nas categorias mantidas (as demais e os ausentes saem).
+
+        As dimensões filtradas continuam no cubo com todas as categorias (as removidas ficam com
+        contagem zero), então os recortes têm o mesmo formato dos de um cubo montado só com as
+        linhas mantidas. Só os cuboides que contêm todas as dimensões filtradas são mantidos.
+
+        Args:
+            filtros (dict): {dimensão: categorias mantidas}.
+
+        Returns:
+            CuboMesclavel: Novo cubo.
+        """
+        cuboides = [c for c in self.cuboides if set(filtros) <= set(c)]
+        if not cuboides:
+            raise ValueError(f"Nenhum cuboide contém as dimensões {list(filtros)}.")
+        recorte = CuboMesclavel(self.dimensoes, self.medidas, cuboides)
+        for cuboide in cuboides:
+            forma = self._forma(cuboide)
+            mascara = np.ones(forma, dtype=bool)
+            for eixo, d in enumerate(cuboide):
+                if d not in filtros:
+                    continue
+                categorias = self.dimensoes[d].categories
+                desconhecidas = set(filtros[d]) - set(categorias)
+                if desconhecidas:
+                    raise ValueError(f"Categorias desconhecidas em {d}: {sorted(map(str, desconhecidas))}.")
+                mantidas = np.zeros(forma[eixo], dtype=bool)
+                mantidas[categorias.get_indexer(list(filtros[d]))] = True
+                mascara &= mantidas.reshape([-1 if i == eixo else 1 for i in range(len(forma))])
+            for chave, valores in self.celulas[cuboide].items():
+                # Os momentos têm um último eixo com as medidas.
+                recorte.celulas[cuboide][chave] = np.where(mascara if valores.ndim == mascara.ndim else mascara[..., None],
+                                                           valores, 0)
+        return recorte
+
+    def cobre(self, dimensoes):
+        """Indica se algum cuboide contém todas as dimensões (e se elas podem ser recortadas do cubo)."""
+        return any(set(dimensoes) <= set(c) for c in self.cuboides)
+
+    def _origem(self, dimensoes):
+        """Menor cuboide que contém todas as dimensões pedidas."""
+        candidatos = [c for c in self.cuboides if set(dimensoes) <= set(c)]
+        if not candidatos:
+            raise ValueError(f"Nenhum cuboide contém as dimensões {list(dimensoes)}.")
+        return min(candidatos, key=lambda c: int(np.prod(self._forma(c))))
+
+    def _rolar(self, dimensoes, chave, filtros=None):
+        """
+        Soma as células de um cuboide sobre as dimensões que não foram pedidas.
+
+        Args:
+            dimensoes (list): Dimensões mantidas, na ordem dos eixos do resultado.
+            chave (str): 'n', 'n_medida', 'soma' ou 'soma_q'.
+            filtros (dict): {dimensão: categorias mantidas}. As linhas com ausentes nas dimensões
+                pedidas ou filtradas são ignoradas.
+
+        Returns:
+            np.ndarray: Um eixo por dimensão pedida (só as categorias, sem a posição dos ausentes)
+                e, para os momentos, um último eixo com as medidas.
+        """
+        filtros = filtros or {}
+        if any(d in filtros for d in dimensoes):
+            raise ValueError("Uma dimensão não pode ser pedida e filtrada ao mesmo tempo.")
+        origem = self._origem(list(dimensoes) + list(filtros))
+        valores = self.celulas[origem][chave]
+        for eixo, d in enumerate(origem):
+            categorias = self.dimensoes[d].categories
+            if d in filtros:
+                desconhecidas = set(filtros[d]) - set(categorias)
+                if desconhecidas:
+                    raise ValueError(f"Categorias desconhecidas em {d}: {sorted(map(str, desconhecidas))}.")
+                mantidas = categorias.get_indexer(list(filtros[d]))
+                valores = np.take(valores, np.sort(mantidas), axis=eixo)
+            elif d in dimensoes:
+                valores = np.take(valores, np.arange(len(categorias)), axis=eixo)
+        # Os eixos filtrados que não foram pedidos também são somados.
+        somados = tuple(i for i, d in enumerate(origem) if d not in dimensoes)
+        valores = valores.sum(axis=somados)
+        restantes = [d for d in origem if d in dimensoes]
+        ordem = [restantes.index(d) for d in dimensoes]
+        if valores.ndim > len(dimensoes):
+            ordem.append(len(dimensoes))
+        return np.transpose(valores, ordem)
+
+    def _indice(self, dimensoes):
+        """Índice com todas as combinações de categorias das dimensões (categórico, como no groupby)."""
+        niveis = [pd.CategoricalIndex(self.dimensoes[d].categories, dtype=self.dimensoes[d], name=d) for d in dimensoes]
+        if len(niveis) == 1:
+            return niveis[0]
+        return pd.MultiIndex.from_product(niveis)
+
+    def contagens(self, dimensoes, filtros=None, observadas=True):
+        """
+        Número de linhas por combinação das dimensões (como `df.groupby(dimensoes).size()`).
+
+        Args:
+            dimensoes (str | list): Dimensão(ões) do agrupamento.
+            filtros (dict): {dimensão: categorias mantidas}.
+            observadas (bool): Se True, omite as combinações sem nenhuma linha.
+
+        Returns:
+            pd.Series: Contagens indexadas pelas categorias.
+        """
+        dimensoes = [dimensoes] if isinstance(dimensoes, str) else list(dimensoes)
+        n = self._rolar(dimensoes, 'n', filtros)
+        serie = pd.Series(n.ravel(), index=self._indice(dimensoes), name='n')
+        return serie[serie > 0] if observadas else serie
+
+    def tabela(self, linhas, colunas, filtros=None):
+        """Tabela de contagens de duas dimensões, como `pd.crosstab(df[linhas], df[colunas])`."""
+        n = self.contagens([linhas, colunas], filtros, observadas=False).unstack()
+        # Como o crosstab, omite as linhas e colunas sem nenhuma contagem.
+        return n.loc[n.sum(axis=1) > 0, n.sum(axis=0) > 0]
+
+    def proporcoes(self, linhas, colunas, filtros=None, observadas=True):
+        """
+        Percentual de cada categoria de `colunas` dentro de cada categoria de `linhas`.
+
+        Equivale a `df.groupby(linhas, observed=observadas)[colunas].value_counts(normalize=True).unstack().fillna(0) * 100`.
+
+        Returns:
+            pd.DataFrame: Uma linha por categoria de `linhas` e uma coluna por categoria de `colunas`.
+        """
+        n = self.contagens([linhas, colunas], filtros, observadas=False).unstack()
+        total = n.sum(axis=1)
+        if observadas:
+            n, total = n[total > 0], total[total > 0]
+        proporcao = n.div(total.where(total > 0), axis=0).fillna(0) * 100
+        return proporcao
+
+    def medias(self, dimensoes, medidas=None, filtros=None, observadas=True):
+        """
+        Média das medidas por combinação das dimensões (como `df.groupby(dimensoes)[medidas].mean()`).
+
+        Returns:
+            pd.DataFrame: Uma linha por combinação e uma coluna por medida.
+        """
+        return self._momento(dimensoes, medidas, filtros, observadas, lambda n, soma, soma_q: soma / n)
+
+    def desvios(self, dimensoes, medidas=None, filtros=None, observadas=True):
+        """Desvios-padrão amostrais (ddof=1) das medidas por combinação das dimensões."""
+        def desvio(n, soma, soma_q):
+            variancia = (soma_q - soma ** 2 / n) / (n - 1)
+            # Erros de arredondamento podem gerar variâncias levemente negativas em grupos constantes.
+            return np.sqrt(np.clip(variancia, 0, None))
+        return self._momento(dimensoes, medidas, filtros, observadas, desvio)
+
+    def _momento(self, dimensoes, medidas, filtros, observadas, calcular):
+        dimensoes = [dimensoes] if isinstance(dimensoes, str) else list(dimensoes)
+        medidas = self.medidas if medidas is None else [medidas] if isinstance(medidas, str) else list(medidas)
+        posicoes = [self.medidas.index(m) for m in medidas]
+        n, soma, soma_q = (self._rolar(dimensoes, chave, filtros)[..., posicoes] for chave in ['n_medida', 'soma', 'soma_q'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = calcular(n.astype(np.float64), soma, soma_q)
+        resultado = pd.DataFrame(valores.reshape(-1, len(medidas)), index=self._indice(dimensoes), columns=medidas)
+        if observadas:
+            resultado = resultado[self._rolar(dimensoes, 'n', filtros).ravel() > 0]
+        return resultado
+
+    def salvar(self, caminho):
+        """Grava o cubo em um `.npz` compactado (as células e, em JSON, as dimensões)."""
+        meta = {
+            'dimensoes': {d: {'categorias': t.categories.tolist(), 'ordenada': bool(t.ordered)} for d, t in self.dimensoes.items()},
+            'medidas': self.medidas, 'cuboides': [list(c) for c in self.cuboides],
+        }
+        arrays = {f'{i}.{chave}': valores for i, cuboide in enumerate(self.cuboides)
+                  for chave, valores in self.celulas[cuboide].items()}
+        with open(caminho, 'wb') as f:
+            np.savez_compressed(f, meta=json.dumps(meta, ensure_ascii=False), **arrays)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê um cubo gravado por `salvar`."""
+        with np.load(caminho) as dados:
+            meta = json.loads(str(dados['meta']))
+            dimensoes = {d: pd.CategoricalDtype(t['categorias'], ordered=t['ordenada']) for d, t in meta['dimensoes'].items()}
+            cubo = cls(dimensoes, meta['medidas'], meta['cuboides'])
+            for i, cuboide in enumerate(cubo.cuboides):
+                for chave in cubo.celulas[cuboide]:
+                    cubo.celulas[cuboide][chave] = dados[f'{i}.{chave}']
+        return cubo
+
+
+def agregar_em_blocos(nome_arquivo, colunas, preparar, atualizar, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Percorre um arquivo de dados em blocos, prepara cada bloco e acumula os agregados.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        colunas (list): Colunas a ler.
+        preparar (callable): Recebe um bloco bruto e devolve o bloco filtrado e com as colunas derivadas.
+        atualizar (callable): Recebe o bloco preparado e atualiza os agregados.
+        tamanho_bloco (int): Número máximo de linhas lidas por vez.
+
+    Returns:
+        int: Total de linhas (após `preparar`) acumuladas.
+    """
+    total = 0
+    for i, bloco in enumerate(ler_em_blocos(nome_arquivo, colunas, tamanho_bloco), 1):
+        bloco = preparar(bloco)
+        atualizar(bloco)
+        total += len(bloco)
+        print(f"Bloco {i} processado ({total} registros válidos acumulados).")
+    return total
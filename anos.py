@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microdados de vários anos do ENEM: nomes dos arquivos por ano, ingestão incremental e
+agregados parciais por ano guardados em disco.
+
+Cada ano tem os seus arquivos na pasta DADOS, com o ano no nome (`RESULTADOS_2023.csv`,
+`PARTICIPANTES_2023.csv`, `ITENS_PROVA_2023.csv`, ...), e o cache colunar guarda um
+Parquet por arquivo. O armazenamento fica, portanto, particionado por ano: acrescentar um
+ano converte só os arquivos desse ano (`ingerir`), e os anos já convertidos não são relidos.
+
+Os temas aceitam um conjunto de anos (`main(anos=[2023, 2024])`) e geram os gráficos de
+cada ano em `graficos_<tema>/<ano>/`. Os agregados que atravessam os anos (ver
+`tendencias.py`) são montados a partir de agregados parciais de cada ano (`AgregadoGrupos`,
+`HistogramaMesclavel`), calculados uma vez e guardados em `DADOS/.cache/parciais`; a
+chave inclui a versão do CSV do ano e o código que calcula o agregado.
+
+Uso:
+    python anos.py                  # lista os anos disponíveis e converte só os que ainda não têm cache
+    python anos.py --anos 2023 2024
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import pickle
+import re
+
+from cache_colunar import CACHE_PATH, DADOS_PATH, cache_atualizado, gerar_cache, impressao_digital
+from rastreamento import contexto
+
+PARCIAIS_PATH = os.path.join(CACHE_PATH, 'parciais')
+
+# Ano dos nomes de arquivo usados pelos temas quando nenhum ano é informado.
+ANO_PADRAO = 2024
+# Prefixos dos arquivos de cada ano.
+PREFIXOS = ['RESULTADOS', 'PARTICIPANTES', 'ITENS_PROVA']
+_PADRAO_ANO = re.compile(r'_(\d{4})(\.csv)$', re.IGNORECASE)
+
+
+def arquivo_do_ano(nome_arquivo, ano=None):
+    """
+    Nome do arquivo de um ano a partir do nome de referência (ex: 'RESULTADOS_2024.csv' -> 'RESULTADOS_2023.csv').
+
+    Args:
+        nome_arquivo (str): Nome do CSV com um ano no final.
+        ano (int): Ano desejado. None mantém o nome de referência.
+    """
+    if ano is None:
+        return nome_arquivo
+    return _PADRAO_ANO.sub(rf'_{int(ano)}\2', nome_arquivo)
+
+
+def pasta_do_ano(pasta, ano=None):
+    """Pasta de saída de um ano (subpasta `<ano>`); None mantém a pasta de referência."""
+    return pasta if ano is None else os.path.join(pasta, str(int(ano)))
+
+
+def anos_disponiveis(prefixo='RESULTADOS'):
+    """
+    Anos com o arquivo `<prefixo>_<ano>.csv` na pasta DADOS.
+
+    Returns:
+        list: Anos em ordem crescente.
+    """
+    if not os.path.isdir(DADOS_PATH):
+        return []
+    anos = []
+    for nome in os.listdir(DADOS_PATH):
+        encontrado = _PADRAO_ANO.search(nome)
+        if encontrado and nome[:encontrado.start()] == prefixo:
+            anos.append(int(encontrado.group(1)))
+    return sorted(anos)
+
+
+def executar_anos(main, anos, **opcoes):
+    """
+    Executa a função `main` de um tema uma vez para cada ano (`main(anos=[ano], **opcoes)`).
+
+    Args:
+        main (callable): Função `main` do tema.
+        anos (list): Anos a executar.
+        **opcoes: Demais argumentos de `main` (interativo, processos, forcar...).
+    """
+    for ano in anos:
+        print(f"\n{'='*20} ANO {ano} {'='*20}")
+        with contexto(ano=ano):
+            main(anos=[ano], **opcoes)
+
+
+def ingerir(anos=None, prefixos=PREFIXOS):
+    """
+    Converte para o cache colunar os arquivos dos anos pedidos que ainda não têm cache atualizado.
+
+    Args:
+        anos (list): Anos a ingerir (None = todos os anos com RESULTADOS na pasta DADOS).
+        prefixos (list): Arquivos de cada ano.
+
+    Returns:
+        list: Nomes dos arquivos convertidos nesta chamada (os já atualizados não são relidos).
+    """
+    anos = anos_disponiveis() if anos is None else anos
+    convertidos = []
+    for ano in anos:
+        for prefixo in prefixos:
+            nome_arquivo = f'{prefixo}_{ano}.csv'
+            if not os.path.isfile(os.path.join(DADOS_PATH, nome_arquivo)) or cache_atualizado(nome_arquivo):
+                continue
+            gerar_cache(nome_arquivo)
+            convertidos.append(nome_arquivo)
+    return convertidos
+
+
+def versao_codigo(*modulos):
+    """Hash do código-fonte dos módulos (muda quando o cálculo de um agregado muda)."""
+    h = hashlib.sha256()
+    for modulo in modulos:
+        with open(modulo.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def assinatura_parcial(nome, nome_arquivo, versao=''):
+    """Hash do nome do agregado, da versão do código e da versão do CSV do ano (chave do agregado parcial)."""
+    conteudo = {'nome': nome, 'versao': versao, 'origem': impressao_digital(os.path.join(DADOS_PATH, nome_arquivo))}
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def parcial_do_ano(nome, calcular, nome_arquivo, ano, versao=''):
+    """
+    Agregado parcial de um ano, calculado só se não estiver no cache.
+
+    Args:
+        nome (str): Nome do agregado (ex: 'instucional').
+        calcular (callable): Recebe o ano e devolve o agregado (objetos com `combinar`, ou dicts deles).
+        nome_arquivo (str): Arquivo de referência lido pelo agregado (o ano é aplicado com `arquivo_do_ano`).
+        ano (int): Ano do agregado.
+        versao (str): Versão do código que calcula o agregado (ver `versao_codigo`).
+
+    Returns:
+        object: O agregado do ano.
+    """
+    arquivo = arquivo_do_ano(nome_arquivo, ano)
+    base = f'{os.path.splitext(arquivo)[0]}.{nome}.'
+    caminho = os.path.join(PARCIAIS_PATH, f'{base}{assinatura_parcial(nome, arquivo, versao)}.pkl')
+    if os.path.isfile(caminho):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+    parcial = calcular(ano)
+    os.makedirs(PARCIAIS_PATH, exist_ok=True)
+    # Grava em um arquivo temporário e só depois renomeia, para nunca deixar um agregado pela metade.
+    caminho_tmp = caminho + '.tmp'
+    with open(caminho_tmp, 'wb') as f:
+        pickle.dump(parcial, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Remove os agregados de versões anteriores do mesmo ano.
+    for antigo in os.listdir(PARCIAIS_PATH):
+        if antigo.startswith(base) and antigo.endswith('.pkl'):
+            os.remove(os.path.join(PARCIAIS_PATH, antigo))
+    os.replace(caminho_tmp, caminho)
+    return parcial
+
+
+def parciais_por_ano(nome, calcular, nome_arquivo, anos, versao=''):
+    """
+    Agregados parciais de vários anos; só os anos sem agregado guardado são calculados.
+
+    Returns:
+        dict: {ano: agregado}, na ordem de `anos`.
+    """
+    return {ano: parcial_do_ano(nome, calcular, nome_arquivo, ano, versao) for ano in anos}
+
+
+def combinar_anos(parciais):
+    """
+    Mescla os agregados de vários anos em um único agregado do período.
+
+    Args:
+        parciais (dict): {ano: agregado}; o agregado é um objeto com `combinar` ou um dict (aninhado) deles.
+
+    Returns:
+        object: Agregado do período (os parciais de cada ano não são alterados).
+    """
+    total = None
+    for parcial in parciais.values():
+        total = copy.deepcopy(parcial) if total is None else _combinar(total, parcial)
+    return total
+
+
+def _combinar(total, parcial):
+    if isinstance(total, dict):
+        for chave, valor in parcial.items():
+            total[chave] = _combinar(total[chave], valor) if chave in total else copy.deepcopy(valor)
+        return total
+    return total.combinar(parcial)
+
+
+def main():
+    """Lista os anos disponíveis e converte para o cache colunar só os arquivos ainda não convertidos."""
+    parser = argparse.ArgumentParser(description='Ingestão incremental dos microdados de vários anos.')
+    parser.add_argument('--anos', nargs='+', type=int, default=None, help='anos a ingerir (padrão: todos em DADOS)')
+    args = parser.parse_args()
+
+    anos = anos_disponiveis() if args.anos is None else args.anos
+    if not anos:
+        print(f"Nenhum arquivo RESULTADOS_<ano>.csv encontrado na pasta '{DADOS_PATH}'.")
+        return
+    print(f"Anos disponíveis: {', '.join(map(str, anos))}")
+    convertidos = ingerir(anos)
+    if convertidos:
+        print(f"{len(convertidos)} arquivos convertidos: {', '.join(convertidos)}")
+    else:
+        print("Todos os anos já estão no cache colunar; nada a converter.")
+
+
+if __name__ == "__main__":
+    main()
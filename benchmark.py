@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark das etapas de cada tema sobre microdados sintéticos de tamanhos configuráveis.
+
+Para cada tamanho, o script gera RESULTADOS e PARTICIPANTES sintéticos com
+`dados_sinteticos.py` (uma vez; os arquivos são reaproveitados nas próximas execuções)
+e mede, cada uma em um processo novo:
+
+- a conversão de cada CSV para o cache colunar (leitura do CSV);
+- para cada tema: carregamento das colunas, filtro compartilhado, preparação
+  (`preparar`), agregação (`montar_graficos`) e a renderização de cada gráfico.
+
+Cada etapa registra o tempo e o pico de memória residente do processo até o seu fim
+(o processo é novo por tema, então o pico de um tema não contamina os outros). O
+resultado vai para um JSON, que pode ser comparado com uma execução anterior para
+detectar regressões.
+
+Uso:
+    python benchmark.py                                  # 100 mil, 1 e 5 milhões de linhas
+    python benchmark.py --linhas 100000 --temas academico desempenho
+    python benchmark.py --linhas 1000000 --comparar-com benchmarks/anterior.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Tamanhos padrão (número de participantes) dos dados sintéticos.
+TAMANHOS_PADRAO = [100_000, 1_000_000, 5_000_000]
+# Pasta onde os dados sintéticos de cada tamanho são gerados e reaproveitados.
+PASTA_DADOS = 'dados_benchmark'
+# Pasta padrão dos resultados em JSON.
+PASTA_RESULTADOS = 'benchmarks'
+# Aumento relativo de tempo a partir do qual uma etapa é considerada regressão.
+TOLERANCIA = 0.20
+# Etapas com menos tempo que isso (em segundos) não são comparadas (ruído de medição).
+TEMPO_MINIMO_COMPARACAO = 0.05
+
+ARQUIVOS = ['RESULTADOS_2024.csv', 'PARTICIPANTES_2024.csv']
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def rss_atual_mb():
+    """Memória residente atual do processo, em MB (None fora do Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+    except OSError:
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class Cronometro:
+    """Mede etapas em sequência: tempo de cada uma, memória residente e pico de memória ao final."""
+
+    def __init__(self):
+        self.etapas = {}
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        from executar_temas import pico_memoria_mb
+
+        inicio = time.perf_counter()
+        yield
+        rss = rss_atual_mb()
+        self.etapas[nome] = {
+            'tempo_s': round(time.perf_counter() - inicio, 4),
+            'rss_mb': round(rss, 1) if rss is not None else None,
+            'pico_rss_mb': round(pico_memoria_mb(), 1),
+        }
+
+
+def medir_conversao(nome_arquivo):
+    """Mede a conversão de um CSV para o cache colunar (executado dentro da pasta dos dados)."""
+    from cache_colunar import gerar_cache
+
+    cronometro = Cronometro()
+    with cronometro.etapa('ler_csv'), contextlib.redirect_stdout(io.StringIO()):
+        gerar_cache(nome_arquivo)
+    return cronometro.etapas['ler_csv']
+
+
+def medir_tema(nome_tema):
+    """
+    Mede as etapas de um tema (executado dentro da pasta dos dados, com o cache colunar pronto).
+
+    Returns:
+        dict: {'registros', 'etapas': {etapa: medição}, 'graficos': {arquivo: tempo em s}, 'pico_rss_mb'}.
+    """
+    from cache_colunar import carregar_colunas, colunas_disponiveis
+    from executar_temas import LIMPEZA_COMPARTILHADA, TEMAS, pico_memoria_mb
+    from limpeza import FILTROS, mascara_filtro
+    from renderizacao import renderizar_graficos
+
+    modulo = TEMAS[nome_tema]
+    cronometro = Cronometro()
+    # As mensagens dos temas não interessam aqui; só a medição é impressa.
+    with contextlib.redirect_stdout(io.StringIO()):
+        with cronometro.etapa('carregar'):
+            disponiveis = colunas_disponiveis(modulo.ARQUIVO)
+            df = carregar_colunas(modulo.ARQUIVO, [c for c in modulo.COLUNAS if c in disponiveis])
+        registros = len(df)
+        filtro = LIMPEZA_COMPARTILHADA.get(modulo.ARQUIVO)
+        if filtro is not None:
+            # O filtro é avaliado em memória (sem o cache de filtros), para medir sempre o mesmo trabalho.
+            with cronometro.etapa('filtrar'):
+                df = df.loc[mascara_filtro(df, FILTROS[filtro])]
+        with cronometro.etapa('preparar'):
+            df = modulo.preparar(df)
+        with cronometro.etapa('agregar'):
+            graficos = modulo.montar_graficos(df)
+        del df
+        with cronometro.etapa('renderizar'):
+            # Em sequência, para que o tempo de cada gráfico não dependa dos outros.
+            tempos = renderizar_graficos(graficos, f'graficos_{nome_tema}', modulo.ESTILO, processos=1, forcar=True)
+    return {
+        'registros': registros,
+        'etapas': cronometro.etapas,
+        'graficos': {arquivo: round(tempo, 4) for arquivo, tempo in tempos.items()},
+        'pico_rss_mb': round(pico_memoria_mb(), 1),
+    }
+
+
+def preparar_dados(linhas, semente=42):
+    """
+    Gera (ou reaproveita) os dados sintéticos de um tamanho.
+
+    Returns:
+        str: Pasta de trabalho com a subpasta DADOS.
+    """
+    from dados_sinteticos import gerar_arquivos
+
+    destino = os.path.abspath(os.path.join(PASTA_DADOS, f'{linhas}_linhas'))
+    marcador = os.path.join(destino, 'DADOS', 'sintetico.json')
+    descricao = {'linhas': linhas, 'semente': semente}
+    if os.path.isfile(marcador):
+        with open(marcador, encoding='utf-8') as f:
+            if json.load(f) == descricao:
+                print(f"Reaproveitando dados sintéticos em '{destino}'.")
+                return destino
+    print(f"Gerando {linhas} linhas sintéticas em '{destino}'...")
+    gerar_arquivos(destino, linhas, semente, itens_file=os.path.join(RAIZ, 'DADOS', 'ITENS_PROVA_2024.csv'))
+    with open(marcador, 'w', encoding='utf-8') as f:
+        json.dump(descricao, f)
+    return destino
+
+
+def _subprocesso(pasta, argumentos):
+    """Executa `benchmark.py` com os argumentos em um processo novo, dentro da pasta dos dados."""
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get('PYTHONPATH')])))
+    resultado = subprocess.run([sys.executable, os.path.abspath(__file__), *argumentos],
+                               cwd=pasta, env=ambiente, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha em {' '.join(argumentos)}:\n{resultado.stderr}")
+    # A medição é a última linha da saída.
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def executar(tamanhos, nomes_temas, semente=42):
+    """
+    Executa o benchmark completo.
+
+    Returns:
+        dict: Ambiente da medição e, para cada tamanho, a conversão dos CSVs e as etapas de cada tema.
+    """
+    import numpy as np
+    import pandas as pd
+
+    resultado = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ambiente': {
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'plataforma': platform.platform(), 'nucleos': os.cpu_count(),
+        },
+        'tamanhos': {},
+    }
+    for linhas in tamanhos:
+        pasta = preparar_dados(linhas, semente)
+        medicao = {'conversao': {}, 'temas': {}}
+        for nome_arquivo in ARQUIVOS:
+            medicao['conversao'][nome_arquivo] = _subprocesso(pasta, ['--medir-conversao', nome_arquivo])
+            print(f"[{linhas}] Conversão de {nome_arquivo}: {medicao['conversao'][nome_arquivo]['tempo_s']:.2f} s")
+        for nome in nomes_temas:
+            tema = _subprocesso(pasta, ['--medir-tema', nome])
+            medicao['temas'][nome] = tema
+            resumo = ', '.join(f"{etapa} {m['tempo_s']:.2f} s" for etapa, m in tema['etapas'].items())
+            print(f"[{linhas}] {nome}: {resumo} | pico {tema['pico_rss_mb']:.0f} MB")
+        resultado['tamanhos'][str(linhas)] = medicao
+    return resultado
+
+
+def _tempos(resultado):
+    """Achata um resultado em {(tamanho, origem, etapa): tempo em s}."""
+    tempos = {}
+    for linhas, medicao in resultado['tamanhos'].items():
+        for nome_arquivo, m in medicao['conversao'].items():
+            tempos[(linhas, nome_arquivo, 'ler_csv')] = m['tempo_s']
+        for nome, tema in medicao['temas'].items():
+            for etapa, m in tema['etapas'].items():
+                tempos[(linhas, nome, etapa)] = m['tempo_s']
+            for arquivo, tempo in tema['graficos'].items():
+                tempos[(linhas, nome, arquivo)] = tempo
+    return tempos
+
+
+def comparar(atual, anterior, tolerancia=TOLERANCIA):
+    """
+    Compara dois resultados e lista as etapas que ficaram mais lentas que a tolerância.
+
+    Returns:
+        list: [(tamanho, origem, etapa, tempo anterior, tempo atual)] das regressões.
+    """
+    tempos_atual, tempos_anterior = _tempos(atual), _tempos(anterior)
+    regressoes = []
+    for chave, tempo in tempos_atual.items():
+        antes = tempos_anterior.get(chave)
+        if antes is None or max(antes, tempo) < TEMPO_MINIMO_COMPARACAO:
+            continue
+        if tempo > antes * (1 + tolerancia):
+            regressoes.append((*chave, antes, tempo))
+    return regressoes
+
+
+def main():
+    """Interpreta os argumentos, executa o benchmark e grava o JSON."""
+    parser = argparse.ArgumentParser(description='Benchmark das etapas dos temas sobre dados sintéticos.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help='tamanhos dos dados sintéticos (padrão: 100000 1000000 5000000)')
+    parser.add_argument('--temas', nargs='+', default=None, help='temas a medir (padrão: todos)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=None, help='arquivo JSON de saída (padrão: benchmarks/benchmark_<data>.json)')
+    parser.add_argument('--comparar-com', default=None, help='JSON de uma execução anterior para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'aumento relativo de tempo considerado regressão (padrão: {TOLERANCIA})')
+    # Uso interno: cada medição roda em um processo novo.
+    parser.add_argument('--medir-conversao', help=argparse.SUPPRESS)
+    parser.add_argument('--medir-tema', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_conversao:
+        print(json.dumps(medir_conversao(args.medir_conversao)))
+        return
+    if args.medir_tema:
+        import matplotlib
+        matplotlib.use('Agg')
+        print(json.dumps(medir_tema(args.medir_tema)))
+        return
+
+    from executar_temas import TEMAS
+    nomes_temas = args.temas or list(TEMAS)
+    invalidos = [t for t in nomes_temas if t not in TEMAS]
+    if invalidos:
+        parser.error(f"temas desconhecidos: {', '.join(invalidos)}")
+
+    resultado = executar(args.linhas, nomes_temas, args.semente)
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em '{saida}'.")
+
+    if args.comparar_com:
+        with open(args.comparar_com, encoding='utf-8') as f:
+            anterior = json.load(f)
+        regressoes = comparar(resultado, anterior, args.tolerancia)
+        if not regressoes:
+            print(f"Nenhuma etapa ficou mais de {args.tolerancia:.0%} mais lenta que em '{args.comparar_com}'.")
+            return
+        print(f"\n⚠️  {len(regressoes)} etapa(s) mais de {args.tolerancia:.0%} mais lenta(s):")
+        print(f"{'Linhas':>10}  {'Origem':<24}{'Etapa':<44}{'Antes (s)':>10}{'Agora (s)':>10}")
+        for linhas, origem, etapa, antes, agora in regressoes:
+            print(f"{linhas:>10}  {origem:<24}{etapa:<44}{antes:>10.2f}{agora:>10.2f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache colunar compartilhado para os microdados do ENEM.
+
+Converte uma única vez cada CSV da pasta `DADOS` (latin1, separado por ';') para um
+arquivo Parquet com colunas tipadas (flags de presença/status em int8, notas em
+float32, UF e respostas do questionário como categorias; ver `esquema.py`). Todos os
+temas leem apenas as colunas de que precisam a partir desse cache, em vez de
+reprocessar o CSV. A leitura do CSV usa o leitor multithread do pyarrow, com o
+pandas como alternativa (ver `ingestao.py`).
+
+O cache é identificado pelo tamanho e pela data de modificação do CSV de origem e pela
+versão do formato (`VERSAO_FORMATO`): se o CSV ou a conversão mudarem, o cache é
+regenerado automaticamente na próxima leitura.
+
+Uso:
+    python cache_colunar.py            # converte todos os CSVs da pasta DADOS
+    python cache_colunar.py --forcar   # regenera mesmo que o cache esteja atualizado
+    python cache_colunar.py --motor pandas
+"""
+
+import argparse
+import json
+import os
+
+from esquema import tipo_coluna
+from ingestao import ler_cabecalho, ler_csv_em_blocos, ler_csv_pandas
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Sem pyarrow não há Parquet: os temas voltam a ler o CSV diretamente.
+    pa = None
+    pq = None
+
+# --- Configuração dos Caminhos ---
+DADOS_PATH = 'DADOS'
+CACHE_PATH = os.path.join(DADOS_PATH, '.cache')
+
+# Quantidade de linhas lidas do CSV por vez durante a conversão (mantém a memória limitada).
+TAMANHO_BLOCO = 1_000_000
+# Aumentar quando a conversão mudar (tipos de `esquema.tipo_coluna`, `esquema.CODIGO_AUSENTE`...), para
+# invalidar os Parquets antigos e, pela impressão digital, os caches derivados deles.
+VERSAO_FORMATO = 2
+
+
+def caminho_cache(nome_arquivo):
+    """Caminho do arquivo Parquet correspondente a um CSV da pasta DADOS."""
+    base = os.path.splitext(nome_arquivo)[0]
+    return os.path.join(CACHE_PATH, f'{base}.parquet')
+
+
+def impressao_digital(caminho_csv):
+    """
+    Identifica a versão de um CSV pelo tamanho, pela data de modificação e pelo formato do cache.
+
+    Os caches derivados do Parquet (filtros, colunas mapeadas, partições, cubos...) guardam essa
+    impressão digital, então também são invalidados quando `VERSAO_FORMATO` muda.
+
+    Args:
+        caminho_csv (str): Caminho completo do arquivo CSV.
+
+    Returns:
+        dict: {'tamanho': bytes, 'mtime_ns': data de modificação em nanossegundos, 'formato': VERSAO_FORMATO}.
+    """
+    info = os.stat(caminho_csv)
+    return {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'formato': VERSAO_FORMATO}
+
+
+def _ler_metadados(caminho_parquet):
+    caminho_meta = caminho_parquet + '.json'
+    if not os.path.isfile(caminho_meta):
+        return None
+    with open(caminho_meta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cache_atualizado(nome_arquivo):
+    """Indica se o cache Parquet existe e corresponde à versão atual do CSV e do formato."""
+    caminho_csv = os.path.join(DADOS_PATH, nome_arquivo)
+    caminho_parquet = caminho_cache(nome_arquivo)
+    if not os.path.isfile(caminho_parquet):
+        return False
+    meta = _ler_metadados(caminho_parquet)
+    return meta is not None and meta.get('origem') == impressao_digital(caminho_csv)
+
+
+def gerar_cache(nome_arquivo, tamanho_bloco=TAMANHO_BLOCO, motor=None):
+    """
+    Converte um CSV da pasta DADOS para o cache colunar tipado.
+
+    A leitura é feita em blocos e cada bloco vira um row group do Parquet, então a
+    memória usada na conversão fica limitada ao tamanho do bloco.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS (ex: 'RESULTADOS_2024.csv').
+        tamanho_bloco (int): Número de linhas lidas do CSV por vez.
+        motor (str): Leitor do CSV, 'pyarrow' (multithread) ou 'pandas' (ver `ingestao.py`).
+            None usa o pyarrow e volta para o pandas se algum valor não puder ser convertido.
+
+    Returns:
+        str: Caminho do arquivo Parquet gerado.
+    """
+    if pq is None:
+        raise RuntimeError("O cache colunar requer o pacote 'pyarrow' (pip install pyarrow).")
+
+    caminho_csv = os.path.join(DADOS_PATH, nome_arquivo)
+    caminho_parquet = caminho_cache(nome_arquivo)
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    print(f"Convertendo '{caminho_csv}' para cache colunar...")
+
+    # Escreve em um arquivo temporário e só substitui o cache no final, para nunca deixar um cache pela metade.
+    caminho_tmp = caminho_parquet + '.tmp'
+    try:
+        total = _gravar_parquet(caminho_csv, caminho_tmp, tamanho_bloco, motor or 'pyarrow')
+    except pa.ArrowInvalid as erro:
+        if motor is not None:
+            raise
+        # O pyarrow não aceita valores fora do tipo esperado; o pandas os converte em ausentes.
+        print(f"AVISO: leitura com pyarrow falhou ({erro}); convertendo com o pandas.")
+        total = _gravar_parquet(caminho_csv, caminho_tmp, tamanho_bloco, 'pandas')
+
+    os.replace(caminho_tmp, caminho_parquet)
+    with open(caminho_parquet + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'origem': impressao_digital(caminho_csv), 'registros': total}, f)
+    print(f"Cache gerado: {caminho_parquet} ({total} registros).")
+    return caminho_parquet
+
+
+def _gravar_parquet(caminho_csv, caminho_parquet, tamanho_bloco, motor):
+    """Grava os blocos do CSV como row groups de um Parquet e devolve o número de registros."""
+    escritor = None
+    total = 0
+    try:
+        for tabela in ler_csv_em_blocos(caminho_csv, tamanho_bloco=tamanho_bloco, motor=motor):
+            if escritor is None:
+                # Colunas categóricas são gravadas com codificação em dicionário.
+                colunas_dict = [c for c in tabela.column_names if tipo_coluna(c) == 'category']
+                escritor = pq.ParquetWriter(caminho_parquet, tabela.schema, use_dictionary=colunas_dict or True)
+            escritor.write_table(tabela.cast(escritor.schema))
+            total += len(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        raise RuntimeError(f"Arquivo '{caminho_csv}' não possui registros.")
+    return total
+
+
+def colunas_disponiveis(nome_arquivo):
+    """
+    Lista as colunas existentes em um arquivo de dados sem carregá-lo.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+
+    Returns:
+        list: Nomes das colunas (sem aspas).
+    """
+    if pq is not None and cache_atualizado(nome_arquivo):
+        return pq.read_schema(caminho_cache(nome_arquivo)).names
+    return ler_cabecalho(os.path.join(DADOS_PATH, nome_arquivo))
+
+
+def contar_registros(nome_arquivo):
+    """
+    Conta os registros de um arquivo de dados sem carregar as colunas.
+
+    Com pyarrow, lê o número de linhas dos metadados do cache; sem ele, conta as linhas do CSV.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+
+    Returns:
+        int: Número de registros (linhas de dados, sem o cabeçalho).
+    """
+    if pq is not None:
+        if not cache_atualizado(nome_arquivo):
+            gerar_cache(nome_arquivo)
+        return pq.ParquetFile(caminho_cache(nome_arquivo)).metadata.num_rows
+    with open(os.path.join(DADOS_PATH, nome_arquivo), 'rb') as f:
+        return sum(bloco.count(b'\n') for bloco in iter(lambda: f.read(1 << 20), b'')) - 1
+
+
+def carregar_colunas(nome_arquivo, colunas=None):
+    """
+    Carrega um arquivo de dados do ENEM lendo apenas as colunas pedidas.
+
+    Usa o cache colunar (gerando-o na primeira vez ou quando o CSV mudou). Se o
+    pyarrow não estiver instalado, lê o CSV diretamente com os mesmos tipos.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS (ex: 'PARTICIPANTES_2024.csv').
+        colunas (list): Colunas a carregar. None carrega todas.
+
+    Returns:
+        pd.DataFrame: Dados com os tipos compactos do cache.
+    """
+    caminho_csv = os.path.join(DADOS_PATH, nome_arquivo)
+    if not os.path.isfile(caminho_csv):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho_csv}")
+
+    if pq is None:
+        print("AVISO: pyarrow não instalado; lendo o CSV sem cache colunar.")
+        return ler_csv_pandas(caminho_csv, colunas)
+
+    if not cache_atualizado(nome_arquivo):
+        gerar_cache(nome_arquivo)
+    caminho_parquet = caminho_cache(nome_arquivo)
+    if colunas is None:
+        colunas = pq.read_schema(caminho_parquet).names
+    # As colunas categóricas são lidas direto do dicionário do Parquet, sem materializar textos.
+    categoricas = [c for c in colunas if tipo_coluna(c) == 'category']
+    tabela = pq.read_table(caminho_parquet, columns=list(colunas), read_dictionary=categoricas)
+    return tabela.to_pandas()
+
+
+def ler_em_blocos(nome_arquivo, colunas=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê um arquivo de dados do ENEM em blocos, sem carregar a tabela inteira na memória.
+
+    Com pyarrow, percorre o cache colunar em lotes; sem ele, lê o CSV com `chunksize`.
+    Os blocos têm os mesmos tipos compactos de `carregar_colunas`.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        colunas (list): Colunas a carregar. None carrega todas.
+        tamanho_bloco (int): Número máximo de linhas por bloco.
+
+    Yields:
+        pd.DataFrame: Um bloco de linhas do arquivo.
+    """
+    caminho_csv = os.path.join(DADOS_PATH, nome_arquivo)
+    if not os.path.isfile(caminho_csv):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho_csv}")
+
+    if pq is None:
+        yield from ler_csv_pandas(caminho_csv, colunas, tamanho_bloco)
+        return
+
+    if not cache_atualizado(nome_arquivo):
+        gerar_cache(nome_arquivo)
+    caminho_parquet = caminho_cache(nome_arquivo)
+    if colunas is None:
+        colunas = pq.read_schema(caminho_parquet).names
+    categoricas = [c for c in colunas if tipo_coluna(c) == 'category']
+    arquivo = pq.ParquetFile(caminho_parquet, read_dictionary=categoricas)
+    for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=list(colunas)):
+        yield lote.to_pandas()
+
+
+def main():
+    """Converte todos os CSVs da pasta DADOS para o cache colunar."""
+    parser = argparse.ArgumentParser(description='Gera o cache colunar dos microdados do ENEM.')
+    parser.add_argument('--forcar', action='store_true', help='regenera o cache mesmo se estiver atualizado')
+    parser.add_argument('--motor', choices=['pyarrow', 'pandas'], default=None,
+                        help='leitor do CSV (padrão: pyarrow, com o pandas se a leitura falhar)')
+    args = parser.parse_args()
+
+    arquivos = sorted(f for f in os.listdir(DADOS_PATH) if f.lower().endswith('.csv'))
+    if not arquivos:
+        print(f"Nenhum CSV encontrado na pasta '{DADOS_PATH}'.")
+        return
+    for nome_arquivo in arquivos:
+        if not args.forcar and cache_atualizado(nome_arquivo):
+            print(f"Cache de '{nome_arquivo}' já está atualizado.")
+            continue
+        gerar_cache(nome_arquivo, motor=args.motor)
+
+
+if __name__ == "__main__":
+    main()
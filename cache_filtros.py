@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em disco dos filtros nomeados de `limpeza.FILTROS`.
+
+Cada filtro é avaliado uma única vez sobre o arquivo inteiro (lido em blocos) e o
+resultado é guardado como um bitmap de linhas (`np.packbits`, 1 bit por registro)
+em `DADOS/.cache/filtros`. A chave do bitmap é o hash da definição do filtro junto
+com a impressão digital do CSV de origem: se o CSV ou o filtro mudarem, a chave muda
+e o filtro é recalculado. Todos os temas e todas as execuções seguintes reutilizam
+o mesmo bitmap, e só as colunas de que o tema precisa são carregadas.
+
+O diretório tem tamanho limitado: quando passa de `LIMITE_CACHE_MB`, os bitmaps usados
+há mais tempo (LRU, pela data de modificação, atualizada a cada uso) são removidos.
+
+Uso:
+    python cache_filtros.py            # materializa os filtros dos arquivos de todos os anos em DADOS
+    python cache_filtros.py --anos 2023
+    python cache_filtros.py --limpar   # remove todos os bitmaps guardados
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from anos import anos_disponiveis, arquivo_do_ano
+from cache_colunar import (CACHE_PATH, DADOS_PATH, TAMANHO_BLOCO, carregar_colunas, colunas_disponiveis,
+                           impressao_digital, ler_em_blocos)
+from limpeza import FILTROS, colunas_filtro, mascara_filtro
+
+FILTROS_PATH = os.path.join(CACHE_PATH, 'filtros')
+
+# Tamanho máximo do diretório de bitmaps, em MB.
+LIMITE_CACHE_MB = 256
+
+# Arquivos aos quais cada filtro nomeado se aplica (usados pela linha de comando), com o ano de referência;
+# a linha de comando usa os arquivos equivalentes de cada ano (`anos.arquivo_do_ano`).
+ARQUIVOS_FILTROS = {
+    'presentes': ['RESULTADOS_2024.csv'],
+}
+
+
+def assinatura_filtro(nome_arquivo, nome_filtro):
+    """
+    Calcula a chave do bitmap de um filtro: hash da definição do filtro e da versão do CSV.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        nome_filtro (str): Nome do filtro em `limpeza.FILTROS`.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal (os primeiros 32 caracteres).
+    """
+    conteudo = {
+        'arquivo': nome_arquivo,
+        'filtro': FILTROS[nome_filtro],
+        'origem': impressao_digital(os.path.join(DADOS_PATH, nome_arquivo)),
+    }
+    texto = json.dumps(conteudo, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_bitmap(nome_arquivo, nome_filtro):
+    """Caminho do bitmap de um filtro (o nome inclui a assinatura)."""
+    base = os.path.splitext(nome_arquivo)[0]
+    return os.path.join(FILTROS_PATH, f'{base}.{nome_filtro}.{assinatura_filtro(nome_arquivo, nome_filtro)}.npz')
+
+
+def _calcular_mascara(nome_arquivo, filtro, tamanho_bloco=TAMANHO_BLOCO):
+    """Avalia o filtro sobre o arquivo inteiro, lendo em blocos apenas as colunas do filtro."""
+    disponiveis = colunas_disponiveis(nome_arquivo)
+    colunas = [c for c in colunas_filtro(filtro) if c in disponiveis]
+    partes = [mascara_filtro(bloco, filtro) for bloco in ler_em_blocos(nome_arquivo, colunas, tamanho_bloco)]
+    return np.concatenate(partes) if partes else np.zeros(0, dtype=bool)
+
+
+def limitar_cache(limite_mb=LIMITE_CACHE_MB, manter=None):
+    """
+    Remove os bitmaps usados há mais tempo até o diretório caber no limite.
+
+    Args:
+        limite_mb (float): Tamanho máximo do diretório, em MB.
+        manter (str): Caminho de um bitmap que nunca é removido (o que acabou de ser usado).
+
+    Returns:
+        int: Número de bitmaps removidos.
+    """
+    if not os.path.isdir(FILTROS_PATH):
+        return 0
+    arquivos = []
+    for nome in os.listdir(FILTROS_PATH):
+        caminho = os.path.join(FILTROS_PATH, nome)
+        if nome.endswith('.npz') and os.path.isfile(caminho):
+            info = os.stat(caminho)
+            arquivos.append((info.st_mtime_ns, info.st_size, caminho))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    limite = limite_mb * 1024 * 1024
+    removidos = 0
+    # Do menos para o mais recentemente usado.
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        if caminho == manter:
+            continue
+        os.remove(caminho)
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+
+def mascara(nome_arquivo, nome_filtro, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Retorna a máscara de linhas de um filtro nomeado, calculando-a só se não estiver no cache.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        nome_filtro (str): Nome do filtro em `limpeza.FILTROS`.
+        tamanho_bloco (int): Linhas lidas por vez quando o filtro precisa ser calculado.
+
+    Returns:
+        np.ndarray: Máscara booleana alinhada às linhas do arquivo (mesma ordem de `carregar_colunas`).
+    """
+    caminho = caminho_bitmap(nome_arquivo, nome_filtro)
+    if os.path.isfile(caminho):
+        with np.load(caminho) as dados:
+            mask = np.unpackbits(dados['bits'], count=int(dados['registros'])).astype(bool)
+        # Marca o bitmap como usado agora (ordem da remoção LRU).
+        os.utime(caminho)
+        return mask
+
+    print(f"Calculando o filtro '{nome_filtro}' de '{nome_arquivo}'...")
+    mask = _calcular_mascara(nome_arquivo, FILTROS[nome_filtro], tamanho_bloco)
+    os.makedirs(FILTROS_PATH, exist_ok=True)
+    # Grava em um arquivo temporário e só depois renomeia, para nunca deixar um bitmap pela metade.
+    caminho_tmp = caminho + '.tmp'
+    with open(caminho_tmp, 'wb') as f:
+        np.savez(f, bits=np.packbits(mask), registros=len(mask))
+    os.replace(caminho_tmp, caminho)
+    print(f"Filtro '{nome_filtro}' guardado: {int(mask.sum())} de {len(mask)} registros selecionados.")
+    limitar_cache(manter=caminho)
+    return mask
+
+
+def carregar_filtrado(nome_arquivo, colunas, nome_filtro):
+    """
+    Carrega as colunas pedidas apenas para as linhas selecionadas por um filtro nomeado.
+
+    O resultado é o mesmo de aplicar o filtro ao DataFrame completo (o índice guarda a
+    posição original das linhas), mas as colunas usadas só pelo filtro não são carregadas.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        colunas (list): Colunas a carregar.
+        nome_filtro (str): Nome do filtro em `limpeza.FILTROS` (ex: 'presentes').
+
+    Returns:
+        pd.DataFrame: Linhas selecionadas, com os tipos compactos do cache colunar.
+    """
+    mask = mascara(nome_arquivo, nome_filtro)
+    df = carregar_colunas(nome_arquivo, colunas)
+    if len(mask) != len(df):
+        raise RuntimeError(f"Bitmap do filtro '{nome_filtro}' não corresponde a '{nome_arquivo}'; "
+                           f"remova '{FILTROS_PATH}' e execute novamente.")
+    return df.loc[mask]
+
+
+def main():
+    """Materializa os filtros nomeados de cada arquivo (ou limpa o cache de filtros)."""
+    parser = argparse.ArgumentParser(description='Gera o cache dos filtros nomeados.')
+    parser.add_argument('--limpar', action='store_true', help='remove todos os bitmaps guardados')
+    parser.add_argument('--anos', nargs='+', type=int, default=None, help='anos materializados (padrão: todos em DADOS)')
+    args = parser.parse_args()
+
+    if args.limpar:
+        removidos = limitar_cache(limite_mb=0)
+        print(f"{removidos} bitmaps removidos de '{FILTROS_PATH}'.")
+        return
+    anos = args.anos or anos_disponiveis() or [None]
+    for nome_filtro, arquivos in ARQUIVOS_FILTROS.items():
+        for nome_arquivo in (arquivo_do_ano(arquivo, ano) for arquivo in arquivos for ano in anos):
+            if not os.path.isfile(os.path.join(DADOS_PATH, nome_arquivo)):
+                print(f"Arquivo '{nome_arquivo}' não encontrado; ignorando o filtro '{nome_filtro}'.")
+                continue
+            mask = mascara(nome_arquivo, nome_filtro)
+            print(f"{nome_arquivo} [{nome_filtro}]: {int(mask.sum())} de {len(mask)} registros.")
+
+
+if __name__ == "__main__":
+    main()
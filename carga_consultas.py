@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga do servidor de consultas (`servidor_consultas.py`).
+
+Vários clientes concorrentes (asyncio, uma conexão persistente cada) enviam uma mistura
+aleatória, mas reprodutível (`--semente`), de consultas: contagens, médias, desvios,
+medianas e proporções por tipo de escola, região, UF e faixa de desempenho, com ou sem
+filtro de região ou de tipo de escola (inclusive sobre a dimensão agrupada, e com uma categoria
+sem lista), respondidas pelo cubo ou pelas colunas mapeadas. Ao final mostra a
+latência (p50, p90, p99 e máxima) por fonte e no total, a vazão e a taxa de acertos do
+cache LRU informada pelo servidor.
+
+Uso:
+    python carga_consultas.py                          # servidor já rodando em 127.0.0.1:8765
+    python carga_consultas.py --iniciar                # inicia o servidor, roda a carga e o encerra
+    python carga_consultas.py --clientes 32 --requisicoes 200 --semente 7
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from servidor_consultas import HOST, PORTA
+
+DIMENSOES = ['TIPO_ESCOLA', 'REGIAO', 'SG_UF_PROVA', 'FAIXA_DESEMPENHO']
+MEDIDAS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO', 'NOTA_MEDIA_GERAL']
+REGIOES = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul']
+ESCOLAS = ['Federal', 'Privada', 'Estadual', 'Municipal']
+# Peso de cada agregação na mistura (as mais comuns nos temas aparecem mais).
+PESOS_AGREGACOES = {'media': 5, 'contagem': 3, 'desvio': 1, 'proporcao': 2, 'mediana': 1}
+
+
+def gerar_consulta(aleatorio):
+    """Sorteia uma consulta sobre RESULTADOS (um ou dois grupos, uma ou duas notas, filtro opcional)."""
+    agregacao = aleatorio.choices(list(PESOS_AGREGACOES), weights=list(PESOS_AGREGACOES.values()))[0]
+    grupos = aleatorio.sample(DIMENSOES, 2 if agregacao == 'proporcao' else aleatorio.choice([1, 1, 2]))
+    consulta = {'grupos': grupos, 'agregacao': agregacao}
+    if agregacao != 'contagem' and agregacao != 'proporcao':
+        consulta['medidas'] = aleatorio.sample(MEDIDAS, aleatorio.choice([1, 2]))
+    if aleatorio.random() < 0.5:
+        # O filtro pode recair sobre um dos grupos (respondido pelas colunas mapeadas) e, às vezes,
+        # vem como uma categoria sozinha, sem lista.
+        dimensao = aleatorio.choice(['REGIAO', 'TIPO_ESCOLA'])
+        categorias = aleatorio.sample(REGIOES if dimensao == 'REGIAO' else ESCOLAS, aleatorio.choice([1, 1, 2]))
+        sozinha = len(categorias) == 1 and aleatorio.random() < 0.3
+        consulta['filtros'] = {dimensao: categorias[0] if sozinha else categorias}
+    return consulta
+
+
+async def requisitar(leitor, escritor, metodo, caminho, objeto=None):
+    """Envia uma requisição HTTP/1.1 pela conexão aberta e devolve (status, resposta JSON)."""
+    corpo = b'' if objeto is None else json.dumps(objeto).encode('utf-8')
+    escritor.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(corpo)}\r\n\r\n".encode('latin1') + corpo)
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    cabecalhos = {}
+    while (linha := await leitor.readline()) not in (b'\r\n', b''):
+        nome, _, valor = linha.decode('latin1').partition(':')
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    return status, json.loads(await leitor.readexactly(int(cabecalhos['content-length'])))
+
+
+async def cliente(host, porta, consultas, resultados):
+    """Envia as consultas em sequência por uma conexão persistente, anotando (fonte, latência em ms)."""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            status, resposta = await requisitar(leitor, escritor, 'POST', '/consulta', consulta)
+            latencia = (time.perf_counter() - inicio) * 1000
+            if status != 200:
+                resultados.append(('erro', latencia))
+                print(f"Erro {status} em {consulta}: {resposta.get('erro')}")
+            else:
+                resultados.append(('cache' if resposta['cache'] else resposta['fonte'], latencia))
+    finally:
+        escritor.close()
+
+
+async def aguardar_servidor(host, porta, limite=300):
+    """Espera o servidor aceitar conexões (ele pode estar calculando os cubos na primeira vez)."""
+    fim = time.perf_counter() + limite
+    while True:
+        try:
+            _, escritor = await asyncio.open_connection(host, porta)
+            escritor.close()
+            return
+        except OSError:
+            if time.perf_counter() > fim:
+                raise TimeoutError(f"O servidor não respondeu em {limite} s.")
+            await asyncio.sleep(0.2)
+
+
+def resumir(rotulo, latencias):
+    """Linha da tabela com o número de requisições e os percentis de latência."""
+    p50, p90, p99 = np.percentile(latencias, [50, 90, 99])
+    return f"{rotulo:>8} | {len(latencias):>7} | {p50:>9.2f} | {p90:>9.2f} | {p99:>9.2f} | {max(latencias):>9.2f}"
+
+
+async def executar_carga(host, porta, clientes, requisicoes, semente):
+    """Roda os clientes concorrentes e mostra a latência por fonte, a vazão e as estatísticas do cache."""
+    aleatorio = random.Random(semente)
+    lotes = [[gerar_consulta(aleatorio) for _ in range(requisicoes)] for _ in range(clientes)]
+    resultados = []
+    print(f"{clientes} clientes x {requisicoes} consultas em http://{host}:{porta}...")
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, porta, lote, resultados) for lote in lotes))
+    duracao = time.perf_counter() - inicio
+
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    _, estatisticas = await requisitar(leitor, escritor, 'GET', '/estatisticas')
+    escritor.close()
+
+    print(f"\n{'fonte':>8} | {'consultas':>7} | {'p50 (ms)':>9} | {'p90 (ms)':>9} | {'p99 (ms)':>9} | {'máx (ms)':>9}")
+    print('-' * 66)
+    for fonte in ('cubo', 'dados', 'cache', 'erro'):
+        latencias = [ms for f, ms in resultados if f == fonte]
+        if latencias:
+            print(resumir(fonte, latencias))
+    print(resumir('total', [ms for _, ms in resultados]))
+    print(f"\nVazão: {len(resultados) / duracao:.0f} consultas/s ({len(resultados)} em {duracao:.2f} s).")
+    taxa = estatisticas['taxa_acertos']
+    print(f"Cache LRU: {estatisticas['acertos']} acertos, {estatisticas['faltas']} faltas"
+          f"{f' ({taxa:.1%})' if taxa is not None else ''}, {estatisticas['itens']}/{estatisticas['capacidade']} itens.")
+
+
+def main():
+    """Roda o teste de carga, iniciando o servidor antes se pedido."""
+    parser = argparse.ArgumentParser(description='Teste de carga do servidor de consultas.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--porta', type=int, default=PORTA)
+    parser.add_argument('--clientes', type=int, default=16, help='conexões concorrentes')
+    parser.add_argument('--requisicoes', type=int, default=100, help='consultas por cliente')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--iniciar', action='store_true', help='inicia o servidor em um subprocesso e o encerra ao final')
+    args = parser.parse_args()
+
+    servidor = None
+    if args.iniciar:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servidor_consultas.py')
+        servidor = subprocess.Popen([sys.executable, script, '--host', args.host, '--porta', str(args.porta)])
+    try:
+        asyncio.run(aguardar_servidor(args.host, args.porta))
+        asyncio.run(executar_carga(args.host, args.porta, args.clientes, args.requisicoes, args.semente))
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazém de colunas mapeadas em memória, compartilhado entre temas e processos sem cópias.
+
+O Parquet do cache colunar precisa ser descomprimido e convertido a cada leitura, em cada
+processo, e entregar um DataFrame a um processo filho (`ProcessPoolExecutor`) significa
+serializá-lo com pickle. Aqui as colunas limpas de RESULTADOS e PARTICIPANTES (já
+restritas a um filtro nomeado de `limpeza.FILTROS`, quando houver) são gravadas uma vez,
+uma por arquivo, em `DADOS/.cache/colunas`:
+- colunas numéricas: `<coluna>.npy`, aberto com `np.load(mmap_mode='r')`;
+- categorias: `<coluna>.codigos.npy` (os códigos, também mapeados) e `<coluna>.categorias.json`;
+- textos e demais tipos: `<coluna>.arrow` (Arrow IPC, aberto com `pa.memory_map`; os textos
+  são gravados como `large_string`, que o pandas usa sem converter os offsets);
+- `_indice.npy`: posição original de cada linha no arquivo (só nos armazéns filtrados).
+
+`abrir_colunas` monta o DataFrame diretamente sobre os arquivos mapeados: nenhum dado é
+copiado nem desserializado, só as páginas lidas vão para a memória, e todos os temas e
+processos que abrem as mesmas colunas dividem as mesmas páginas do cache do sistema
+operacional. Um processo filho recebe só o nome do arquivo e das colunas.
+
+As colunas são somente leitura: alterar valores no lugar (`df.loc[...] = ...`) gera erro;
+colunas novas (`assign`, `df[nova] = ...`) funcionam normalmente. A chave do diretório é o
+hash da definição do filtro, do formato e da versão do CSV; se um deles mudar, as colunas
+são gravadas de novo. Só as colunas ainda ausentes são gravadas a cada pedido.
+
+Uso:
+    python colunas_mapeadas.py                     # compara pickle e mapeamento com 1 processo por UF
+    python colunas_mapeadas.py --processos 4 --colunas NU_NOTA_MT TX_RESPOSTAS_MT
+    python colunas_mapeadas.py --limpar            # remove os armazéns gravados
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import CACHE_PATH, DADOS_PATH, carregar_colunas, impressao_digital
+from cache_filtros import carregar_filtrado
+from limpeza import FILTROS, NOTAS_COLS
+
+try:
+    import pyarrow as pa
+except ImportError:  # Sem pyarrow, `abrir_colunas` devolve os dados carregados normalmente.
+    pa = None
+
+COLUNAS_PATH = os.path.join(CACHE_PATH, 'colunas')
+ARQUIVO_INDICE = '_indice.npy'
+# Aumentar quando o formato dos arquivos mudar, para invalidar os armazéns antigos.
+VERSAO_FORMATO = 1
+
+
+def assinatura_armazem(nome_arquivo, filtro=None):
+    """Hash do arquivo, da definição do filtro, do formato e da versão do CSV (chave do diretório)."""
+    conteudo = {
+        'arquivo': nome_arquivo,
+        'filtro': None if filtro is None else FILTROS[filtro],
+        'versao': VERSAO_FORMATO,
+        'origem': impressao_digital(os.path.join(DADOS_PATH, nome_arquivo)),
+    }
+    texto = json.dumps(conteudo, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_armazem(nome_arquivo, filtro=None):
+    """Diretório das colunas mapeadas de um arquivo e filtro (o nome inclui a assinatura)."""
+    base = os.path.splitext(nome_arquivo)[0]
+    return os.path.join(COLUNAS_PATH, f"{base}.{filtro or 'todas'}.{assinatura_armazem(nome_arquivo, filtro)}")
+
+
+def _arquivos_coluna(coluna):
+    """Nomes dos arquivos que guardam uma coluna (o primeiro existente indica o formato)."""
+    return {'npy': f'{coluna}.npy', 'categoria': f'{coluna}.codigos.npy', 'arrow': f'{coluna}.arrow'}
+
+
+def _gravado(caminho, coluna):
+    """Indica se a coluna já está no armazém, em qualquer um dos formatos."""
+    return any(os.path.isfile(os.path.join(caminho, nome)) for nome in _arquivos_coluna(coluna).values())
+
+
+def _gravar_npy(destino, valores):
+    """Grava um array em `.npy` por um arquivo temporário (nunca deixa um arquivo pela metade)."""
+    caminho_tmp = f'{destino}.{os.getpid()}.tmp'
+    with open(caminho_tmp, 'wb') as f:
+        np.save(f, valores)
+    os.replace(caminho_tmp, destino)
+
+
+def _gravar_coluna(caminho, serie):
+    """Grava uma coluna no formato que permite abri-la mapeada (ver o docstring do módulo)."""
+    nomes = _arquivos_coluna(serie.name)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = {'categorias': serie.cat.categories.tolist(), 'ordenada': bool(serie.cat.ordered)}
+        destino = os.path.join(caminho, f'{serie.name}.categorias.json')
+        with open(destino + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(categorias, f, ensure_ascii=False)
+        os.replace(destino + '.tmp', destino)
+        # Os códigos por último: são eles que marcam a coluna como gravada.
+        _gravar_npy(os.path.join(caminho, nomes['categoria']), serie.cat.codes.to_numpy())
+    elif isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biuf':
+        _gravar_npy(os.path.join(caminho, nomes['npy']), serie.to_numpy())
+    else:
+        valores = pa.array(serie, from_pandas=True)
+        if pa.types.is_string(valores.type):
+            valores = valores.cast(pa.large_string())
+        tabela = pa.table({serie.name: valores})
+        destino = os.path.join(caminho, nomes['arrow'])
+        caminho_tmp = f'{destino}.{os.getpid()}.tmp'
+        with pa.OSFile(caminho_tmp, 'wb') as f, pa.ipc.new_file(f, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        os.replace(caminho_tmp, destino)
+
+
+def _criar_armazem(caminho):
+    """Cria o diretório do armazém, removendo as versões antigas do mesmo arquivo e filtro."""
+    os.makedirs(COLUNAS_PATH, exist_ok=True)
+    prefixo = os.path.basename(caminho).rsplit('.', 1)[0] + '.'
+    for nome in os.listdir(COLUNAS_PATH):
+        antigo = os.path.join(COLUNAS_PATH, nome)
+        if nome.startswith(prefixo) and antigo != caminho:
+            shutil.rmtree(antigo, ignore_errors=True)
+    os.makedirs(caminho, exist_ok=True)
+
+
+def materializar(nome_arquivo, colunas, filtro=None):
+    """
+    Grava no armazém as colunas pedidas que ainda não estão lá.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        colunas (list): Colunas a gravar.
+        filtro (str): Filtro nomeado de `limpeza.FILTROS` aplicado às linhas (None = todas as linhas).
+
+    Returns:
+        str: Diretório do armazém.
+    """
+    caminho = caminho_armazem(nome_arquivo, filtro)
+    if not os.path.isdir(caminho):
+        _criar_armazem(caminho)
+    faltantes = [c for c in colunas if not _gravado(caminho, c)]
+    indice_faltante = filtro is not None and not os.path.isfile(os.path.join(caminho, ARQUIVO_INDICE))
+    if not faltantes and not indice_faltante:
+        return caminho
+
+    print(f"Gravando {len(faltantes)} colunas mapeadas de '{nome_arquivo}' ({filtro or 'todas as linhas'})...")
+    if filtro is not None:
+        df = carregar_filtrado(nome_arquivo, faltantes, filtro)
+        if indice_faltante:
+            _gravar_npy(os.path.join(caminho, ARQUIVO_INDICE), df.index.to_numpy(dtype=np.int64))
+    else:
+        df = carregar_colunas(nome_arquivo, faltantes)
+    for coluna in faltantes:
+        _gravar_coluna(caminho, df[coluna])
+    return caminho
+
+
+def _abrir_coluna(caminho, coluna):
+    """Abre uma coluna gravada sem copiar os dados (array NumPy mapeado, categoria ou array Arrow)."""
+    nomes = _arquivos_coluna(coluna)
+    arquivo = os.path.join(caminho, nomes['npy'])
+    if os.path.isfile(arquivo):
+        return np.load(arquivo, mmap_mode='r')
+    arquivo = os.path.join(caminho, nomes['categoria'])
+    if os.path.isfile(arquivo):
+        with open(os.path.join(caminho, f'{coluna}.categorias.json'), encoding='utf-8') as f:
+            info = json.load(f)
+        tipo = pd.CategoricalDtype(info['categorias'], ordered=info['ordenada'])
+        return pd.Categorical.from_codes(np.load(arquivo, mmap_mode='r'), dtype=tipo, validate=False)
+    tabela = pa.ipc.open_file(pa.memory_map(os.path.join(caminho, nomes['arrow']))).read_all()
+    return tabela.to_pandas()[coluna].array
+
+
+def abrir_colunas(nome_arquivo, colunas, filtro=None):
+    """
+    Abre as colunas de um arquivo mapeadas da memória do disco, gravando antes as que faltarem.
+
+    O resultado tem os mesmos valores, tipos e índice de `carregar_colunas` (ou de
+    `carregar_filtrado`, com `filtro`), mas os dados ficam nos arquivos mapeados: abrir as
+    colunas não lê o arquivo inteiro e vários processos compartilham as mesmas páginas.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        colunas (list): Colunas a abrir.
+        filtro (str): Filtro nomeado de `limpeza.FILTROS` (ex: 'presentes'). None abre todas as linhas.
+
+    Returns:
+        pd.DataFrame: Colunas somente leitura (colunas novas podem ser criadas normalmente).
+    """
+    if pa is None:
+        print("AVISO: pyarrow não instalado; carregando as colunas sem o armazém mapeado.")
+        return carregar_colunas(nome_arquivo, colunas) if filtro is None else carregar_filtrado(
+            nome_arquivo, colunas, filtro)
+
+    caminho = materializar(nome_arquivo, colunas, filtro)
+    dados = {coluna: _abrir_coluna(caminho, coluna) for coluna in colunas}
+    if filtro is None:
+        indice = None
+    else:
+        indice = pd.Index(np.load(os.path.join(caminho, ARQUIVO_INDICE), mmap_mode='r'), copy=False)
+    # copy=False mantém os arrays mapeados como blocos do DataFrame, sem cópia.
+    return pd.DataFrame(dados, index=indice, copy=False)
+
+
+def limpar():
+    """Remove todos os armazéns de colunas mapeadas; retorna quantos foram removidos."""
+    if not os.path.isdir(COLUNAS_PATH):
+        return 0
+    nomes = os.listdir(COLUNAS_PATH)
+    for nome in nomes:
+        shutil.rmtree(os.path.join(COLUNAS_PATH, nome), ignore_errors=True)
+    return len(nomes)
+
+
+# --- Comparação: DataFrame enviado por pickle x colunas abertas em cada processo ---
+
+def pico_memoria_mb():
+    """Pico de memória residente (RSS) do processo atual, em MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No Linux ru_maxrss é dado em KB; no macOS, em bytes.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _medias_uf(df, uf):
+    """Tarefa de exemplo de um processo por UF: médias das notas da UF."""
+    linhas = (df['SG_UF_PROVA'] == uf).to_numpy()
+    notas = {c: float(np.nanmean(df[c].to_numpy()[linhas])) for c in NOTAS_COLS if c in df}
+    return notas, pico_memoria_mb()
+
+
+def _tarefa_pickle(df, uf):
+    """Recebe o recorte da UF já serializado pelo processo principal."""
+    return _medias_uf(df, uf)
+
+
+def _tarefa_mapeada(nome_arquivo, colunas, filtro, uf):
+    """Recebe só os nomes e abre as colunas mapeadas no próprio processo."""
+    return _medias_uf(abrir_colunas(nome_arquivo, colunas, filtro), uf)
+
+
+def main():
+    """Compara o envio de DataFrames por pickle com a abertura das colunas mapeadas, em um processo por UF."""
+    parser = argparse.ArgumentParser(description='Armazém de colunas mapeadas em memória.')
+    parser.add_argument('--arquivo', default='RESULTADOS_2024.csv', help='arquivo da pasta DADOS')
+    parser.add_argument('--filtro', default='presentes', help="filtro nomeado ('nenhum' = todas as linhas)")
+    parser.add_argument('--colunas', nargs='+', default=None,
+                        help='colunas enviadas aos processos (padrão: UF, notas e respostas)')
+    parser.add_argument('--processos', type=int, default=None, help='processos em paralelo (padrão: um por núcleo)')
+    parser.add_argument('--limpar', action='store_true', help='remove os armazéns gravados')
+    args = parser.parse_args()
+
+    if args.limpar:
+        print(f"{limpar()} armazéns removidos de '{COLUNAS_PATH}'.")
+        return
+    filtro = None if args.filtro == 'nenhum' else args.filtro
+    colunas = args.colunas or ['SG_UF_PROVA', *NOTAS_COLS, 'TX_RESPOSTAS_CN', 'TX_RESPOSTAS_MT']
+    colunas = colunas if 'SG_UF_PROVA' in colunas else ['SG_UF_PROVA', *colunas]
+
+    inicio = time.perf_counter()
+    df = carregar_colunas(args.arquivo, colunas) if filtro is None else carregar_filtrado(args.arquivo, colunas, filtro)
+    tempo_carga = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    mapeado = abrir_colunas(args.arquivo, colunas, filtro)
+    tempo_abertura = time.perf_counter() - inicio
+    iguais = mapeado.index.equals(df.index) and all(
+        mapeado[c].dtype == df[c].dtype and mapeado[c].equals(df[c]) for c in colunas)
+    print(f"{len(df)} linhas x {len(colunas)} colunas | leitura do Parquet: {tempo_carga:.2f} s | "
+          f"abertura mapeada: {tempo_abertura:.3f} s | dados idênticos: {'sim' if iguais else 'NÃO'}")
+
+    ufs = [uf for uf in df['SG_UF_PROVA'].cat.categories if (df['SG_UF_PROVA'] == uf).any()]
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        inicio = time.perf_counter()
+        recortes = [df[df['SG_UF_PROVA'] == uf] for uf in ufs]
+        serializados = sum(len(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL)) for r in recortes)
+        por_pickle = list(executor.map(_tarefa_pickle, recortes, ufs))
+        tempo_pickle = time.perf_counter() - inicio
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        inicio = time.perf_counter()
+        tarefas = [(args.arquivo, colunas, filtro, uf) for uf in ufs]
+        serializados_mapa = sum(len(pickle.dumps(t, protocol=pickle.HIGHEST_PROTOCOL)) for t in tarefas)
+        por_mapa = list(executor.map(_tarefa_mapeada, *zip(*tarefas)))
+        tempo_mapa = time.perf_counter() - inicio
+
+    iguais = all(a[0] == b[0] for a, b in zip(por_pickle, por_mapa))
+    print(f"{len(ufs)} tarefas (uma por UF), resultados idênticos: {'sim' if iguais else 'NÃO'}")
+    for nome, tempo, enviados, resultados in [('pickle', tempo_pickle, serializados, por_pickle),
+                                              ('mapeado', tempo_mapa, serializados_mapa, por_mapa)]:
+        pico = max(r[1] for r in resultados)
+        print(f"{nome:>8}: {tempo:.2f} s | {enviados / 2**20:.2f} MB serializados | "
+              f"pico de RSS por processo: {pico:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Correlação (Pearson e Spearman) e regressão linear entre duas notas, mescláveis entre blocos.
+
+`scipy.stats.pearsonr`, `spearmanr` e `linregress` percorrem os dados separadamente, e o
+Spearman ordena as duas colunas inteiras (argsort) para obter os postos. Aqui uma única
+passada acumula:
+
+- os momentos do par (n, médias e somas centradas dos quadrados e dos produtos), dos quais
+  saem Pearson, R² e os coeficientes da regressão (`MomentosBivariados`);
+- a contagem de cada par de notas quantizadas (um histograma 2D esparso, `TabelaConjunta`).
+  As notas têm resolução limitada (a redação vai de 20 em 20 e a média das objetivas é
+  múltipla de 0,025), então o número de pares distintos é pequeno. O posto de cada nota
+  (a média das posições dos empates, como no `spearmanr`) sai das contagens acumuladas de
+  cada nota, sem ordenar, e o Spearman é o Pearson dos postos, ponderado pelas contagens.
+
+Os dois agregados podem ser mesclados com `combinar` (blocos, partições ou anos). Os
+intervalos de confiança por bootstrap sorteiam novas contagens para os pares distintos
+(uma reamostragem multinomial equivale a reamostrar as linhas), então cada réplica custa
+o número de pares, e não o de linhas; as réplicas são divididas entre processos.
+
+Uso:
+    python correlacao.py                      # compara com o scipy sobre RESULTADOS (tema desempenho)
+    python correlacao.py --replicar 10        # repete os dados 10 vezes para simular uma amostra maior
+    python correlacao.py --replicas 500 --processos 2
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Resoluções padrão das notas na tabela conjunta (média das 4 objetivas e notas com uma casa decimal).
+RESOLUCAO_X = 0.025
+RESOLUCAO_Y = 0.1
+# Réplicas e nível de confiança padrão do bootstrap.
+REPLICAS_BOOTSTRAP = 200
+CONFIANCA = 0.95
+# Réplicas sorteadas por tarefa (cada lote tem a sua semente).
+REPLICAS_POR_LOTE = 25
+ESTATISTICAS = ['pearson', 'spearman', 'r2', 'inclinacao']
+
+
+def _pares_validos(x, y):
+    """Valores float64 das linhas em que as duas colunas não são nulas."""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    validos = ~(np.isnan(x) | np.isnan(y))
+    return x[validos], y[validos]
+
+
+class MomentosBivariados:
+    """
+    n, médias e somas centradas (Sxx, Syy, Sxy) de um par de colunas.
+
+    Dois agregados são mesclados com a fórmula de Chan et al. para momentos centrados, que
+    não perde precisão como as somas de quadrados brutas em milhões de notas.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media_x = self.media_y = 0.0
+        self.sxx = self.syy = self.sxy = 0.0
+
+    def atualizar(self, x, y):
+        """Acumula os pares de um bloco (linhas com algum valor nulo são ignoradas)."""
+        x, y = _pares_validos(x, y)
+        if len(x) == 0:
+            return self
+        media_x, media_y = x.mean(), y.mean()
+        dx, dy = x - media_x, y - media_y
+        self._mesclar(len(x), media_x, media_y, np.dot(dx, dx), np.dot(dy, dy), np.dot(dx, dy))
+        return self
+
+    def combinar(self, outro):
+        """Mescla os momentos de outro `MomentosBivariados` neste."""
+        if outro.n:
+            self._mesclar(outro.n, outro.media_x, outro.media_y, outro.sxx, outro.syy, outro.sxy)
+        return self
+
+    def _mesclar(self, n, media_x, media_y, sxx, syy, sxy):
+        total = self.n + n
+        delta_x, delta_y = media_x - self.media_x, media_y - self.media_y
+        peso = self.n * n / total
+        self.sxx += sxx + delta_x * delta_x * peso
+        self.syy += syy + delta_y * delta_y * peso
+        self.sxy += sxy + delta_x * delta_y * peso
+        self.media_x += delta_x * n / total
+        self.media_y += delta_y * n / total
+        self.n = total
+
+    def pearson(self):
+        """Coeficiente de correlação de Pearson."""
+        return self.sxy / np.sqrt(self.sxx * self.syy)
+
+    def regressao(self):
+        """
+        Regressão linear simples de y em x (os mesmos valores de `scipy.stats.linregress`).
+
+        Returns:
+            dict: 'inclinacao', 'intercepto', 'r', 'r2' e 'erro_padrao' (da inclinação).
+        """
+        r = self.pearson()
+        inclinacao = self.sxy / self.sxx
+        erro_padrao = np.sqrt(max(1 - r * r, 0.0) * self.syy / self.sxx / (self.n - 2)) if self.n > 2 else np.nan
+        return {'inclinacao': inclinacao, 'intercepto': self.media_y - inclinacao * self.media_x,
+                'r': r, 'r2': r * r, 'erro_padrao': erro_padrao}
+
+
+def _pearson_ponderado(x, y, pesos):
+    """Pearson de valores repetidos `pesos` vezes (sem expandir as repetições)."""
+    n = pesos.sum()
+    dx = x - np.dot(pesos, x) / n
+    dy = y - np.dot(pesos, y) / n
+    return np.dot(pesos, dx * dy) / np.sqrt(np.dot(pesos, dx * dx) * np.dot(pesos, dy * dy))
+
+
+def postos_medios(contagens):
+    """
+    Posto de cada valor possível a partir das suas contagens, com empates pela média das posições.
+
+    Um valor que aparece c vezes depois de outros k valores ocupa as posições k+1 a k+c; o seu
+    posto é a média delas, k + (c + 1) / 2 (o critério 'average' de `scipy.stats.rankdata`).
+    """
+    contagens = np.asarray(contagens, dtype='float64')
+    return np.cumsum(contagens) - (contagens - 1) / 2
+
+
+class TabelaConjunta:
+    """
+    Contagem de cada par (x, y) de notas quantizadas: um histograma 2D que guarda só os pares presentes.
+
+    Cada nota é arredondada para o múltiplo mais próximo da sua resolução entre `inicio` e
+    `fim`; com a resolução das notas do ENEM, os postos e o Spearman obtidos daqui são os
+    mesmos do `spearmanr` sobre as notas originais.
+    """
+
+    def __init__(self, resolucao_x=RESOLUCAO_X, resolucao_y=RESOLUCAO_Y, inicio=0.0, fim=1000.0):
+        self.resolucao_x = resolucao_x
+        self.resolucao_y = resolucao_y
+        self.inicio = inicio
+        self.n_x = int(round((fim - inicio) / resolucao_x)) + 1
+        self.n_y = int(round((fim - inicio) / resolucao_y)) + 1
+        # Código do par (ix * n_y + iy) -> número de linhas.
+        self.contagens = pd.Series(dtype='int64')
+
+    def _indices(self, valores, resolucao, n):
+        return np.clip(np.rint((valores - self.inicio) / resolucao), 0, n - 1).astype(np.int64)
+
+    def atualizar(self, x, y):
+        """Acumula os pares de um bloco (linhas com algum valor nulo são ignoradas)."""
+        x, y = _pares_validos(x, y)
+        codigos = self._indices(x, self.resolucao_x, self.n_x) * self.n_y + self._indices(y, self.resolucao_y, self.n_y)
+        # value_counts usa uma tabela hash: o custo é linear no número de linhas, sem ordenação.
+        contagens = pd.Series(codigos).value_counts(sort=False)
+        self.contagens = contagens if self.contagens.empty else self.contagens.add(contagens, fill_value=0).astype('int64')
+        return self
+
+    def combinar(self, outro):
+        """Soma as contagens de outra tabela com as mesmas resoluções."""
+        if (self.resolucao_x, self.resolucao_y, self.inicio, self.n_x, self.n_y) != \
+                (outro.resolucao_x, outro.resolucao_y, outro.inicio, outro.n_x, outro.n_y):
+            raise ValueError("As tabelas precisam ter as mesmas resoluções para serem combinadas.")
+        if not outro.contagens.empty:
+            self.contagens = outro.contagens.copy() if self.contagens.empty else \
+                self.contagens.add(outro.contagens, fill_value=0).astype('int64')
+        return self
+
+    def pares(self):
+        """
+        Índices e contagens dos pares presentes.
+
+        Returns:
+            tuple: (índices de x, índices de y, contagens), arrays com uma posição por par distinto.
+        """
+        codigos = self.contagens.index.to_numpy(dtype=np.int64)
+        return codigos // self.n_y, codigos % self.n_y, self.contagens.to_numpy(dtype=np.int64)
+
+    def valores(self, ix, iy):
+        """Notas (quantizadas) correspondentes aos índices."""
+        return self.inicio + ix * self.resolucao_x, self.inicio + iy * self.resolucao_y
+
+    def spearman(self, contagens=None):
+        """
+        Correlação de Spearman: Pearson dos postos médios, ponderado pelas contagens dos pares.
+
+        Args:
+            contagens (np.ndarray): Contagens alternativas para os pares de `pares()` (ex: uma
+                réplica do bootstrap). None usa as contagens acumuladas.
+        """
+        ix, iy, acumuladas = self.pares()
+        contagens = acumuladas if contagens is None else contagens
+        postos_x = postos_medios(np.bincount(ix, weights=contagens, minlength=self.n_x))
+        postos_y = postos_medios(np.bincount(iy, weights=contagens, minlength=self.n_y))
+        return _pearson_ponderado(postos_x[ix], postos_y[iy], contagens.astype('float64'))
+
+
+def _estatisticas_replicas(tabela, semente, replicas):
+    """Pearson, Spearman, R² e inclinação de `replicas` reamostragens da tabela (executado em outro processo)."""
+    ix, iy, contagens = tabela.pares()
+    x, y = tabela.valores(ix, iy)
+    n = int(contagens.sum())
+    probabilidades = contagens / n
+    gerador = np.random.default_rng(semente)
+    resultados = np.empty((replicas, len(ESTATISTICAS)))
+    for i in range(replicas):
+        # Número de vezes que cada par aparece em uma reamostragem de n linhas com reposição.
+        pesos = gerador.multinomial(n, probabilidades).astype('float64')
+        momentos = MomentosBivariados()
+        media_x, media_y = np.dot(pesos, x) / n, np.dot(pesos, y) / n
+        dx, dy = x - media_x, y - media_y
+        momentos._mesclar(n, media_x, media_y, np.dot(pesos, dx * dx), np.dot(pesos, dy * dy), np.dot(pesos, dx * dy))
+        regressao = momentos.regressao()
+        resultados[i] = [regressao['r'], tabela.spearman(pesos), regressao['r2'], regressao['inclinacao']]
+    return resultados
+
+
+class CorrelacaoMesclavel:
+    """
+    Pearson, Spearman e regressão linear entre duas colunas, acumulados em uma única passada.
+
+    Combina `MomentosBivariados` (Pearson, R² e regressão exatos) e `TabelaConjunta`
+    (Spearman e bootstrap); pode ser mesclada com `combinar`, como os outros agregados.
+    """
+
+    def __init__(self, resolucao_x=RESOLUCAO_X, resolucao_y=RESOLUCAO_Y):
+        self.momentos = MomentosBivariados()
+        self.tabela = TabelaConjunta(resolucao_x, resolucao_y)
+
+    def atualizar(self, x, y):
+        """Acumula os pares de um bloco."""
+        x, y = _pares_validos(x, y)
+        self.momentos.atualizar(x, y)
+        self.tabela.atualizar(x, y)
+        return self
+
+    def combinar(self, outro):
+        """Mescla outra `CorrelacaoMesclavel` nesta."""
+        self.momentos.combinar(outro.momentos)
+        self.tabela.combinar(outro.tabela)
+        return self
+
+    def resumo(self):
+        """
+        Returns:
+            dict: 'n', 'pearson', 'spearman' e os valores de `MomentosBivariados.regressao`.
+        """
+        return {'n': self.momentos.n, 'pearson': self.momentos.pearson(), 'spearman': self.tabela.spearman(),
+                **self.momentos.regressao()}
+
+    def intervalos(self, replicas=REPLICAS_BOOTSTRAP, confianca=CONFIANCA, processos=None, semente=0):
+        """
+        Intervalos de confiança por bootstrap (percentis das réplicas).
+
+        Args:
+            replicas (int): Número de reamostragens.
+            confianca (float): Nível de confiança (ex: 0.95).
+            processos (int): Número de processos. None usa um por núcleo; 1 calcula em sequência.
+            semente (int): Semente do sorteio (o resultado não depende do número de processos).
+
+        Returns:
+            pd.DataFrame: Uma linha por estatística ('pearson', 'spearman', 'r2', 'inclinacao'),
+                colunas 'inferior' e 'superior'.
+        """
+        processos = max(1, min(processos or os.cpu_count() or 1, replicas))
+        # Lotes fixos de réplicas, cada um com a sua semente: os mesmos sorteios com qualquer número de processos.
+        lotes = np.array_split(np.arange(replicas), -(-replicas // REPLICAS_POR_LOTE))
+        sementes = np.random.SeedSequence(semente).spawn(len(lotes))
+        argumentos = [(self.tabela, s, len(lote)) for s, lote in zip(sementes, lotes)]
+        if processos == 1:
+            partes = [_estatisticas_replicas(*a) for a in argumentos]
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                partes = list(executor.map(_estatisticas_replicas, *zip(*argumentos)))
+        resultados = np.vstack(partes)
+        alfa = (1 - confianca) / 2
+        limites = np.quantile(resultados, [alfa, 1 - alfa], axis=0)
+        return pd.DataFrame(limites.T, index=ESTATISTICAS, columns=['inferior', 'superior'])
+
+
+def correlacionar(x, y, resolucao_x=RESOLUCAO_X, resolucao_y=RESOLUCAO_Y):
+    """Atalho: `CorrelacaoMesclavel` com todos os pares de `x` e `y`."""
+    return CorrelacaoMesclavel(resolucao_x, resolucao_y).atualizar(x, y)
+
+
+def main():
+    """Compara tempo e resultados com `scipy.stats` sobre a média das objetivas e a redação do tema desempenho."""
+    from scipy import stats
+
+    import tema_desempenho
+    from cache_filtros import carregar_filtrado
+    from cache_colunar import colunas_disponiveis
+
+    parser = argparse.ArgumentParser(description='Pearson, Spearman e regressão em uma passada, comparados com o scipy.')
+    parser.add_argument('--replicar', type=int, default=1, help='repete os dados N vezes para simular uma amostra maior')
+    parser.add_argument('--replicas', type=int, default=REPLICAS_BOOTSTRAP, help='réplicas do bootstrap')
+    parser.add_argument('--processos', type=int, default=None, help='processos do bootstrap (padrão: um por núcleo)')
+    args = parser.parse_args()
+
+    arquivo = tema_desempenho.ARQUIVO
+    colunas = [c for c in tema_desempenho.COLUNAS if c in colunas_disponiveis(arquivo)]
+    df = tema_desempenho.preparar(carregar_filtrado(arquivo, colunas, 'presentes'))
+    x = np.tile(df['MEDIA_OBJETIVAS'].to_numpy(), args.replicar)
+    y = np.tile(df['NU_NOTA_REDACAO'].to_numpy(), args.replicar)
+    print(f"{len(x)} pares (MEDIA_OBJETIVAS, NU_NOTA_REDACAO).")
+
+    inicio = time.perf_counter()
+    esperado = {'pearson': stats.pearsonr(x, y)[0], 'spearman': stats.spearmanr(x, y)[0]}
+    lr = stats.linregress(x, y)
+    esperado.update({'inclinacao': lr.slope, 'intercepto': lr.intercept, 'r2': lr.rvalue ** 2, 'erro_padrao': lr.stderr})
+    tempo_scipy = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resumo = correlacionar(x, y).resumo()
+    tempo_passada = time.perf_counter() - inicio
+
+    print(f"\n{'estatística':<12} {'scipy':>14} {'uma passada':>14} {'diferença':>11}")
+    for nome, valor in esperado.items():
+        print(f"{nome:<12} {valor:>14.8f} {resumo[nome]:>14.8f} {abs(resumo[nome] - valor):>11.2e}")
+    print(f"\nscipy (pearsonr + spearmanr + linregress): {tempo_scipy:.3f} s | "
+          f"uma passada: {tempo_passada:.3f} s ({tempo_scipy / tempo_passada:.1f}x)")
+
+    correlacao = correlacionar(x, y)
+    inicio = time.perf_counter()
+    intervalos = correlacao.intervalos(args.replicas, processos=args.processos)
+    print(f"\nIntervalos de {CONFIANCA:.0%} por bootstrap ({args.replicas} réplicas, "
+          f"{len(correlacao.tabela.contagens)} pares distintos, {time.perf_counter() - inicio:.2f} s):")
+    print(intervalos.round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cubo OLAP pré-calculado com as dimensões usadas pelos temas, um por arquivo de dados.
+
+Os cubos guardados aqui servem a este script, ao servidor de consultas (`servidor_consultas.py`)
+e aos temas acadêmico, institucional, de perfil e socioeconômico: na execução completa de um
+ano (sem DataFrame recebido e sem recorte de região ou escola), as contagens e proporções dos
+gráficos desses temas são recortes do cubo do arquivo (`carregar_cubo`). Com um recorte ou com
+um DataFrame recebido (ex: do orquestrador ou dados sintéticos), o tema monta o mesmo cubo em
+memória, com as mesmas dimensões e faixas definidas aqui.
+
+As mesmas dimensões aparecem em vários temas: tipo de escola, região e UF, faixa de
+desempenho nas faixas dos temas acadêmico e institucional (RESULTADOS), sexo, faixa etária, estado civil, situação de conclusão, cor/raça,
+escolaridade e ocupação dos pais e renda familiar (PARTICIPANTES). Aqui cada arquivo é
+lido uma única vez, em blocos, e cada bloco atualiza todos os cuboides de um
+`agregacao_streaming.CuboMesclavel`: todos os pares de dimensões e as combinações maiores
+usadas pelos temas, com a contagem de linhas e, em RESULTADOS, a contagem, a soma e a
+soma dos quadrados de cada nota (médias e desvios por qualquer combinação).
+
+O cubo fica em `DADOS/.cache/cubos` (um `.npz` compactado de poucos KB), com uma chave que
+é o hash do filtro, do código do cubo e da versão do CSV. Contagens, proporções e médias
+por qualquer combinação de dimensões de um cuboide (com filtros por categoria, ex: "média
+de MT por tipo de escola no Nordeste") são recortes do cubo, sem reler os microdados.
+
+Uso:
+    python cubo.py                              # gera (ou reaproveita) os cubos e mostra alguns recortes
+    python cubo.py --arquivos PARTICIPANTES_2024.csv --forcar
+    python cubo.py --comparar                   # tempo dos recortes do cubo x groupby sobre os dados
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregacao_streaming
+import esquema
+from agregacao_streaming import CuboMesclavel, agregar_em_blocos
+from anos import ANO_PADRAO, arquivo_do_ano, versao_codigo
+from cache_colunar import CACHE_PATH, DADOS_PATH, TAMANHO_BLOCO, impressao_digital
+from derivacao import media_linhas
+from esquema import (MAPA_REGIOES, ORDEM_ESCOLARIDADE, ORDEM_ESCOLAS, ORDEM_OCUPACAO, ORDEM_RACA, ORDEM_REGIOES,
+                     ORDEM_RENDA, decodificar)
+from limpeza import FILTROS, NOTAS_COLS, mascara_filtro
+
+CUBOS_PATH = os.path.join(CACHE_PATH, 'cubos')
+
+# Faixas da nota média geral dos gráficos 5 e 8 do tema acadêmico (fechadas à esquerda).
+FAIXAS_NOTA = [0, 450, 600, 750, 1000]
+ROTULOS_FAIXAS = ['Baixo (<450)', 'Médio (450-600)', 'Bom (600-750)', 'Excelente (>750)']
+# Faixas do gráfico 8 do tema institucional (fechadas à direita).
+FAIXAS_NOTA_INSTITUCIONAL = [0, 500, 600, 700, 1000]
+ROTULOS_FAIXAS_INSTITUCIONAL = ['Regular (<500)', 'Bom (500-600)', 'Muito Bom (600-700)', 'Excelente (>700)']
+
+# Dimensões de cada arquivo: {nome: (coluna de origem, função que devolve a coluna categórica)}.
+# Os nomes e a ordem das categorias são os mesmos dos temas (ver `esquema.py`).
+DIMENSOES = {
+    'RESULTADOS_2024.csv': {
+        'TIPO_ESCOLA': ('TP_DEPENDENCIA_ADM_ESC', lambda s: decodificar(s, ordem=ORDEM_ESCOLAS)),
+        'REGIAO': ('SG_UF_PROVA', lambda s: decodificar(s, MAPA_REGIOES, ORDEM_REGIOES)),
+        'SG_UF_PROVA': ('SG_UF_PROVA', lambda s: decodificar(s, {uf: uf for uf in sorted(MAPA_REGIOES)})),
+        'FAIXA_DESEMPENHO': ('NOTA_MEDIA_GERAL', lambda s: pd.cut(s, bins=FAIXAS_NOTA, labels=ROTULOS_FAIXAS, right=False)),
+        'FAIXA_INSTITUCIONAL': ('NOTA_MEDIA_GERAL', lambda s: pd.cut(s, bins=FAIXAS_NOTA_INSTITUCIONAL,
+                                                                    labels=ROTULOS_FAIXAS_INSTITUCIONAL)),
+    },
+    'PARTICIPANTES_2024.csv': {
+        'Sexo': ('TP_SEXO', decodificar),
+        'Faixa Etária': ('TP_FAIXA_ETARIA', decodificar),
+        'Estado Civil': ('TP_ESTADO_CIVIL', decodificar),
+        'Situação Conclusão': ('TP_ST_CONCLUSAO', decodificar),
+        'Cor/Raça': ('TP_COR_RACA', lambda s: decodificar(s, ordem=ORDEM_RACA)),
+        'ESCOLARIDADE_PAI': ('Q001', lambda s: decodificar(s, ordem=ORDEM_ESCOLARIDADE)),
+        'ESCOLARIDADE_MAE': ('Q002', lambda s: decodificar(s, ordem=ORDEM_ESCOLARIDADE)),
+        'OCUPACAO_PAI': ('Q003', lambda s: decodificar(s, ordem=ORDEM_OCUPACAO)),
+        'OCUPACAO_MAE': ('Q004', lambda s: decodificar(s, ordem=ORDEM_OCUPACAO)),
+        'RENDA_FAMILIAR': ('Q007', lambda s: decodificar(s, ordem=ORDEM_RENDA)),
+    },
+}
+
+# Combinações com mais de duas dimensões guardadas além de todos os pares (as usadas pelos temas).
+COMBINACOES = {
+    'RESULTADOS_2024.csv': [('REGIAO', 'TIPO_ESCOLA', 'FAIXA_DESEMPENHO'), ('SG_UF_PROVA', 'TIPO_ESCOLA', 'FAIXA_DESEMPENHO')],
+    'PARTICIPANTES_2024.csv': [('Faixa Etária', 'Sexo', 'Situação Conclusão', 'Estado Civil'),
+                               ('Cor/Raça', 'ESCOLARIDADE_PAI', 'ESCOLARIDADE_MAE', 'RENDA_FAMILIAR'),
+                               # O tema socioeconômico só usa quem respondeu às seis questões (sem "Não sei").
+                               ('Cor/Raça', 'ESCOLARIDADE_PAI', 'ESCOLARIDADE_MAE', 'OCUPACAO_PAI', 'OCUPACAO_MAE',
+                                'RENDA_FAMILIAR')],
+}
+
+# Filtro nomeado aplicado às linhas e notas agregadas em cada célula.
+FILTROS_CUBO = {'RESULTADOS_2024.csv': 'presentes', 'PARTICIPANTES_2024.csv': None}
+MEDIDAS = {'RESULTADOS_2024.csv': NOTAS_COLS + ['NOTA_MEDIA_GERAL'], 'PARTICIPANTES_2024.csv': []}
+
+
+def cuboides(referencia):
+    """Todos os pares de dimensões do arquivo, mais as combinações maiores de `COMBINACOES`."""
+    return list(itertools.combinations(DIMENSOES[referencia], 2)) + COMBINACOES[referencia]
+
+
+def _referencia(nome_arquivo):
+    """Nome do arquivo do ano de referência, usado nas definições (ex: RESULTADOS_2023.csv -> RESULTADOS_2024.csv)."""
+    referencia = arquivo_do_ano(nome_arquivo, ANO_PADRAO)
+    if referencia not in DIMENSOES:
+        raise ValueError(f"Não há cubo definido para '{nome_arquivo}' (use {' ou '.join(DIMENSOES)}).")
+    return referencia
+
+
+def assinatura_cubo(nome_arquivo):
+    """Hash do arquivo, do filtro, do código das dimensões e da versão do CSV (chave do cubo)."""
+    filtro = FILTROS_CUBO[_referencia(nome_arquivo)]
+    conteudo = {
+        'arquivo': nome_arquivo,
+        'filtro': None if filtro is None else FILTROS[filtro],
+        'versao': versao_codigo(sys.modules[__name__], agregacao_streaming, esquema),
+        'origem': impressao_digital(os.path.join(DADOS_PATH, nome_arquivo)),
+    }
+    texto = json.dumps(conteudo, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_cubo(nome_arquivo):
+    """Caminho do cubo de um arquivo (o nome inclui a assinatura)."""
+    base = os.path.splitext(nome_arquivo)[0]
+    return os.path.join(CUBOS_PATH, f'{base}.{assinatura_cubo(nome_arquivo)}.npz')
+
+
+def dimensoes_bloco(bloco, referencia):
+    """Colunas categóricas de todas as dimensões de um bloco, com as categorias fixas do cubo."""
+    return {nome: decodificar_dimensao(bloco[origem]) for nome, (origem, decodificar_dimensao)
+            in DIMENSOES[referencia].items()}
+
+
+def construir_cubo(nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê o arquivo em blocos e acumula todos os cuboides em uma única passada.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS (ex: 'RESULTADOS_2024.csv').
+        tamanho_bloco (int): Linhas lidas por vez.
+
+    Returns:
+        CuboMesclavel: O cubo do arquivo.
+    """
+    referencia = _referencia(nome_arquivo)
+    filtro = FILTROS_CUBO[referencia]
+    medidas = MEDIDAS[referencia]
+    origens = list(dict.fromkeys(origem for origem, _ in DIMENSOES[referencia].values() if origem != 'NOTA_MEDIA_GERAL'))
+    colunas = list(dict.fromkeys(origens + [c for c in medidas if c != 'NOTA_MEDIA_GERAL']))
+    if filtro is not None:
+        filtro = FILTROS[filtro]
+        colunas += [c for c in list(filtro['iguais']) + list(filtro['nao_nulas']) if c not in colunas]
+
+    # O cubo é criado no primeiro bloco: as categorias de cada dimensão são fixas e não dependem dos dados.
+    cubo = None
+
+    def preparar(bloco):
+        if filtro is not None:
+            bloco = bloco.loc[mascara_filtro(bloco, filtro)]
+        if 'NOTA_MEDIA_GERAL' in medidas:
+            bloco = bloco.assign(NOTA_MEDIA_GERAL=media_linhas(bloco, NOTAS_COLS))
+        return bloco
+
+    def atualizar(bloco):
+        nonlocal cubo
+        categoricas = dimensoes_bloco(bloco, referencia)
+        if cubo is None:
+            cubo = CuboMesclavel({nome: serie.dtype for nome, serie in categoricas.items()}, medidas, cuboides(referencia))
+        valores = bloco[medidas].to_numpy(dtype=np.float64, na_value=np.nan) if medidas else None
+        cubo.atualizar({nome: CuboMesclavel.codigos(serie) for nome, serie in categoricas.items()}, valores)
+
+    agregar_em_blocos(nome_arquivo, colunas, preparar, atualizar, tamanho_bloco)
+    return cubo
+
+
+def carregar_cubo(nome_arquivo, tamanho_bloco=TAMANHO_BLOCO, forcar=False):
+    """
+    Abre o cubo de um arquivo, calculando-o só se não estiver no cache (ou se `forcar`).
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        tamanho_bloco (int): Linhas lidas por vez quando o cubo precisa ser calculado.
+        forcar (bool): Recalcula o cubo mesmo que ele já esteja no cache.
+
+    Returns:
+        CuboMesclavel: O cubo do arquivo.
+    """
+    caminho = caminho_cubo(nome_arquivo)
+    if os.path.isfile(caminho) and not forcar:
+        return CuboMesclavel.carregar(caminho)
+
+    print(f"Calculando o cubo de '{nome_arquivo}'...")
+    cubo = construir_cubo(nome_arquivo, tamanho_bloco)
+    os.makedirs(CUBOS_PATH, exist_ok=True)
+    # Grava em um arquivo temporário e só depois renomeia, para nunca deixar um cubo pela metade.
+    caminho_tmp = caminho + '.tmp'
+    cubo.salvar(caminho_tmp)
+    # Remove os cubos antigos do mesmo arquivo antes de publicar o novo.
+    prefixo = os.path.basename(caminho).rsplit('.', 2)[0] + '.'
+    for nome in os.listdir(CUBOS_PATH):
+        if nome.startswith(prefixo) and nome.endswith('.npz'):
+            os.remove(os.path.join(CUBOS_PATH, nome))
+    os.replace(caminho_tmp, caminho)
+    return cubo
+
+
+def comparar(nome_arquivo, cubo):
+    """Compara o tempo de alguns recortes do cubo com o groupby equivalente sobre os dados decodificados."""
+    from colunas_mapeadas import abrir_colunas
+
+    referencia = _referencia(nome_arquivo)
+    filtro = FILTROS_CUBO[referencia]
+    colunas = list(dict.fromkeys(o for o, _ in DIMENSOES[referencia].values() if o != 'NOTA_MEDIA_GERAL'))
+    colunas += [c for c in MEDIDAS[referencia] if c not in colunas and c != 'NOTA_MEDIA_GERAL']
+    df = abrir_colunas(nome_arquivo, colunas, filtro)
+    if 'NOTA_MEDIA_GERAL' in MEDIDAS[referencia]:
+        df = df.assign(NOTA_MEDIA_GERAL=media_linhas(df, NOTAS_COLS))
+    df = df.assign(**dimensoes_bloco(df, referencia))
+
+    if referencia.startswith('RESULTADOS'):
+        consultas = [
+            ('média de MT por tipo de escola no Nordeste',
+             lambda: df[df['REGIAO'] == 'Nordeste'].groupby('TIPO_ESCOLA', observed=True)['NU_NOTA_MT'].mean(),
+             lambda: cubo.medias('TIPO_ESCOLA', 'NU_NOTA_MT', filtros={'REGIAO': ['Nordeste']})),
+            ('faixas por região (%)',
+             lambda: df.groupby('REGIAO', observed=True)['FAIXA_DESEMPENHO'].value_counts(normalize=True).unstack().fillna(0) * 100,
+             lambda: cubo.proporcoes('REGIAO', 'FAIXA_DESEMPENHO')),
+        ]
+    else:
+        consultas = [
+            ('renda por cor/raça (%)',
+             lambda: df.groupby('Cor/Raça', observed=True)['RENDA_FAMILIAR'].value_counts(normalize=True).unstack().fillna(0) * 100,
+             lambda: cubo.proporcoes('Cor/Raça', 'RENDA_FAMILIAR')),
+            ('sexo por faixa etária (%)',
+             lambda: df.groupby('Faixa Etária', observed=True)['Sexo'].value_counts(normalize=True).unstack().fillna(0) * 100,
+             lambda: cubo.proporcoes('Faixa Etária', 'Sexo')),
+        ]
+    for descricao, com_groupby, com_cubo in consultas:
+        tempos = []
+        for calcular in (com_groupby, com_cubo):
+            inicio = time.perf_counter()
+            resultado = calcular()
+            tempos.append(time.perf_counter() - inicio)
+        # As médias do cubo são somadas em float64; as do groupby, nas notas float32.
+        iguais = np.allclose(np.ravel(com_groupby().to_numpy(dtype=np.float64)),
+                             np.ravel(resultado.to_numpy(dtype=np.float64)), rtol=1e-5)
+        print(f"  {descricao}: groupby {tempos[0] * 1000:.1f} ms | cubo {tempos[1] * 1000:.1f} ms | "
+              f"mesmo resultado: {'sim' if iguais else 'NÃO'}")
+
+
+def main():
+    """Gera os cubos dos arquivos pedidos e mostra o tamanho e alguns recortes."""
+    parser = argparse.ArgumentParser(description='Cubo OLAP com as dimensões dos temas.')
+    parser.add_argument('--arquivos', nargs='+', default=list(DIMENSOES), help='arquivos da pasta DADOS')
+    parser.add_argument('--forcar', action='store_true', help='recalcula os cubos mesmo que estejam no cache')
+    parser.add_argument('--comparar', action='store_true', help='compara os recortes com o groupby sobre os dados')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO,
+                        help=f'linhas lidas por vez (padrão: {TAMANHO_BLOCO})')
+    args = parser.parse_args()
+
+    for nome_arquivo in args.arquivos:
+        if not os.path.isfile(os.path.join(DADOS_PATH, nome_arquivo)):
+            print(f"Arquivo '{nome_arquivo}' não encontrado; ignorando.")
+            continue
+        inicio = time.perf_counter()
+        cubo = carregar_cubo(nome_arquivo, args.tamanho_bloco, args.forcar)
+        tempo = time.perf_counter() - inicio
+        celulas = sum(c['n'].size for c in cubo.celulas.values())
+        tamanho = os.path.getsize(caminho_cubo(nome_arquivo))
+        print(f"\n{nome_arquivo}: {len(cubo.dimensoes)} dimensões, {len(cubo.cuboides)} cuboides, {celulas} células, "
+              f"{tamanho / 1024:.0f} KB em disco ({tempo:.2f} s)")
+        if 'REGIAO' in cubo.dimensoes:
+            print("Média de Matemática por tipo de escola no Nordeste:")
+            print(cubo.medias('TIPO_ESCOLA', 'NU_NOTA_MT', filtros={'REGIAO': ['Nordeste']}).round(1).to_string())
+        else:
+            print("Participantes por sexo e situação de conclusão:")
+            print(cubo.tabela('Situação Conclusão', 'Sexo').to_string())
+        if args.comparar:
+            comparar(nome_arquivo, cubo)
+
+
+if __name__ == "__main__":
+    main()
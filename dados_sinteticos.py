@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de microdados sintéticos do ENEM para testes e benchmarks.
+
+Cria `RESULTADOS_2024.csv` e `PARTICIPANTES_2024.csv` no mesmo formato dos arquivos
+oficiais (latin1, separados por ';') com distribuições realistas: notas correlacionadas
+entre as áreas, ausências, redações em múltiplos de 20, UF proporcional à população e
+respostas do questionário socioeconômico dependentes da renda. Opcionalmente gera as
+strings de respostas e gabaritos a partir dos parâmetros reais de `ITENS_PROVA_2024.csv`.
+
+Uso:
+    python dados_sinteticos.py --linhas 1000000 --destino /tmp/enem_sintetico
+    python dados_sinteticos.py --linhas 100000 --destino /tmp/enem --respostas
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# UFs e peso aproximado no número de inscritos.
+PESOS_UF = {
+    'SP': 17.0, 'MG': 9.5, 'BA': 7.5, 'RJ': 7.0, 'PE': 5.5, 'CE': 5.5, 'PA': 5.0, 'MA': 4.0, 'PR': 4.5,
+    'RS': 3.5, 'GO': 3.0, 'PB': 2.5, 'AM': 2.5, 'PI': 2.0, 'RN': 2.0, 'SC': 2.5, 'ES': 2.0, 'AL': 1.8,
+    'SE': 1.2, 'DF': 1.5, 'MT': 1.5, 'MS': 1.2, 'TO': 0.8, 'RO': 0.8, 'AC': 0.5, 'AP': 0.5, 'RR': 0.3,
+}
+AREAS = ['CN', 'CH', 'LC', 'MT']
+LETRAS = np.frombuffer(b'ABCDE', dtype='S1')
+
+
+def _gabaritos(itens_file):
+    """Monta o gabarito (string de 45 ou 50 letras) e os parâmetros de cada prova de cada área."""
+    itens = pd.read_csv(itens_file, encoding='latin1', delimiter=';')
+    provas = {}
+    for (area, co_prova), grupo in itens.groupby(['SG_AREA', 'CO_PROVA']):
+        # Língua estrangeira: os 5 itens de inglês vêm antes dos 5 de espanhol no gabarito de LC.
+        grupo = grupo.sort_values('CO_POSICAO')
+        if area == 'LC':
+            estrangeira = grupo[grupo['TP_LINGUA'].notna()].sort_values(['TP_LINGUA', 'CO_POSICAO'])
+            grupo = pd.concat([estrangeira, grupo[grupo['TP_LINGUA'].isna()]])
+        provas.setdefault(area, []).append({
+            'CO_PROVA': co_prova,
+            'gabarito': ''.join(grupo['TX_GABARITO'].fillna('X')),
+            'lingua': grupo['TP_LINGUA'].to_numpy(),
+            'a': grupo['NU_PARAM_A'].fillna(1.0).to_numpy(),
+            'b': grupo['NU_PARAM_B'].fillna(0.0).to_numpy(),
+            'c': grupo['NU_PARAM_C'].fillna(0.2).to_numpy(),
+        })
+    return provas
+
+
+def _respostas(rng, theta, prova, lingua):
+    """Sorteia as respostas de um bloco de candidatos pelo modelo 3PL."""
+    gabarito = np.frombuffer(prova['gabarito'].encode('latin1'), dtype='S1')
+    if len(gabarito) == 50:
+        # Cada candidato responde apenas aos 5 itens da língua escolhida.
+        idx_en = np.r_[0:5, 10:50]
+        idx_es = np.r_[5:50]
+        indices = np.where(lingua[:, None] == 1, idx_es[None, :], idx_en[None, :])
+    else:
+        indices = np.broadcast_to(np.arange(len(gabarito)), (len(theta), len(gabarito)))
+    a, b, c = prova['a'][indices], prova['b'][indices], prova['c'][indices]
+    p = c + (1 - c) / (1 + np.exp(-a * (theta[:, None] - b)))
+    acertou = rng.random(p.shape) < p
+    erradas = LETRAS[rng.integers(0, 5, size=p.shape)]
+    resp = np.where(acertou, gabarito[indices], erradas)
+    return resp.view(f'S{resp.shape[1]}').ravel().astype(str)
+
+
+def gerar_bloco(rng, inicio, n, provas=None):
+    """
+    Gera um bloco de participantes e resultados sintéticos.
+
+    Args:
+        rng (np.random.Generator): Gerador de números aleatórios.
+        inicio (int): Primeiro número de inscrição do bloco.
+        n (int): Quantidade de participantes.
+        provas (dict): Gabaritos e parâmetros das provas; se informado, gera as strings de respostas.
+
+    Returns:
+        tuple: (DataFrame de resultados, DataFrame de participantes).
+    """
+    inscricao = np.arange(inicio, inicio + n, dtype=np.int64) + 240000000000
+    ufs = np.array(list(PESOS_UF))
+    pesos = np.array(list(PESOS_UF.values()))
+    uf = ufs[rng.choice(len(ufs), size=n, p=pesos / pesos.sum())]
+
+    # Perfil socioeconômico: um fator latente de renda influencia escolaridade dos pais e desempenho.
+    renda_latente = rng.normal(size=n)
+    renda = np.clip(np.round(3 + 2.5 * renda_latente + rng.normal(scale=1.5, size=n)), 0, 16).astype(int)
+    esc_pai = np.clip(np.round(3.5 + 1.5 * renda_latente + rng.normal(scale=1.2, size=n)), 0, 7).astype(int)
+    esc_mae = np.clip(np.round(4.0 + 1.5 * renda_latente + rng.normal(scale=1.2, size=n)), 0, 7).astype(int)
+    ocup_pai = np.clip(np.round(1.5 + 1.2 * renda_latente + rng.normal(scale=1.0, size=n)), 0, 5).astype(int)
+    ocup_mae = np.clip(np.round(1.5 + 1.2 * renda_latente + rng.normal(scale=1.0, size=n)), 0, 5).astype(int)
+    letras = np.array(list('ABCDEFGHIJKLMNOPQ'))
+
+    # Escola: privada e federal concentram os candidatos de renda mais alta; muitos não informam.
+    dependencia = np.where(renda_latente > 0.8, 4, np.where(renda_latente > 0.5, 1, rng.choice([2, 3], size=n, p=[0.9, 0.1])))
+    dependencia = np.where(rng.random(n) < 0.6, np.nan, dependencia)
+
+    # Habilidade por área, correlacionada entre si e com a renda.
+    geral = 0.5 * renda_latente + rng.normal(scale=0.85, size=n)
+    theta = {area: geral + rng.normal(scale=0.5, size=n) for area in AREAS}
+
+    presente_dia1 = rng.random(n) < 0.75
+    presente_dia2 = presente_dia1 & (rng.random(n) < 0.95)
+    resultados = {'NU_INSCRICAO': inscricao, 'SG_UF_PROVA': uf, 'TP_DEPENDENCIA_ADM_ESC': dependencia}
+    for area, presente in zip(AREAS, [presente_dia2, presente_dia1, presente_dia1, presente_dia2]):
+        resultados[f'TP_PRESENCA_{area}'] = np.where(presente, 1, np.where(rng.random(n) < 0.01, 2, 0))
+    lingua = rng.choice([0, 1], size=n, p=[0.55, 0.45])
+    for area in AREAS:
+        presente = resultados[f'TP_PRESENCA_{area}'] == 1
+        nota = np.clip(500 + 100 * theta[area] + rng.normal(scale=20, size=n), 300, 980).round(1)
+        resultados[f'NU_NOTA_{area}'] = np.where(presente, nota, np.nan)
+        if provas is not None:
+            opcoes = provas[area]
+            escolha = rng.integers(0, len(opcoes), size=n)
+            co_prova = np.array([p['CO_PROVA'] for p in opcoes])[escolha]
+            respostas = np.full(n, None, dtype=object)
+            gabaritos = np.full(n, None, dtype=object)
+            for i, prova in enumerate(opcoes):
+                sel = (escolha == i) & presente
+                if sel.any():
+                    respostas[sel] = _respostas(rng, theta[area][sel], prova, lingua[sel])
+                    gabaritos[sel] = prova['gabarito']
+            resultados[f'CO_PROVA_{area}'] = np.where(presente, co_prova, np.nan)
+            resultados[f'TX_RESPOSTAS_{area}'] = respostas
+            resultados[f'TX_GABARITO_{area}'] = gabaritos
+    resultados['TP_LINGUA'] = lingua
+    status = np.where(rng.random(n) < 0.96, 1, rng.choice([2, 3, 4, 6, 7, 8, 9], size=n))
+    resultados['TP_STATUS_REDACAO'] = np.where(presente_dia1, status, np.nan)
+    redacao = np.clip(np.round((620 + 160 * geral + rng.normal(scale=80, size=n)) / 20) * 20, 0, 1000)
+    resultados['NU_NOTA_REDACAO'] = np.where(presente_dia1, np.where(status == 1, redacao, 0), np.nan)
+
+    idade = np.clip(np.round(rng.gamma(2.0, 1.6, size=n)) + 1, 1, 20).astype(int)
+    participantes = {
+        'NU_INSCRICAO': inscricao,
+        'TP_FAIXA_ETARIA': idade,
+        'TP_SEXO': rng.choice(['F', 'M'], size=n, p=[0.6, 0.4]),
+        'TP_ESTADO_CIVIL': np.where(idade > 10, rng.choice([1, 2, 3], size=n, p=[0.6, 0.35, 0.05]), rng.choice([0, 1, 2], size=n, p=[0.05, 0.9, 0.05])),
+        'TP_COR_RACA': rng.choice([0, 1, 2, 3, 4, 5, 6], size=n, p=[0.01, 0.40, 0.13, 0.43, 0.015, 0.01, 0.005]),
+        'TP_ST_CONCLUSAO': np.where(idade <= 3, rng.choice([1, 2, 3, 4], size=n, p=[0.2, 0.7, 0.02, 0.08]), rng.choice([1, 2, 3, 4], size=n, p=[0.9, 0.02, 0.03, 0.05])),
+        'Q001': letras[esc_pai], 'Q002': letras[esc_mae],
+        'Q003': letras[ocup_pai], 'Q004': letras[ocup_mae],
+        'Q005': rng.integers(1, 10, size=n), 'Q006': letras[rng.integers(0, 5, size=n)],
+        'Q007': letras[renda],
+    }
+    return pd.DataFrame(resultados), pd.DataFrame(participantes)
+
+
+def gerar_arquivos(destino, linhas, semente=42, respostas=False, tamanho_bloco=500_000,
+                   itens_file=os.path.join('DADOS', 'ITENS_PROVA_2024.csv')):
+    """
+    Gera os CSVs sintéticos em `<destino>/DADOS`.
+
+    Args:
+        destino (str): Pasta de trabalho onde será criada a subpasta DADOS.
+        linhas (int): Número de participantes.
+        semente (int): Semente do gerador, para resultados reprodutíveis.
+        respostas (bool): Se True, gera também CO_PROVA_*, TX_RESPOSTAS_* e TX_GABARITO_*.
+        tamanho_bloco (int): Linhas geradas e gravadas por vez.
+
+    Returns:
+        str: Caminho da pasta DADOS gerada.
+    """
+    dados_path = os.path.join(destino, 'DADOS')
+    os.makedirs(dados_path, exist_ok=True)
+    provas = _gabaritos(itens_file) if respostas else None
+    if os.path.isfile(itens_file) and os.path.abspath(itens_file) != os.path.abspath(os.path.join(dados_path, 'ITENS_PROVA_2024.csv')):
+        pd.read_csv(itens_file, encoding='latin1', delimiter=';').to_csv(
+            os.path.join(dados_path, 'ITENS_PROVA_2024.csv'), sep=';', encoding='latin1', index=False)
+
+    rng = np.random.default_rng(semente)
+    arq_resultados = os.path.join(dados_path, 'RESULTADOS_2024.csv')
+    arq_participantes = os.path.join(dados_path, 'PARTICIPANTES_2024.csv')
+    for inicio in range(0, linhas, tamanho_bloco):
+        n = min(tamanho_bloco, linhas - inicio)
+        df_res, df_part = gerar_bloco(rng, inicio, n, provas)
+        modo, cabecalho = ('w', True) if inicio == 0 else ('a', False)
+        df_res.to_csv(arq_resultados, sep=';', encoding='latin1', index=False, mode=modo, header=cabecalho)
+        df_part.to_csv(arq_participantes, sep=';', encoding='latin1', index=False, mode=modo, header=cabecalho)
+        print(f"{inicio + n}/{linhas} linhas geradas...")
+    return dados_path
+
+
+def main():
+    """Gera os arquivos sintéticos a partir dos argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description='Gera microdados sintéticos do ENEM.')
+    parser.add_argument('--linhas', type=int, default=100_000, help='número de participantes (padrão: 100000)')
+    parser.add_argument('--destino', default='enem_sintetico', help='pasta onde será criada a subpasta DADOS')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--respostas', action='store_true', help='gera também as strings de respostas e gabaritos')
+    args = parser.parse_args()
+    caminho = gerar_arquivos(args.destino, args.linhas, args.semente, args.respostas)
+    print(f"Arquivos sintéticos gerados em '{caminho}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Colunas derivadas por linha (ex: NOTA_MEDIA_GERAL, MEDIA_OBJETIVAS) calculadas com NumPy, sem cópias do DataFrame.
+
+`df[colunas].mean(axis=1)` monta um bloco 2D com as colunas antes de calcular a média, e o
+`.copy()` que costumava vir antes (para criar colunas no recorte filtrado) duplica a tabela
+inteira. Aqui a média é acumulada coluna a coluna em um array float32 pré-alocado (o mesmo
+tipo das notas no cache colunar), e o recorte das linhas é feito uma única vez, só quando
+alguma linha é de fato removida.
+
+A soma em float32, na ordem das colunas, seguida da divisão pela contagem de valores não
+nulos, dá exatamente o mesmo resultado de `mean(axis=1)` do pandas para colunas float32.
+"""
+
+import numpy as np
+
+
+def media_linhas(df, colunas, saida=None):
+    """
+    Média por linha das colunas, ignorando valores nulos (como `df[colunas].mean(axis=1)`).
+
+    Args:
+        df (pd.DataFrame): Dados com as colunas numéricas.
+        colunas (list): Colunas da média.
+        saida (np.ndarray): Array float32 pré-alocado com uma posição por linha (None aloca um novo).
+
+    Returns:
+        np.ndarray: Média de cada linha (float32), NaN quando todas as colunas são nulas.
+    """
+    n = len(df)
+    soma = np.zeros(n, dtype=np.float32) if saida is None else saida
+    soma[:] = 0
+    contagem = np.zeros(n, dtype=np.float32)
+    for coluna in colunas:
+        valores = df[coluna].to_numpy(dtype=np.float32, na_value=np.nan)
+        validos = ~np.isnan(valores)
+        np.add(soma, valores, out=soma, where=validos)
+        contagem += validos
+    with np.errstate(invalid='ignore'):
+        np.divide(soma, contagem, out=soma)
+    return soma
+
+
+def selecionar(df, colunas, mascara=None):
+    """
+    Seleciona colunas e, opcionalmente, linhas, copiando os dados no máximo uma vez.
+
+    Quando a máscara mantém todas as linhas, só as colunas são selecionadas (o pandas
+    compartilha os dados com o DataFrame original até que uma coluna seja alterada).
+
+    Args:
+        df (pd.DataFrame): Dados de origem.
+        colunas (list): Colunas mantidas.
+        mascara (np.ndarray): Linhas mantidas (None = todas).
+
+    Returns:
+        pd.DataFrame: Novo DataFrame, no qual colunas derivadas podem ser criadas sem afetar `df`.
+    """
+    if mascara is None or mascara.all():
+        return df[colunas]
+    return df.loc[mascara, colunas]
+
+
+def derivar(df, colunas, mascara=None, medias=None, novas=None):
+    """
+    Recorta os dados e acrescenta as colunas derivadas, todas de uma vez.
+
+    Args:
+        df (pd.DataFrame): Dados de origem.
+        colunas (list): Colunas mantidas.
+        mascara (np.ndarray): Linhas mantidas (None = todas).
+        medias (dict): {coluna nova: colunas da média por linha}, calculadas já sobre o recorte (float32).
+        novas (dict): {coluna nova: valores já calculados, uma posição por linha de `df`} (ex: uma
+            categoria de `esquema.decodificar`); são recortadas pela mesma máscara.
+
+    Returns:
+        pd.DataFrame: Recorte com as colunas derivadas.
+    """
+    recorte = selecionar(df, colunas, mascara)
+    recortado = len(recorte) < len(df)
+    derivadas = {nome: valores[mascara] if recortado else valores for nome, valores in (novas or {}).items()}
+    derivadas.update({nome: media_linhas(recorte, origem) for nome, origem in (medias or {}).items()})
+    # As colunas novas entram de uma vez; as existentes não são copiadas.
+    return recorte.assign(**derivadas) if derivadas else recorte
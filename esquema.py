@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Esquema central das colunas do ENEM: tipo compacto de cada coluna e rótulo de cada código.
+
+`tipo_coluna` define o tipo usado no cache colunar (flags em int8, notas em float32,
+UF e questionário como categorias). `ROTULOS` traduz os códigos das colunas de perfil
+e do questionário para textos legíveis.
+
+`decodificar` cria a coluna categórica com os rótulos a partir dos códigos int8 (ou dos
+códigos do dicionário das colunas categóricas), com uma tabela de consulta do tamanho
+do mapa e `pd.Categorical.from_codes`. Assim não é criada uma coluna intermediária de
+textos (objeto Python por linha) como acontece com `Series.map` seguido de `pd.Categorical`.
+
+Uso:
+    python esquema.py    # compara tempo e memória da decodificação de PARTICIPANTES_2024.csv
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Código usado no cache para dados ausentes nas colunas de códigos inteiros (ver cache_colunar).
+CODIGO_AUSENTE = -1
+
+# Rótulos das escalas do questionário socioeconômico, compartilhados por mais de uma questão.
+ESCOLARIDADE = {'A': 'Nunca estudou', 'B': 'Fund. I Incompleto', 'C': 'Fund. II Incompleto', 'D': 'Médio Incompleto', 'E': 'Médio Completo', 'F': 'Superior Completo', 'G': 'Pós-graduação', 'H': 'Não sei'}
+OCUPACAO = {'A': 'Grupo 1 (Agricultor)', 'B': 'Grupo 2 (Doméstico)', 'C': 'Grupo 3 (Qualificado)', 'D': 'Grupo 4 (Técnico)', 'E': 'Grupo 5 (Superior)', 'F': 'Não sei'}
+RENDA_FAMILIAR = { 'A': 'Nenhuma Renda', 'B': 'Até 1 Salário Min.', 'C': '1-1.5 Salário Min.', 'D': '1.5-2 Salário Min.', 'E': '2-2.5 Salário Min.', 'F': '2.5-3 Salário Min.', 'G': '3-4 Salário Min.', 'H': '4-5 Salário Min.', 'I': '5-6 Salário Min.', 'J': '6-7 Salário Min.', 'K': '7-8 Salário Min.', 'L': '8-9 Salário Min.', 'M': '9-10 Salário Min.', 'N': '10-12 Salário Min.', 'O': '12-15 Salário Min.', 'P': '15-20 Salário Min.', 'Q': 'Acima de 20 Salário Min.' }
+
+# Rótulo de cada código, por coluna. A ordem das chaves é a ordem padrão das categorias.
+ROTULOS = {
+    'TP_SEXO': {'F': 'Feminino', 'M': 'Masculino'},
+    'TP_FAIXA_ETARIA': {1: '<17', 2: '17', 3: '18', 4: '19', 5: '20', 6: '21', 7: '22', 8: '23', 9: '24', 10: '25', 11: '26-30', 12: '31-35', 13: '36-40', 14: '>40'},
+    'TP_ESTADO_CIVIL': {0: 'Não inf.', 1: 'Solteiro(a)', 2: 'Casado(a)', 3: 'Divorciado(a)', 4: 'Viúvo(a)'},
+    'TP_ST_CONCLUSAO': {1: 'Já concluí', 2: 'Estou cursando', 3: 'Cursando após concluir', 4: 'Não concluí'},
+    'TP_COR_RACA': {0: 'Não declarado', 1: 'Branca', 2: 'Preta', 3: 'Parda', 4: 'Amarela', 5: 'Indígena', 6: 'Não dispõe da informação'},
+    'TP_DEPENDENCIA_ADM_ESC': {1: 'Federal', 2: 'Estadual', 3: 'Municipal', 4: 'Privada'},
+    'Q001': ESCOLARIDADE,
+    'Q002': ESCOLARIDADE,
+    'Q003': OCUPACAO,
+    'Q004': OCUPACAO,
+    'Q007': RENDA_FAMILIAR,
+}
+
+# Ordem das categorias nos gráficos e nos cubos, compartilhada pelos temas e por `cubo.py`.
+ORDEM_ESCOLAS = ['Federal', 'Privada', 'Estadual', 'Municipal'] # Ordena por desempenho esperado.
+ORDEM_RACA = ['Branca', 'Parda', 'Preta', 'Amarela', 'Indígena']
+ORDEM_ESCOLARIDADE = list(ESCOLARIDADE.values())
+ORDEM_OCUPACAO = list(OCUPACAO.values())
+ORDEM_RENDA = list(RENDA_FAMILIAR.values())
+
+# Região geográfica de cada UF, para análises agregadas.
+MAPA_REGIOES = {
+    'AC': 'Norte', 'AP': 'Norte', 'AM': 'Norte', 'PA': 'Norte', 'RO': 'Norte', 'RR': 'Norte', 'TO': 'Norte',
+    'AL': 'Nordeste', 'BA': 'Nordeste', 'CE': 'Nordeste', 'MA': 'Nordeste', 'PB': 'Nordeste', 'PE': 'Nordeste', 'PI': 'Nordeste', 'RN': 'Nordeste', 'SE': 'Nordeste',
+    'DF': 'Centro-Oeste', 'GO': 'Centro-Oeste', 'MT': 'Centro-Oeste', 'MS': 'Centro-Oeste',
+    'ES': 'Sudeste', 'MG': 'Sudeste', 'RJ': 'Sudeste', 'SP': 'Sudeste',
+    'PR': 'Sul', 'RS': 'Sul', 'SC': 'Sul'
+}
+# Ordem das regiões nos gráficos (geograficamente e, em geral, por desempenho).
+ORDEM_REGIOES = ['Sudeste', 'Sul', 'Centro-Oeste', 'Nordeste', 'Norte']
+
+
+def tipo_coluna(coluna):
+    """
+    Retorna o tipo compacto usado no cache para uma coluna do ENEM.
+
+    Args:
+        coluna (str): Nome da coluna no CSV (ex: 'NU_NOTA_MT', 'TP_PRESENCA_CN').
+
+    Returns:
+        str: 'int8', 'float32', 'category', 'string' ou None (mantém o tipo inferido pelo pandas).
+    """
+    if coluna.startswith('NU_NOTA_'):
+        return 'float32'
+    if coluna.startswith(('SG_UF_', 'Q0')) or coluna == 'TP_SEXO':
+        return 'category'
+    if coluna.startswith(('TP_', 'IN_')):
+        return 'int8'
+    if coluna.startswith(('TX_', 'NO_')):
+        return 'string'
+    return None
+
+
+def _tabela_consulta(serie, mapa, posicao):
+    """
+    Monta a tabela que leva cada código da coluna à posição do seu rótulo nas categorias.
+
+    Returns:
+        tuple: (tabela, índices), onde `tabela[índices]` são os códigos das categorias (-1 = ausente).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Uma entrada por categoria do dicionário; a última (-1) recebe os valores ausentes.
+        tabela = np.array([posicao.get(mapa.get(v), -1) for v in serie.cat.categories] + [-1], dtype='int16')
+        indices = serie.cat.codes.to_numpy()
+        return tabela, indices
+    # Códigos inteiros: a tabela cobre do menor ao maior código do mapa, mais uma entrada para os demais.
+    chaves = [int(k) for k in mapa]
+    minimo, maximo = min(chaves), max(chaves)
+    tabela = np.full(maximo - minimo + 2, -1, dtype='int16')
+    for codigo, rotulo in mapa.items():
+        tabela[int(codigo) - minimo] = posicao.get(rotulo, -1)
+    indices = serie.to_numpy(dtype='int16', na_value=CODIGO_AUSENTE) - minimo
+    indices[(indices < 0) | (indices > maximo - minimo)] = len(tabela) - 1
+    return tabela, indices
+
+
+def decodificar(serie, mapa=None, ordem=None, ordenada=True):
+    """
+    Converte uma coluna de códigos em uma coluna categórica com os rótulos, sem criar textos por linha.
+
+    Equivale a `pd.Categorical(serie.map(mapa), categories=ordem, ordered=ordenada)`: códigos fora do
+    mapa e rótulos fora de `ordem` viram ausentes (NaN).
+
+    Args:
+        serie (pd.Series): Códigos (int8 do cache ou categoria, ex: as letras do questionário).
+        mapa (dict): {código: rótulo}. None usa `ROTULOS[serie.name]`. Vários códigos podem ter o mesmo rótulo.
+        ordem (list): Categorias, na ordem desejada. None usa os rótulos na ordem do mapa.
+        ordenada (bool): Se True, a categoria é ordenada (permite comparações e ordena os gráficos).
+
+    Returns:
+        pd.Series: Coluna categórica com o mesmo índice de `serie`.
+    """
+    mapa = ROTULOS[serie.name] if mapa is None else mapa
+    categorias = list(dict.fromkeys(mapa.values())) if ordem is None else list(ordem)
+    posicao = {rotulo: i for i, rotulo in enumerate(categorias)}
+    if not isinstance(serie.dtype, pd.CategoricalDtype) and not pd.api.types.is_integer_dtype(serie.dtype):
+        # Textos (ex: leitura sem cache): passa por categoria, que agrupa os valores repetidos.
+        serie = serie.astype('category')
+    tabela, indices = _tabela_consulta(serie, mapa, posicao)
+    codigos = tabela[indices]
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias, ordered=ordenada),
+                     index=serie.index, name=serie.name)
+
+
+def main():
+    """Compara a decodificação por `Series.map` com `decodificar` nas colunas de PARTICIPANTES."""
+    from cache_colunar import carregar_colunas
+
+    colunas = [c for c in ROTULOS if c != 'TP_DEPENDENCIA_ADM_ESC']
+    df = carregar_colunas('PARTICIPANTES_2024.csv', colunas)
+    print(f"PARTICIPANTES_2024.csv: {len(df)} registros, {len(colunas)} colunas de códigos.")
+
+    inicio = time.perf_counter()
+    com_map = pd.DataFrame({c: df[c].map(ROTULOS[c]) for c in colunas})
+    pico_textos = com_map.memory_usage(deep=True).sum()
+    com_map = pd.DataFrame({c: pd.Categorical(com_map[c], categories=list(ROTULOS[c].values()), ordered=True)
+                            for c in colunas})
+    tempo_map = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    com_codigos = pd.DataFrame({c: decodificar(df[c]) for c in colunas})
+    tempo_codigos = time.perf_counter() - inicio
+
+    iguais = all(com_map[c].equals(com_codigos[c]) for c in colunas)
+    print(f"Series.map + Categorical: {tempo_map:.3f} s, colunas de texto intermediárias: {pico_textos / 2**20:.1f} MB")
+    print(f"decodificar (from_codes): {tempo_codigos:.3f} s, sem colunas intermediárias")
+    print(f"Resultado final: {com_codigos.memory_usage(deep=True).sum() / 2**20:.1f} MB | "
+          f"resultados idênticos: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
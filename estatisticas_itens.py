@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estatísticas dos itens pela Teoria Clássica dos Testes, calculadas em uma única leitura de RESULTADOS.
+
+Para cada item (CO_ITEM), somando todos os cadernos (CO_PROVA / TX_COR) em que aparece:
+- P_VALOR: proporção de acertos (dificuldade clássica; quanto menor, mais difícil);
+- PONTO_BISSERIAL: correlação entre acertar o item e a nota da área (NU_NOTA_*);
+- PCT_A ... PCT_E, PCT_BRANCO, PCT_DUPLA: frequência de cada alternativa marcada (análise de distratores).
+
+Os somatórios (participantes, acertos, soma e soma dos quadrados da nota, soma da nota de
+quem acertou e contagem de cada alternativa) são acumulados por item a cada bloco lido do
+arquivo, com somas por coluna dentro de cada caderno, então a memória depende do tamanho do bloco e do número
+de itens, não do número de participantes. Entram no cálculo os participantes com
+respostas e com a nota da área.
+
+Uso:
+    python estatisticas_itens.py                    # as 4 áreas; grava graficos_itens/estatisticas_itens_2024.csv
+    python estatisticas_itens.py --areas MT --tamanho-bloco 200000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from anos import arquivo_do_ano
+from cache_colunar import TAMANHO_BLOCO, carregar_colunas, ler_em_blocos
+from indice_itens import carregar_indice
+from respostas import ARQUIVO, ARQUIVO_ITENS, AREAS, linhas_por_grupo, respostas_marcadas, tabela_grupos
+
+ARQUIVO_SAIDA = 'estatisticas_itens_2024.csv'
+# Pasta da tabela gravada pela linha de comando (a mesma dos gráficos de `tema_itens.py`).
+PASTA_SAIDA = 'graficos_itens'
+
+# Alternativas contadas na análise de distratores. No ENEM, '.' é resposta em branco e '*' é dupla marcação.
+ALTERNATIVAS = ['A', 'B', 'C', 'D', 'E', 'BRANCO', 'DUPLA', 'OUTRA']
+CODIGO_ALTERNATIVA = np.full(256, ALTERNATIVAS.index('OUTRA'), dtype=np.intp)
+for _i, _letra in enumerate('ABCDE'):
+    CODIGO_ALTERNATIVA[ord(_letra)] = _i
+CODIGO_ALTERNATIVA[ord('.')] = ALTERNATIVAS.index('BRANCO')
+CODIGO_ALTERNATIVA[ord('*')] = ALTERNATIVAS.index('DUPLA')
+
+
+class EstatisticasItens:
+    """
+    Somatórios por item de uma área, atualizados bloco a bloco e mescláveis entre si.
+
+    Args:
+        area (str): 'CN', 'CH', 'LC' ou 'MT'.
+        indice (dict): Índice dos itens (None usa `indice_itens.carregar_indice`).
+    """
+
+    def __init__(self, area, indice=None):
+        self.area = area
+        self.grupos = tabela_grupos(carregar_indice() if indice is None else indice, area)
+        # Índice denso de cada item (0 a K-1) e a posição do item de cada grupo nesse índice.
+        self.co_itens = np.unique(self.grupos['co_item'])
+        self.posicao_item = np.searchsorted(self.co_itens, self.grupos['co_item'])
+        k = len(self.co_itens)
+        self.n = np.zeros(k)
+        self.acertos = np.zeros(k)
+        self.soma_nota = np.zeros(k)
+        self.soma_nota2 = np.zeros(k)
+        self.soma_nota_acerto = np.zeros(k)
+        self.alternativas = np.zeros((k, len(ALTERNATIVAS)))
+
+    def atualizar(self, bloco):
+        """Acumula um bloco de RESULTADOS (CO_PROVA_*, TX_RESPOSTAS_*, NU_NOTA_* e TP_LINGUA)."""
+        marcadas, grupo = respostas_marcadas(bloco, self.area, self.grupos)
+        nota = bloco[f'NU_NOTA_{self.area}'].to_numpy(dtype=np.float64, na_value=np.nan)
+        n_alternativas = len(ALTERNATIVAS)
+        # Dentro de um grupo (caderno e língua) cada coluna é sempre o mesmo item: os somatórios saem
+        # das somas por coluna e são levados aos itens pelo índice do grupo (45 itens distintos).
+        for g, linhas in linhas_por_grupo(np.where(np.isnan(nota), -1, grupo)).items():
+            ids = self.posicao_item[g]
+            m, y = marcadas[linhas], nota[linhas]
+            acerto = m == self.grupos['gabarito'][g]
+            self.n[ids] += len(linhas)
+            self.acertos[ids] += acerto.sum(axis=0)
+            self.soma_nota[ids] += y.sum()
+            self.soma_nota2[ids] += y @ y
+            self.soma_nota_acerto[ids] += y @ acerto
+            codigos = np.arange(m.shape[1]) * n_alternativas + CODIGO_ALTERNATIVA[m]
+            self.alternativas[ids] += np.bincount(codigos.ravel(), minlength=m.shape[1] * n_alternativas
+                                                  ).reshape(m.shape[1], n_alternativas)
+
+    def mesclar(self, outro):
+        """Soma os totais de outro agregado da mesma área (ex: calculado em outro processo)."""
+        for nome in ['n', 'acertos', 'soma_nota', 'soma_nota2', 'soma_nota_acerto', 'alternativas']:
+            setattr(self, nome, getattr(self, nome) + getattr(outro, nome))
+        return self
+
+    def tabela(self, itens):
+        """
+        Monta a tabela final de estatísticas da área.
+
+        Args:
+            itens (pd.DataFrame): Dados de ITENS_PROVA_2024.csv (para gabarito, habilidade e parâmetros da TRI).
+
+        Returns:
+            pd.DataFrame: Uma linha por CO_ITEM.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            p = self.acertos / self.n
+            media = self.soma_nota / self.n
+            desvio = np.sqrt(np.maximum(self.soma_nota2 / self.n - media ** 2, 0))
+            # r_pb = (média de quem acertou - média geral) / desvio * sqrt(p / (1 - p))
+            media_acerto = self.soma_nota_acerto / self.acertos
+            bisserial = (media_acerto - media) / desvio * np.sqrt(p / (1 - p))
+            pct = self.alternativas / self.n[:, None] * 100
+        tabela = pd.DataFrame({'CO_ITEM': self.co_itens, 'SG_AREA': self.area, 'N': self.n.astype(np.int64),
+                               'P_VALOR': p, 'PONTO_BISSERIAL': bisserial})
+        for j, alternativa in enumerate(ALTERNATIVAS):
+            tabela[f'PCT_{alternativa}'] = pct[:, j]
+
+        # Dados do item (iguais em todos os cadernos) e número de cadernos (cores) em que aparece.
+        da_area = itens[itens['SG_AREA'] == self.area]
+        info = da_area.groupby('CO_ITEM').agg(
+            TX_GABARITO=('TX_GABARITO', 'first'), CO_HABILIDADE=('CO_HABILIDADE', 'first'),
+            IN_ITEM_ABAN=('IN_ITEM_ABAN', 'max'), NU_PARAM_A=('NU_PARAM_A', 'first'),
+            NU_PARAM_B=('NU_PARAM_B', 'first'), NU_PARAM_C=('NU_PARAM_C', 'first'),
+            N_CADERNOS=('CO_PROVA', 'nunique'))
+        return tabela.merge(info, left_on='CO_ITEM', right_index=True, how='left')
+
+
+def calcular_estatisticas(areas=AREAS, tamanho_bloco=TAMANHO_BLOCO, itens=None, ano=None):
+    """
+    Calcula as estatísticas de todos os itens das áreas pedidas em uma única leitura de RESULTADOS.
+
+    Args:
+        areas (list): Áreas do conhecimento.
+        tamanho_bloco (int): Linhas lidas por vez.
+        itens (pd.DataFrame): Dados de ITENS_PROVA do ano (None carrega do cache colunar).
+        ano (int): Ano dos dados (None = 2024): lê RESULTADOS e ITENS_PROVA desse ano.
+
+    Returns:
+        pd.DataFrame: Uma linha por item, com as estatísticas e os dados do item.
+    """
+    itens = carregar_colunas(arquivo_do_ano(ARQUIVO_ITENS, ano)) if itens is None else itens
+    indice = carregar_indice(ano)
+    agregados = [EstatisticasItens(area, indice) for area in areas]
+    colunas = ['TP_LINGUA'] + [f'{prefixo}_{area}' for area in areas
+                               for prefixo in ['CO_PROVA', 'TX_RESPOSTAS', 'NU_NOTA']]
+    for bloco in ler_em_blocos(arquivo_do_ano(ARQUIVO, ano), colunas, tamanho_bloco):
+        for agregado in agregados:
+            agregado.atualizar(bloco)
+    return pd.concat([agregado.tabela(itens) for agregado in agregados], ignore_index=True)
+
+
+def main():
+    """Calcula as estatísticas dos itens, grava a tabela e mostra um resumo por área."""
+    parser = argparse.ArgumentParser(description='Estatísticas clássicas dos itens (p-valor, ponto-bisserial, distratores).')
+    parser.add_argument('--areas', nargs='+', choices=AREAS, default=AREAS)
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO,
+                        help=f'linhas de RESULTADOS lidas por vez (padrão: {TAMANHO_BLOCO})')
+    saida_padrao = os.path.join(PASTA_SAIDA, ARQUIVO_SAIDA)
+    parser.add_argument('--saida', default=saida_padrao, help=f'arquivo CSV da tabela (padrão: {saida_padrao})')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tabela = calcular_estatisticas(args.areas, args.tamanho_bloco)
+    tempo = time.perf_counter() - inicio
+    os.makedirs(os.path.dirname(args.saida) or '.', exist_ok=True)
+    tabela.to_csv(args.saida, sep=';', index=False, float_format='%.4f')
+    print(f"{len(tabela)} itens em {tempo:.2f} s; tabela gravada em '{args.saida}'.")
+    resumo = tabela.groupby('SG_AREA').agg(itens=('CO_ITEM', 'size'), p_valor_medio=('P_VALOR', 'mean'),
+                                           bisserial_medio=('PONTO_BISSERIAL', 'mean'),
+                                           bisserial_abaixo_020=('PONTO_BISSERIAL', lambda r: int((r < 0.2).sum())))
+    print(resumo.round(3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Executa todos os temas em um único processo, carregando cada arquivo de dados uma só vez.
+
+O script calcula a união das colunas usadas pelos temas de cada arquivo, carrega
+RESULTADOS e PARTICIPANTES uma única vez, aplica a limpeza compartilhada e entrega
+os DataFrames em memória para a função `main` de cada tema. As colunas são abertas
+mapeadas do disco (`colunas_mapeadas`): no modo subprocesso, todos os temas dividem as
+mesmas páginas do cache do sistema operacional, sem reconverter o Parquet.
+
+Uso:
+    python executar_temas.py                       # todos os temas em um único processo
+    python executar_temas.py --temas academico desempenho
+    python executar_temas.py --modo subprocesso    # um processo por tema (como testar_temas.py)
+    python executar_temas.py --comparar            # mede tempo e memória dos dois modos
+    python executar_temas.py --streaming           # só as estatísticas descritivas, lendo em blocos
+    python executar_temas.py --streaming --particoes  # idem, com um processo por partição de UF (institucional)
+    python executar_temas.py --anos 2023 2024      # os temas de cada ano (gráficos em graficos_<tema>/<ano>/)
+    python executar_temas.py --interativo          # exibe cada gráfico na tela (renderização sequencial)
+    python executar_temas.py --forcar              # renderiza todos os gráficos, mesmo os que não mudaram
+    python executar_temas.py --rastrear rastros/temas.jsonl --chrome rastros/temas.trace.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import matplotlib.pyplot as plt
+
+import tema_academico
+import tema_desempenho
+import tema_instucional
+import tema_perfil_estudante
+import tema_socieconomico
+from anos import ANO_PADRAO, arquivo_do_ano
+from cache_colunar import TAMANHO_BLOCO, colunas_disponiveis
+from colunas_mapeadas import abrir_colunas
+from rastreamento import ativar, contexto, etapa
+
+# Temas disponíveis, na mesma ordem de testar_temas.py.
+TEMAS = {
+    'desempenho': tema_desempenho,
+    'academico': tema_academico,
+    'perfil_estudante': tema_perfil_estudante,
+    'instucional': tema_instucional,
+    'socieconomico': tema_socieconomico,
+}
+
+# Filtro nomeado (`limpeza.FILTROS`) aplicado uma única vez ao arquivo antes de entregá-lo aos temas.
+# O resultado do filtro fica guardado em disco (`cache_filtros`) e é reaproveitado nas próximas execuções.
+LIMPEZA_COMPARTILHADA = {
+    'RESULTADOS_2024.csv': 'presentes',
+}
+
+
+def pico_memoria_mb(incluir_filhos=False):
+    """
+    Retorna o pico de memória residente (RSS) do processo, em MB.
+
+    Args:
+        incluir_filhos (bool): Se True, considera também o maior pico entre os subprocessos já finalizados.
+    """
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if incluir_filhos:
+        pico = max(pico, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # No Linux ru_maxrss é dado em KB; no macOS, em bytes.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def colunas_por_arquivo(nomes_temas, ano=None):
+    """
+    Agrupa os temas pelo arquivo que leem e calcula a união das colunas de cada arquivo.
+
+    Args:
+        nomes_temas (list): Temas a executar.
+        ano (int): Ano dos arquivos (None = 2024).
+
+    Returns:
+        dict: {arquivo: {'colunas': [...], 'temas': [...]}}, preservando a ordem das colunas.
+    """
+    arquivos = {}
+    for nome in nomes_temas:
+        modulo = TEMAS[nome]
+        info = arquivos.setdefault(arquivo_do_ano(modulo.ARQUIVO, ano), {'colunas': [], 'temas': []})
+        info['temas'].append(nome)
+        info['colunas'] += [c for c in modulo.COLUNAS if c not in info['colunas']]
+    return arquivos
+
+
+def executar_unico(nomes_temas, interativo=False, processos=None, forcar=False, ano=None):
+    """Executa os temas no processo atual, carregando cada arquivo (do ano pedido) uma única vez."""
+    # O ano entra em todos os eventos do rastreamento (ver `rastreamento.py`).
+    with contexto(ano=ano or ANO_PADRAO):
+        for arquivo, info in colunas_por_arquivo(nomes_temas, ano).items():
+            disponiveis = colunas_disponiveis(arquivo)
+            colunas = [c for c in info['colunas'] if c in disponiveis]
+            print(f"\n{'='*50}")
+            print(f"CARREGANDO {arquivo} ({len(colunas)} colunas) para: {', '.join(info['temas'])}")
+            print(f"{'='*50}")
+            # Os filtros são declarados pelo nome do arquivo do ano de referência.
+            filtro = LIMPEZA_COMPARTILHADA.get(arquivo_do_ano(arquivo, ANO_PADRAO))
+            with etapa('carregar', arquivo=arquivo, filtro=filtro, temas=info['temas']) as medicao:
+                df = abrir_colunas(arquivo, colunas, filtro)
+                medicao.linhas_saida = len(df)
+            if filtro is not None:
+                print(f"Dados carregados com sucesso: {len(df)} registros após o filtro '{filtro}'.")
+            else:
+                print(f"Dados carregados com sucesso: {len(df)} registros.")
+
+            for nome in info['temas']:
+                print(f"\n{'='*50}")
+                print(f"EXECUTANDO TEMA: {nome.upper()}")
+                print(f"{'='*50}")
+                TEMAS[nome].main(df, interativo=interativo, processos=processos, forcar=forcar,
+                                 anos=None if ano is None else [ano])
+                # Fecha as figuras que o tema deixou abertas, para não acumularem memória entre os temas.
+                plt.close('all')
+            # Libera o arquivo antes de carregar o próximo.
+            del df
+
+
+def executar_streaming(nomes_temas, tamanho_bloco=TAMANHO_BLOCO, ano=None, por_particao=False, processos=None):
+    """
+    Calcula as estatísticas descritivas dos temas lendo os dados (do ano pedido) em blocos (memória limitada).
+
+    Com `por_particao`, os temas que possuem `estatisticas_por_uf` leem as partições por UF de
+    RESULTADOS (`particoes.py`), um processo por UF, e mesclam os agregados de cada uma.
+    """
+    for nome in nomes_temas:
+        modulo = TEMAS[nome]
+        if por_particao and hasattr(modulo, 'estatisticas_por_uf'):
+            print(f"\n{'='*50}")
+            print(f"ESTATÍSTICAS POR PARTIÇÃO DE UF: {nome.upper()}")
+            print(f"{'='*50}")
+            with contexto(tema=nome), etapa('estatisticas_por_uf', processos=processos):
+                modulo.estatisticas_por_uf(processos=processos, ano=ano)
+            continue
+        if not hasattr(modulo, 'estatisticas_streaming'):
+            print(f"Tema {nome} não possui modo streaming; ignorando.")
+            continue
+        print(f"\n{'='*50}")
+        print(f"ESTATÍSTICAS EM BLOCOS: {nome.upper()}")
+        print(f"{'='*50}")
+        with contexto(tema=nome), etapa('estatisticas_streaming', tamanho_bloco=tamanho_bloco):
+            modulo.estatisticas_streaming(tamanho_bloco, ano=ano)
+
+
+def executar_subprocessos(nomes_temas, interativo=False, processos=None, forcar=False, anos=None):
+    """Executa cada tema em um processo separado, lendo os dados do disco a cada vez."""
+    opcoes = ['--interativo'] if interativo else []
+    if forcar:
+        opcoes.append('--forcar')
+    if anos is not None:
+        opcoes += ['--anos', *map(str, anos)]
+    if processos is not None:
+        opcoes += ['--processos', str(processos)]
+    sucessos = 0
+    for nome in nomes_temas:
+        print(f"Executando tema_{nome}.py em subprocesso...")
+        arquivo_tema = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"tema_{nome}.py")
+        resultado = subprocess.run([sys.executable, arquivo_tema, *opcoes], capture_output=True, text=True)
+        if resultado.returncode == 0:
+            sucessos += 1
+        else:
+            print(f"❌ Erro ao executar tema {nome}:\n{resultado.stderr}")
+    return sucessos
+
+
+def medir(modo, nomes_temas, tamanho_bloco=TAMANHO_BLOCO, processos=None, forcar=False, anos=None,
+          por_particao=False):
+    """
+    Executa os temas no modo indicado e mede o tempo total e o pico de memória.
+
+    Com `anos`, os temas são executados para cada ano (nos modos único e streaming, um ano por vez).
+    Com `por_particao`, o modo streaming usa as partições por UF (ver `executar_streaming`).
+
+    Returns:
+        dict: {'modo', 'temas', 'tempo_s', 'pico_rss_mb'}.
+    """
+    inicio = time.perf_counter()
+    if modo == 'subprocesso':
+        executar_subprocessos(nomes_temas, processos=processos, forcar=forcar, anos=anos)
+    for ano in ([None] if anos is None or modo == 'subprocesso' else anos):
+        if modo == 'unico':
+            executar_unico(nomes_temas, processos=processos, forcar=forcar, ano=ano)
+        elif modo == 'streaming':
+            executar_streaming(nomes_temas, tamanho_bloco, ano, por_particao, processos)
+    return {
+        'modo': modo,
+        'temas': nomes_temas,
+        'tempo_s': round(time.perf_counter() - inicio, 2),
+        'pico_rss_mb': round(pico_memoria_mb(incluir_filhos=(modo == 'subprocesso')), 1),
+    }
+
+
+def comparar(nomes_temas, processos=None):
+    """Roda cada modo em um processo novo (para medir o pico de memória isoladamente) e compara."""
+    medicoes = []
+    for modo in ['subprocesso', 'unico']:
+        # --forcar: os dois modos precisam renderizar todos os gráficos para a comparação ser justa.
+        cmd = [sys.executable, os.path.abspath(__file__), '--modo', modo, '--json', '--forcar', '--temas', *nomes_temas]
+        if processos is not None:
+            cmd += ['--processos', str(processos)]
+        resultado = subprocess.run(cmd, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            print(f"❌ Erro no modo {modo}:\n{resultado.stderr}")
+            return
+        # A medição é a última linha da saída.
+        medicoes.append(json.loads(resultado.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'Modo':<14}{'Tempo (s)':>12}{'Pico RSS (MB)':>16}")
+    for m in medicoes:
+        print(f"{m['modo']:<14}{m['tempo_s']:>12.2f}{m['pico_rss_mb']:>16.1f}")
+    sub, unico = medicoes
+    if unico['tempo_s'] > 0:
+        print(f"\nGanho de tempo do modo único: {sub['tempo_s'] / unico['tempo_s']:.2f}x")
+
+
+def main():
+    """Função principal: interpreta os argumentos e executa os temas."""
+    parser = argparse.ArgumentParser(description='Executa os temas do ENEM carregando cada arquivo uma única vez.')
+    parser.add_argument('--temas', nargs='+', choices=list(TEMAS), default=list(TEMAS),
+                        help='temas a executar (padrão: todos)')
+    parser.add_argument('--modo', choices=['unico', 'subprocesso'], default='unico',
+                        help="'unico' compartilha os dados em memória; 'subprocesso' roda um processo por tema")
+    parser.add_argument('--comparar', action='store_true', help='compara tempo total e pico de memória dos dois modos')
+    parser.add_argument('--streaming', action='store_true',
+                        help='calcula apenas as estatísticas descritivas, lendo os dados em blocos')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO,
+                        help=f'linhas por bloco no modo streaming (padrão: {TAMANHO_BLOCO})')
+    parser.add_argument('--particoes', action='store_true',
+                        help='com --streaming, lê as partições por UF em paralelo nos temas que as suportam')
+    parser.add_argument('--interativo', '--interactive', dest='interativo', action='store_true',
+                        help='exibe cada gráfico na tela (renderização sequencial, sem medição)')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='processos usados na renderização dos gráficos (padrão: um por núcleo)')
+    parser.add_argument('--forcar', action='store_true',
+                        help='renderiza todos os gráficos, mesmo os que não mudaram desde a última execução')
+    parser.add_argument('--anos', nargs='+', type=int, default=None,
+                        help='anos analisados, com os gráficos de cada ano em graficos_<tema>/<ano>/ (padrão: 2024)')
+    parser.add_argument('--rastrear', default=None, metavar='LOG',
+                        help='grava o tempo, a CPU, a memória e as linhas de cada etapa e gráfico neste log JSON')
+    parser.add_argument('--chrome', default=None, metavar='ARQUIVO',
+                        help='com --rastrear, grava também o rastro no formato de eventos do Chrome')
+    parser.add_argument('--json', action='store_true', help='imprime a medição final em JSON (uso interno)')
+    args = parser.parse_args()
+    if args.chrome and not args.rastrear:
+        parser.error('--chrome requer --rastrear')
+    if args.particoes and not args.streaming:
+        parser.error('--particoes requer --streaming')
+
+    if not os.path.exists("DADOS"):
+        print("❌ ERRO: Pasta 'DADOS' não encontrada!")
+        return
+
+    if args.comparar:
+        comparar(args.temas, args.processos)
+        return
+
+    if args.rastrear:
+        # Os subprocessos (temas e renderização) herdam o rastreamento e gravam no mesmo log.
+        ativar(args.rastrear, args.chrome)
+
+    if args.interativo:
+        # No modo interativo o tempo depende do usuário fechar as janelas, então não há medição.
+        if args.modo == 'unico':
+            for ano in args.anos or [None]:
+                executar_unico(args.temas, interativo=True, ano=ano)
+        else:
+            executar_subprocessos(args.temas, interativo=True, anos=args.anos)
+        return
+
+    modo = 'streaming' if args.streaming else args.modo
+    medicao = medir(modo, args.temas, args.tamanho_bloco, args.processos, args.forcar, args.anos, args.particoes)
+    if args.json:
+        print(json.dumps(medicao))
+    else:
+        print(f"\n📊 Tempo total: {medicao['tempo_s']:.2f} s | Pico de memória: {medicao['pico_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
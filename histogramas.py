@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Histogramas e densidades (KDE) calculados sobre contagens em faixas fixas.
+
+`sns.histplot` e `sns.kdeplot` percorrem todas as linhas a cada gráfico; a KDE, em
+particular, avalia um kernel por participante. Aqui as notas são contadas uma única
+vez em faixas finas por grupo (`HistogramaMesclavel`, com `np.bincount`) e a densidade
+é obtida convoluindo essas contagens com um kernel gaussiano via FFT. Os gráficos
+são desenhados a partir desses arrays compactos, com custo independente do número
+de linhas. Os boxplots seguem a mesma ideia, com a contagem exata de cada nota possível
+(`QuantisMesclaveis`) no lugar da ordenação das colunas, e os gráficos de dispersão são
+substituídos pela imagem das contagens de pares de notas em células (`Histograma2DMesclavel`),
+que usa todos os participantes e gera arquivos pequenos, sem amostragem (um painel por grupo).
+"""
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.colors import LogNorm
+
+from agregacao_streaming import Histograma2DMesclavel, HistogramaMesclavel, QuantisMesclaveis
+from cache_colunar import TAMANHO_BLOCO
+
+# Largura das faixas finas usadas na contagem (as notas vão de 0 a 1000).
+LARGURA_FINA = 1.0
+# Alcance do kernel gaussiano, em larguras de banda.
+RAIO_KERNEL = 4.0
+# Largura das células dos histogramas 2D (pares de notas).
+LARGURA_2D = 5.0
+# Passo das notas da redação (0, 20, 40, ..., 1000): a largura das células no eixo da redação.
+PASSO_REDACAO = 20.0
+
+
+def histograma_por_grupo(valores, grupos=None, inicio=0.0, fim=1000.0, largura=LARGURA_FINA):
+    """
+    Conta os valores em faixas fixas, por grupo, em uma única passada.
+
+    Args:
+        valores (array-like): Notas (NaN são ignorados).
+        grupos (array-like): Grupo de cada nota. None acumula tudo em um único grupo.
+        inicio, fim, largura (float): Faixas do histograma.
+
+    Returns:
+        HistogramaMesclavel: Contagens por grupo.
+    """
+    return HistogramaMesclavel(inicio, fim, largura).atualizar(valores, grupos)
+
+
+def quantis_por_grupo(valores, grupos=None, resolucao=0.1):
+    """
+    Conta cada nota possível (0 a 1000, em passos de `resolucao`) por grupo, para quantis e boxplots.
+
+    Returns:
+        QuantisMesclaveis: Contagens exatas por grupo.
+    """
+    return QuantisMesclaveis(0.0, 1000.0, resolucao).atualizar(valores, grupos)
+
+
+def histograma_2d_por_grupo(x, y, grupos=None, inicio=0.0, fim=1000.0, largura=LARGURA_2D, largura_y=None,
+                            tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Conta os pares (x, y) em células fixas, por grupo, percorrendo os dados em blocos.
+
+    Os blocos limitam a memória temporária (índices das células) ao tamanho do bloco.
+
+    Args:
+        x, y (array-like): Notas de cada eixo (pares com NaN são ignorados).
+        grupos (array-like): Grupo de cada par. None acumula tudo em um único grupo.
+        inicio, fim, largura (float): Células do histograma.
+        largura_y (float): Largura das células no eixo y (None = `largura`).
+        tamanho_bloco (int): Pares contados por vez.
+
+    Returns:
+        Histograma2DMesclavel: Contagens por grupo.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    # Os grupos continuam categóricos: só os rótulos de cada bloco são convertidos.
+    grupos = None if grupos is None else pd.Series(grupos).array
+    histograma = Histograma2DMesclavel(inicio, fim, largura, largura_y)
+    for i in range(0, len(x), tamanho_bloco):
+        bloco = slice(i, i + tamanho_bloco)
+        histograma.atualizar(x[bloco], y[bloco], None if grupos is None else grupos[bloco])
+    return histograma
+
+
+def kde_em_grade(contagens, inicio, largura, ajuste=1.0):
+    """
+    Estima a densidade (KDE gaussiana) a partir de contagens em faixas de mesma largura.
+
+    A largura de banda segue a regra de Scott (a mesma de `sns.kdeplot`), calculada com a
+    média e o desvio das contagens. A convolução das contagens com o kernel é feita por FFT,
+    então o custo depende do número de faixas, e não do número de valores.
+
+    Args:
+        contagens (np.ndarray): Contagem de valores em cada faixa.
+        inicio (float): Borda esquerda da primeira faixa.
+        largura (float): Largura das faixas.
+        ajuste (float): Multiplicador da largura de banda (equivalente ao `bw_adjust` do seaborn).
+
+    Returns:
+        tuple: (x, densidade), do menor ao maior valor observado, estendida pelo alcance do kernel
+            nas duas pontas (como o `cut` do seaborn).
+    """
+    contagens = np.asarray(contagens, dtype='float64')
+    n = contagens.sum()
+    if n < 2:
+        centros = inicio + largura * (np.arange(len(contagens)) + 0.5)
+        return centros, np.zeros_like(centros)
+    # Considera só as faixas entre o menor e o maior valor observado.
+    ocupadas = np.flatnonzero(contagens)
+    inicio = inicio + largura * ocupadas[0]
+    contagens = contagens[ocupadas[0]:ocupadas[-1] + 1]
+    centros = inicio + largura * (np.arange(len(contagens)) + 0.5)
+    media = np.dot(contagens, centros) / n
+    desvio = np.sqrt(np.dot(contagens, (centros - media) ** 2) / (n - 1))
+    banda = max(ajuste * desvio * n ** (-1 / 5), largura)
+
+    # Kernel amostrado nas mesmas faixas, de -RAIO_KERNEL a +RAIO_KERNEL larguras de banda.
+    raio = int(np.ceil(RAIO_KERNEL * banda / largura))
+    deslocamentos = largura * np.arange(-raio, raio + 1)
+    kernel = np.exp(-0.5 * (deslocamentos / banda) ** 2) / (banda * np.sqrt(2 * np.pi))
+
+    # Convolução completa via FFT (o resultado cobre também as bordas estendidas).
+    tamanho = len(contagens) + len(kernel) - 1
+    n_fft = 1 << (tamanho - 1).bit_length()
+    convolucao = np.fft.irfft(np.fft.rfft(contagens, n_fft) * np.fft.rfft(kernel, n_fft), n_fft)[:tamanho]
+    x = inicio + largura * (np.arange(tamanho) - raio + 0.5)
+    return x, np.clip(convolucao, 0, None) / n
+
+
+def densidades(histograma, ordem=None, ajuste=1.0):
+    """
+    Calcula a KDE de cada grupo de um histograma.
+
+    Returns:
+        dict: {grupo: (x, densidade)}, na ordem de `ordem` (ou de aparição dos grupos).
+    """
+    grupos = ordem if ordem is not None else list(histograma.contagens)
+    return {g: kde_em_grade(histograma.contagens[g], histograma.inicio, histograma.largura, ajuste)
+            for g in grupos if g in histograma.contagens}
+
+
+def desenhar_histograma(histograma, ordem=None, titulo_legenda=None, n_faixas=None, palette=None, kde=False, ax=None, **kwargs):
+    """
+    Desenha um histograma (por grupo) a partir das contagens, com `sns.histplot` ponderado.
+
+    Args:
+        histograma (HistogramaMesclavel): Contagens em faixas finas.
+        ordem (list): Grupos a desenhar, na ordem da legenda. None usa todos.
+        titulo_legenda (str): Nome do grupo na legenda. None desenha um único histograma sem legenda.
+        n_faixas (int): Número aproximado de faixas exibidas (as faixas finas são somadas).
+        palette: Paleta do seaborn para os grupos.
+        kde (bool): Se True, sobrepõe a densidade de cada grupo na escala de contagens (como `kde=True`).
+        **kwargs: Repassados ao `sns.histplot` (ex: element='step', linewidth=2).
+    """
+    exibido = histograma
+    if n_faixas:
+        exibido = histograma.recortar()
+        exibido = exibido.reagrupar(np.ceil(exibido.n_faixas / n_faixas))
+    grupos = [g for g in (ordem if ordem is not None else list(histograma.contagens)) if g in histograma.contagens]
+    centros = exibido.bordas[:-1] + exibido.largura / 2
+    tabela = pd.concat([pd.DataFrame({'valor': centros, 'grupo': g, 'contagem': exibido.contagens[g]}) for g in grupos],
+                       ignore_index=True).rename(columns={'grupo': titulo_legenda or 'grupo'})
+    hue = titulo_legenda if titulo_legenda else None
+    ax = sns.histplot(data=tabela, x='valor', weights='contagem', bins=list(exibido.bordas), hue=hue,
+                      hue_order=grupos if hue else None, palette=palette if hue else None, ax=ax, **kwargs)
+    if kde:
+        # A densidade usa as faixas finas; a escala n * largura exibida a coloca na altura das barras.
+        escala = {g: histograma.contagens[g].sum() * exibido.largura for g in grupos}
+        cores = palette if hue else [ax.patches[0].get_facecolor()[:3]]
+        desenhar_densidades(densidades(histograma, grupos), palette=cores, fill=False, escala=escala, ax=ax)
+    return ax
+
+
+def desenhar_densidades(curvas, titulo_legenda=None, palette=None, fill=True, escala=None, ax=None):
+    """
+    Desenha curvas de densidade já calculadas, no estilo de `sns.kdeplot(fill=True)`.
+
+    Args:
+        curvas (dict): {rótulo: (x, densidade)}, como o retorno de `densidades`.
+        titulo_legenda (str): Título da legenda. None não cria legenda.
+        palette: Paleta do seaborn (None usa a paleta atual).
+        fill (bool): Se True, preenche a área sob cada curva.
+        escala (dict): Multiplicador de cada curva (ex: n * largura da faixa para sobrepor a um histograma de contagens).
+    """
+    ax = ax or plt.gca()
+    cores = sns.color_palette(palette, n_colors=len(curvas))
+    for (rotulo, (x, y)), cor in zip(curvas.items(), cores):
+        if escala is not None:
+            y = y * escala[rotulo]
+        if fill:
+            ax.fill_between(x, y, color=cor, alpha=0.25, linewidth=0)
+        ax.plot(x, y, color=cor, label=rotulo)
+    if titulo_legenda is not None:
+        ax.legend(title=titulo_legenda)
+    ax.set_ylim(bottom=0)
+    return ax
+
+
+def desenhar_boxplot(quantis, ordem=None, palette=None, ax=None):
+    """
+    Desenha boxplots a partir de `QuantisMesclaveis`, no estilo de `sns.boxplot`, sem ordenar os dados.
+
+    Args:
+        quantis (QuantisMesclaveis): Contagens exatas dos valores por grupo.
+        ordem (list): Grupos no eixo x, na ordem desejada. None usa a ordem de aparição.
+        palette: Paleta do seaborn (uma cor por grupo). None usa a primeira cor da paleta atual em todas as caixas.
+    """
+    ax = ax or plt.gca()
+    grupos = [g for g in (ordem if ordem is not None else list(quantis.contagens)) if quantis.n(g) > 0]
+    resumos = [quantis.resumo_boxplot(g) for g in grupos]
+    cores = sns.color_palette(palette, n_colors=len(grupos)) if palette is not None else [sns.color_palette()[0]] * len(grupos)
+    # Mesmas proporções do seaborn: cores com saturação de 75% e linhas em cinza escuro.
+    linha = {'color': '.26', 'linewidth': 1.25}
+    caixas = ax.bxp(resumos, positions=range(len(grupos)), widths=0.8, patch_artist=True, showfliers=True,
+                    boxprops={'edgecolor': '.26', 'linewidth': 1.25}, whiskerprops=linha, capprops=linha,
+                    medianprops=linha, flierprops={'marker': 'd', 'markerfacecolor': '.26', 'markeredgecolor': '.26', 'markersize': 5})
+    for caixa, cor in zip(caixas['boxes'], cores):
+        caixa.set_facecolor(sns.desaturate(cor, 0.75))
+    ax.set_xticks(range(len(grupos)), [str(g) for g in grupos])
+    ax.set_xlim(-0.5, len(grupos) - 0.5)
+    return ax
+
+
+def desenhar_densidade_2d(histograma, ordem=None, cmap='viridis', fig=None):
+    """
+    Desenha as contagens de um `Histograma2DMesclavel` como imagem, no lugar de um gráfico de dispersão.
+
+    Cada célula é colorida pelo número de participantes, em escala logarítmica. Com um único
+    grupo (None), o desenho ocupa os eixos atuais e tem uma barra de cores com as contagens.
+    Com grupos, cada grupo tem o seu painel, nos mesmos eixos, colorido pela fração do grupo
+    em cada célula (grupos de tamanhos diferentes ficam comparáveis); sobrepor os grupos em
+    uma única imagem esconderia os menores.
+
+    Args:
+        histograma (Histograma2DMesclavel): Contagens dos pares.
+        ordem (list): Grupos a desenhar, na ordem dos painéis. None usa todos.
+        cmap (str): Mapa de cores.
+        fig (matplotlib.figure.Figure): Figura dos painéis (None usa a figura atual).
+
+    Returns:
+        list: Eixos desenhados (um por grupo).
+    """
+    eixo_x, eixo_y = histograma.ocupadas()
+    extensao = [histograma.bordas[eixo_x.start], histograma.bordas[eixo_x.stop],
+                histograma.bordas_y[eixo_y.start], histograma.bordas_y[eixo_y.stop]]
+    grupos = [g for g in (ordem if ordem is not None else list(histograma.contagens)) if g in histograma.contagens]
+    # As imagens têm o eixo y nas linhas; as contagens guardam o eixo x nas linhas.
+    imagens = {g: histograma.contagens[g][eixo_x, eixo_y].T.astype('float64') for g in grupos}
+
+    if grupos == [None]:
+        ax = plt.gca()
+        imagem = ax.imshow(np.ma.masked_equal(imagens[None], 0), origin='lower', extent=extensao, aspect='auto',
+                           interpolation='nearest', cmap=cmap, norm=LogNorm(vmin=1, vmax=max(imagens[None].max(), 1)))
+        plt.colorbar(imagem, ax=ax, label='Participantes')
+        return [ax]
+
+    fracoes = {g: imagem / max(imagem.sum(), 1) for g, imagem in imagens.items()}
+    positivas = np.concatenate([f[f > 0] for f in fracoes.values()])
+    norma = LogNorm(vmin=positivas.min(), vmax=positivas.max()) if len(positivas) else None
+    fig = fig or plt.gcf()
+    n_colunas = int(np.ceil(np.sqrt(len(grupos))))
+    eixos = np.atleast_1d(fig.subplots(-(-len(grupos) // n_colunas), n_colunas, sharex=True, sharey=True)).ravel()
+    for ax, g in zip(eixos, grupos):
+        imagem = ax.imshow(np.ma.masked_equal(fracoes[g], 0), origin='lower', extent=extensao, aspect='auto',
+                           interpolation='nearest', cmap=cmap, norm=norma)
+        ax.set_title(f'{g} (n = {int(imagens[g].sum()):,})'.replace(',', '.'))
+    for ax in eixos[len(grupos):]:
+        ax.set_visible(False)
+    fig.colorbar(imagem, ax=list(eixos[:len(grupos)]), label='Fração do grupo na célula')
+    return list(eixos[:len(grupos)])
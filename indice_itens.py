@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice denso dos itens de `ITENS_PROVA_2024.csv` por caderno, língua estrangeira e posição.
+
+O índice é um array estruturado do NumPy com formato [caderno][língua][posição]: cada
+célula guarda o item (CO_ITEM), o gabarito, os parâmetros a/b/c da TRI e as marcas de
+item anulado e adaptado. O caderno é a linha de CO_PROVA em `provas` (a tabela
+`linha_prova` leva o CO_PROVA direto à linha), a língua é 0 (inglês) ou 1 (espanhol) e a
+posição é CO_POSICAO (1 a 180). Fora das posições 1 a 5 de LC, as duas línguas têm o
+mesmo item.
+
+Consultar milhões de pares (CO_PROVA, CO_POSICAO) vira uma indexação do NumPy
+(`itens[linha_prova[co_prova], lingua, posicao]`), sem merge nem dicionário por linha.
+O índice é gravado em `DADOS/.cache/indice_itens` e aberto mapeado do disco.
+
+Uso:
+    python indice_itens.py     # gera o índice e mede a consulta de 10 milhões de pares
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from anos import arquivo_do_ano
+from cache_colunar import CACHE_PATH, DADOS_PATH, carregar_colunas, impressao_digital
+
+ARQUIVO_ITENS = 'ITENS_PROVA_2024.csv'
+AREAS = ['CN', 'CH', 'LC', 'MT']
+INDICE_PATH = os.path.join(CACHE_PATH, 'indice_itens')
+
+# Maior CO_POSICAO possível (45 itens em cada uma das 4 áreas) e número de línguas estrangeiras.
+POSICOES = 180
+LINGUAS = 2
+# Aumentar quando os campos mudarem, para invalidar os índices antigos.
+VERSAO_FORMATO = 1
+
+# Campos de cada célula. Células sem item têm co_item -1 e area -1.
+TIPO_ITEM = np.dtype([
+    ('co_item', np.int32),
+    ('area', np.int8),          # posição da área em AREAS
+    ('gabarito', np.uint8),     # byte da alternativa correta (ex: ord('A'))
+    ('a', np.float32),
+    ('b', np.float32),
+    ('c', np.float32),
+    ('anulado', np.bool_),
+    ('adaptado', np.bool_),
+])
+
+
+def construir_indice(itens):
+    """
+    Monta o índice denso a partir dos dados de ITENS_PROVA.
+
+    Args:
+        itens (pd.DataFrame): Dados de ITENS_PROVA_2024.csv.
+
+    Returns:
+        dict: 'itens' (array estruturado [caderno][língua][posição]) e 'provas' (CO_PROVA de cada caderno).
+    """
+    provas = np.unique(itens['CO_PROVA'].to_numpy()).astype(np.int32)
+    indice = np.zeros((len(provas), LINGUAS, POSICOES + 1), dtype=TIPO_ITEM)
+    indice['co_item'] = -1
+    indice['area'] = -1
+    indice['a'] = indice['b'] = indice['c'] = np.nan
+
+    linha = np.searchsorted(provas, itens['CO_PROVA'].to_numpy())
+    posicao = itens['CO_POSICAO'].to_numpy()
+    lingua = itens['TP_LINGUA'].to_numpy()
+    area = np.array([AREAS.index(a) for a in itens['SG_AREA']], dtype=np.int8)
+    valores = {
+        'co_item': itens['CO_ITEM'].to_numpy(),
+        'area': area,
+        'gabarito': np.frombuffer(''.join(itens['TX_GABARITO'].fillna('?')).encode('ascii'), dtype=np.uint8),
+        'a': itens['NU_PARAM_A'].to_numpy(), 'b': itens['NU_PARAM_B'].to_numpy(), 'c': itens['NU_PARAM_C'].to_numpy(),
+        'anulado': itens['IN_ITEM_ABAN'].to_numpy() == 1,
+        'adaptado': itens['IN_ITEM_ADAPTADO'].to_numpy() == 1 if 'IN_ITEM_ADAPTADO' in itens else False,
+    }
+    # Itens sem língua (TP_LINGUA ausente) valem para as duas línguas; os de língua estrangeira, só para a sua.
+    for l in range(LINGUAS):
+        sel = (lingua < 0) | (lingua == l)
+        for campo, valor in valores.items():
+            indice[campo][linha[sel], l, posicao[sel]] = valor[sel] if np.ndim(valor) else valor
+    return {'itens': indice, 'provas': provas}
+
+
+def assinatura_indice(ano=None):
+    """Hash do formato e da versão de ITENS_PROVA do ano (chave do diretório do índice)."""
+    arquivo = arquivo_do_ano(ARQUIVO_ITENS, ano)
+    conteudo = {'versao': VERSAO_FORMATO, 'itens': impressao_digital(os.path.join(DADOS_PATH, arquivo))}
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_indice(ano=None):
+    """Diretório do índice de um ano (`DADOS/.cache/indice_itens/ITENS_PROVA_<ano>.<assinatura>`)."""
+    base = os.path.splitext(arquivo_do_ano(ARQUIVO_ITENS, ano))[0]
+    return os.path.join(INDICE_PATH, f'{base}.{assinatura_indice(ano)}')
+
+
+def gerar_indice(itens=None, ano=None):
+    """
+    Gera o índice e grava em `DADOS/.cache/indice_itens/ITENS_PROVA_<ano>.<assinatura>` (itens.npy e provas.npy).
+
+    Args:
+        itens (pd.DataFrame): Dados de ITENS_PROVA do ano (None carrega do cache colunar).
+        ano (int): Ano dos itens (None = 2024).
+
+    Returns:
+        str: Diretório do índice.
+    """
+    itens = carregar_colunas(arquivo_do_ano(ARQUIVO_ITENS, ano)) if itens is None else itens
+    indice = construir_indice(itens)
+    caminho = caminho_indice(ano)
+    # Grava em um diretório temporário e só depois renomeia, para nunca deixar um índice pela metade.
+    caminho_tmp = caminho + '.tmp'
+    shutil.rmtree(caminho_tmp, ignore_errors=True)
+    os.makedirs(caminho_tmp)
+    np.save(os.path.join(caminho_tmp, 'itens.npy'), indice['itens'])
+    np.save(os.path.join(caminho_tmp, 'provas.npy'), indice['provas'])
+    # Remove os índices de versões anteriores do ITENS_PROVA do mesmo ano.
+    prefixo = os.path.basename(caminho).rsplit('.', 1)[0] + '.'
+    for nome in os.listdir(INDICE_PATH):
+        if nome.startswith(prefixo) and nome != os.path.basename(caminho_tmp):
+            shutil.rmtree(os.path.join(INDICE_PATH, nome))
+    os.replace(caminho_tmp, caminho)
+    return caminho
+
+
+def carregar_indice(ano=None):
+    """
+    Abre o índice dos itens de um ano (gerando-o se necessário), mapeado da memória do disco.
+
+    Args:
+        ano (int): Ano dos itens (None = 2024).
+
+    Returns:
+        dict: 'itens' (array estruturado [caderno][língua][posição], memmap), 'provas' (CO_PROVA de cada
+            caderno), 'linha_prova' (CO_PROVA -> linha do caderno, -1 se não existe) e 'posicoes'
+            ({área: CO_POSICAO dos 45 itens da área, em ordem}).
+    """
+    caminho = caminho_indice(ano)
+    if not os.path.isdir(caminho):
+        gerar_indice(ano=ano)
+    indice = {
+        'itens': np.load(os.path.join(caminho, 'itens.npy'), mmap_mode='r'),
+        'provas': np.load(os.path.join(caminho, 'provas.npy')),
+    }
+    indice['linha_prova'] = np.full(int(indice['provas'].max()) + 1, -1, dtype=np.intp)
+    indice['linha_prova'][indice['provas']] = np.arange(len(indice['provas']))
+    area_posicao = np.asarray(indice['itens']['area']).max(axis=(0, 1))
+    indice['posicoes'] = {area: np.flatnonzero(area_posicao == k) for k, area in enumerate(AREAS)}
+    return indice
+
+
+def linhas_provas(indice, co_prova):
+    """
+    Converte códigos CO_PROVA (array, com NaN para ausentes) nas linhas dos cadernos no índice.
+
+    Returns:
+        np.ndarray: Linha de cada caderno, ou -1 para CO_PROVA ausente ou desconhecido.
+    """
+    co_prova = np.asarray(co_prova)
+    tabela = indice['linha_prova']
+    if np.issubdtype(co_prova.dtype, np.integer):
+        validos = (co_prova >= 0) & (co_prova < len(tabela))
+    else:
+        validos = ~np.isnan(co_prova) & (co_prova >= 0) & (co_prova < len(tabela))
+    if validos.all():
+        return tabela[co_prova.astype(np.intp, copy=False)]
+    linhas = np.full(len(co_prova), -1, dtype=np.intp)
+    linhas[validos] = tabela[co_prova[validos].astype(np.intp)]
+    return linhas
+
+
+def buscar(indice, co_prova, posicao, lingua=0):
+    """
+    Busca os itens de muitos pares (CO_PROVA, CO_POSICAO) de uma vez.
+
+    Args:
+        indice (dict): Saída de `carregar_indice`.
+        co_prova (array): Códigos dos cadernos.
+        posicao (array): CO_POSICAO de cada consulta (1 a 180).
+        lingua (array ou int): Língua estrangeira (0 = inglês, 1 = espanhol); só muda as posições 1 a 5 de LC.
+
+    Returns:
+        np.ndarray: Array estruturado (campos de TIPO_ITEM) com um item por consulta; co_item -1 se não existe.
+    """
+    linhas = linhas_provas(indice, co_prova)
+    # Posição no array achatado: uma única indexação, mais rápida que a indexação por três eixos.
+    _, linguas, posicoes = indice['itens'].shape
+    plano = (np.maximum(linhas, 0) * linguas + lingua) * posicoes + posicao
+    plano[linhas < 0] = 0  # a posição 0 nunca tem item
+    return np.asarray(indice['itens']).reshape(-1).take(plano)
+
+
+def main():
+    """Gera o índice e compara a consulta vetorizada com um merge do pandas."""
+    import pandas as pd
+
+    itens = carregar_colunas(ARQUIVO_ITENS)
+    inicio = time.perf_counter()
+    gerar_indice(itens)
+    indice = carregar_indice()
+    print(f"Índice gerado em {time.perf_counter() - inicio:.3f} s: {indice['itens'].shape} "
+          f"(cadernos x línguas x posições), {indice['itens'].nbytes / 2**20:.2f} MB.")
+
+    rng = np.random.default_rng(0)
+    sorteio = itens.iloc[rng.integers(0, len(itens), 10_000_000)]
+    co_prova, posicao = sorteio['CO_PROVA'].to_numpy(), sorteio['CO_POSICAO'].to_numpy()
+    lingua = np.maximum(sorteio['TP_LINGUA'].to_numpy(), 0)
+
+    inicio = time.perf_counter()
+    achados = buscar(indice, co_prova, posicao, lingua)
+    tempo_indice = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    consultas = pd.DataFrame({'CO_PROVA': co_prova, 'CO_POSICAO': posicao, 'TP_LINGUA': sorteio['TP_LINGUA'].to_numpy()})
+    unidos = consultas.merge(itens[['CO_PROVA', 'CO_POSICAO', 'TP_LINGUA', 'CO_ITEM', 'NU_PARAM_B']],
+                             on=['CO_PROVA', 'CO_POSICAO', 'TP_LINGUA'], how='left')
+    tempo_merge = time.perf_counter() - inicio
+
+    iguais = np.array_equal(achados['co_item'], unidos['CO_ITEM'].to_numpy())
+    print(f"10 milhões de consultas: índice {tempo_indice:.3f} s | merge do pandas {tempo_merge:.3f} s "
+          f"({tempo_merge / tempo_indice:.1f}x) | resultados idênticos: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura dos CSVs do ENEM (latin1, separados por ';') com o leitor multithread do pyarrow.
+
+`pd.read_csv` com o motor C usa uma única thread, e os tipos compactos (`esquema.py`) só
+são aplicados depois da leitura, com uma conversão por coluna. Aqui o arquivo é lido em
+faixas de bytes terminadas em fim de linha e cada faixa é analisada pelo
+`pyarrow.csv.read_csv`, que divide a faixa entre as threads. A conversão de latin1 para
+UTF-8 é feita durante a leitura, só as colunas pedidas são convertidas e cada coluna já
+sai com o tipo do cache (int8, float32 ou texto). A memória fica limitada ao tamanho da
+faixa, como na leitura em blocos do pandas.
+
+Sem pyarrow (ou com `motor='pandas'`), a leitura volta para `pd.read_csv` em blocos,
+com os mesmos tipos. Os microdados não têm quebras de linha dentro dos campos, o que
+permite cortar as faixas em qualquer fim de linha.
+
+Uso:
+    python ingestao.py                          # compara os leitores em RESULTADOS sintéticos (2 milhões de linhas)
+    python ingestao.py --linhas 5000000
+    python ingestao.py --colunas NU_NOTA_MT NU_NOTA_LC TP_PRESENCA_MT
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from esquema import CODIGO_AUSENTE, tipo_coluna
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # Sem pyarrow, a leitura usa apenas o pandas.
+    pa = None
+    pc = None
+    pacsv = None
+
+ENCODING = 'latin1'
+SEPARADOR = ';'
+MOTORES = ['pyarrow', 'pandas']
+MOTOR_PADRAO = 'pyarrow' if pa is not None else 'pandas'
+# Bytes do CSV analisados por vez pelo leitor do pyarrow (a faixa é dividida entre as threads).
+TAMANHO_FAIXA = 64 * 1024 * 1024
+# Linhas por bloco devolvido (o mesmo padrão de `cache_colunar.TAMANHO_BLOCO`).
+TAMANHO_BLOCO = 1_000_000
+
+
+def ler_cabecalho(caminho_csv):
+    """Nomes das colunas de um CSV (sem aspas), lendo só a primeira linha."""
+    with open(caminho_csv, encoding=ENCODING, newline='') as f:
+        return [c.strip().strip('"') for c in f.readline().rstrip('\r\n').split(SEPARADOR)]
+
+
+def tipar_bloco(bloco):
+    """Converte um bloco lido do CSV pelo pandas para os tipos compactos do cache."""
+    # Remove aspas duplas dos nomes das colunas, caso existam.
+    bloco.columns = bloco.columns.str.replace('"', '')
+    for coluna in bloco.columns:
+        tipo = tipo_coluna(coluna)
+        if tipo == 'int8':
+            valores = pd.to_numeric(bloco[coluna], errors='coerce')
+            bloco[coluna] = valores.fillna(CODIGO_AUSENTE).astype('int8')
+        elif tipo == 'float32':
+            bloco[coluna] = pd.to_numeric(bloco[coluna], errors='coerce').astype('float32')
+        elif tipo in ('category', 'string'):
+            # Categorias são guardadas como texto; o Parquet codifica em dicionário e a leitura devolve categorias.
+            bloco[coluna] = bloco[coluna].astype('string')
+    return bloco
+
+
+def ler_csv_pandas(caminho_csv, colunas=None, tamanho_bloco=None):
+    """
+    Lê um CSV do ENEM com `pd.read_csv` e aplica os tipos compactos (categorias como `category`).
+
+    Args:
+        caminho_csv (str): Caminho completo do CSV.
+        colunas (list): Colunas a ler. None lê todas.
+        tamanho_bloco (int): Linhas por bloco. None lê o arquivo inteiro.
+
+    Returns:
+        pd.DataFrame | iterator: O DataFrame, ou um iterador de blocos quando `tamanho_bloco` é informado.
+    """
+    def categorizar(bloco):
+        bloco = tipar_bloco(bloco)
+        for coluna in bloco.columns:
+            if tipo_coluna(coluna) == 'category':
+                bloco[coluna] = bloco[coluna].astype('category')
+        return bloco
+
+    leitor = pd.read_csv(caminho_csv, encoding=ENCODING, delimiter=SEPARADOR, usecols=colunas,
+                         chunksize=tamanho_bloco, low_memory=False)
+    if tamanho_bloco is None:
+        return categorizar(leitor)
+    return (categorizar(bloco) for bloco in leitor)
+
+
+def _tipo_arrow(coluna):
+    """Tipo usado na análise do CSV (os códigos int8 são lidos como float32, que aceita '3' e '3.0')."""
+    tipo = tipo_coluna(coluna)
+    if tipo in ('int8', 'float32'):
+        return pa.float32()
+    if tipo in ('category', 'string'):
+        return pa.string()
+    return None
+
+
+def _faixas(arquivo, tamanho_faixa):
+    """Faixas de bytes do arquivo, cada uma terminada em um fim de linha."""
+    resto = b''
+    while True:
+        dados = arquivo.read(tamanho_faixa)
+        if not dados:
+            if resto:
+                yield resto
+            return
+        dados = resto + dados
+        corte = dados.rfind(b'\n') + 1
+        resto = dados[corte:]
+        if corte:
+            yield dados[:corte]
+
+
+def _tabelas_pyarrow(caminho_csv, colunas, tamanho_faixa):
+    """Uma tabela tipada por faixa do CSV (leitura multithread do pyarrow)."""
+    nomes = ler_cabecalho(caminho_csv)
+    colunas = nomes if colunas is None else [c for c in nomes if c in set(colunas)]
+    tipos = {c: _tipo_arrow(c) for c in colunas if _tipo_arrow(c) is not None}
+    opcoes_leitura = pacsv.ReadOptions(column_names=nomes, encoding=ENCODING, use_threads=True)
+    opcoes_analise = pacsv.ParseOptions(delimiter=SEPARADOR)
+    with open(caminho_csv, 'rb') as arquivo:
+        arquivo.readline()  # cabeçalho
+        for faixa in _faixas(arquivo, tamanho_faixa):
+            conversao = pacsv.ConvertOptions(include_columns=colunas, column_types=tipos, strings_can_be_null=True)
+            tabela = pacsv.read_csv(pa.py_buffer(faixa), read_options=opcoes_leitura,
+                                    parse_options=opcoes_analise, convert_options=conversao)
+            # As colunas sem tipo definido no esquema são inferidas na primeira faixa e fixadas para as
+            # seguintes (uma coluna toda vazia vira float64, como no pandas).
+            for campo in tabela.schema:
+                if campo.name not in tipos:
+                    tipos[campo.name] = pa.float64() if pa.types.is_null(campo.type) else campo.type
+            yield tabela.cast(pa.schema([(c, tipos[c]) for c in tabela.column_names]))
+
+
+def _tipar_tabela(tabela):
+    """Converte os códigos para int8, com os ausentes em `CODIGO_AUSENTE`, como em `tipar_bloco`."""
+    for i, nome in enumerate(tabela.column_names):
+        if tipo_coluna(nome) == 'int8':
+            codigos = pc.fill_null(tabela.column(i), CODIGO_AUSENTE)
+            # safe=False trunca as casas decimais, como o `astype('int8')` do pandas.
+            tabela = tabela.set_column(i, nome, pc.cast(codigos, pa.int8(), safe=False))
+    return tabela
+
+
+def ler_csv_em_blocos(caminho_csv, colunas=None, tamanho_bloco=TAMANHO_BLOCO, motor=None, tamanho_faixa=TAMANHO_FAIXA):
+    """
+    Lê um CSV do ENEM em blocos de linhas, já com os tipos compactos do cache.
+
+    Args:
+        caminho_csv (str): Caminho completo do CSV.
+        colunas (list): Colunas a ler (as demais não são convertidas). None lê todas.
+        tamanho_bloco (int): Linhas por bloco devolvido (o último pode ter menos).
+        motor (str): 'pyarrow' (multithread) ou 'pandas'. None usa o pyarrow quando instalado.
+        tamanho_faixa (int): Bytes analisados por vez pelo pyarrow.
+
+    Yields:
+        pa.Table: Um bloco de linhas, com categorias e textos como string.
+    """
+    motor = motor or MOTOR_PADRAO
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconhecido: {motor} (use {' ou '.join(MOTORES)}).")
+    if pa is None:
+        raise RuntimeError("A leitura em tabelas Arrow requer o pacote 'pyarrow' (pip install pyarrow).")
+
+    if motor == 'pandas':
+        leitor = pd.read_csv(caminho_csv, encoding=ENCODING, delimiter=SEPARADOR, usecols=colunas,
+                             chunksize=tamanho_bloco, low_memory=False)
+        for bloco in leitor:
+            yield pa.Table.from_pandas(tipar_bloco(bloco), preserve_index=False)
+        return
+
+    # Junta as faixas (de tamanho variável em linhas) em blocos de `tamanho_bloco` linhas, sem copiar os dados.
+    pendentes, n_pendentes = [], 0
+    for tabela in _tabelas_pyarrow(caminho_csv, colunas, tamanho_faixa):
+        pendentes.append(_tipar_tabela(tabela))
+        n_pendentes += len(tabela)
+        while n_pendentes >= tamanho_bloco:
+            juntas = pa.concat_tables(pendentes)
+            yield juntas.slice(0, tamanho_bloco)
+            resto = juntas.slice(tamanho_bloco)
+            pendentes, n_pendentes = ([resto] if len(resto) else []), len(resto)
+    if n_pendentes:
+        yield pa.concat_tables(pendentes)
+
+
+def main():
+    """Compara o leitor do pandas com o do pyarrow em um RESULTADOS sintético de vários milhões de linhas."""
+    from dados_sinteticos import gerar_arquivos
+
+    parser = argparse.ArgumentParser(description='Compara os leitores de CSV (pandas e pyarrow multithread).')
+    parser.add_argument('--linhas', type=int, default=2_000_000, help='participantes do arquivo sintético')
+    parser.add_argument('--colunas', nargs='+', default=None, help='colunas lidas (padrão: todas)')
+    parser.add_argument('--destino', default=os.path.join('dados_benchmark', 'ingestao'),
+                        help='pasta do arquivo sintético (reaproveitado nas próximas execuções)')
+    args = parser.parse_args()
+
+    destino = os.path.join(args.destino, f'{args.linhas}_linhas')
+    caminho_csv = os.path.join(destino, 'DADOS', 'RESULTADOS_2024.csv')
+    if not os.path.isfile(caminho_csv):
+        gerar_arquivos(destino, args.linhas)
+    tamanho_mb = os.path.getsize(caminho_csv) / (1024 * 1024)
+    print(f"Arquivo: {caminho_csv} ({tamanho_mb:.0f} MB, {pa.io_thread_count()} threads de E/S, "
+          f"{pa.cpu_count()} threads de CPU no pyarrow).")
+
+    tempos, tabelas = {}, {}
+    for motor in ['pandas', 'pyarrow']:
+        inicio = time.perf_counter()
+        tabelas[motor] = pa.concat_tables(ler_csv_em_blocos(caminho_csv, args.colunas, motor=motor))
+        tempos[motor] = time.perf_counter() - inicio
+        print(f"{motor:>8}: {len(tabelas[motor])} linhas em {tempos[motor]:.2f} s ({tamanho_mb / tempos[motor]:.0f} MB/s)")
+
+    # Mesmos valores e tipos dos dois leitores (textos comparados como string).
+    esperado, obtido = (tabelas[m].to_pandas() for m in ['pandas', 'pyarrow'])
+    for df in (esperado, obtido):
+        for coluna in df.columns:
+            if tipo_coluna(coluna) in ('category', 'string'):
+                df[coluna] = df[coluna].astype('string')
+    iguais = esperado.columns.equals(obtido.columns) and all(
+        esperado[c].equals(obtido[c]) for c in esperado.columns)
+    print(f"pyarrow {tempos['pandas'] / tempos['pyarrow']:.1f}x mais rápido | resultados idênticos: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
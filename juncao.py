@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Junção de RESULTADOS e PARTICIPANTES pela inscrição (NU_INSCRICAO), com memória limitada.
+
+RESULTADOS traz as notas e PARTICIPANTES traz o perfil e o questionário (ex: renda
+familiar Q007 e cor/raça TP_COR_RACA). Um `pd.merge` dos dois arquivos inteiros precisaria
+dos dois na memória ao mesmo tempo; aqui a junção é feita por partições (hash join):
+
+1. Cada arquivo é lido em blocos a partir do cache colunar e cada linha vai para a
+   partição dada pelo hash de NU_INSCRICAO, gravada em Parquet no disco. Linhas com a
+   mesma inscrição caem na mesma partição nos dois arquivos.
+2. Cada par de partições é lido e unido pelo pyarrow (`Table.join`), e o resultado é
+   acrescentado a um único Parquet em `DADOS/.cache/juncao/`.
+
+A memória fica limitada ao tamanho de um bloco e de uma partição (`LINHAS_POR_PARTICAO`),
+não ao tamanho dos arquivos. O resultado é guardado com uma chave que inclui as colunas e
+a versão dos dois CSVs, e é reaproveitado nas próximas execuções.
+
+Uso:
+    python juncao.py                                  # médias das notas por renda (Q007) e por cor/raça
+    python juncao.py --colunas-participantes Q007 Q001 --como left
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from cache_colunar import (CACHE_PATH, DADOS_PATH, TAMANHO_BLOCO, cache_atualizado, caminho_cache, contar_registros,
+                           gerar_cache, impressao_digital, pa, pq)
+from esquema import decodificar, tipo_coluna
+
+ARQUIVO_RESULTADOS = 'RESULTADOS_2024.csv'
+ARQUIVO_PARTICIPANTES = 'PARTICIPANTES_2024.csv'
+CHAVE = 'NU_INSCRICAO'
+JUNCAO_PATH = os.path.join(CACHE_PATH, 'juncao')
+
+# Linhas (somando os dois arquivos) em cada partição; define o pico de memória da etapa de junção.
+LINHAS_POR_PARTICAO = 2_000_000
+# Tipos de junção aceitos: só quem tem os dois registros, ou todos os de RESULTADOS.
+TIPOS_JUNCAO = {'inner': 'inner', 'left': 'left outer'}
+# Constante do hash multiplicativo (espalha inscrições sequenciais entre as partições).
+_MULTIPLICADOR_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+NOTAS_COLS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+
+
+def _exigir_pyarrow():
+    if pq is None:
+        raise RuntimeError("A junção por partições requer o pacote 'pyarrow' (pip install pyarrow).")
+
+
+def numero_particoes(total_linhas, linhas_por_particao=LINHAS_POR_PARTICAO):
+    """Menor potência de 2 de partições que mantém cada uma abaixo de `linhas_por_particao` linhas."""
+    n = 1
+    while total_linhas / n > linhas_por_particao:
+        n *= 2
+    return n
+
+
+def particao_de(inscricoes, n_particoes):
+    """
+    Partição de cada inscrição (hash multiplicativo; `n_particoes` deve ser potência de 2).
+
+    Returns:
+        np.ndarray: Número da partição (0 a n_particoes - 1) de cada linha.
+    """
+    bits = int(n_particoes).bit_length() - 1
+    if bits == 0:
+        return np.zeros(len(inscricoes), dtype=np.intp)
+    valores = np.asarray(inscricoes).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        return ((valores * _MULTIPLICADOR_HASH) >> np.uint64(64 - bits)).astype(np.intp)
+
+
+def assinatura_juncao(colunas_resultados, colunas_participantes, como):
+    """Hash das colunas, do tipo de junção e das versões dos dois CSVs (chave do arquivo da junção)."""
+    conteudo = {
+        'resultados': [list(colunas_resultados), impressao_digital(os.path.join(DADOS_PATH, ARQUIVO_RESULTADOS))],
+        'participantes': [list(colunas_participantes), impressao_digital(os.path.join(DADOS_PATH, ARQUIVO_PARTICIPANTES))],
+        'como': como,
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_juncao(colunas_resultados, colunas_participantes, como='inner'):
+    """Caminho do Parquet da junção (o nome inclui a assinatura)."""
+    return os.path.join(JUNCAO_PATH, f'juncao.{assinatura_juncao(colunas_resultados, colunas_participantes, como)}.parquet')
+
+
+def particionar(nome_arquivo, colunas, n_particoes, destino, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Distribui as linhas de um arquivo em `n_particoes` arquivos Parquet pelo hash de NU_INSCRICAO.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS (lido do cache colunar).
+        colunas (list): Colunas a gravar (NU_INSCRICAO é incluída se faltar).
+        n_particoes (int): Número de partições (potência de 2).
+        destino (str): Pasta das partições (`parte_<n>.parquet`).
+        tamanho_bloco (int): Linhas lidas por vez.
+    """
+    if not cache_atualizado(nome_arquivo):
+        gerar_cache(nome_arquivo)
+    colunas = [CHAVE] + [c for c in colunas if c != CHAVE]
+    caminho_parquet = caminho_cache(nome_arquivo)
+    esquema = pq.read_schema(caminho_parquet)
+    esquema = pa.schema([esquema.field(c) for c in colunas])
+    os.makedirs(destino, exist_ok=True)
+    # Um escritor por partição, todos com o mesmo esquema (partições vazias também existem no disco).
+    escritores = [pq.ParquetWriter(os.path.join(destino, f'parte_{p}.parquet'), esquema) for p in range(n_particoes)]
+    try:
+        for lote in pq.ParquetFile(caminho_parquet).iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            particao = particao_de(lote.column(CHAVE).fill_null(0).to_numpy(), n_particoes)
+            # Ordena o bloco pela partição; cada partição vira uma fatia contínua.
+            ordem = np.argsort(particao, kind='stable')
+            lote = pa.Table.from_batches([lote]).take(ordem)
+            limites = np.searchsorted(particao[ordem], np.arange(n_particoes + 1))
+            for p in range(n_particoes):
+                if limites[p + 1] > limites[p]:
+                    escritores[p].write_table(lote.slice(limites[p], limites[p + 1] - limites[p]))
+    finally:
+        for escritor in escritores:
+            escritor.close()
+
+
+def juntar(colunas_resultados, colunas_participantes, como='inner', n_particoes=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Une RESULTADOS e PARTICIPANTES por NU_INSCRICAO, gerando a junção só se ela não estiver no cache.
+
+    Args:
+        colunas_resultados (list): Colunas de RESULTADOS.
+        colunas_participantes (list): Colunas de PARTICIPANTES.
+        como (str): 'inner' (só inscrições presentes nos dois) ou 'left' (todas as de RESULTADOS).
+        n_particoes (int): Partições do hash join (None calcula pelo número de linhas).
+        tamanho_bloco (int): Linhas lidas por vez na etapa de particionamento.
+
+    Returns:
+        str: Caminho do Parquet com a junção.
+    """
+    _exigir_pyarrow()
+    caminho = caminho_juncao(colunas_resultados, colunas_participantes, como)
+    if os.path.isfile(caminho):
+        return caminho
+    if n_particoes is None:
+        total = contar_registros(ARQUIVO_RESULTADOS) + contar_registros(ARQUIVO_PARTICIPANTES)
+        n_particoes = numero_particoes(total)
+    print(f"Unindo {ARQUIVO_RESULTADOS} e {ARQUIVO_PARTICIPANTES} por {CHAVE} ({n_particoes} partições)...")
+
+    pasta_particoes = caminho + '.particoes'
+    shutil.rmtree(pasta_particoes, ignore_errors=True)
+    caminho_tmp = caminho + '.tmp'
+    escritor = None
+    total = 0
+    try:
+        particionar(ARQUIVO_RESULTADOS, colunas_resultados, n_particoes, os.path.join(pasta_particoes, 'resultados'),
+                    tamanho_bloco)
+        particionar(ARQUIVO_PARTICIPANTES, colunas_participantes, n_particoes,
+                    os.path.join(pasta_particoes, 'participantes'), tamanho_bloco)
+        for p in range(n_particoes):
+            esquerda = pq.read_table(os.path.join(pasta_particoes, 'resultados', f'parte_{p}.parquet'))
+            direita = pq.read_table(os.path.join(pasta_particoes, 'participantes', f'parte_{p}.parquet'))
+            unidos = esquerda.join(direita, keys=CHAVE, join_type=TIPOS_JUNCAO[como]).sort_by(CHAVE)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho_tmp, unidos.schema)
+            escritor.write_table(unidos.cast(escritor.schema))
+            total += unidos.num_rows
+    finally:
+        if escritor is not None:
+            escritor.close()
+        shutil.rmtree(pasta_particoes, ignore_errors=True)
+    os.replace(caminho_tmp, caminho)
+    print(f"Junção gerada: {caminho} ({total} registros).")
+    return caminho
+
+
+def carregar_juncao(colunas_resultados, colunas_participantes, como='inner'):
+    """
+    Carrega a junção de RESULTADOS e PARTICIPANTES (gerando-a se necessário), com os tipos do cache colunar.
+
+    Args:
+        colunas_resultados (list): Colunas de RESULTADOS.
+        colunas_participantes (list): Colunas de PARTICIPANTES.
+        como (str): 'inner' ou 'left' (ver `juntar`).
+
+    Returns:
+        pd.DataFrame: NU_INSCRICAO e as colunas pedidas dos dois arquivos, ordenadas dentro de cada partição.
+    """
+    caminho = juntar(colunas_resultados, colunas_participantes, como)
+    colunas = pq.read_schema(caminho).names
+    # As colunas categóricas são lidas direto do dicionário do Parquet, como em `carregar_colunas`.
+    categoricas = [c for c in colunas if tipo_coluna(c) == 'category']
+    df = pq.read_table(caminho, read_dictionary=categoricas).to_pandas()
+    # Na junção 'left', as flags int8 sem correspondência ficam nulas e voltam ao código de ausente do cache.
+    for coluna in colunas:
+        if tipo_coluna(coluna) == 'int8' and df[coluna].dtype != 'int8':
+            df[coluna] = df[coluna].fillna(-1).astype('int8')
+    return df
+
+
+def main():
+    """Une os arquivos e mostra as médias das notas por renda familiar e por cor/raça."""
+    from benchmark import Cronometro
+
+    parser = argparse.ArgumentParser(description='Junção de RESULTADOS e PARTICIPANTES por NU_INSCRICAO.')
+    parser.add_argument('--colunas-resultados', nargs='+', default=NOTAS_COLS)
+    parser.add_argument('--colunas-participantes', nargs='+', default=['Q007', 'TP_COR_RACA'])
+    parser.add_argument('--como', choices=list(TIPOS_JUNCAO), default='inner')
+    parser.add_argument('--particoes', type=int, default=None, help='número de partições (potência de 2)')
+    args = parser.parse_args()
+    if args.particoes is not None and args.particoes & (args.particoes - 1):
+        parser.error('--particoes deve ser uma potência de 2')
+
+    cronometro = Cronometro()
+    with cronometro.etapa('juntar'):
+        juntar(args.colunas_resultados, args.colunas_participantes, args.como, args.particoes)
+    with cronometro.etapa('carregar'):
+        df = carregar_juncao(args.colunas_resultados, args.colunas_participantes, args.como)
+    for nome, medida in cronometro.etapas.items():
+        print(f"{nome}: {medida['tempo_s']:.2f} s | pico de memória do processo: {medida['pico_rss_mb']:.1f} MB")
+    print(f"{len(df)} registros unidos.")
+
+    notas = [c for c in args.colunas_resultados if c.startswith('NU_NOTA_')]
+    for coluna in args.colunas_participantes:
+        if coluna not in df or not notas:
+            continue
+        try:
+            grupos = decodificar(df[coluna])
+        except KeyError:  # coluna sem rótulos no esquema
+            grupos = df[coluna]
+        print(f"\nMédias das notas por {coluna}:")
+        print(df[notas].astype('float64').groupby(grupos, observed=True).mean().round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Limpeza compartilhada dos dados de RESULTADOS do ENEM.
+
+Os temas acadêmico, de desempenho e institucional analisam apenas os participantes
+que fizeram todas as provas e tiveram a redação avaliada. O filtro fica aqui para
+ser aplicado uma única vez quando os temas são executados juntos.
+
+Os filtros são declarados por nome em `FILTROS` (colunas que devem valer 1 e colunas
+que não podem ser nulas). `cache_filtros.py` guarda em disco o resultado de cada filtro
+nomeado, para que ele não seja recalculado a cada execução.
+"""
+
+import numpy as np
+
+# Colunas de notas das 4 provas objetivas e da redação.
+NOTAS_COLS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+# Colunas de presença nas provas objetivas e de situação da redação (1 = presente / sem problemas).
+PRESENCA_COLS = ['TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT', 'TP_STATUS_REDACAO']
+
+# Filtros nomeados: {nome: {'iguais': {coluna: valor}, 'nao_nulas': [colunas]}}.
+FILTROS = {
+    # Presentes nas 4 provas objetivas, com redação avaliada sem problemas e todas as notas preenchidas.
+    'presentes': {'iguais': {c: 1 for c in PRESENCA_COLS}, 'nao_nulas': NOTAS_COLS},
+}
+
+
+def colunas_filtro(filtro):
+    """Lista as colunas lidas por um filtro declarado em `FILTROS`."""
+    return list(filtro.get('iguais', {})) + [c for c in filtro.get('nao_nulas', []) if c not in filtro.get('iguais', {})]
+
+
+def mascara_filtro(df, filtro):
+    """
+    Avalia um filtro declarado em `FILTROS` sobre um DataFrame.
+
+    Colunas de `nao_nulas` ausentes do DataFrame são ignoradas (como no `dropna` original).
+
+    Args:
+        df (pd.DataFrame): Dados com as colunas usadas pelo filtro.
+        filtro (dict): Filtro no formato de `FILTROS`.
+
+    Returns:
+        np.ndarray: Máscara booleana, uma posição por linha de `df`.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, valor in filtro.get('iguais', {}).items():
+        mask &= (df[col] == valor).to_numpy()
+    for col in filtro.get('nao_nulas', []):
+        if col in df.columns:
+            mask &= df[col].notna().to_numpy()
+    return mask
+
+
+def filtrar_presentes(df):
+    """
+    Mantém apenas os participantes presentes nas 4 provas objetivas, com redação
+    avaliada sem problemas e com todas as notas preenchidas.
+
+    Args:
+        df (pd.DataFrame): Dados de RESULTADOS com as colunas de presença e de notas.
+
+    Returns:
+        pd.DataFrame: Novo DataFrame apenas com os participantes válidos.
+    """
+    return df.loc[mascara_filtro(df, FILTROS['presentes'])]
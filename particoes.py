@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cópia de RESULTADOS particionada por UF da prova (e, opcionalmente, por dependência administrativa).
+
+O cache colunar guarda cada arquivo em um único Parquet, então qualquer consulta restrita
+a um estado ou região lê as colunas do país inteiro. Aqui RESULTADOS é regravado no
+layout de partições do Hive, um diretório por valor da chave:
+
+    DADOS/.cache/particoes/RESULTADOS_2024.SG_UF_PROVA.<assinatura>/SG_UF_PROVA=SP/parte-0.parquet
+    ...SG_UF_PROVA-TP_DEPENDENCIA_ADM_ESC.<assinatura>/SG_UF_PROVA=SP/TP_DEPENDENCIA_ADM_ESC=2/parte-0.parquet
+
+Com isso:
+- uma consulta por UF, região (conjunto de UFs) ou tipo de escola lê só os diretórios
+  correspondentes (poda de partições pelo `pyarrow.dataset`), e não o arquivo inteiro;
+- agregados por UF podem ser calculados em paralelo, um processo por partição,
+  e depois mesclados (ver `agregar_por_particao`).
+
+As partições são geradas a partir do cache colunar, em blocos, e são refeitas quando o
+CSV de origem muda (a assinatura inclui a versão do CSV e as chaves de partição).
+
+Uso:
+    python particoes.py                                     # particiona por SG_UF_PROVA e compara as leituras
+    python particoes.py --por-dependencia                   # particiona também por TP_DEPENDENCIA_ADM_ESC
+    python particoes.py --ufs SP RJ --dependencias 4        # lê só as partições pedidas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache_colunar import (CACHE_PATH, DADOS_PATH, TAMANHO_BLOCO, cache_atualizado, caminho_cache, carregar_colunas,
+                           gerar_cache, impressao_digital, pa, pq)
+from esquema import tipo_coluna
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:  # Sem pyarrow, as consultas voltam a ler o arquivo inteiro e filtrar no pandas.
+    ds = None
+
+ARQUIVO = 'RESULTADOS_2024.csv'
+PARTICOES_PATH = os.path.join(CACHE_PATH, 'particoes')
+
+# Chaves de partição aceitas, na ordem dos níveis de diretório. A UF é sempre o primeiro nível.
+CHAVE_UF = 'SG_UF_PROVA'
+CHAVE_DEPENDENCIA = 'TP_DEPENDENCIA_ADM_ESC'
+CHAVES = [CHAVE_UF, CHAVE_DEPENDENCIA]
+# Aumentar quando o layout mudar, para invalidar as partições antigas.
+VERSAO_FORMATO = 1
+
+
+def chaves_particao(por_dependencia=False):
+    """Chaves de partição: só a UF, ou a UF e a dependência administrativa da escola."""
+    return CHAVES if por_dependencia else [CHAVE_UF]
+
+
+def _tipo_chave(chave):
+    # A UF é texto; a dependência é um código int8 (CODIGO_AUSENTE para escola não informada).
+    return pa.string() if tipo_coluna(chave) == 'category' else pa.int8()
+
+
+def _particionamento(chaves):
+    return ds.partitioning(pa.schema([(c, _tipo_chave(c)) for c in chaves]), flavor='hive')
+
+
+def assinatura_particoes(nome_arquivo, chaves):
+    """Hash do formato, das chaves de partição e da versão do CSV (chave do diretório das partições)."""
+    conteudo = {'versao': VERSAO_FORMATO, 'chaves': list(chaves),
+                'origem': impressao_digital(os.path.join(DADOS_PATH, nome_arquivo))}
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_particoes(nome_arquivo=ARQUIVO, chaves=(CHAVE_UF,)):
+    """Diretório das partições de um arquivo (o nome inclui as chaves e a assinatura)."""
+    base = os.path.splitext(nome_arquivo)[0]
+    return os.path.join(PARTICOES_PATH, f"{base}.{'-'.join(chaves)}.{assinatura_particoes(nome_arquivo, chaves)}")
+
+
+def gerar_particoes(nome_arquivo=ARQUIVO, chaves=(CHAVE_UF,), tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Grava um arquivo particionado pelas chaves, a partir do cache colunar, se ainda não existir.
+
+    O cache é lido em blocos e cada bloco é distribuído entre as partições pelo
+    `pyarrow.dataset.write_dataset`, então a memória usada depende do tamanho do bloco.
+
+    Args:
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        chaves (list): Chaves de partição (ver `chaves_particao`).
+        tamanho_bloco (int): Linhas lidas por vez (também o maior row group de cada partição).
+
+    Returns:
+        str: Diretório das partições.
+    """
+    if ds is None:
+        raise RuntimeError("As partições requerem o pacote 'pyarrow' (pip install pyarrow).")
+    chaves = list(chaves)
+    caminho = caminho_particoes(nome_arquivo, chaves)
+    if os.path.isdir(caminho):
+        return caminho
+    if not cache_atualizado(nome_arquivo):
+        gerar_cache(nome_arquivo)
+    print(f"Particionando '{nome_arquivo}' por {', '.join(chaves)}...")
+
+    arquivo = pq.ParquetFile(caminho_cache(nome_arquivo))
+    esquema = arquivo.schema_arrow
+    # As chaves ficam no nome dos diretórios, com os mesmos tipos usados na leitura.
+    esquema = esquema.set(esquema.get_field_index(chaves[0]), pa.field(chaves[0], _tipo_chave(chaves[0])))
+    lotes = (lote.cast(esquema) for lote in arquivo.iter_batches(batch_size=tamanho_bloco))
+
+    # Grava em um diretório temporário e só depois renomeia, para nunca deixar partições pela metade.
+    caminho_tmp = caminho + '.tmp'
+    shutil.rmtree(caminho_tmp, ignore_errors=True)
+    ds.write_dataset(lotes, caminho_tmp, schema=esquema, format='parquet', partitioning=_particionamento(chaves),
+                     basename_template='parte-{i}.parquet', max_rows_per_group=tamanho_bloco,
+                     existing_data_behavior='overwrite_or_ignore')
+    # Remove as partições de versões anteriores do mesmo arquivo com as mesmas chaves.
+    prefixo = os.path.basename(caminho).rsplit('.', 1)[0] + '.'
+    for nome in os.listdir(PARTICOES_PATH):
+        if nome.startswith(prefixo) and nome != os.path.basename(caminho_tmp):
+            shutil.rmtree(os.path.join(PARTICOES_PATH, nome))
+    os.replace(caminho_tmp, caminho)
+    print(f"Partições gravadas em '{caminho}'.")
+    return caminho
+
+
+def _abrir(nome_arquivo, chaves, colunas):
+    caminho = gerar_particoes(nome_arquivo, chaves)
+    # As colunas categóricas são lidas direto do dicionário do Parquet, como em `carregar_colunas`.
+    categoricas = [c for c in colunas if tipo_coluna(c) == 'category' and c not in chaves]
+    formato = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=categoricas))
+    return ds.dataset(caminho, format=formato, partitioning=_particionamento(chaves))
+
+
+def _expressao(ufs=None, dependencias=None):
+    """Filtro sobre as chaves de partição (None quando não há restrição)."""
+    expressao = None
+    for chave, valores in [(CHAVE_UF, ufs), (CHAVE_DEPENDENCIA, dependencias)]:
+        if valores is not None:
+            condicao = ds.field(chave).isin(list(valores))
+            expressao = condicao if expressao is None else expressao & condicao
+    return expressao
+
+
+def listar_particoes(nome_arquivo=ARQUIVO, ufs=None, dependencias=None, por_dependencia=False):
+    """
+    Lista as UFs com dados entre as partições selecionadas (sem ler as linhas).
+
+    Sem pyarrow, lê a coluna de UF do arquivo inteiro.
+
+    Returns:
+        list: Valores de SG_UF_PROVA, em ordem alfabética.
+    """
+    if ds is None:
+        df = carregar_particoes([CHAVE_UF], ufs, dependencias, nome_arquivo)
+        return sorted(df[CHAVE_UF].dropna().unique())
+    chaves = chaves_particao(por_dependencia or dependencias is not None)
+    dataset = _abrir(nome_arquivo, chaves, [])
+    ufs_encontradas = set()
+    for fragmento in dataset.get_fragments(filter=_expressao(ufs, dependencias)):
+        ufs_encontradas.add(ds.get_partition_keys(fragmento.partition_expression).get(CHAVE_UF))
+    # Linhas sem UF ficam em uma partição própria, que não é listada.
+    return sorted(uf for uf in ufs_encontradas if uf is not None)
+
+
+def carregar_particoes(colunas, ufs=None, dependencias=None, nome_arquivo=ARQUIVO, por_dependencia=False):
+    """
+    Carrega as colunas pedidas lendo apenas as partições das UFs e dependências selecionadas.
+
+    Sem pyarrow, lê o arquivo inteiro e filtra no pandas (mesmo resultado, sem a poda).
+
+    Args:
+        colunas (list): Colunas a carregar (as chaves de partição podem estar entre elas).
+        ufs (list): Valores de SG_UF_PROVA a manter (None = todas).
+        dependencias (list): Códigos de TP_DEPENDENCIA_ADM_ESC a manter (None = todos). Usa as
+            partições por dependência.
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        por_dependencia (bool): Usa as partições por UF e dependência mesmo sem filtrar a dependência.
+
+    Returns:
+        pd.DataFrame: Linhas selecionadas, com os tipos compactos do cache colunar (índice de 0 a n-1;
+            a ordem das linhas segue as partições, não o arquivo original).
+    """
+    colunas = list(colunas)
+    if ds is None:
+        filtros = [c for c, v in [(CHAVE_UF, ufs), (CHAVE_DEPENDENCIA, dependencias)] if v is not None]
+        df = carregar_colunas(nome_arquivo, colunas + [c for c in filtros if c not in colunas])
+        if ufs is not None:
+            df = df[df[CHAVE_UF].isin(ufs)]
+        if dependencias is not None:
+            df = df[df[CHAVE_DEPENDENCIA].isin(dependencias)]
+        return df[colunas].reset_index(drop=True)
+
+    chaves = chaves_particao(por_dependencia or dependencias is not None)
+    tabela = _abrir(nome_arquivo, chaves, colunas).to_table(columns=colunas, filter=_expressao(ufs, dependencias))
+    df = tabela.to_pandas()
+    # As chaves vêm do nome dos diretórios; voltam aos tipos do cache colunar.
+    for chave in chaves:
+        if chave in df and tipo_coluna(chave) == 'category':
+            df[chave] = df[chave].astype('category')
+    return df
+
+
+def _executar_particao(funcao, colunas, uf, dependencias, nome_arquivo, por_dependencia):
+    df = carregar_particoes(colunas, [uf], dependencias, nome_arquivo, por_dependencia)
+    return uf, funcao(df)
+
+
+def agregar_por_particao(funcao, colunas, ufs=None, dependencias=None, processos=None, nome_arquivo=ARQUIVO,
+                         por_dependencia=False):
+    """
+    Aplica uma função a cada UF separadamente, um processo por partição.
+
+    Cada processo lê só a partição da sua UF, então a memória de cada um depende do tamanho
+    do maior estado, e não do país. Os resultados parciais (ex: `AgregadoGrupos`) são
+    devolvidos para o processo principal, que pode mesclá-los.
+
+    Args:
+        funcao (callable): Função de nível de módulo (precisa ir para outro processo) que recebe o
+            DataFrame de uma UF e devolve um resultado parcial.
+        colunas (list): Colunas lidas de cada partição.
+        ufs (list): UFs a processar (None = todas as que têm dados).
+        dependencias (list): Códigos de TP_DEPENDENCIA_ADM_ESC a manter (None = todos).
+        processos (int): Número de processos. None usa um por núcleo; 1 processa em sequência.
+        nome_arquivo (str): Nome do CSV dentro da pasta DADOS.
+        por_dependencia (bool): Usa as partições por UF e dependência.
+
+    Returns:
+        dict: {UF: resultado de `funcao`}, em ordem alfabética de UF.
+    """
+    ufs = listar_particoes(nome_arquivo, ufs, dependencias, por_dependencia)
+    argumentos = (colunas, dependencias, nome_arquivo, por_dependencia)
+    resultados = {}
+    if processos == 1 or len(ufs) <= 1 or ds is None:
+        for uf in ufs:
+            resultados[uf] = _executar_particao(funcao, colunas, uf, *argumentos[1:])[1]
+    else:
+        processos = min(processos or os.cpu_count() or 1, len(ufs))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(_executar_particao, funcao, colunas, uf, *argumentos[1:]) for uf in ufs]
+            for futuro in as_completed(futuros):
+                uf, resultado = futuro.result()
+                resultados[uf] = resultado
+    return {uf: resultados[uf] for uf in ufs}
+
+
+def _medias_notas(df):
+    """Soma e contagem das notas de uma partição (função de exemplo para `agregar_por_particao`)."""
+    notas = [c for c in df.columns if c.startswith('NU_NOTA_')]
+    return df[notas].astype('float64').sum(), df[notas].count()
+
+
+def main():
+    """Gera as partições e compara a leitura podada e a agregação por UF com a leitura do arquivo inteiro."""
+    import numpy as np
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Particiona RESULTADOS por UF (e dependência) e consulta as partições.')
+    parser.add_argument('--por-dependencia', action='store_true', help='particiona também por TP_DEPENDENCIA_ADM_ESC')
+    parser.add_argument('--ufs', nargs='+', default=['SP'], help="UFs da consulta de exemplo (padrão: SP)")
+    parser.add_argument('--dependencias', nargs='+', type=int, default=None,
+                        help='códigos de TP_DEPENDENCIA_ADM_ESC da consulta (1 federal, 2 estadual, 3 municipal, 4 privada)')
+    parser.add_argument('--processos', type=int, default=None, help='processos da agregação por UF (padrão: um por núcleo)')
+    args = parser.parse_args()
+
+    por_dependencia = args.por_dependencia or args.dependencias is not None
+    inicio = time.perf_counter()
+    gerar_particoes(ARQUIVO, chaves_particao(por_dependencia))
+    print(f"Partições prontas em {time.perf_counter() - inicio:.2f} s.")
+
+    notas = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
+    colunas = [CHAVE_UF, CHAVE_DEPENDENCIA] + notas
+
+    inicio = time.perf_counter()
+    completo = carregar_colunas(ARQUIVO, colunas)
+    mask = completo[CHAVE_UF].isin(args.ufs).to_numpy()
+    if args.dependencias is not None:
+        mask = mask & completo[CHAVE_DEPENDENCIA].isin(args.dependencias).to_numpy()
+    esperado = completo.loc[mask]
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    podado = carregar_particoes(colunas, args.ufs, args.dependencias, por_dependencia=por_dependencia)
+    tempo_podado = time.perf_counter() - inicio
+    # A ordem das linhas muda entre os layouts; as somas são comparadas com tolerância de arredondamento.
+    iguais = len(podado) == len(esperado) and all(
+        np.isclose(podado[c].astype('float64').sum(), esperado[c].astype('float64').sum()) for c in notas)
+    print(f"Consulta {args.ufs} (dependências {args.dependencias or 'todas'}): {len(podado)} linhas | "
+          f"arquivo inteiro {tempo_completo:.3f} s | partições {tempo_podado:.3f} s | "
+          f"resultados idênticos: {'sim' if iguais else 'NÃO'}")
+
+    inicio = time.perf_counter()
+    parciais = agregar_por_particao(_medias_notas, notas, processos=args.processos, por_dependencia=por_dependencia)
+    medias = pd.DataFrame({uf: soma / n for uf, (soma, n) in parciais.items()}).T
+    print(f"Médias por UF em {len(parciais)} partições ({time.perf_counter() - inicio:.2f} s):")
+    print(medias.round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rastreamento das etapas de cada tema e de cada gráfico, em produção.
+
+Cada etapa (`carregar`, `preparar`, `agregar`, `renderizar` e o desenho de cada gráfico,
+dentro do intervalo do tema) registra um evento com o tempo de relógio, o tempo de CPU do
+processo, a memória residente no início e no fim, quanto a etapa elevou o pico de memória
+do processo e as linhas de entrada e de saída (em `agregar`, as linhas entregues às funções
+de desenho: um gráfico que recebe os dados completos, e não um agregado, aparece aqui e no
+seu evento de desenho). Os eventos são gravados como JSON, um por linha, no arquivo indicado
+pela variável de ambiente `ENEM_RASTREAMENTO`. Os processos de renderização e os
+subprocessos herdam a variável e gravam no mesmo arquivo (cada evento é uma única escrita em
+modo de acréscimo).
+
+Sem a variável, `etapa` não mede nada e o custo é desprezível. O log pode ser convertido
+para o formato de eventos do Chrome (`chrome://tracing` ou https://ui.perfetto.dev), com
+uma linha do tempo por processo.
+
+Uso:
+    python tema_desempenho.py --rastrear rastros/desempenho.jsonl --chrome rastros/desempenho.trace.json
+    python executar_temas.py --rastrear rastros/temas.jsonl
+    ENEM_RASTREAMENTO=rastros/temas.jsonl python executar_temas.py --modo subprocesso
+    python rastreamento.py rastros/temas.jsonl                  # etapas e gráficos mais lentos
+    python rastreamento.py rastros/temas.jsonl --chrome rastros/temas.trace.json
+"""
+
+import argparse
+import atexit
+import contextlib
+import functools
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Variável de ambiente com o caminho do log; herdada pelos processos filhos.
+VARIAVEL_AMBIENTE = 'ENEM_RASTREAMENTO'
+
+# Atributos acrescentados a todos os eventos do processo (ex: tema e ano em execução).
+_contexto = {}
+# Identificadores das etapas abertas no processo, da mais externa para a mais interna.
+_abertas = []
+_contador = itertools.count(1)
+
+
+class Medicao:
+    """Etapa em andamento: quem a executa informa as linhas de saída e outros atributos."""
+
+    def __init__(self, nome, categoria, linhas_entrada, atributos):
+        self.nome = nome
+        self.categoria = categoria
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.atributos = atributos
+
+
+def caminho_log():
+    """Caminho do log de rastreamento, ou None se o rastreamento estiver desligado."""
+    return os.environ.get(VARIAVEL_AMBIENTE) or None
+
+
+def ativar(caminho, chrome=None):
+    """
+    Liga o rastreamento neste processo e nos processos que ele criar, começando um log novo.
+
+    Args:
+        caminho (str): Log em JSON, um evento por linha.
+        chrome (str): Se informado, o log é convertido para eventos do Chrome neste caminho ao final do processo.
+    """
+    caminho = os.path.abspath(caminho)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    open(caminho, 'w').close()
+    os.environ[VARIAVEL_AMBIENTE] = caminho
+    if chrome is not None:
+        atexit.register(exportar_chrome, caminho, chrome)
+
+
+def contar_linhas(dados):
+    """Linhas de um DataFrame, Series ou array (somadas dentro de tuplas, listas e dicts); None se não houver."""
+    if isinstance(dados, (pd.DataFrame, pd.Series, pd.Index)):
+        return len(dados)
+    if isinstance(dados, np.ndarray):
+        return dados.shape[0] if dados.ndim else 1
+    if isinstance(dados, dict):
+        dados = list(dados.values())
+    if isinstance(dados, (list, tuple)):
+        linhas = [n for n in map(contar_linhas, dados) if n is not None]
+        return sum(linhas) if linhas else None
+    return None
+
+
+def _rss_mb():
+    """Memória residente atual do processo, em MB (None fora do Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+    except OSError:
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def _pico_mb():
+    """Pico de memória residente do processo, em MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No Linux ru_maxrss é dado em KB; no macOS, em bytes.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _gravar(caminho, evento):
+    """Acrescenta um evento ao log com uma única escrita (processos diferentes podem gravar ao mesmo tempo)."""
+    linha = json.dumps(evento, ensure_ascii=False, default=str) + '\n'
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(linha)
+
+
+@contextlib.contextmanager
+def contexto(**atributos):
+    """Acrescenta atributos (ex: `tema='academico'`) a todos os eventos registrados dentro do bloco."""
+    anteriores = dict(_contexto)
+    _contexto.update(atributos)
+    try:
+        yield
+    finally:
+        _contexto.clear()
+        _contexto.update(anteriores)
+
+
+def contexto_atual():
+    """Cópia dos atributos de contexto, para repassar aos processos de renderização."""
+    return dict(_contexto)
+
+
+def definir_contexto(atributos):
+    """Substitui os atributos de contexto do processo (usado na inicialização dos processos filhos)."""
+    _contexto.clear()
+    _contexto.update(atributos or {})
+
+
+@contextlib.contextmanager
+def etapa(nome, categoria='etapa', linhas_entrada=None, **atributos):
+    """
+    Mede um bloco de código e grava o evento no log, se o rastreamento estiver ligado.
+
+    Args:
+        nome (str): Nome da etapa (ex: 'preparar') ou do gráfico.
+        categoria (str): 'tema', 'etapa' ou 'grafico'.
+        linhas_entrada (int): Linhas recebidas pela etapa.
+        **atributos: Outros campos do evento (ex: arquivo=..., filtro=...).
+
+    Yields:
+        Medicao: Objeto em que o bloco informa `linhas_saida` (e pode acrescentar `atributos`).
+    """
+    medicao = Medicao(nome, categoria, linhas_entrada, atributos)
+    caminho = caminho_log()
+    if caminho is None:
+        yield medicao
+        return
+
+    identificador = f'{os.getpid()}.{next(_contador)}'
+    pai = _abertas[-1] if _abertas else None
+    _abertas.append(identificador)
+    rss_inicio, pico_inicio = _rss_mb(), _pico_mb()
+    inicio, relogio, cpu = time.time(), time.perf_counter(), time.process_time()
+    erro = None
+    try:
+        yield medicao
+    except BaseException as e:
+        erro = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        duracao, cpu = time.perf_counter() - relogio, time.process_time() - cpu
+        _abertas.pop()
+        rss_fim = _rss_mb()
+        _gravar(caminho, {
+            'nome': medicao.nome,
+            'categoria': medicao.categoria,
+            **_contexto,
+            **medicao.atributos,
+            'inicio': inicio,
+            'tempo_s': round(duracao, 6),
+            'cpu_s': round(cpu, 6),
+            'rss_inicio_mb': None if rss_inicio is None else round(rss_inicio, 1),
+            'rss_fim_mb': None if rss_fim is None else round(rss_fim, 1),
+            # Quanto a etapa elevou o pico do processo (0 se ficou abaixo de um pico anterior).
+            'pico_rss_delta_mb': round(_pico_mb() - pico_inicio, 1),
+            'linhas_entrada': medicao.linhas_entrada,
+            'linhas_saida': medicao.linhas_saida,
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+            'id': identificador,
+            'pai': pai,
+            'erro': erro,
+        })
+
+
+def medir(nome, funcao, *args, **kwargs):
+    """
+    Executa `funcao(*args, **kwargs)` como uma etapa, com as linhas do primeiro argumento e do resultado.
+
+    Returns:
+        O resultado de `funcao`.
+    """
+    with etapa(nome, linhas_entrada=contar_linhas(args[0]) if args else None) as medicao:
+        resultado = funcao(*args, **kwargs)
+        medicao.linhas_saida = contar_linhas(resultado)
+    return resultado
+
+
+def rastrear_tema(nome_tema):
+    """Decorador da `main` de um tema: um evento cobrindo o tema inteiro, com `tema` em todos os eventos internos."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with contexto(tema=nome_tema), etapa(nome_tema, categoria='tema'):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def ler_log(caminho):
+    """Eventos do log, na ordem em que foram gravados."""
+    with open(caminho, encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def exportar_chrome(caminho, destino):
+    """
+    Converte o log para o formato de eventos do Chrome (eventos completos 'X', em microssegundos).
+
+    Args:
+        caminho (str): Log gravado por `etapa`.
+        destino (str): Arquivo JSON aberto em `chrome://tracing` ou no Perfetto.
+    """
+    eventos = ler_log(caminho)
+    campos_tempo = {'nome', 'categoria', 'inicio', 'tempo_s', 'pid', 'tid'}
+    rastros = [{
+        'name': e['nome'],
+        'cat': e['categoria'],
+        'ph': 'X',
+        'ts': e['inicio'] * 1e6,
+        'dur': e['tempo_s'] * 1e6,
+        'pid': e['pid'],
+        'tid': e['tid'],
+        'args': {k: v for k, v in e.items() if k not in campos_tempo and v is not None},
+    } for e in eventos]
+    # Nomeia a linha do tempo de cada processo pelo tema (ou pelo tipo de processo, para os de renderização).
+    processos = {}
+    for e in eventos:
+        rotulo = e.get('tema') or ('renderização' if e['categoria'] == 'grafico' else 'principal')
+        processos.setdefault(e['pid'], f"{rotulo} (pid {e['pid']})")
+    rastros += [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': rotulo}} for pid, rotulo in processos.items()]
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': rastros, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    os.replace(destino + '.tmp', destino)
+    print(f"Rastro do Chrome gravado em '{destino}' ({len(eventos)} eventos).")
+
+
+def resumir(caminho, limite=15):
+    """
+    Tabela das etapas e gráficos mais lentos do log (somando repetições, ex: vários anos).
+
+    Returns:
+        pd.DataFrame: Uma linha por (tema, categoria, nome), ordenada pelo tempo total.
+    """
+    eventos = pd.DataFrame(ler_log(caminho))
+    if eventos.empty:
+        return eventos
+    if 'tema' not in eventos:
+        eventos['tema'] = None
+    eventos['tema'] = eventos['tema'].fillna('-')
+    resumo = eventos.groupby(['tema', 'categoria', 'nome'], sort=False).agg(
+        execucoes=('tempo_s', 'size'), tempo_s=('tempo_s', 'sum'), cpu_s=('cpu_s', 'sum'),
+        pico_rss_delta_mb=('pico_rss_delta_mb', 'max'), linhas_entrada=('linhas_entrada', 'max'),
+        linhas_saida=('linhas_saida', 'max'))
+    # O evento do tema inteiro contém os outros e ficaria sempre no topo.
+    resumo = resumo.drop(index='tema', level='categoria', errors='ignore')
+    return resumo.sort_values('tempo_s', ascending=False).head(limite)
+
+
+def main():
+    """Mostra as etapas mais lentas de um log e, opcionalmente, o converte para eventos do Chrome."""
+    parser = argparse.ArgumentParser(description='Resumo e conversão do log de rastreamento dos temas.')
+    parser.add_argument('log', help='log gravado com --rastrear (ou ENEM_RASTREAMENTO)')
+    parser.add_argument('--chrome', default=None, help='grava o rastro no formato de eventos do Chrome neste caminho')
+    parser.add_argument('--limite', type=int, default=15, help='número de etapas e gráficos mostrados')
+    args = parser.parse_args()
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(resumir(args.log, args.limite).round(3).to_string())
+    if args.chrome:
+        exportar_chrome(args.log, args.chrome)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Renderização dos gráficos dos temas em paralelo, com backend sem interface (Agg).
+
+Cada gráfico é uma tarefa independente: uma função de desenho de um tema e os dados
+já agregados de que ela precisa. As tarefas são distribuídas entre processos com
+`ProcessPoolExecutor`, então o tempo total passa a ser o do gráfico mais lento e não
+a soma de todos. `plt.show()` só é chamado no modo interativo, que roda no processo
+principal e em sequência.
+
+A renderização é incremental: cada gráfico tem uma assinatura (hash dos dados que recebe,
+do código da função de desenho e das funções e constantes do projeto que ela usa, do
+estilo e da resolução). As assinaturas ficam em um manifesto na pasta dos PNGs
+(`.manifesto.json`) e os gráficos cuja assinatura não mudou não são desenhados de novo.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+import types
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from rastreamento import ativar, contar_linhas, contexto_atual, definir_contexto, etapa
+
+# Resolução padrão dos gráficos salvos (ver README).
+DPI = 300
+
+# Manifesto com a assinatura de cada PNG, gravado na pasta dos gráficos.
+MANIFESTO = '.manifesto.json'
+
+# Pasta do projeto: só as funções e classes definidas aqui entram na assinatura do código.
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Uma tarefa de renderização: nome do PNG, descrição exibida no progresso,
+# função de desenho (definida no módulo do tema, para poder ser enviada a outro processo)
+# e os dados de que ela precisa.
+Grafico = namedtuple('Grafico', ['arquivo', 'descricao', 'funcao', 'dados'])
+
+
+def _atualizar_hash_dados(h, dados):
+    """Acrescenta ao hash o conteúdo dos dados de um gráfico (DataFrames, arrays, agregados e tuplas)."""
+    if isinstance(dados, (pd.DataFrame, pd.Series)):
+        colunas = dados.columns.tolist() if isinstance(dados, pd.DataFrame) else [dados.name]
+        tipos = dados.dtypes.tolist() if isinstance(dados, pd.DataFrame) else [dados.dtype]
+        h.update(repr((type(dados).__name__, dados.shape, colunas, [str(t) for t in tipos],
+                       list(dados.index.names), dados.columns.names if isinstance(dados, pd.DataFrame) else None)).encode())
+        h.update(pd.util.hash_pandas_object(dados, index=True).to_numpy().tobytes())
+    elif isinstance(dados, np.ndarray):
+        h.update(repr((dados.dtype.str, dados.shape)).encode())
+        h.update(np.ascontiguousarray(dados).tobytes())
+    elif isinstance(dados, dict):
+        h.update(b'dict')
+        for chave, valor in dados.items():
+            h.update(repr(chave).encode())
+            _atualizar_hash_dados(h, valor)
+    elif isinstance(dados, (list, tuple)):
+        h.update(type(dados).__name__.encode())
+        for valor in dados:
+            _atualizar_hash_dados(h, valor)
+    elif hasattr(dados, '__dict__') and not isinstance(dados, type):
+        # Agregados do projeto (ex: HistogramaMesclavel): classe e atributos.
+        h.update(type(dados).__qualname__.encode())
+        _atualizar_hash_dados(h, vars(dados))
+    else:
+        h.update(repr(dados).encode())
+
+
+def _nomes_usados(codigo):
+    """Nomes globais referenciados por um código, incluindo funções internas e compreensões."""
+    nomes = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nomes |= _nomes_usados(constante)
+    return nomes
+
+
+def _do_projeto(objeto):
+    """Indica se uma função ou classe foi definida em um arquivo do projeto."""
+    try:
+        arquivo = inspect.getsourcefile(objeto)
+    except TypeError:
+        return False
+    return arquivo is not None and os.path.dirname(os.path.abspath(arquivo)) == RAIZ
+
+
+def _atualizar_hash_codigo(h, objeto, vistos):
+    """
+    Acrescenta ao hash o código-fonte de uma função (ou classe) do projeto e, recursivamente,
+    o das funções, classes e constantes globais do projeto que ela usa.
+    """
+    if id(objeto) in vistos:
+        return
+    vistos.add(id(objeto))
+    try:
+        h.update(inspect.getsource(objeto).encode())
+    except (OSError, TypeError):
+        h.update(getattr(objeto, '__qualname__', repr(objeto)).encode())
+        return
+    if isinstance(objeto, type):
+        membros = [m for m in vars(objeto).values() if isinstance(m, types.FunctionType)]
+        codigos = [m.__code__ for m in membros]
+        globais = membros[0].__globals__ if membros else {}
+    else:
+        codigos = [objeto.__code__]
+        globais = objeto.__globals__
+    for nome in sorted(set().union(*map(_nomes_usados, codigos))):
+        if nome not in globais:
+            continue
+        valor = globais[nome]
+        if isinstance(valor, (types.FunctionType, type)):
+            if _do_projeto(valor):
+                _atualizar_hash_codigo(h, valor, vistos)
+        elif isinstance(valor, (dict, list, tuple, str, int, float, bool)):
+            # Constantes do módulo (ex: mapas de rótulos, ordens de categorias).
+            h.update(f'{nome}={valor!r}'.encode())
+
+
+def assinatura(grafico, estilo=None):
+    """
+    Calcula a assinatura de um gráfico: muda quando os dados, o código de desenho, o estilo ou o DPI mudam.
+
+    Args:
+        grafico (Grafico): Tarefa de renderização.
+        estilo (dict): Argumentos de `sns.set_theme` do tema.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal.
+    """
+    import seaborn as sns
+
+    h = hashlib.sha256()
+    h.update(json.dumps({'dpi': DPI, 'estilo': estilo, 'matplotlib': matplotlib.__version__,
+                         'seaborn': sns.__version__}, sort_keys=True, default=str).encode())
+    _atualizar_hash_codigo(h, grafico.funcao, set())
+    _atualizar_hash_dados(h, grafico.dados)
+    return h.hexdigest()
+
+
+def ler_manifesto(graficos_path):
+    """Lê o manifesto de uma pasta de gráficos ({arquivo: assinatura}); vazio se não existir."""
+    caminho = os.path.join(graficos_path, MANIFESTO)
+    if not os.path.isfile(caminho):
+        return {}
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_manifesto(graficos_path, manifesto):
+    caminho = os.path.join(graficos_path, MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=1, sort_keys=True)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def _inicializar_processo(contexto=None):
+    """Configura o backend Agg em cada processo de renderização (e o contexto do rastreamento, ex: o tema)."""
+    matplotlib.use('Agg', force=True)
+    if contexto is not None:
+        definir_contexto(contexto)
+
+
+def renderizar(grafico, graficos_path, estilo=None, interativo=False):
+    """
+    Desenha um gráfico e salva o PNG correspondente.
+
+    Args:
+        grafico (Grafico): Tarefa a renderizar.
+        graficos_path (str): Pasta onde o PNG será salvo.
+        estilo (dict): Argumentos de `sns.set_theme` do tema (ex: {'style': 'whitegrid'}).
+        interativo (bool): Se True, exibe o gráfico com `plt.show()` depois de salvar.
+
+    Returns:
+        tuple: (nome do arquivo, tempo de renderização em segundos).
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    inicio = time.perf_counter()
+    with etapa(grafico.arquivo, categoria='grafico', linhas_entrada=contar_linhas(grafico.dados),
+               descricao=grafico.descricao, pasta=graficos_path):
+        sns.set_theme(**(estilo or {'style': 'whitegrid'}))
+        grafico.funcao(grafico.dados)
+        plt.savefig(os.path.join(graficos_path, grafico.arquivo), dpi=DPI, bbox_inches='tight')
+        if interativo:
+            plt.show()
+        plt.close('all')
+    return grafico.arquivo, time.perf_counter() - inicio
+
+
+def renderizar_graficos(graficos, graficos_path, estilo=None, interativo=False, processos=None, forcar=False):
+    """
+    Renderiza uma lista de gráficos, em paralelo quando não estiver no modo interativo.
+
+    Gráficos cujo PNG existe e cuja assinatura é igual à do manifesto da pasta são pulados.
+
+    Args:
+        graficos (list): Lista de `Grafico`.
+        graficos_path (str): Pasta onde os PNGs serão salvos (criada se não existir).
+        estilo (dict): Argumentos de `sns.set_theme` do tema.
+        interativo (bool): Se True, renderiza em sequência no processo atual e exibe cada gráfico (sem pular nenhum).
+        processos (int): Número de processos. None usa um por núcleo; 1 renderiza em sequência.
+        forcar (bool): Se True, renderiza todos os gráficos mesmo sem alterações.
+
+    Returns:
+        dict: {arquivo: tempo de renderização em segundos} dos gráficos renderizados.
+    """
+    with etapa('renderizar', graficos=len(graficos), pasta=graficos_path) as medicao:
+        os.makedirs(graficos_path, exist_ok=True)
+        manifesto = ler_manifesto(graficos_path)
+        assinaturas = {g.arquivo: assinatura(g, estilo) for g in graficos}
+        pendentes = [g for g in graficos
+                     if interativo or forcar or manifesto.get(g.arquivo) != assinaturas[g.arquivo]
+                     or not os.path.isfile(os.path.join(graficos_path, g.arquivo))]
+        if len(pendentes) < len(graficos):
+            print(f"{len(graficos) - len(pendentes)} de {len(graficos)} gráficos sem alterações; "
+                  f"renderizando {len(pendentes)}.")
+        total = len(pendentes)
+        medicao.atributos['renderizados'] = total
+        tempos = {}
+
+        def registrar(arquivo, tempo):
+            tempos[arquivo] = tempo
+            manifesto[arquivo] = assinaturas[arquivo]
+
+        try:
+            if interativo or processos == 1 or total <= 1:
+                if not interativo:
+                    _inicializar_processo()
+                for i, grafico in enumerate(pendentes, 1):
+                    print(f"[{i}/{total}] Gerando: {grafico.descricao}...")
+                    registrar(*renderizar(grafico, graficos_path, estilo, interativo))
+                return tempos
+
+            processos = min(processos or os.cpu_count() or 1, total)
+            with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo,
+                                     initargs=(contexto_atual(),)) as executor:
+                futuros = {executor.submit(renderizar, g, graficos_path, estilo): g for g in pendentes}
+                for i, futuro in enumerate(as_completed(futuros), 1):
+                    grafico = futuros[futuro]
+                    arquivo, tempo = futuro.result()
+                    registrar(arquivo, tempo)
+                    print(f"[{i}/{total}] Gerado: {grafico.descricao} ({tempo:.1f} s)")
+            return tempos
+        finally:
+            # Grava o manifesto mesmo se algum gráfico falhar, para não refazer os que já foram gerados.
+            if tempos:
+                _gravar_manifesto(graficos_path, manifesto)
+
+
+def argumentos_linha_comando(recortes=False):
+    """
+    Lê as opções de renderização comuns a todos os temas (`python tema_x.py --interativo`).
+
+    Args:
+        recortes (bool): Se True, aceita também `--regioes` e `--dependencias`, para temas que leem
+            só as partições de RESULTADOS das regiões e tipos de escola pedidos (ver `particoes.py`).
+
+    Com `--rastrear`, liga o rastreamento das etapas (ver `rastreamento.py`) antes de o tema começar.
+
+    Returns:
+        dict: {'interativo': bool, 'processos': int | None, 'forcar': bool, 'anos': list | None} (e 'regioes'
+            e 'dependencias' com `recortes`), prontos para `main(**argumentos)`.
+    """
+    parser = argparse.ArgumentParser(description='Gera os gráficos do tema.')
+    parser.add_argument('--interativo', '--interactive', dest='interativo', action='store_true',
+                        help='exibe cada gráfico na tela (renderização sequencial)')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='processos usados na renderização (padrão: um por núcleo)')
+    parser.add_argument('--forcar', action='store_true',
+                        help='renderiza todos os gráficos, mesmo os que não mudaram')
+    parser.add_argument('--anos', nargs='+', type=int, default=None,
+                        help='anos analisados, um conjunto de gráficos por ano em <pasta do tema>/<ano> (padrão: 2024)')
+    parser.add_argument('--rastrear', default=None, metavar='LOG',
+                        help='grava o tempo, a CPU, a memória e as linhas de cada etapa e gráfico neste log JSON')
+    parser.add_argument('--chrome', default=None, metavar='ARQUIVO',
+                        help='com --rastrear, grava também o rastro no formato de eventos do Chrome')
+    if recortes:
+        parser.add_argument('--regioes', nargs='+', default=None, help='regiões analisadas (padrão: todas)')
+        parser.add_argument('--dependencias', nargs='+', type=int, default=None,
+                            help='códigos de TP_DEPENDENCIA_ADM_ESC (1 federal, 2 estadual, 3 municipal, 4 privada)')
+    args = parser.parse_args()
+    if args.chrome and not args.rastrear:
+        parser.error('--chrome requer --rastrear')
+    if args.rastrear:
+        ativar(args.rastrear, args.chrome)
+    argumentos = {'interativo': args.interativo, 'processos': args.processos, 'forcar': args.forcar, 'anos': args.anos}
+    if recortes:
+        argumentos.update(regioes=args.regioes, dependencias=args.dependencias)
+    return argumentos
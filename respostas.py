@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matriz de acertos por item (participantes x 45 itens de cada área), compactada em bits.
+
+As respostas de cada participante (TX_RESPOSTAS_*) são comparadas com o gabarito do seu
+caderno, buscado no índice denso de `ITENS_PROVA_2024.csv` (`indice_itens`, por CO_PROVA,
+língua e CO_POSICAO). A comparação é feita sobre matrizes de bytes, sem laço em Python por
+participante. Itens anulados (IN_ITEM_ABAN) contam como erro na matriz e aparecem como
+inválidos na tabela de itens; em LC, cada participante usa os 5 itens da língua escolhida.
+
+A matriz é guardada em `DADOS/.cache/respostas`, um diretório por área:
+- `acertos.npy`: uint8 (45, ceil(N/8)), um bit por participante (`np.packbits` no eixo
+  dos participantes). Ocupa 1/8 da matriz booleana equivalente (45 x N bytes).
+- `grupo.npy`: int16 (N,), índice do caderno (e língua) de cada participante na tabela
+  de itens, ou -1 para quem não fez a prova.
+- `itens.npz`: para cada grupo, CO_PROVA, língua, CO_ITEM, gabarito e validade de cada um dos 45 itens.
+
+Os arquivos são abertos com `np.load(mmap_mode='r')`: só as páginas lidas vão para a memória.
+A chave do diretório é o hash das versões de RESULTADOS e ITENS_PROVA; se um deles mudar,
+a matriz é recalculada.
+
+Uso:
+    python respostas.py                  # gera as matrizes das 4 áreas e mostra a memória ocupada
+    python respostas.py --areas LC --forcar
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import CACHE_PATH, DADOS_PATH, TAMANHO_BLOCO, contar_registros, impressao_digital, ler_em_blocos
+from indice_itens import LINGUAS, carregar_indice, linhas_provas
+
+ARQUIVO = 'RESULTADOS_2024.csv'
+ARQUIVO_ITENS = 'ITENS_PROVA_2024.csv'
+AREAS = ['CN', 'CH', 'LC', 'MT']
+RESPOSTAS_PATH = os.path.join(CACHE_PATH, 'respostas')
+
+# Itens respondidos por área e itens de língua estrangeira de LC (5 de inglês e 5 de espanhol).
+ITENS_POR_AREA = 45
+ITENS_LINGUA = 5
+# Aumentar quando o formato dos arquivos mudar, para invalidar as matrizes antigas.
+VERSAO_FORMATO = 3
+
+
+def posicoes_respondidas(n_gabarito, lingua):
+    """
+    Índices, no gabarito, dos itens que o participante respondeu (45 por área).
+
+    Args:
+        n_gabarito (int): Tamanho do gabarito do caderno (45, ou 50 em LC).
+        lingua (int): Língua estrangeira escolhida (0 = inglês, 1 = espanhol); usada só em LC.
+
+    Returns:
+        np.ndarray: Índices no gabarito.
+    """
+    if n_gabarito == ITENS_POR_AREA:
+        return np.arange(ITENS_POR_AREA)
+    if lingua == 1:
+        return np.arange(ITENS_LINGUA, n_gabarito)
+    return np.r_[0:ITENS_LINGUA, 2 * ITENS_LINGUA:n_gabarito]
+
+
+def matriz_bytes(textos, largura):
+    """
+    Converte textos de mesma largura (ex: strings de respostas) em uma matriz uint8 (linhas x caracteres).
+
+    A conversão é feita pelo NumPy, sem laço em Python sobre as linhas; textos ausentes viram zeros.
+    """
+    valores = pd.Series(textos).fillna('').to_numpy(dtype=object)
+    return np.array(valores, dtype=f'S{largura}').view(np.uint8).reshape(len(valores), largura)
+
+
+def tabela_grupos(indice, area):
+    """
+    Lista os grupos de participantes com os mesmos 45 itens: um por caderno (e por língua, em LC).
+
+    Os itens de todos os grupos saem de uma única consulta ao índice denso (`indice_itens`).
+
+    Args:
+        indice (dict): Saída de `indice_itens.carregar_indice`.
+        area (str): Área do conhecimento.
+
+    Returns:
+        dict: 'prova' e 'lingua' (um valor por grupo); 'co_item', 'gabarito' (byte da alternativa
+            correta), 'a', 'b', 'c', 'anulado' e 'valido' (grupos x 45, na ordem respondida);
+            'grupo_caderno' (linha do caderno no índice x língua -> grupo, -1 fora da área) e
+            'linha_prova' (CO_PROVA -> linha do caderno), usados por `respostas_marcadas`.
+    """
+    posicoes = indice['posicoes'][area]
+    itens = np.asarray(indice['itens'])
+    cadernos = np.flatnonzero((itens['area'][:, 0, posicoes] >= 0).any(axis=1))
+    linguas = np.array([0, 1] if area == 'LC' else [0])
+    linha_g = np.repeat(cadernos, len(linguas))
+    lingua_g = np.tile(linguas, len(cadernos))
+    registros = itens[linha_g[:, None], lingua_g[:, None], posicoes[None, :]]
+    grupo_caderno = np.full((len(indice['provas']), LINGUAS), -1, dtype=np.intp)
+    grupo_caderno[linha_g, lingua_g] = np.arange(len(linha_g))
+    if area != 'LC':
+        # Fora de LC a língua não muda os itens.
+        grupo_caderno[:, 1] = grupo_caderno[:, 0]
+    return {
+        'prova': indice['provas'][linha_g].astype(np.int16),
+        'lingua': lingua_g.astype(np.int8),
+        'co_item': registros['co_item'],
+        'gabarito': registros['gabarito'],
+        'a': registros['a'].astype(np.float64),
+        'b': registros['b'].astype(np.float64),
+        'c': registros['c'].astype(np.float64),
+        'anulado': registros['anulado'],
+        'valido': ~registros['anulado'] & ~np.isnan(registros['a']),
+        'grupo_caderno': grupo_caderno,
+        'linha_prova': indice['linha_prova'],
+    }
+
+
+def linhas_por_grupo(grupo):
+    """Agrupa as linhas pelo índice do grupo: {grupo: posições das linhas}, sem as linhas com grupo -1."""
+    return {int(g): linhas for g, linhas in pd.DataFrame({'g': grupo}).groupby('g').indices.items() if g >= 0}
+
+
+def respostas_marcadas(bloco, area, tabela):
+    """
+    Alinha as respostas de um bloco de participantes aos 45 itens respondidos do seu caderno.
+
+    Args:
+        bloco (pd.DataFrame): Linhas de RESULTADOS com CO_PROVA_<area>, TX_RESPOSTAS_<area> (e TP_LINGUA em LC).
+        area (str): Área do conhecimento.
+        tabela (dict): Saída de `tabela_grupos`.
+
+    Returns:
+        tuple: (marcadas, grupo). `marcadas` é uma matriz uint8 (linhas do bloco x 45) com o byte da
+            alternativa marcada (zero para quem não fez a prova). `grupo` é o grupo (caderno e língua)
+            de cada linha em `tabela`, ou -1 sem respostas ou com caderno desconhecido.
+    """
+    respostas = bloco[f'TX_RESPOSTAS_{area}']
+    caderno = linhas_provas(tabela, pd.to_numeric(bloco[f'CO_PROVA_{area}'], errors='coerce').to_numpy())
+    # Fora de LC não há língua estrangeira; em LC, TP_LINGUA ausente é tratado como inglês.
+    linguas = (bloco['TP_LINGUA'].to_numpy() == 1).astype(np.intp) if area == 'LC' else np.zeros(len(bloco), np.intp)
+    grupo = np.where(caderno >= 0, tabela['grupo_caderno'][np.maximum(caderno, 0), linguas], -1)
+    grupo[respostas.isna().to_numpy()] = -1
+    presentes = grupo >= 0
+    if not presentes.any():
+        return np.zeros((len(bloco), ITENS_POR_AREA), dtype=np.uint8), grupo
+    largura = max(int(respostas[presentes].str.len().max()), ITENS_POR_AREA)
+    matriz = matriz_bytes(respostas.where(presentes), largura)
+    if largura == ITENS_POR_AREA:
+        return matriz, grupo
+    # Strings com uma posição por item do gabarito (50 em LC, com '9' na língua não escolhida).
+    marcadas = np.zeros((len(bloco), ITENS_POR_AREA), dtype=np.uint8)
+    for lingua in np.unique(linguas[presentes]):
+        linhas = np.flatnonzero(presentes & (linguas == lingua))
+        marcadas[linhas] = matriz[np.ix_(linhas, posicoes_respondidas(largura, lingua))]
+    return marcadas, grupo
+
+
+def decodificar_acertos(bloco, area, tabela):
+    """
+    Compara as respostas de um bloco de participantes com o gabarito do caderno de cada um.
+
+    O gabarito de cada linha vem de uma indexação da tabela de grupos (`tabela['gabarito'][grupo]`).
+
+    Args:
+        bloco (pd.DataFrame): Linhas de RESULTADOS com CO_PROVA_<area>, TX_RESPOSTAS_<area> (e TP_LINGUA em LC).
+        area (str): Área do conhecimento.
+        tabela (dict): Saída de `tabela_grupos`.
+
+    Returns:
+        tuple: (acertos, grupo). `acertos` é uma matriz booleana (linhas do bloco x 45), com False
+            para itens anulados, em branco e para quem não fez a prova. `grupo` é o mesmo de
+            `respostas_marcadas`.
+    """
+    marcadas, grupo = respostas_marcadas(bloco, area, tabela)
+    g = np.maximum(grupo, 0)
+    acertos = (marcadas == tabela['gabarito'][g]) & ~tabela['anulado'][g] & (grupo >= 0)[:, None]
+    return acertos, grupo
+
+
+def assinatura_matriz(area):
+    """Hash da área, do formato e das versões de RESULTADOS e ITENS_PROVA (chave do diretório da matriz)."""
+    conteudo = {
+        'area': area,
+        'versao': VERSAO_FORMATO,
+        'resultados': impressao_digital(os.path.join(DADOS_PATH, ARQUIVO)),
+        'itens': impressao_digital(os.path.join(DADOS_PATH, ARQUIVO_ITENS)),
+    }
+    texto = json.dumps(conteudo, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+def caminho_matriz(area):
+    """Diretório da matriz de acertos de uma área (o nome inclui a assinatura)."""
+    base = os.path.splitext(ARQUIVO)[0]
+    return os.path.join(RESPOSTAS_PATH, f'{base}.{area}.{assinatura_matriz(area)}')
+
+
+def gerar_matriz(area, tamanho_bloco=TAMANHO_BLOCO, indice=None):
+    """
+    Decodifica as respostas de uma área em blocos e grava a matriz de acertos compactada.
+
+    Args:
+        area (str): 'CN', 'CH', 'LC' ou 'MT'.
+        tamanho_bloco (int): Linhas de RESULTADOS lidas por vez.
+        indice (dict): Índice dos itens (None usa `indice_itens.carregar_indice`).
+
+    Returns:
+        str: Diretório da matriz gerada.
+    """
+    indice = carregar_indice() if indice is None else indice
+    tabela = tabela_grupos(indice, area)
+    registros = contar_registros(ARQUIVO)
+    caminho = caminho_matriz(area)
+    # Grava em um diretório temporário e só depois renomeia, para nunca deixar uma matriz pela metade.
+    caminho_tmp = caminho + '.tmp'
+    shutil.rmtree(caminho_tmp, ignore_errors=True)
+    os.makedirs(caminho_tmp)
+    print(f"Decodificando as respostas de {area} ({registros} registros)...")
+
+    bits = np.lib.format.open_memmap(os.path.join(caminho_tmp, 'acertos.npy'), mode='w+', dtype=np.uint8,
+                                     shape=(ITENS_POR_AREA, (registros + 7) // 8))
+    grupo = np.lib.format.open_memmap(os.path.join(caminho_tmp, 'grupo.npy'), mode='w+', dtype=np.int16,
+                                      shape=(registros,))
+    colunas = [f'CO_PROVA_{area}', f'TX_RESPOSTAS_{area}'] + (['TP_LINGUA'] if area == 'LC' else [])
+    linha, byte = 0, 0
+    # Participantes que ainda não completam um byte; vão para o início do próximo bloco.
+    pendentes = np.zeros((ITENS_POR_AREA, 0), dtype=bool)
+    for bloco in ler_em_blocos(ARQUIVO, colunas, tamanho_bloco):
+        acertos, grupo[linha:linha + len(bloco)] = decodificar_acertos(bloco, area, tabela)
+        linha += len(bloco)
+
+        acertos = np.concatenate([pendentes, acertos.T], axis=1)
+        completos = acertos.shape[1] // 8
+        bits[:, byte:byte + completos] = np.packbits(acertos[:, :completos * 8], axis=1)
+        byte += completos
+        pendentes = acertos[:, completos * 8:]
+    if pendentes.shape[1]:
+        bits[:, byte:byte + 1] = np.packbits(pendentes, axis=1)
+    if linha != registros:
+        raise RuntimeError(f"Foram lidos {linha} registros de '{ARQUIVO}', mas eram esperados {registros}.")
+    bits.flush()
+    grupo.flush()
+    del bits, grupo
+    np.savez(os.path.join(caminho_tmp, 'itens.npz'), registros=registros,
+             **{k: tabela[k] for k in ['prova', 'lingua', 'co_item', 'gabarito', 'valido']})
+
+    # Remove as matrizes antigas da mesma área antes de publicar a nova.
+    prefixo = os.path.basename(caminho).rsplit('.', 1)[0] + '.'
+    for nome in os.listdir(RESPOSTAS_PATH):
+        if nome.startswith(prefixo) and not nome.endswith('.tmp'):
+            shutil.rmtree(os.path.join(RESPOSTAS_PATH, nome))
+    os.replace(caminho_tmp, caminho)
+    return caminho
+
+
+def carregar_matriz(area, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Abre a matriz de acertos de uma área (gerando-a se necessário), mapeada da memória do disco.
+
+    Args:
+        area (str): 'CN', 'CH', 'LC' ou 'MT'.
+        tamanho_bloco (int): Linhas lidas por vez quando a matriz precisa ser gerada.
+
+    Returns:
+        dict: 'acertos' (uint8 45 x ceil(N/8), memmap), 'grupo' (int16 N, memmap), 'registros' (N)
+            e a tabela de itens de cada grupo: 'prova', 'lingua', 'co_item', 'gabarito' e 'valido'.
+    """
+    caminho = caminho_matriz(area)
+    if not os.path.isdir(caminho):
+        gerar_matriz(area, tamanho_bloco)
+    matriz = {
+        'acertos': np.load(os.path.join(caminho, 'acertos.npy'), mmap_mode='r'),
+        'grupo': np.load(os.path.join(caminho, 'grupo.npy'), mmap_mode='r'),
+    }
+    with np.load(os.path.join(caminho, 'itens.npz')) as tabela:
+        matriz.update({k: tabela[k] for k in tabela.files})
+    matriz['registros'] = int(matriz['registros'])
+    return matriz
+
+
+def acertos_item(matriz, posicao, inicio=0, fim=None):
+    """
+    Desempacota os acertos de um item (posição 0 a 44 na ordem respondida) para um intervalo de participantes.
+
+    Args:
+        matriz (dict): Saída de `carregar_matriz`.
+        posicao (int): Posição do item entre os 45 respondidos.
+        inicio (int), fim (int): Intervalo de participantes (fim=None vai até o último).
+            `inicio` deve ser múltiplo de 8, para começar no início de um byte.
+
+    Returns:
+        np.ndarray: Vetor booleano com um valor por participante do intervalo.
+    """
+    fim = matriz['registros'] if fim is None else min(fim, matriz['registros'])
+    if inicio % 8:
+        raise ValueError("O início do intervalo deve ser múltiplo de 8.")
+    bits = matriz['acertos'][posicao, inicio // 8:(fim + 7) // 8]
+    return np.unpackbits(bits, count=fim - inicio).astype(bool)
+
+
+def acertos_bloco(matriz, inicio=0, fim=None):
+    """
+    Desempacota os acertos dos 45 itens para um intervalo de participantes.
+
+    Returns:
+        np.ndarray: Matriz booleana (participantes do intervalo x 45).
+    """
+    fim = matriz['registros'] if fim is None else min(fim, matriz['registros'])
+    if inicio % 8:
+        raise ValueError("O início do intervalo deve ser múltiplo de 8.")
+    bits = matriz['acertos'][:, inicio // 8:(fim + 7) // 8]
+    return np.unpackbits(bits, axis=1, count=fim - inicio).astype(bool).T
+
+
+def main():
+    """Gera as matrizes de acertos das áreas pedidas e compara a memória com a matriz booleana."""
+    parser = argparse.ArgumentParser(description='Matriz de acertos por item, compactada em bits.')
+    parser.add_argument('--areas', nargs='+', choices=AREAS, default=AREAS)
+    parser.add_argument('--forcar', action='store_true', help='gera as matrizes mesmo que já existam')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO,
+                        help=f'linhas de RESULTADOS lidas por vez (padrão: {TAMANHO_BLOCO})')
+    args = parser.parse_args()
+
+    indice = carregar_indice()
+    for area in args.areas:
+        inicio = time.perf_counter()
+        if args.forcar or not os.path.isdir(caminho_matriz(area)):
+            gerar_matriz(area, args.tamanho_bloco, indice)
+        tempo = time.perf_counter() - inicio
+        matriz = carregar_matriz(area)
+        presentes = int((matriz['grupo'] >= 0).sum())
+        compactada = matriz['acertos'].nbytes
+        booleana = ITENS_POR_AREA * matriz['registros']
+        anulados = int((~matriz['valido']).any(axis=0).sum())
+        print(f"{area}: {presentes} de {matriz['registros']} participantes com respostas | "
+              f"{compactada / 2**20:.2f} MB em bits vs {booleana / 2**20:.2f} MB em bool "
+              f"({booleana / max(compactada, 1):.1f}x) | {len(matriz['prova'])} grupos, "
+              f"{anulados} posições com item anulado em algum grupo | {tempo:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local (asyncio) para consultas agregadas sobre os microdados do ENEM.
+
+Os cubos de `cubo.py` e as colunas mapeadas de `colunas_mapeadas.py` são abertos uma única
+vez, na inicialização; cada consulta é um JSON com filtros, agrupamentos e uma agregação
+e é respondida em milissegundos, sem copiar e editar um `tema_*.py` e reler o CSV.
+Consultas cobertas por um cuboide (contagem, média, desvio ou proporção, com filtros por
+categoria) são recortes do cubo; as demais (ex: mediana, mínimo, filtros por faixa de
+nota, dimensões fora de um cuboide) usam as colunas mapeadas. As respostas ficam em um
+cache LRU em memória, com a consulta normalizada como chave.
+
+Rotas:
+    POST /consulta       corpo JSON, ex: {"arquivo": "RESULTADOS_2024.csv", "grupos": ["TIPO_ESCOLA"],
+                         "medidas": ["NU_NOTA_MT"], "agregacao": "media", "filtros": {"REGIAO": ["Nordeste"]}}
+    GET  /dimensoes      dimensões e medidas de cada arquivo
+    GET  /estatisticas   acertos e faltas do cache LRU
+
+Agregações: 'contagem', 'media', 'desvio', 'mediana', 'minimo', 'maximo' e 'proporcao'
+(percentual das categorias do segundo grupo dentro de cada categoria do primeiro).
+Filtros: lista de categorias (`{"REGIAO": ["Nordeste"]}`, ou só `"Nordeste"`) ou faixa de valores
+de uma coluna numérica (`{"NU_NOTA_MT": {"min": 600, "max": 1000}}`).
+
+Uso:
+    python servidor_consultas.py                     # http://127.0.0.1:8765
+    python servidor_consultas.py --porta 9000 --cache 4096
+    curl -s localhost:8765/consulta -d '{"grupos": ["TIPO_ESCOLA"], "medidas": ["NU_NOTA_MT"], "filtros": {"REGIAO": ["Nordeste"]}}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from anos import ANO_PADRAO, arquivo_do_ano
+from cache_colunar import DADOS_PATH
+from colunas_mapeadas import abrir_colunas
+from cubo import DIMENSOES, FILTROS_CUBO, MEDIDAS, carregar_cubo, dimensoes_bloco
+from derivacao import media_linhas
+from limpeza import NOTAS_COLS
+
+HOST = '127.0.0.1'
+PORTA = 8765
+# Número máximo de respostas guardadas no cache LRU.
+TAMANHO_CACHE = 1024
+ARQUIVO_PADRAO = 'RESULTADOS_2024.csv'
+
+# Agregações respondidas pelo cubo e funções do pandas usadas sobre as colunas mapeadas.
+AGREGACOES_CUBO = {'contagem', 'media', 'desvio', 'proporcao'}
+FUNCOES = {'media': 'mean', 'desvio': 'std', 'mediana': 'median', 'minimo': 'min', 'maximo': 'max'}
+AGREGACOES = sorted(set(FUNCOES) | AGREGACOES_CUBO)
+
+MENSAGENS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class CacheLRU:
+    """Respostas das consultas mais recentes, removendo a usada há mais tempo quando enche."""
+
+    def __init__(self, capacidade=TAMANHO_CACHE):
+        self.capacidade = capacidade
+        self.itens = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        """Resposta guardada para a chave (marcada como usada agora), ou None."""
+        if chave not in self.itens:
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        self.itens.move_to_end(chave)
+        return self.itens[chave]
+
+    def guardar(self, chave, valor):
+        self.itens[chave] = valor
+        self.itens.move_to_end(chave)
+        while len(self.itens) > self.capacidade:
+            self.itens.popitem(last=False)
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {'itens': len(self.itens), 'capacidade': self.capacidade, 'acertos': self.acertos,
+                'faltas': self.faltas, 'taxa_acertos': self.acertos / total if total else None}
+
+
+def carregar_fontes(arquivos=None):
+    """
+    Abre, uma única vez, o cubo e as colunas mapeadas (com as dimensões decodificadas) de cada arquivo.
+
+    Returns:
+        dict: {arquivo: {'cubo': CuboMesclavel, 'dados': pd.DataFrame}}.
+    """
+    fontes = {}
+    for arquivo in arquivos or list(DIMENSOES):
+        if arquivo_do_ano(arquivo, ANO_PADRAO) not in DIMENSOES:
+            print(f"Não há cubo definido para '{arquivo}'; ignorando.")
+            continue
+        if not os.path.isfile(os.path.join(DADOS_PATH, arquivo)):
+            print(f"Arquivo '{arquivo}' não encontrado; ignorando.")
+            continue
+        referencia = arquivo_do_ano(arquivo, ANO_PADRAO)
+        cubo = carregar_cubo(arquivo)
+        origens = [o for o, _ in DIMENSOES[referencia].values() if o != 'NOTA_MEDIA_GERAL']
+        colunas = list(dict.fromkeys(origens + [c for c in MEDIDAS[referencia] if c != 'NOTA_MEDIA_GERAL']))
+        dados = abrir_colunas(arquivo, colunas, FILTROS_CUBO[referencia])
+        if 'NOTA_MEDIA_GERAL' in MEDIDAS[referencia]:
+            dados = dados.assign(NOTA_MEDIA_GERAL=media_linhas(dados, NOTAS_COLS))
+        dados = dados.assign(**dimensoes_bloco(dados, referencia))
+        fontes[arquivo] = {'cubo': cubo, 'dados': dados}
+        print(f"{arquivo}: {len(dados)} registros, {len(cubo.dimensoes)} dimensões, {len(cubo.cuboides)} cuboides.")
+    return fontes
+
+
+def normalizar(consulta):
+    """
+    Valida a consulta e preenche os valores padrão.
+
+    Returns:
+        dict: 'arquivo', 'grupos', 'medidas', 'agregacao' e 'filtros', sempre presentes.
+    """
+    if not isinstance(consulta, dict):
+        raise ValueError("A consulta deve ser um objeto JSON.")
+    desconhecidas = set(consulta) - {'arquivo', 'grupos', 'medidas', 'agregacao', 'filtros'}
+    if desconhecidas:
+        raise ValueError(f"Campos desconhecidos: {sorted(desconhecidas)}.")
+    grupos = consulta.get('grupos', [])
+    medidas = consulta.get('medidas', [])
+    filtros = consulta.get('filtros', {})
+    if not isinstance(filtros, dict):
+        raise ValueError("Os filtros devem ser um objeto JSON ({coluna: categorias ou faixa}).")
+    normalizada = {
+        'arquivo': consulta.get('arquivo', ARQUIVO_PADRAO),
+        'grupos': [grupos] if isinstance(grupos, str) else list(grupos),
+        'medidas': [medidas] if isinstance(medidas, str) else list(medidas),
+        # Uma categoria sozinha ({"REGIAO": "Nordeste"}) vira uma lista de uma categoria.
+        'filtros': {coluna: valores if isinstance(valores, (list, dict)) else [valores]
+                    for coluna, valores in filtros.items()},
+    }
+    normalizada['agregacao'] = consulta.get('agregacao', 'media' if normalizada['medidas'] else 'contagem')
+    if normalizada['agregacao'] not in AGREGACOES:
+        raise ValueError(f"Agregação desconhecida: {normalizada['agregacao']} (use {', '.join(AGREGACOES)}).")
+    if normalizada['agregacao'] in FUNCOES and not normalizada['medidas']:
+        raise ValueError(f"A agregação '{normalizada['agregacao']}' precisa de ao menos uma medida.")
+    if normalizada['agregacao'] == 'proporcao' and len(normalizada['grupos']) != 2:
+        raise ValueError("A agregação 'proporcao' precisa de exatamente dois grupos (linhas e colunas).")
+    return normalizada
+
+
+def _pelo_cubo(cubo, consulta):
+    """Resultado da consulta a partir do cubo, ou None se o cubo não a cobre."""
+    grupos, medidas, filtros, agregacao = consulta['grupos'], consulta['medidas'], consulta['filtros'], consulta['agregacao']
+    dimensoes = grupos + list(filtros)
+    # O cubo não recorta e agrupa a mesma dimensão; essas consultas ficam com as colunas mapeadas.
+    if (agregacao not in AGREGACOES_CUBO or not grupos or set(grupos) & set(filtros)
+            or not set(dimensoes) <= set(cubo.dimensoes)
+            or not set(medidas) <= set(cubo.medidas) or not cubo.cobre(dimensoes)
+            or not all(isinstance(v, list) for v in filtros.values())):
+        return None
+    if agregacao == 'contagem':
+        return cubo.contagens(grupos, filtros).to_frame()
+    if agregacao == 'proporcao':
+        return cubo.proporcoes(grupos[0], grupos[1], filtros)
+    calcular = cubo.medias if agregacao == 'media' else cubo.desvios
+    resultado = calcular(grupos, medidas, filtros)
+    return resultado.assign(n=cubo.contagens(grupos, filtros))
+
+
+def _pelos_dados(dados, consulta):
+    """Resultado da consulta a partir das colunas mapeadas (filtro, agrupamento e agregação do pandas)."""
+    grupos, medidas, filtros, agregacao = consulta['grupos'], consulta['medidas'], consulta['filtros'], consulta['agregacao']
+    faltantes = [c for c in grupos + medidas + list(filtros) if c not in dados.columns]
+    if faltantes:
+        raise ValueError(f"Colunas desconhecidas: {faltantes}.")
+    mascara = np.ones(len(dados), dtype=bool)
+    for coluna, valores in filtros.items():
+        if isinstance(valores, dict):
+            mascara &= dados[coluna].between(valores.get('min', -np.inf), valores.get('max', np.inf)).to_numpy()
+        else:
+            mascara &= dados[coluna].isin(valores).to_numpy()
+    recorte = dados.loc[mascara, grupos + medidas]
+    if agregacao == 'proporcao':
+        return recorte.groupby(grupos[0], observed=True)[grupos[1]].value_counts(normalize=True).unstack().fillna(0) * 100
+    if not grupos:
+        if agregacao == 'contagem':
+            return pd.DataFrame({'n': [len(recorte)]})
+        return recorte[medidas].agg(FUNCOES[agregacao]).to_frame().T.assign(n=len(recorte))
+    agrupado = recorte.groupby(grupos, observed=True)
+    if agregacao == 'contagem':
+        return agrupado.size().rename('n').to_frame()
+    return agrupado[medidas].agg(FUNCOES[agregacao]).assign(n=agrupado.size())
+
+
+def executar_consulta(fontes, consulta):
+    """
+    Responde uma consulta já normalizada.
+
+    Returns:
+        dict: 'fonte' ('cubo' ou 'dados') e 'linhas' (uma por grupo, com os grupos como campos).
+    """
+    if consulta['arquivo'] not in fontes:
+        raise ValueError(f"Arquivo não carregado: {consulta['arquivo']} (disponíveis: {', '.join(fontes)}).")
+    fonte = fontes[consulta['arquivo']]
+    resultado = _pelo_cubo(fonte['cubo'], consulta)
+    origem = 'cubo'
+    if resultado is None:
+        resultado, origem = _pelos_dados(fonte['dados'], consulta), 'dados'
+    if consulta['grupos']:
+        # Categorias e colunas como texto, para que os grupos virem campos comuns do JSON.
+        resultado.columns = resultado.columns.astype(str)
+        resultado = resultado.reset_index()
+    # O `to_json` do pandas converte NaN em null e os tipos do NumPy em números do JSON.
+    return {'fonte': origem, 'linhas': json.loads(resultado.to_json(orient='records', force_ascii=False))}
+
+
+def descrever(fontes):
+    """Dimensões (com as categorias), medidas e colunas de cada arquivo carregado."""
+    return {arquivo: {
+        'dimensoes': {d: t.categories.tolist() for d, t in fonte['cubo'].dimensoes.items()},
+        'medidas': fonte['cubo'].medidas,
+        'cuboides': [list(c) for c in fonte['cubo'].cuboides],
+        'registros': len(fonte['dados']),
+    } for arquivo, fonte in fontes.items()}
+
+
+class ServidorConsultas:
+    """Servidor HTTP/1.1 mínimo (com conexões persistentes) sobre `asyncio.start_server`."""
+
+    def __init__(self, fontes, tamanho_cache=TAMANHO_CACHE):
+        self.fontes = fontes
+        self.cache = CacheLRU(tamanho_cache)
+
+    async def consultar(self, corpo):
+        """Responde uma consulta pelo cache ou, em uma falta, calculando-a fora do laço de eventos."""
+        consulta = normalizar(json.loads(corpo or b'{}'))
+        chave = json.dumps(consulta, sort_keys=True, ensure_ascii=False)
+        inicio = time.perf_counter()
+        resposta = self.cache.obter(chave)
+        em_cache = resposta is not None
+        if not em_cache:
+            # O pandas roda em uma thread, para o laço continuar atendendo as outras conexões.
+            resposta = await asyncio.get_running_loop().run_in_executor(None, executar_consulta, self.fontes, consulta)
+            self.cache.guardar(chave, resposta)
+        return {**resposta, 'cache': em_cache, 'tempo_ms': round((time.perf_counter() - inicio) * 1000, 3)}
+
+    async def responder(self, metodo, caminho, corpo):
+        """Encaminha a requisição para a rota; devolve (status, objeto JSON)."""
+        rotas = {'/consulta': 'POST', '/dimensoes': 'GET', '/estatisticas': 'GET'}
+        if caminho not in rotas:
+            return 404, {'erro': f"Rota desconhecida: {caminho} (use {', '.join(rotas)})."}
+        if metodo != rotas[caminho]:
+            return 405, {'erro': f"Use {rotas[caminho]} em {caminho}."}
+        if caminho == '/dimensoes':
+            return 200, descrever(self.fontes)
+        if caminho == '/estatisticas':
+            return 200, self.cache.estatisticas()
+        try:
+            return 200, await self.consultar(corpo)
+        except (ValueError, KeyError, TypeError) as erro:
+            # JSON inválido, campos ou categorias desconhecidas: erro do cliente.
+            return 400, {'erro': str(erro)}
+
+    async def atender(self, leitor, escritor):
+        """Atende as requisições de uma conexão até o cliente fechá-la (ou pedir `Connection: close`)."""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                metodo, caminho, _ = linha.decode('latin1').split(' ', 2)
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+                    nome, _, valor = linha.decode('latin1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                corpo = await leitor.readexactly(int(cabecalhos.get('content-length', 0)))
+                try:
+                    status, objeto = await self.responder(metodo, caminho.split('?', 1)[0], corpo)
+                except Exception as erro:  # Nunca derruba a conexão por um erro de uma consulta.
+                    status, objeto = 500, {'erro': f'{type(erro).__name__}: {erro}'}
+                dados = json.dumps(objeto, ensure_ascii=False).encode('utf-8')
+                fechar = cabecalhos.get('connection', '').lower() == 'close'
+                escritor.write(f"HTTP/1.1 {status} {MENSAGENS_HTTP[status]}\r\n"
+                               f"Content-Type: application/json; charset=utf-8\r\n"
+                               f"Content-Length: {len(dados)}\r\n"
+                               f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode('latin1') + dados)
+                await escritor.drain()
+                if fechar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass  # Cliente desconectou no meio de uma requisição (ou enviou uma linha inválida).
+        finally:
+            escritor.close()
+
+    async def servir(self, host=HOST, porta=PORTA):
+        servidor = await asyncio.start_server(self.atender, host, porta)
+        print(f"Servidor de consultas em http://{host}:{porta} (cache LRU de {self.cache.capacidade} respostas).")
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main():
+    """Carrega os cubos e as colunas mapeadas e atende as consultas até ser interrompido."""
+    parser = argparse.ArgumentParser(description='Servidor HTTP local de consultas agregadas.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--porta', type=int, default=PORTA)
+    parser.add_argument('--cache', type=int, default=TAMANHO_CACHE, help='respostas guardadas no cache LRU')
+    parser.add_argument('--arquivos', nargs='+', default=None, help='arquivos carregados (padrão: RESULTADOS e PARTICIPANTES)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    fontes = carregar_fontes(args.arquivos)
+    if not fontes:
+        print("Nenhum arquivo de dados encontrado na pasta 'DADOS'.")
+        return
+    print(f"Dados carregados em {time.perf_counter() - inicio:.2f} s.")
+    try:
+        asyncio.run(ServidorConsultas(fontes, args.cache).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,86 +11,85 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from agregacao_streaming import AgregadoGrupos, CuboMesclavel, HistogramaMesclavel, agregar_em_blocos
+from anos import arquivo_do_ano, executar_anos, pasta_do_ano
+from cache_colunar import DADOS_PATH, TAMANHO_BLOCO
+from colunas_mapeadas import abrir_colunas
+from cubo import FAIXAS_NOTA, ROTULOS_FAIXAS, carregar_cubo
+from derivacao import derivar
+from esquema import ORDEM_ESCOLAS, ROTULOS, decodificar
+from histogramas import (densidades, desenhar_boxplot, desenhar_densidade_2d, desenhar_densidades, desenhar_histograma,
+                         histograma_2d_por_grupo, histograma_por_grupo, quantis_por_grupo)
+from limpeza import NOTAS_COLS, filtrar_presentes
+from rastreamento import etapa, medir, rastrear_tema
+from renderizacao import Grafico, argumentos_linha_comando, renderizar_graficos
 
-def main():
+# Arquivo e colunas usados pelo tema (o orquestrador usa essas listas para carregar cada arquivo uma única vez).
+ARQUIVO = 'RESULTADOS_2024.csv'
+COLUNAS = [
+    'TP_DEPENDENCIA_ADM_ESC', 'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
+    'TP_STATUS_REDACAO', 'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
+]
 
-    # --- Configuração Inicial ---
-    dados_path = 'DADOS'
-    dados_enem_file = os.path.join(dados_path, 'RESULTADOS_2024.csv')
-    sns.set_theme(style="whitegrid") # Define o estilo dos gráficos.
-    
-    # Cria a pasta para salvar os gráficos
-    graficos_path = 'graficos_academico'
-    os.makedirs(graficos_path, exist_ok=True)
+# Mapeia os códigos de dependência da escola para textos (a ordem lógica, ORDEM_ESCOLAS, vem do esquema central).
+MAPA_DEPENDENCIA = ROTULOS['TP_DEPENDENCIA_ADM_ESC']
 
-    # --- Parte 1: Carregar Dados do CSV ---
-    print(f"\n--- Parte 1: Carregando Dados do arquivo: {dados_enem_file} ---")
-    try:
-        df_resultados = pd.read_csv(dados_enem_file, encoding='latin1', delimiter=';')
-        print(f"Dados carregados com sucesso: {len(df_resultados)} registros.")
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo '{dados_enem_file}' não encontrado.")
-        return
-    except Exception as e:
-        print(f"ERRO ao carregar o arquivo CSV: {e}")
-        return
-    if df_resultados.empty:
-        print("DataFrame está vazio. Finalizando.")
-        return
+def preparar(df_resultados):
+    """
+    Prepara os dados do tema a partir de RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
 
-    # --- Parte 2: Limpar e Preparar os Dados ---
-    print("\n--- Parte 2: Limpeza e Preparação dos Dados ---")
+    Mantém apenas estudantes com tipo de escola declarado (códigos 1 a 4) e cria as colunas
+    TIPO_ESCOLA (categórica e ordenada) e NOTA_MEDIA_GERAL.
 
-    # Filtra o DataFrame para incluir apenas estudantes que:
-    # 1. Têm tipo de escola declarado (códigos 1 a 4).
-    # 2. Estiveram presentes em todas as 4 provas objetivas.
-    # 3. Tiveram a redação avaliada (status 1 = sem problemas).
-    df_presentes = df_resultados[
-        (df_resultados['TP_DEPENDENCIA_ADM_ESC'].isin([1, 2, 3, 4])) &
-        (df_resultados['TP_PRESENCA_CN'] == 1) &
-        (df_resultados['TP_PRESENCA_CH'] == 1) &
-        (df_resultados['TP_PRESENCA_LC'] == 1) &
-        (df_resultados['TP_PRESENCA_MT'] == 1) &
-        (df_resultados['TP_STATUS_REDACAO'] == 1)
-    ].copy() # .copy() evita o SettingWithCopyWarning.
-
-    # Remove aspas duplas dos nomes das colunas, caso existam.
-    df_presentes.columns = df_presentes.columns.str.replace('"', '')
-    # Lista de colunas de notas para facilitar a manipulação.
-    notas_cols = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
-    # Remove qualquer linha que tenha valor nulo em qualquer uma das colunas de nota.
-    df_presentes.dropna(subset=notas_cols, inplace=True)
-
-    # Mapeia os códigos de dependência da escola para textos e define uma ordem lógica.
-    mapa_dependencia = {1: 'Federal', 2: 'Estadual', 3: 'Municipal', 4: 'Privada'}
-    ordem_escolas = ['Federal', 'Privada', 'Estadual', 'Municipal'] # Ordena por desempenho esperado.
-    df_presentes['TIPO_ESCOLA'] = df_presentes['TP_DEPENDENCIA_ADM_ESC'].map(mapa_dependencia)
-    df_presentes['TIPO_ESCOLA'] = pd.Categorical(df_presentes['TIPO_ESCOLA'], categories=ordem_escolas, ordered=True)
-
-    # Calcula a média geral das notas de cada estudante para análises agregadas.
-    df_presentes['NOTA_MEDIA_GERAL'] = df_presentes[notas_cols].mean(axis=1)
+    Returns:
+        pd.DataFrame: Novo DataFrame com as colunas do tema e as colunas derivadas.
+    """
+    tipo_escola = decodificar(df_resultados['TP_DEPENDENCIA_ADM_ESC'], ordem=ORDEM_ESCOLAS)
+    # Um único recorte mantém os tipos de escola 1 a 4; a média geral das notas de cada estudante
+    # (para análises agregadas) é calculada em float32 já sobre o recorte.
+    return derivar(df_resultados, COLUNAS, tipo_escola.notna().to_numpy(), medias={'NOTA_MEDIA_GERAL': NOTAS_COLS},
+                   novas={'TIPO_ESCOLA': tipo_escola})
 
-    print(f"Registros válidos para análise: {len(df_presentes)}.")
+def estatisticas_streaming(tamanho_bloco=TAMANHO_BLOCO, ano=None):
+    """
+    Calcula as estatísticas descritivas por tipo de escola lendo o arquivo em blocos.
 
-    # --- Parte 3: Análise Descritiva ---
-    print("\n--- Parte 3: Análise Descritiva por Tipo de Escola ---")
-    # Calcula e exibe a média de cada prova, agrupada por tipo de escola.
-    estatisticas_por_escola = df_presentes.groupby('TIPO_ESCOLA')[notas_cols].mean().round(2)
-    print("\nMédia das Notas por Tipo de Escola:")
-    print(estatisticas_por_escola)
+    A memória usada depende do tamanho do bloco, e não do número de participantes,
+    o que permite processar o arquivo nacional completo em máquinas com pouca RAM.
 
-    # --- Parte 4: Visualização Completa dos Resultados ---
-    print("\n--- Parte 4: Visualização dos Resultados ---")
+    Args:
+        tamanho_bloco (int): Linhas lidas por vez.
+        ano (int): Ano dos dados (None = 2024).
 
-    # 1. GRÁFICO DE BARRAS: Compara as notas médias de cada área de conhecimento por tipo de escola.
-    print("[1/8] Gerando: Gráfico de Barras (Médias por Área)...")
-    media_por_escola = df_presentes.groupby('TIPO_ESCOLA')[notas_cols].mean()
-    # Mapeia nomes técnicos das colunas para nomes amigáveis para a legenda.
-    mapa_nomes_notas = {
-        'NU_NOTA_CN': 'Ciências da Natureza', 'NU_NOTA_CH': 'Ciências Humanas',
-        'NU_NOTA_LC': 'Linguagens e Códigos', 'NU_NOTA_MT': 'Matemática', 'NU_NOTA_REDACAO': 'Redação'
-    }
-    media_por_escola.rename(columns=mapa_nomes_notas, inplace=True)
+    Returns:
+        dict: 'por_escola' (AgregadoGrupos das notas por TIPO_ESCOLA) e
+            'histograma' (HistogramaMesclavel da NOTA_MEDIA_GERAL por TIPO_ESCOLA).
+    """
+    por_escola = AgregadoGrupos('TIPO_ESCOLA', NOTAS_COLS + ['NOTA_MEDIA_GERAL'])
+    histograma = HistogramaMesclavel(0, 1000, 10)
+
+    def atualizar(bloco):
+        por_escola.atualizar(bloco)
+        histograma.atualizar(bloco['NOTA_MEDIA_GERAL'], bloco['TIPO_ESCOLA'])
+
+    agregar_em_blocos(arquivo_do_ano(ARQUIVO, ano), COLUNAS, lambda bloco: preparar(filtrar_presentes(bloco)), atualizar, tamanho_bloco)
+    print("\nMédia das Notas por Tipo de Escola (streaming):")
+    print(por_escola.medias()[NOTAS_COLS].round(2))
+    return {'por_escola': por_escola, 'histograma': histograma}
+
+# Mapeia nomes técnicos das colunas para nomes amigáveis para a legenda.
+MAPA_NOMES_NOTAS = {
+    'NU_NOTA_CN': 'Ciências da Natureza', 'NU_NOTA_CH': 'Ciências Humanas',
+    'NU_NOTA_LC': 'Linguagens e Códigos', 'NU_NOTA_MT': 'Matemática', 'NU_NOTA_REDACAO': 'Redação'
+}
+# Estilo visual dos gráficos do tema (argumentos de sns.set_theme).
+ESTILO = {'style': 'whitegrid'}
+
+# --- Funções de Desenho dos Gráficos ---
+# Cada função recebe apenas os dados (já agregados, sempre que possível) de que precisa e desenha
+# na figura atual; `renderizacao.renderizar` salva o PNG. Assim cada gráfico pode ser gerado em outro processo.
+
+def barras_notas_medias(media_por_escola):
     # Plota as médias. O pandas cria um gráfico de barras agrupado automaticamente.
     media_por_escola.plot(kind='bar', figsize=(16, 9), colormap='viridis')
     plt.title('Gráfico de Barras: Média de Notas por Área e Dependência da Escola', fontsize=16)
@@ -99,91 +98,206 @@ def main():
     plt.xticks(rotation=0) # Mantém os nomes das escolas na horizontal.
     plt.legend(title='Área de Conhecimento')
     plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '01_barras_notas_medias.png'), dpi=300, bbox_inches='tight')
-    plt.show()
 
-    # 2. BOXPLOT: Analisa a distribuição (mediana, quartis, outliers) das notas de Matemática e Redação.
-    print("[2/8] Gerando: Boxplots (Distribuição de Notas)...")
+def boxplots_distribuicao(quantis):
     fig, axes = plt.subplots(1, 2, figsize=(18, 8)) # Dois gráficos lado a lado.
-    sns.boxplot(ax=axes[0], data=df_presentes, x='TIPO_ESCOLA', y='NU_NOTA_MT', palette='viridis')
+    # Cada boxplot é desenhado a partir das contagens exatas das notas por tipo de escola.
+    desenhar_boxplot(quantis['NU_NOTA_MT'], ORDEM_ESCOLAS, palette='viridis', ax=axes[0])
     axes[0].set_title('Distribuição da Nota de Matemática por Tipo de Escola')
     axes[0].set_xlabel('Dependência da Escola'), axes[0].set_ylabel('Nota de Matemática')
-    sns.boxplot(ax=axes[1], data=df_presentes, x='TIPO_ESCOLA', y='NU_NOTA_REDACAO', palette='viridis')
+    desenhar_boxplot(quantis['NU_NOTA_REDACAO'], ORDEM_ESCOLAS, palette='viridis', ax=axes[1])
     axes[1].set_title('Distribuição da Nota de Redação por Tipo de Escola')
     axes[1].set_xlabel('Dependência da Escola'), axes[1].set_ylabel('Nota de Redação')
-    plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '02_boxplots_distribuicao.png'), dpi=300, bbox_inches='tight'); plt.show()
+    plt.tight_layout()
 
-    # 3. HISTOGRAMA: Mostra a frequência das notas médias gerais para cada tipo de escola.
-    print("[3/8] Gerando: Histograma (Distribuição da Nota Média Geral)...")
+def histograma_nota_media(histograma):
     plt.figure(figsize=(12, 7))
-    # Renomeia a coluna 'TIPO_ESCOLA' temporariamente para ter um título de legenda mais limpo ("Tipo de Escola").
-    df_temp_plot_hist = df_presentes.rename(columns={'TIPO_ESCOLA': 'Tipo de Escola'})
+    # Desenha a partir das contagens por faixa; "Tipo de Escola" é o título da legenda.
     # 'element=step' cria um histograma de linhas, que é melhor para comparar distribuições.
-    sns.histplot(data=df_temp_plot_hist, x='NOTA_MEDIA_GERAL', hue='Tipo de Escola', element='step', common_norm=False, palette='viridis')
+    desenhar_histograma(histograma, ORDEM_ESCOLAS, 'Tipo de Escola', n_faixas=60, palette='viridis', element='step')
     plt.title('Histograma: Distribuição da Nota Média Geral por Tipo de Escola')
     plt.xlabel('Nota Média Geral'), plt.ylabel('Contagem de Estudantes')
-    plt.legend(title='Tipo de Escola', labels=ordem_escolas) # Garante que a legenda esteja correta.
-    plt.savefig(os.path.join(graficos_path, '03_histograma_nota_media.png'), dpi=300, bbox_inches='tight'); plt.show()
 
-    # 4. GRÁFICO DE DENSIDADE (KDE): Visão suavizada da distribuição da nota média geral.
-    print("[4/8] Gerando: Gráfico de Densidade (Distribuição da Nota Média Geral)...")
+def densidade_nota_media(curvas):
     plt.figure(figsize=(12, 7))
-    df_temp_plot_kde = df_presentes.rename(columns={'TIPO_ESCOLA': 'Tipo de Escola'})
-    sns.kdeplot(data=df_temp_plot_kde, x='NOTA_MEDIA_GERAL', hue='Tipo de Escola', fill=True, common_norm=False, palette='viridis')
+    # Cada curva foi normalizada no próprio grupo (equivale a common_norm=False).
+    desenhar_densidades(curvas, 'Tipo de Escola', palette='viridis')
     plt.title('Gráfico de Densidade: Distribuição da Nota Média Geral por Tipo de Escola')
     plt.xlabel('Nota Média Geral'), plt.ylabel('Densidade')
-    plt.savefig(os.path.join(graficos_path, '04_densidade_nota_media.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 5. GRÁFICO DE BARRAS EMPILHADAS: Mostra a composição de faixas de desempenho dentro de cada tipo de escola.
-    print("[5/8] Gerando: Gráfico de Barras Empilhadas (Faixas de Desempenho)...")
-    # Cria faixas de desempenho ('bins') usando a nota média geral.
-    bins = [0, 450, 600, 750, 1000]
-    labels = ['Baixo (<450)', 'Médio (450-600)', 'Bom (600-750)', 'Excelente (>750)']
-    df_presentes['FAIXA_DESEMPENHO'] = pd.cut(df_presentes['NOTA_MEDIA_GERAL'], bins=bins, labels=labels, right=False)
-    # Calcula a porcentagem de alunos em cada faixa, por tipo de escola.
-    dados_empilhados = df_presentes.groupby('TIPO_ESCOLA')['FAIXA_DESEMPENHO'].value_counts(normalize=True).unstack().fillna(0) * 100
-    dados_empilhados = dados_empilhados[labels] # Garante a ordem correta das faixas.
+
+def barras_empilhadas_desempenho(dados_empilhados):
     ax = dados_empilhados.plot(kind='bar', stacked=True, figsize=(12, 8), colormap='tab20c')
     plt.title('Barras Empilhadas: Composição do Desempenho por Dependência da Escola (%)')
     plt.xlabel('Dependência da Escola'), plt.ylabel('Percentual de Estudantes (%)')
     plt.xticks(rotation=0), plt.legend(title='Faixa de Desempenho', bbox_to_anchor=(1.02, 1)), plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '05_barras_empilhadas_desempenho.png'), dpi=300, bbox_inches='tight'); plt.show()
 
-    # 6. HEATMAP DE CORRELAÇÃO: Mostra a correlação entre as notas das diferentes áreas do conhecimento.
-    print("[6/8] Gerando: Heatmap de Correlação entre as Notas...")
-    correlation_matrix = df_presentes[notas_cols].corr()
-    correlation_matrix.rename(columns=mapa_nomes_notas, index=mapa_nomes_notas, inplace=True) # Renomeia eixos para clareza.
+def heatmap_correlacao(correlation_matrix):
     plt.figure(figsize=(10, 8))
     sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f")
     plt.title('Heatmap: Correlação entre as Notas das Diferentes Áreas'), plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '06_heatmap_correlacao.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 7. GRÁFICO DE DISPERSÃO: Relaciona as notas de Matemática e Linguagens, colorindo por tipo de escola.
-    print("[7/8] Gerando: Gráfico de Dispersão (Matemática vs. Linguagens)...")
-    # Usa uma amostra aleatória dos dados para evitar um gráfico muito poluído e lento.
-    amostra_df = df_presentes.sample(n=min(5000, len(df_presentes)), random_state=42)
-    plt.figure(figsize=(12, 8))
-    amostra_temp_plot = amostra_df.rename(columns={'TIPO_ESCOLA': 'Tipo de Escola'}) # Renomeia para a legenda.
-    sns.scatterplot(data=amostra_temp_plot, x='NU_NOTA_MT', y='NU_NOTA_LC', hue='Tipo de Escola', palette='viridis', alpha=0.7)
-    plt.title('Gráfico de Dispersão: Nota de Matemática vs. Nota de Linguagens por Tipo de Escola (Amostra)')
-    plt.xlabel('Nota de Matemática'), plt.ylabel('Nota de Linguagens e Códigos')
-    plt.savefig(os.path.join(graficos_path, '07_dispersao_matematica_linguagens.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 8. GRÁFICO DE LINHAS: Mostra a proporção de cada tipo de escola dentro de cada faixa de desempenho.
-    print("[8/8] Gerando: Gráfico de Linhas (Composição por Faixa de Desempenho)...")
-    df_temp_plot_line = df_presentes.rename(columns={'TIPO_ESCOLA': 'Tipo de Escola'})
-    # Calcula a proporção (normalize=True) de cada tipo de escola DENTRO de cada faixa de desempenho.
-    composicao_por_faixa = df_temp_plot_line.groupby('FAIXA_DESEMPENHO')['Tipo de Escola'].value_counts(normalize=True).unstack().fillna(0) * 100
-    # Plota a evolução dessas proporções ao longo das faixas de desempenho.
-    ax = composicao_por_faixa[ordem_escolas].plot(kind='line', marker='o', figsize=(16, 8), colormap='viridis')
+
+def dispersao_matematica_linguagens(histograma_2d):
+    fig = plt.figure(figsize=(12, 9))
+    desenhar_densidade_2d(histograma_2d, ORDEM_ESCOLAS, fig=fig)
+    fig.suptitle('Densidade: Nota de Matemática vs. Nota de Linguagens por Tipo de Escola')
+    fig.supxlabel('Nota de Matemática'), fig.supylabel('Nota de Linguagens e Códigos')
+
+def linhas_composicao_faixas(composicao_por_faixa):
+    # Plota a evolução das proporções ao longo das faixas de desempenho.
+    ax = composicao_por_faixa[ORDEM_ESCOLAS].plot(kind='line', marker='o', figsize=(16, 8), colormap='viridis')
     plt.title('Gráfico de Linhas: Proporção de Cada Tipo de Escola por Faixa de Desempenho', fontsize=16)
     plt.xlabel('Faixa de Desempenho (Nota Média Geral)', fontsize=12)
     plt.ylabel('Percentual de Estudantes na Faixa (%)', fontsize=12)
     plt.legend(title='Tipo de Escola')
     plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '08_linhas_composicao_faixas.png'), dpi=300, bbox_inches='tight'); plt.show()
+
+def montar_graficos(df_presentes, cubo=None):
+    """
+    Calcula os agregados de cada gráfico do tema a partir dos dados já preparados por `preparar`.
+
+    Args:
+        df_presentes (pd.DataFrame): Dados preparados por `preparar`.
+        cubo (CuboMesclavel): Cubo pré-calculado do arquivo (`cubo.carregar_cubo`), usado nos gráficos 5 e 8.
+            None monta o cubo de tipo de escola e faixa de desempenho a partir de `df_presentes`.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    notas_cols = NOTAS_COLS
+
+    # --- Parte 3: Análise Descritiva ---
+    print("\n--- Parte 3: Análise Descritiva por Tipo de Escola ---")
+    # Calcula e exibe a média de cada prova, agrupada por tipo de escola (as notas são float32; a média
+    # vai para float64 antes de arredondar, para imprimir 531.31 e não 531.309998).
+    media_por_escola = df_presentes.groupby('TIPO_ESCOLA', observed=False)[notas_cols].mean().astype('float64')
+    estatisticas_por_escola = media_por_escola.round(2)
+    print("\nMédia das Notas por Tipo de Escola:")
+    print(estatisticas_por_escola)
+
+    # --- Parte 4: Visualização Completa dos Resultados ---
+    print("\n--- Parte 4: Visualização dos Resultados ---")
+    # Primeiro calcula os dados de cada gráfico; depois os gráficos são renderizados em paralelo.
+
+    # 1. GRÁFICO DE BARRAS: Compara as notas médias de cada área de conhecimento por tipo de escola.
+    media_por_escola = media_por_escola.rename(columns=MAPA_NOMES_NOTAS)
+
+    # 2. Conta cada nota possível (passos de 0,1) por tipo de escola; quartis, bigodes e outliers
+    # do boxplot saem dessas contagens, sem ordenar as colunas.
+    quantis = {c: quantis_por_grupo(df_presentes[c], df_presentes['TIPO_ESCOLA']) for c in ['NU_NOTA_MT', 'NU_NOTA_REDACAO']}
+
+    # 3 e 4. Conta a nota média geral em faixas de 1 ponto por tipo de escola, uma única vez;
+    # o histograma e as densidades são desenhados a partir dessas contagens.
+    histograma = histograma_por_grupo(df_presentes['NOTA_MEDIA_GERAL'], df_presentes['TIPO_ESCOLA'])
+    curvas = densidades(histograma, ORDEM_ESCOLAS)
+
+    # 5. Faixas de desempenho ('bins') da nota média geral, as mesmas do cubo pré-calculado (`cubo.py`).
+    labels = ROTULOS_FAIXAS
+    # Os alunos por tipo de escola e faixa são contados uma única vez (cubo); os gráficos 5 e 8 são recortes
+    # dessas contagens. Sem o cubo do arquivo (recebido na execução completa), o cubo é montado aqui.
+    if cubo is None:
+        df_presentes['FAIXA_DESEMPENHO'] = pd.cut(df_presentes['NOTA_MEDIA_GERAL'], bins=FAIXAS_NOTA, labels=labels, right=False)
+        cubo = CuboMesclavel.de_dataframe(df_presentes, ['TIPO_ESCOLA', 'FAIXA_DESEMPENHO'])
+    # Calcula a porcentagem de alunos em cada faixa, por tipo de escola.
+    dados_empilhados = cubo.proporcoes('TIPO_ESCOLA', 'FAIXA_DESEMPENHO', observadas=False)
+    dados_empilhados = dados_empilhados[labels] # Garante a ordem correta das faixas.
+
+    # 6. Correlação entre as notas das diferentes áreas do conhecimento.
+    correlation_matrix = df_presentes[notas_cols].corr()
+    correlation_matrix.rename(columns=MAPA_NOMES_NOTAS, index=MAPA_NOMES_NOTAS, inplace=True) # Renomeia eixos para clareza.
+
+    # 7. Conta os pares (matemática, linguagens) de todos os estudantes em células de 5 pontos, por tipo
+    # de escola, em vez de sortear uma amostra: o gráfico usa a população inteira e é reprodutível.
+    histograma_2d = histograma_2d_por_grupo(df_presentes['NU_NOTA_MT'], df_presentes['NU_NOTA_LC'], df_presentes['TIPO_ESCOLA'])
+
+    # 8. Calcula a proporção (normalize=True) de cada tipo de escola DENTRO de cada faixa de desempenho.
+    composicao_por_faixa = cubo.proporcoes('FAIXA_DESEMPENHO', 'TIPO_ESCOLA', observadas=False)
+
+    graficos = [
+        Grafico('01_barras_notas_medias.png', 'Gráfico de Barras (Médias por Área)', barras_notas_medias, media_por_escola),
+        # 2. BOXPLOT: Analisa a distribuição (mediana, quartis, outliers) das notas de Matemática e Redação.
+        Grafico('02_boxplots_distribuicao.png', 'Boxplots (Distribuição de Notas)', boxplots_distribuicao, quantis),
+        # 3. HISTOGRAMA: Mostra a frequência das notas médias gerais para cada tipo de escola.
+        Grafico('03_histograma_nota_media.png', 'Histograma (Distribuição da Nota Média Geral)', histograma_nota_media, histograma),
+        # 4. GRÁFICO DE DENSIDADE (KDE): Visão suavizada da distribuição da nota média geral.
+        Grafico('04_densidade_nota_media.png', 'Gráfico de Densidade (Distribuição da Nota Média Geral)', densidade_nota_media, curvas),
+        # 5. GRÁFICO DE BARRAS EMPILHADAS: Mostra a composição de faixas de desempenho dentro de cada tipo de escola.
+        Grafico('05_barras_empilhadas_desempenho.png', 'Gráfico de Barras Empilhadas (Faixas de Desempenho)', barras_empilhadas_desempenho, dados_empilhados),
+        # 6. HEATMAP DE CORRELAÇÃO: Mostra a correlação entre as notas das diferentes áreas do conhecimento.
+        Grafico('06_heatmap_correlacao.png', 'Heatmap de Correlação entre as Notas', heatmap_correlacao, correlation_matrix),
+        # 7. GRÁFICO DE DISPERSÃO: Relaciona as notas de Matemática e Linguagens, colorindo por tipo de escola.
+        Grafico('07_dispersao_matematica_linguagens.png', 'Gráfico de Dispersão (Densidade 2D, Matemática vs. Linguagens)', dispersao_matematica_linguagens, histograma_2d),
+        # 8. GRÁFICO DE LINHAS: Mostra a proporção de cada tipo de escola dentro de cada faixa de desempenho.
+        Grafico('08_linhas_composicao_faixas.png', 'Gráfico de Linhas (Composição por Faixa de Desempenho)', linhas_composicao_faixas, composicao_por_faixa),
+    ]
+    return graficos
+
+@rastrear_tema('academico')
+def main(df_resultados=None, interativo=False, processos=None, forcar=False, anos=None):
+    """
+    Executa a análise acadêmica.
+
+    Args:
+        df_resultados (pd.DataFrame): Dados de RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
+            Se None, os dados são carregados e filtrados a partir do cache colunar.
+        interativo (bool): Se True, exibe cada gráfico na tela (renderização sequencial).
+        processos (int): Processos usados na renderização dos gráficos (None = um por núcleo).
+        forcar (bool): Se True, renderiza todos os gráficos, mesmo os que não mudaram desde a última execução.
+        anos (list): Anos analisados (None = 2024, gráficos na pasta do tema). Cada ano lê os seus
+            arquivos (ex: RESULTADOS_2023.csv) e grava os gráficos em `graficos_academico/<ano>/`.
+    """
+    # Vários anos: o tema é executado uma vez para cada ano (ver `anos.executar_anos`).
+    if anos is not None and len(anos) > 1:
+        return executar_anos(main, anos, interativo=interativo, processos=processos, forcar=forcar)
+    ano = anos[0] if anos else None
+
+    # --- Configuração Inicial ---
+    arquivo = arquivo_do_ano(ARQUIVO, ano)
+    dados_enem_file = os.path.join(DADOS_PATH, arquivo)
+    
+    # Cria a pasta para salvar os gráficos
+    graficos_path = pasta_do_ano('graficos_academico', ano)
+    os.makedirs(graficos_path, exist_ok=True)
+
+    # --- Parte 1: Carregar Dados do CSV ---
+    # Execução completa do arquivo: as contagens por faixa de desempenho saem do cubo pré-calculado.
+    completo = df_resultados is None
+    if df_resultados is None:
+        print(f"\n--- Parte 1: Carregando Dados do arquivo: {dados_enem_file} ---")
+        try:
+            # Apenas as colunas usadas na análise são lidas do cache colunar, já restritas aos
+            # presentes nas 4 provas objetivas, com redação avaliada (status 1) e notas preenchidas
+            # (o filtro é calculado uma vez e guardado em `cache_filtros`). As colunas são abertas
+            # mapeadas do disco (`colunas_mapeadas`), sem cópia.
+            with etapa('carregar', arquivo=arquivo, filtro='presentes') as medicao:
+                df_resultados = abrir_colunas(arquivo, COLUNAS, 'presentes')
+                medicao.linhas_saida = len(df_resultados)
+            print(f"Dados carregados com sucesso: {len(df_resultados)} registros válidos.")
+        except FileNotFoundError:
+            print(f"ERRO: Arquivo '{dados_enem_file}' não encontrado.")
+            return
+        except Exception as e:
+            print(f"ERRO ao carregar o arquivo CSV: {e}")
+            return
+    if df_resultados.empty:
+        print("DataFrame está vazio. Finalizando.")
+        return
+
+    # --- Parte 2: Limpar e Preparar os Dados ---
+    print("\n--- Parte 2: Limpeza e Preparação dos Dados ---")
+
+    # Os dados já contêm apenas estudantes presentes em todas as provas e com redação avaliada.
+    # Aqui mantém apenas os que têm tipo de escola declarado e cria as colunas derivadas.
+    df_presentes = medir('preparar', preparar, df_resultados)
+
+    print(f"Registros válidos para análise: {len(df_presentes)}.")
+
+    cubo = None
+    if completo:
+        with etapa('carregar_cubo', arquivo=arquivo):
+            cubo = carregar_cubo(arquivo)
+    graficos = medir('agregar', montar_graficos, df_presentes, cubo)
+    renderizar_graficos(graficos, graficos_path, ESTILO, interativo, processos, forcar)
     print("\nAnálise completa com 8 tipos de gráficos foi concluída!")
 
 if __name__ == "__main__":
-    main()
-
+    main(**argumentos_linha_comando())
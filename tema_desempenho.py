@@ -6,89 +6,61 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+from agregacao_streaming import AgregadoGrupos, CuboMesclavel, HistogramaMesclavel, agregar_em_blocos
+from anos import arquivo_do_ano, executar_anos, pasta_do_ano
+from cache_colunar import DADOS_PATH, TAMANHO_BLOCO, colunas_disponiveis
+from colunas_mapeadas import abrir_colunas
+from correlacao import CorrelacaoMesclavel, correlacionar
+from derivacao import media_linhas, selecionar
+from histogramas import (densidades, desenhar_boxplot, desenhar_densidade_2d, desenhar_densidades, desenhar_histograma,
+                         histograma_2d_por_grupo, histograma_por_grupo, quantis_por_grupo, PASSO_REDACAO)
+from limpeza import filtrar_presentes
+from rastreamento import etapa, medir, rastrear_tema
+from renderizacao import Grafico, argumentos_linha_comando, renderizar_graficos
 
 # --- 2. Configuração Inicial do Ambiente ---
-# Define um estilo visual padrão para todos os gráficos gerados pelo Seaborn. 'whitegrid' é limpo e profissional.
-sns.set_theme(style="whitegrid")
+# Estilo visual padrão dos gráficos (argumentos de sns.set_theme). 'whitegrid' é limpo e profissional.
+ESTILO = {'style': 'whitegrid'}
 
-def main():
+# Arquivo e colunas relevantes para esta análise (o orquestrador usa essas listas para carregar cada arquivo uma única vez).
+ARQUIVO = 'RESULTADOS_2024.csv'
+COLUNAS = [
+    'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
+    'TP_STATUS_REDACAO', 'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
+]
+OBJ_COLS = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT']
+# Rótulos dos quartis da média das objetivas.
+GRUPOS_DESEMPENHO = ['Grupo 1 (25% piores)', 'Grupo 2', 'Grupo 3', 'Grupo 4 (25% melhores)']
 
-    # --- 3. Carregamento e Preparação dos Dados ---
-    dados_path = 'DADOS'  # Define o diretório onde o arquivo CSV está localizado
-    resultados_file = os.path.join(dados_path, 'RESULTADOS_2024.csv')  # Cria o caminho completo para o arquivo
-    
-    # Cria a pasta para salvar os gráficos
-    graficos_path = 'graficos_desempenho'
-    os.makedirs(graficos_path, exist_ok=True)
+def preparar(df):
+    """
+    Limpeza e engenharia de features sobre RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
 
-    # Lista das colunas que são relevantes para esta análise. Carregar apenas o necessário economiza memória.
-    cols_wanted = [
-        'NU_INSCRICAO', 'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
-        'TP_STATUS_REDACAO', 'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
-    ]
+    Cria MEDIA_OBJETIVAS e as faixas fixas FAIXA_OBJETIVAS e FAIXA_REDACAO. Os grupos por
+    quartil (GRUPO_DESEMPENHO) dependem da distribuição completa e são criados em `main`.
 
-    # Verificação de robustez: Checa se o arquivo de dados realmente existe antes de tentar lê-lo.
-    if not os.path.isfile(resultados_file):
-        raise FileNotFoundError(f"Arquivo não encontrado: {resultados_file}")
-
-    # Leitura otimizada do CSV:
-    # 1. Lê apenas o cabeçalho (nrows=0) para obter a lista de colunas existentes no arquivo.
-    hdrs = pd.read_csv(resultados_file, nrows=0, delimiter=';', encoding='latin1').columns
-    # 2. Cria uma lista 'usecols' contendo apenas as colunas de 'cols_wanted' que de fato existem no arquivo.
-    usecols = [c for c in cols_wanted if c in hdrs]
-    # 3. Carrega o DataFrame usando apenas as colunas validadas, otimizando o processo.
-    df = pd.read_csv(resultados_file, usecols=usecols, delimiter=';', encoding='latin1', low_memory=False)
-
-    # --- 4. Filtragem dos Participantes Válidos ---
-    # Cria uma máscara booleana para selecionar apenas os estudantes que:
-    # - Compareceram a todas as 4 provas objetivas (presença = 1).
-    # - Tiveram sua redação avaliada sem problemas (status = 1).
-    pres_cols = ['TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT', 'TP_STATUS_REDACAO']
-    mask = pd.Series(True, index=df.index)  # Começa com todos os registros como True
-    for col in pres_cols:
-        if col in df.columns:
-            mask &= (df[col] == 1)  # Atualiza a máscara, mantendo apenas os True onde a condição é atendida
-    df = df.loc[mask].copy()  # Aplica a máscara e usa .copy() para evitar avisos e garantir um novo DataFrame.
-    print(f"Registros após filtro de presença+redação: {len(df)}")
+    Returns:
+        pd.DataFrame: Novo DataFrame com as colunas do tema e as colunas derivadas.
+    """
+    # Trabalha sobre as colunas do tema, sem alterar o DataFrame recebido (que pode ser compartilhado com outros temas).
+    # Sem `.copy()`: só as colunas alteradas abaixo deixam de compartilhar os dados com o original.
+    df = selecionar(df, [c for c in COLUNAS if c in df.columns])
 
-    # --- 5. Limpeza e Engenharia de Features ---
     # Converte as colunas de notas para o tipo numérico. 'errors='coerce'' transforma textos ou erros em NaN (Not a Number).
-    obj_cols = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT']
-    for c in obj_cols + ['NU_NOTA_REDACAO']:
+    for c in OBJ_COLS + ['NU_NOTA_REDACAO']:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors='coerce')
 
     # Validação para garantir que todas as colunas de notas objetivas foram encontradas no arquivo.
-    if any(c not in df.columns for c in obj_cols):
+    if any(c not in df.columns for c in OBJ_COLS):
         raise RuntimeError("Faltam colunas de notas objetivas obrigatórias para a análise.")
 
     # Cria uma nova coluna 'MEDIA_OBJETIVAS' calculando a média das notas das provas objetivas para cada aluno.
-    # axis=1 indica que a média deve ser calculada horizontalmente (ao longo das colunas de cada linha).
-    df['MEDIA_OBJETIVAS'] = df[obj_cols].mean(axis=1)
+    # A média é acumulada coluna a coluna em um array float32, sem montar um bloco 2D com as notas (ver `derivacao`).
+    df['MEDIA_OBJETIVAS'] = media_linhas(df, OBJ_COLS)
 
     # Remove qualquer linha que tenha valor NaN na média ou na redação, pois são inúteis para a correlação.
     df = df.dropna(subset=['MEDIA_OBJETIVAS', 'NU_NOTA_REDACAO']).reset_index(drop=True)
-    if df.empty:
-        raise RuntimeError("Nenhum registro válido restou após a limpeza das notas.")
-
-    # --- 6. Análise Estatística ---
-    # Calcula as correlações e a regressão linear entre a média das objetivas e a nota da redação.
-    pearson_r, _ = stats.pearsonr(df['MEDIA_OBJETIVAS'], df['NU_NOTA_REDACAO']) # Correlação linear
-    spearman_rho, _ = stats.spearmanr(df['MEDIA_OBJETIVAS'], df['NU_NOTA_REDACAO']) # Correlação monotônica (não necessariamente linear)
-    lr = stats.linregress(df['MEDIA_OBJETIVAS'], df['NU_NOTA_REDACAO']) # Modelo de regressão linear simples
-
-    # Imprime um resumo com os principais resultados estatísticos.
-    print("\n--- Resumo da análise estatística ---")
-    print(f"Total de registros analisados: {len(df)}")
-    print(f"Correlação de Pearson (r): {pearson_r:.4f}")
-    print(f"Correlação de Spearman (rho): {spearman_rho:.4f}")
-    print(f"Coeficiente de Determinação (R²): {lr.rvalue**2:.4f}") # R² indica a % da variação da redação explicada pela média objetiva.
-    print("--------------------------------------\n")
-
-    # --- 7. Criação de Grupos para Análise Comparativa ---
-    # `pd.qcut`: Divide os alunos em 4 grupos (quartis) de tamanho igual com base na média das objetivas.
-    df['GRUPO_DESEMPENHO'] = pd.qcut(df['MEDIA_OBJETIVAS'], 4, labels=['Grupo 1 (25% piores)', 'Grupo 2', 'Grupo 3', 'Grupo 4 (25% melhores)'])
 
     # `pd.cut`: Divide os alunos em faixas de desempenho com base em intervalos de nota pré-definidos.
     obj_bins = [0, 500, 600, 700, 1000]
@@ -97,32 +69,80 @@ def main():
     red_bins = [0, 400, 600, 800, 1000]
     red_labels = ['<400', '400-600', '600-800', '>800']
     df['FAIXA_REDACAO'] = pd.cut(df['NU_NOTA_REDACAO'], bins=red_bins, labels=red_labels, include_lowest=True)
+    return df
+
+def estatisticas_streaming(tamanho_bloco=TAMANHO_BLOCO, ano=None):
+    """
+    Calcula as médias por faixa de desempenho e a composição das faixas lendo o arquivo em blocos.
+
+    A memória usada depende do tamanho do bloco, e não do número de participantes.
+
+    Args:
+        tamanho_bloco (int): Linhas lidas por vez.
+        ano (int): Ano dos dados (None = 2024).
+
+    Returns:
+        dict: 'por_faixa' (AgregadoGrupos por FAIXA_OBJETIVAS), 'composicao' (AgregadoGrupos por
+            FAIXA_OBJETIVAS e FAIXA_REDACAO), 'histogramas' (HistogramaMesclavel de cada nota) e
+            'correlacao' (CorrelacaoMesclavel entre MEDIA_OBJETIVAS e NU_NOTA_REDACAO).
+    """
+    por_faixa = AgregadoGrupos('FAIXA_OBJETIVAS', ['MEDIA_OBJETIVAS', 'NU_NOTA_REDACAO'])
+    composicao = AgregadoGrupos(['FAIXA_OBJETIVAS', 'FAIXA_REDACAO'], ['NU_NOTA_REDACAO'])
+    histogramas = {'MEDIA_OBJETIVAS': HistogramaMesclavel(0, 1000, 10), 'NU_NOTA_REDACAO': HistogramaMesclavel(0, 1000, 20)}
+    correlacao = CorrelacaoMesclavel()
 
-    # Renomeia as colunas de notas para criar rótulos mais amigáveis nos gráficos.
-    df_renamed = df.rename(columns={
-        'NU_NOTA_CN': 'Ciências da Natureza', 'NU_NOTA_CH': 'Ciências Humanas',
-        'NU_NOTA_LC': 'Linguagens e Códigos', 'NU_NOTA_MT': 'Matemática', 'NU_NOTA_REDACAO': 'Redação'
-    })
+    def atualizar(bloco):
+        por_faixa.atualizar(bloco)
+        composicao.atualizar(bloco)
+        for coluna, histograma in histogramas.items():
+            histograma.atualizar(bloco[coluna])
+        correlacao.atualizar(bloco['MEDIA_OBJETIVAS'], bloco['NU_NOTA_REDACAO'])
 
-    # --- 8. Geração das Visualizações ---
+    agregar_em_blocos(arquivo_do_ano(ARQUIVO, ano), COLUNAS, lambda bloco: preparar(filtrar_presentes(bloco)), atualizar, tamanho_bloco)
+    print("\nMédias por Faixa de Desempenho nas Objetivas (streaming):")
+    print(por_faixa.resumo().round(2))
+    # Percentual de cada faixa da redação dentro de cada faixa das objetivas.
+    contagens = composicao.contagens()['NU_NOTA_REDACAO'].unstack(fill_value=0)
+    print("\nComposição das Faixas da Redação (%) (streaming):")
+    print((contagens.div(contagens.sum(axis=1), axis=0) * 100).round(1))
+    resumo = correlacao.resumo()
+    print(f"\nCorrelação (streaming): Pearson {resumo['pearson']:.4f} | Spearman {resumo['spearman']:.4f} | R² {resumo['r2']:.4f}")
+    return {'por_faixa': por_faixa, 'composicao': composicao, 'histogramas': histogramas, 'correlacao': correlacao}
 
-    # Gráfico 1: HISTOGRAMA - Mostra a distribuição de frequência da média das notas objetivas.
-    print("Gerando Histograma...")
-    plt.figure(figsize=(9,5)); sns.histplot(df['MEDIA_OBJETIVAS'], bins=50, kde=True) # kde=True adiciona uma linha de densidade.
+# Rótulos amigáveis das colunas de notas, usados no heatmap.
+MAPA_NOMES_NOTAS = {
+    'NU_NOTA_CN': 'Ciências da Natureza', 'NU_NOTA_CH': 'Ciências Humanas',
+    'NU_NOTA_LC': 'Linguagens e Códigos', 'NU_NOTA_MT': 'Matemática', 'NU_NOTA_REDACAO': 'Redação'
+}
+
+# --- Funções de Desenho dos Gráficos ---
+# Cada função recebe apenas os dados de que precisa e desenha na figura atual; `renderizacao.renderizar`
+# salva o PNG. Assim cada gráfico pode ser gerado em outro processo.
+
+def histograma_media_objetivas(histograma):
+    plt.figure(figsize=(9,5)); desenhar_histograma(histograma, n_faixas=50, kde=True) # kde=True adiciona uma linha de densidade.
     plt.title('Distribuição da Média das Provas Objetivas'); plt.xlabel('Média das Notas Objetivas'); plt.ylabel('Contagem de Participantes')
-    plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '01_histograma_media_objetivas.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+    plt.tight_layout()
 
-    # Gráfico 2: BOXPLOT - Compara a distribuição da nota de redação entre os 4 grupos de desempenho.
-    print("Gerando Boxplot...")
-    plt.figure(figsize=(9,5)); sns.boxplot(x='GRUPO_DESEMPENHO', y='NU_NOTA_REDACAO', data=df)
+def boxplot_redacao_grupos(quantis):
+    plt.figure(figsize=(9,5)); desenhar_boxplot(quantis, GRUPOS_DESEMPENHO)
     plt.title('Distribuição das Notas de Redação por Grupo de Desempenho'); plt.xlabel('Grupo de Desempenho (Média Objetiva)'); plt.ylabel('Nota da Redação')
-    plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '02_boxplot_redacao_grupos.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+    plt.tight_layout()
 
-    
-    # Gráfico 4: BARRAS - Compara a nota média (objetivas e redação) de cada grupo de desempenho.
-    print("Gerando Gráfico de Barras com Legenda Clara...")
-    media_q = df.groupby('GRUPO_DESEMPENHO', observed=True)[['MEDIA_OBJETIVAS', 'NU_NOTA_REDACAO']].mean()
-    media_q.rename(columns={'MEDIA_OBJETIVAS': 'Média das Provas Objetivas', 'NU_NOTA_REDACAO': 'Nota da Redação'}, inplace=True)
+def dispersao_correlacao(dados):
+    histograma_2d, resumo = dados
+    pearson_r, r2 = resumo['pearson'], resumo['r2']
+    # Densidade dos pares de notas (todos os participantes) com a reta da regressão linear.
+    plt.figure(figsize=(9,6)); desenhar_densidade_2d(histograma_2d)
+    x, limites_y = np.array(plt.xlim()), plt.ylim()
+    plt.plot(x, resumo['intercepto'] + resumo['inclinacao'] * x, color='red'); plt.ylim(limites_y)
+    plt.title('Relação entre Média Objetiva e Nota da Redação'); plt.xlabel('Média das Notas Objetivas'); plt.ylabel('Nota da Redação')
+    # Adiciona uma caixa de texto no gráfico com os resultados estatísticos mais importantes.
+    plt.annotate(f"Correlação (Pearson) r = {pearson_r:.3f}\nCoeficiente de Determinação R² = {r2:.3f}",
+                 xy=(0.05, 0.95), xycoords='axes fraction', va='top', bbox=dict(boxstyle='round', fc='wheat', alpha=0.7))
+    plt.tight_layout()
+
+def barras_medias_grupos(media_q):
     media_q.plot(kind='bar', figsize=(10, 6))
     plt.title('Médias por Grupo de Desempenho', fontsize=16)
     plt.xlabel('Grupo de Desempenho', fontsize=12)
@@ -131,12 +151,8 @@ def main():
     plt.legend(title='Componente da Nota', fontsize=11)
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '04_barras_medias_grupos.png'), dpi=300, bbox_inches='tight')
-    plt.show()
 
-    # Gráfico 5: LINHAS
-    print("Gerando Gráfico de Linhas (Tendência)...")
-    trend = media_q.reset_index()
+def linhas_tendencia(trend):
     plt.figure(figsize=(10,6))
     plt.plot(trend['GRUPO_DESEMPENHO'].astype(str), trend['Média das Provas Objetivas'], marker='o', linestyle='--', label='Média das Provas Objetivas')
     plt.plot(trend['GRUPO_DESEMPENHO'].astype(str), trend['Nota da Redação'], marker='s', label='Nota da Redação')
@@ -146,41 +162,157 @@ def main():
     plt.legend(fontsize=11)
     plt.grid(True, linestyle='--', alpha=0.6)
     plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '05_linhas_tendencia.png'), dpi=300, bbox_inches='tight')
-    plt.show()
 
-    # Gráfico 6: HEATMAP - Exibe a matriz de correlação entre todas as notas (incluindo as 4 objetivas e a redação).
-    print("Gerando Heatmap de Correlação...")
-    notas_renamed = ['Ciências da Natureza','Ciências Humanas','Linguagens e Códigos','Matemática','Redação']
-    corr = df_renamed[notas_renamed].corr()
+def heatmap_correlacao(corr):
     plt.figure(figsize=(8,6)); sns.heatmap(corr, annot=True, fmt=".2f", cmap='coolwarm', linewidths=.5) # annot=True mostra os valores
-    plt.title('Matriz de Correlação entre as Notas das Provas'); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '06_heatmap_correlacao.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+    plt.title('Matriz de Correlação entre as Notas das Provas'); plt.tight_layout()
 
-    # Gráfico 7: DENSIDADE (KDE) - Compara a forma da distribuição da média objetiva com a da redação.
-    print("Gerando Gráfico de Densidade...")
-    plt.figure(figsize=(9,5)); sns.kdeplot(df['MEDIA_OBJETIVAS'], fill=True, label='Média Objetivas'); sns.kdeplot(df['NU_NOTA_REDACAO'], fill=True, label='Redação')
-    plt.title('Comparação da Distribuição de Densidade das Notas'); plt.xlabel('Nota'); plt.legend(); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '07_densidade_distribuicao.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+def densidade_distribuicao(curvas):
+    plt.figure(figsize=(9,5)); desenhar_densidades(curvas)
+    plt.title('Comparação da Distribuição de Densidade das Notas'); plt.xlabel('Nota'); plt.legend(); plt.tight_layout()
 
-    # Gráfico 8: BARRAS EMPILHADAS - Mostra, para cada faixa de desempenho nas objetivas, a composição percentual das faixas da redação.
-    print("Gerando Gráfico de Barras Empilhadas...")
-    # 'normalize=True' calcula as proporções. Multiplicamos por 100 para ter percentuais.
-    comp = df.groupby('FAIXA_OBJETIVAS', observed=True)['FAIXA_REDACAO'].value_counts(normalize=True).unstack(fill_value=0) * 100
+def barras_empilhadas_composicao(comp):
     ax = comp.plot(kind='bar', stacked=True, figsize=(10,7), title='Composição das Notas de Redação por Faixa de Desempenho nas Objetivas (%)')
     ax.set(xlabel='Faixa de Desempenho (Objetivas)', ylabel='Percentual (%)')
-    plt.legend(title='Faixa da Redação', bbox_to_anchor=(1.02,1)); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '08_barras_empilhadas_composicao.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+    plt.legend(title='Faixa da Redação', bbox_to_anchor=(1.02,1)); plt.tight_layout()
+
+def montar_graficos(df):
+    """
+    Calcula os agregados de cada gráfico do tema a partir dos dados já preparados por `preparar`.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    # --- 6. Análise Estatística ---
+    # Calcula as correlações e a regressão linear entre a média das objetivas e a nota da redação em uma
+    # única passada: Pearson (linear), Spearman (monotônica, não necessariamente linear) e a regressão
+    # linear simples saem dos momentos e da tabela de pares de notas (ver `correlacao`), sem ordenar as colunas.
+    resumo = correlacionar(df['MEDIA_OBJETIVAS'], df['NU_NOTA_REDACAO']).resumo()
+    pearson_r, spearman_rho, r2 = resumo['pearson'], resumo['spearman'], resumo['r2']
+    # Os intervalos de confiança por bootstrap não entram no tema (nenhum gráfico os usa e o sorteio
+    # rodaria a cada execução, mesmo sem gráficos a renderizar): ver `python correlacao.py`.
+
+    # Imprime um resumo com os principais resultados estatísticos.
+    print("\n--- Resumo da análise estatística ---")
+    print(f"Total de registros analisados: {len(df)}")
+    print(f"Correlação de Pearson (r): {pearson_r:.4f}")
+    print(f"Correlação de Spearman (rho): {spearman_rho:.4f}")
+    print(f"Coeficiente de Determinação (R²): {r2:.4f}") # R² indica a % da variação da redação explicada pela média objetiva.
+    print("--------------------------------------\n")
+
+    # Gráfico 3: pares (média objetiva, redação) de todos os participantes contados em células (5 pontos na média, 20 na redação).
+    histograma_2d = histograma_2d_por_grupo(df['MEDIA_OBJETIVAS'], df['NU_NOTA_REDACAO'], largura_y=PASSO_REDACAO)
+
+    # --- 7. Criação de Grupos para Análise Comparativa ---
+    # Divide os alunos em 4 grupos (quartis) de tamanho igual com base na média das objetivas, como `pd.qcut`.
+    # Os quartis vêm da contagem de cada média possível (a média de 4 notas com uma casa decimal
+    # é múltipla de 0,025), sem ordenar a coluna; as médias são comparadas já arredondadas a essa grade.
+    quantis_media = quantis_por_grupo(df['MEDIA_OBJETIVAS'], resolucao=0.025)
+    limites = quantis_media.quantis(np.linspace(0, 1, 5))
+    df['GRUPO_DESEMPENHO'] = pd.cut(quantis_media.quantizar(df['MEDIA_OBJETIVAS']), limites, labels=GRUPOS_DESEMPENHO, include_lowest=True)
+
+    # --- 8. Dados das Visualizações ---
+    # Primeiro calcula os dados de cada gráfico; depois os gráficos são renderizados em paralelo.
+
+    # Gráficos 1 e 7: contagens em faixas de 1 ponto, calculadas uma única vez; o histograma
+    # e as densidades são desenhados a partir delas, sem percorrer as linhas de novo.
+    hist_objetivas = histograma_por_grupo(df['MEDIA_OBJETIVAS'])
+    hist_redacao = histograma_por_grupo(df['NU_NOTA_REDACAO'])
+    curvas = {'Média Objetivas': densidades(hist_objetivas)[None], 'Redação': densidades(hist_redacao)[None]}
+
+    # Gráfico 2: contagem de cada nota de redação possível por grupo, para o boxplot sem ordenação.
+    quantis_redacao = quantis_por_grupo(df['NU_NOTA_REDACAO'], df['GRUPO_DESEMPENHO'])
+
+    # Médias (objetivas e redação) de cada grupo de desempenho, usadas nos gráficos 4 e 5.
+    media_q = df.groupby('GRUPO_DESEMPENHO', observed=True)[['MEDIA_OBJETIVAS', 'NU_NOTA_REDACAO']].mean()
+    media_q.rename(columns={'MEDIA_OBJETIVAS': 'Média das Provas Objetivas', 'NU_NOTA_REDACAO': 'Nota da Redação'}, inplace=True)
+
+    # Matriz de correlação entre todas as notas, com rótulos amigáveis.
+    corr = df[OBJ_COLS + ['NU_NOTA_REDACAO']].corr().rename(columns=MAPA_NOMES_NOTAS, index=MAPA_NOMES_NOTAS)
+
+    # Percentual de cada faixa de redação dentro de cada faixa das objetivas, a partir do cubo de contagens.
+    comp = CuboMesclavel.de_dataframe(df, ['FAIXA_OBJETIVAS', 'FAIXA_REDACAO']).proporcoes('FAIXA_OBJETIVAS', 'FAIXA_REDACAO')
 
+    graficos = [
+        # Gráfico 1: HISTOGRAMA - Mostra a distribuição de frequência da média das notas objetivas.
+        Grafico('01_histograma_media_objetivas.png', 'Histograma', histograma_media_objetivas, hist_objetivas),
+        # Gráfico 2: BOXPLOT - Compara a distribuição da nota de redação entre os 4 grupos de desempenho.
+        Grafico('02_boxplot_redacao_grupos.png', 'Boxplot', boxplot_redacao_grupos, quantis_redacao),
+        # Gráfico 3: DISPERSÃO + REGRESSÃO LINEAR - Visualização central para a pergunta de pesquisa.
+        Grafico('03_dispersao_correlacao.png', 'Gráfico de Dispersão', dispersao_correlacao,
+                (histograma_2d, resumo)),
+        # Gráfico 4: BARRAS - Compara a nota média (objetivas e redação) de cada grupo de desempenho.
+        Grafico('04_barras_medias_grupos.png', 'Gráfico de Barras com Legenda Clara', barras_medias_grupos, media_q),
+        # Gráfico 5: LINHAS
+        Grafico('05_linhas_tendencia.png', 'Gráfico de Linhas (Tendência)', linhas_tendencia, media_q.reset_index()),
+        # Gráfico 6: HEATMAP - Exibe a matriz de correlação entre todas as notas (incluindo as 4 objetivas e a redação).
+        Grafico('06_heatmap_correlacao.png', 'Heatmap de Correlação', heatmap_correlacao, corr),
+        # Gráfico 7: DENSIDADE (KDE) - Compara a forma da distribuição da média objetiva com a da redação.
+        Grafico('07_densidade_distribuicao.png', 'Gráfico de Densidade', densidade_distribuicao, curvas),
+        # Gráfico 8: BARRAS EMPILHADAS - Mostra, para cada faixa de desempenho nas objetivas, a composição percentual das faixas da redação.
+        Grafico('08_barras_empilhadas_composicao.png', 'Gráfico de Barras Empilhadas', barras_empilhadas_composicao, comp),
+    ]
+    return graficos
+
+@rastrear_tema('desempenho')
+def main(df=None, interativo=False, processos=None, forcar=False, anos=None):
+    """
+    Executa a análise de desempenho.
+
+    Args:
+        df (pd.DataFrame): Dados de RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
+            Se None, os dados são carregados e filtrados a partir do cache colunar.
+        interativo (bool): Se True, exibe cada gráfico na tela (renderização sequencial).
+        processos (int): Processos usados na renderização dos gráficos (None = um por núcleo).
+        forcar (bool): Se True, renderiza todos os gráficos, mesmo os que não mudaram desde a última execução.
+        anos (list): Anos analisados (None = 2024, gráficos na pasta do tema). Cada ano lê os seus
+            arquivos (ex: RESULTADOS_2023.csv) e grava os gráficos em `graficos_desempenho/<ano>/`.
+    """
+    # Vários anos: o tema é executado uma vez para cada ano (ver `anos.executar_anos`).
+    if anos is not None and len(anos) > 1:
+        return executar_anos(main, anos, interativo=interativo, processos=processos, forcar=forcar)
+    ano = anos[0] if anos else None
+
+    # --- 3. Carregamento e Preparação dos Dados ---
+    arquivo = arquivo_do_ano(ARQUIVO, ano)
+    resultados_file = os.path.join(DADOS_PATH, arquivo)  # Cria o caminho completo para o arquivo
     
-    # Gráfico 3: DISPERSÃO + REGRESSÃO LINEAR - Visualização central para a pergunta de pesquisa.
-    print("Gerando Gráfico de Dispersão...")
-    plt.figure(figsize=(9,6)); sns.regplot(x='MEDIA_OBJETIVAS', y='NU_NOTA_REDACAO', data=df,
-                                           scatter_kws={'alpha':0.2}, line_kws={'color':'red'}) # alpha deixa os pontos semi-transparentes
-    plt.title('Relação entre Média Objetiva e Nota da Redação'); plt.xlabel('Média das Notas Objetivas'); plt.ylabel('Nota da Redação')
-    # Adiciona uma caixa de texto no gráfico com os resultados estatísticos mais importantes.
-    plt.annotate(f"Correlação (Pearson) r = {pearson_r:.3f}\nCoeficiente de Determinação R² = {lr.rvalue**2:.3f}",
-                 xy=(0.05, 0.95), xycoords='axes fraction', va='top', bbox=dict(boxstyle='round', fc='wheat', alpha=0.7))
-    plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '03_dispersao_correlacao.png'), dpi=300, bbox_inches='tight'); plt.show(); plt.close()
+    # Cria a pasta para salvar os gráficos
+    graficos_path = pasta_do_ano('graficos_desempenho', ano)
+    os.makedirs(graficos_path, exist_ok=True)
+
+    if df is None:
+        # Verificação de robustez: Checa se o arquivo de dados realmente existe antes de tentar lê-lo.
+        if not os.path.isfile(resultados_file):
+            raise FileNotFoundError(f"Arquivo não encontrado: {resultados_file}")
+
+        # Leitura otimizada a partir do cache colunar:
+        # 1. Obtém a lista de colunas existentes no arquivo sem carregá-lo.
+        hdrs = colunas_disponiveis(arquivo)
+        # 2. Cria uma lista 'usecols' contendo apenas as colunas de 'COLUNAS' que de fato existem no arquivo.
+        usecols = [c for c in COLUNAS if c in hdrs]
+        # 3. Carrega o DataFrame usando apenas as colunas validadas, otimizando o processo (ver a etapa 4).
+
+        # --- 4. Filtragem dos Participantes Válidos ---
+        # Carrega apenas os estudantes que compareceram a todas as 4 provas objetivas (presença = 1)
+        # e tiveram sua redação avaliada sem problemas (status = 1). O filtro nomeado 'presentes'
+        # é calculado uma vez e reaproveitado a partir do cache de filtros; as colunas são abertas
+        # mapeadas do disco (`colunas_mapeadas`).
+        with etapa('carregar', arquivo=arquivo, filtro='presentes') as medicao:
+            df = abrir_colunas(arquivo, usecols, 'presentes')
+            medicao.linhas_saida = len(df)
+    print(f"Registros após filtro de presença+redação: {len(df)}")
+
+    # --- 5. Limpeza e Engenharia de Features ---
+    # Cria a média das objetivas e as faixas de desempenho (ver `preparar`).
+    df = medir('preparar', preparar, df)
+    if df.empty:
+        raise RuntimeError("Nenhum registro válido restou após a limpeza das notas.")
+
+    graficos = medir('agregar', montar_graficos, df)
+    renderizar_graficos(graficos, graficos_path, ESTILO, interativo, processos, forcar)
 
 
 if __name__ == "__main__":
     # Este bloco garante que a função main() só será executada quando o script for rodado diretamente.
-    main()
+    main(**argumentos_linha_comando())
@@ -9,132 +9,303 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from agregacao_streaming import AgregadoGrupos, CuboMesclavel, HistogramaMesclavel, agregar_em_blocos
+from anos import arquivo_do_ano, executar_anos, pasta_do_ano
+from cache_colunar import TAMANHO_BLOCO
+from colunas_mapeadas import abrir_colunas
+from cubo import FAIXAS_NOTA_INSTITUCIONAL, ROTULOS_FAIXAS_INSTITUCIONAL, carregar_cubo
+from derivacao import derivar
+from esquema import MAPA_REGIOES, ORDEM_REGIOES, decodificar
+from histogramas import (densidades, desenhar_boxplot, desenhar_densidade_2d, desenhar_densidades, desenhar_histograma,
+                         histograma_2d_por_grupo, histograma_por_grupo, quantis_por_grupo, PASSO_REDACAO)
+from limpeza import NOTAS_COLS, filtrar_presentes
+from particoes import agregar_por_particao, carregar_particoes
+from rastreamento import etapa, medir, rastrear_tema
+from renderizacao import Grafico, argumentos_linha_comando, renderizar_graficos
 
-def main():
+# Arquivo e colunas a serem carregadas, para otimizar o uso de memória
+# (o orquestrador usa essas listas para carregar cada arquivo uma única vez).
+ARQUIVO = 'RESULTADOS_2024.csv'
+COLUNAS = [
+    'SG_UF_PROVA', 'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
+    'TP_STATUS_REDACAO', 'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
+]
 
-    # --- Configuração Inicial ---
-    dados_path = 'DADOS'
-    dados_enem_file = os.path.join(dados_path, 'RESULTADOS_2024.csv')
-    sns.set_theme(style="whitegrid", palette="viridis")
-    
-    # Cria a pasta para salvar os gráficos
-    graficos_path = 'graficos_institucional'
-    os.makedirs(graficos_path, exist_ok=True)
 
-    # Lista de colunas a serem carregadas, para otimizar o uso de memória.
-    cols_essenciais = [
-        'SG_UF_PROVA', 'TP_PRESENCA_CN', 'TP_PRESENCA_CH', 'TP_PRESENCA_LC', 'TP_PRESENCA_MT',
-        'TP_STATUS_REDACAO', 'NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO'
-    ]
+def preparar(df):
+    """
+    Prepara os dados do tema a partir de RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
 
-    # --- Parte 1: Carregando Dados ---
-    print("\n--- Parte 1: Carregando Dados ---")
-    try:
-        # Carrega apenas as colunas especificadas em 'usecols'.
-        df = pd.read_csv(dados_enem_file, encoding='latin1', delimiter=';', usecols=cols_essenciais)
-        print(f"Dados carregados com sucesso: {len(df)} registros.")
-    except Exception as e:
-        print(f"ERRO ao carregar CSV: {e}")
-        return
+    Remove linhas sem UF e cria as colunas NOTA_MEDIA_GERAL e REGIAO (categórica e ordenada).
 
-    # --- Parte 2: Limpeza e Preparação dos Dados ---
-    print("\n--- Parte 2: Limpando e preparando os dados ---")
-    notas_cols = ['NU_NOTA_CN', 'NU_NOTA_CH', 'NU_NOTA_LC', 'NU_NOTA_MT', 'NU_NOTA_REDACAO']
-    # Remove linhas com valores nulos nas notas ou na UF.
-    df.dropna(subset=notas_cols + ['SG_UF_PROVA'], inplace=True)
-
-    # Filtra por presença em todas as provas e redação válida.
-    df = df[
-        (df['TP_PRESENCA_CN'] == 1) & (df['TP_PRESENCA_CH'] == 1) &
-        (df['TP_PRESENCA_LC'] == 1) & (df['TP_PRESENCA_MT'] == 1) &
-        (df['TP_STATUS_REDACAO'] == 1)
-    ].copy()
-
-    # Cria a nota média geral para cada estudante.
-    df['NOTA_MEDIA_GERAL'] = df[notas_cols].mean(axis=1)
-
-    # Mapeia cada UF para sua respectiva região geográfica, para análises agregadas.
-    mapa_regioes = {
-        'AC': 'Norte', 'AP': 'Norte', 'AM': 'Norte', 'PA': 'Norte', 'RO': 'Norte', 'RR': 'Norte', 'TO': 'Norte',
-        'AL': 'Nordeste', 'BA': 'Nordeste', 'CE': 'Nordeste', 'MA': 'Nordeste', 'PB': 'Nordeste', 'PE': 'Nordeste', 'PI': 'Nordeste', 'RN': 'Nordeste', 'SE': 'Nordeste',
-        'DF': 'Centro-Oeste', 'GO': 'Centro-Oeste', 'MT': 'Centro-Oeste', 'MS': 'Centro-Oeste',
-        'ES': 'Sudeste', 'MG': 'Sudeste', 'RJ': 'Sudeste', 'SP': 'Sudeste',
-        'PR': 'Sul', 'RS': 'Sul', 'SC': 'Sul'
-    }
-    df['REGIAO'] = df['SG_UF_PROVA'].map(mapa_regioes)
-    df.dropna(subset=['REGIAO'], inplace=True)
-    # Converte para tipo categórico e ordena as regiões geograficamente (e por desempenho, geralmente).
-    df['REGIAO'] = pd.Categorical(df['REGIAO'], categories=['Sudeste', 'Sul', 'Centro-Oeste', 'Nordeste', 'Norte'], ordered=True)
+    Returns:
+        pd.DataFrame: Novo DataFrame com as colunas do tema e as colunas derivadas.
+    """
+    # Região categórica e ordenada, obtida direto dos códigos do dicionário de UFs (sem textos por linha).
+    regiao = decodificar(df['SG_UF_PROVA'], MAPA_REGIOES, ORDEM_REGIOES)
+    # Um único recorte remove as linhas sem UF ou com UF fora do mapa (as notas nulas já foram removidas na
+    # limpeza compartilhada); a nota média geral é calculada em float32 já sobre o recorte.
+    return derivar(df, COLUNAS, regiao.notna().to_numpy(), medias={'NOTA_MEDIA_GERAL': NOTAS_COLS},
+                   novas={'REGIAO': regiao})
 
-    print(f"Total de registros válidos para análise: {len(df)}")
-    if df.empty: return
+def estatisticas_streaming(tamanho_bloco=TAMANHO_BLOCO, ano=None):
+    """
+    Calcula as médias por região e por UF lendo o arquivo em blocos.
 
-    # --- Parte 3: Geração dos 8 Tipos de Gráficos ---
-    # Cria uma amostra para gráficos de dispersão, que podem ficar sobrecarregados.
-    df_sample = df.sample(n=min(50000, len(df)))
+    A memória usada depende do tamanho do bloco, e não do número de participantes.
+
+    Args:
+        tamanho_bloco (int): Linhas lidas por vez.
+        ano (int): Ano dos dados (None = 2024).
+
+    Returns:
+        dict: 'por_regiao' e 'por_uf' (AgregadoGrupos das notas) e
+            'histograma' (HistogramaMesclavel da NOTA_MEDIA_GERAL por REGIAO).
+    """
+    agregados = _novos_agregados()
+    agregar_em_blocos(arquivo_do_ano(ARQUIVO, ano), COLUNAS, lambda bloco: preparar(filtrar_presentes(bloco)),
+                      lambda bloco: _acumular(agregados, bloco), tamanho_bloco)
+    _imprimir_medias(agregados, 'streaming')
+    return agregados
+
+def estatisticas_por_uf(regioes=None, dependencias=None, processos=None, ano=None):
+    """
+    Calcula os mesmos agregados de `estatisticas_streaming` a partir das partições por UF.
+
+    Cada UF é lida e agregada em um processo separado (ver `particoes.agregar_por_particao`) e
+    os agregados parciais são mesclados. Com `regioes` ou `dependencias`, só as partições
+    correspondentes são lidas.
+
+    Args:
+        regioes (list): Regiões a incluir (None = todas).
+        dependencias (list): Códigos de TP_DEPENDENCIA_ADM_ESC a incluir (None = todos).
+        processos (int): Processos usados (None = um por núcleo).
+        ano (int): Ano do arquivo de RESULTADOS (None = 2024).
+
+    Returns:
+        dict: 'por_regiao', 'por_uf' e 'histograma', como em `estatisticas_streaming`.
+    """
+    parciais = agregar_por_particao(_agregar_particao, COLUNAS, ufs_das_regioes(regioes), dependencias, processos,
+                                    arquivo_do_ano(ARQUIVO, ano))
+    agregados = _novos_agregados()
+    for parcial in parciais.values():
+        for nome, agregado in agregados.items():
+            agregado.combinar(parcial[nome])
+    _imprimir_medias(agregados, f'{len(parciais)} partições por UF')
+    return agregados
+
+def _novos_agregados():
+    colunas_valor = NOTAS_COLS + ['NOTA_MEDIA_GERAL']
+    return {'por_regiao': AgregadoGrupos('REGIAO', colunas_valor), 'por_uf': AgregadoGrupos('SG_UF_PROVA', colunas_valor),
+            'histograma': HistogramaMesclavel(0, 1000, 10)}
+
+def _acumular(agregados, bloco):
+    agregados['por_regiao'].atualizar(bloco)
+    # A UF é agrupada como texto, pois cada bloco pode ter um dicionário de categorias diferente.
+    agregados['por_uf'].atualizar(bloco.assign(SG_UF_PROVA=bloco['SG_UF_PROVA'].astype(str)))
+    agregados['histograma'].atualizar(bloco['NOTA_MEDIA_GERAL'], bloco['REGIAO'])
+
+def _agregar_particao(df):
+    """Agregados de uma partição (executado em outro processo por `agregar_por_particao`)."""
+    agregados = _novos_agregados()
+    _acumular(agregados, preparar(filtrar_presentes(df)))
+    return agregados
+
+def _imprimir_medias(agregados, origem):
+    print(f"\nMédias por Região ({origem}):")
+    print(agregados['por_regiao'].medias().round(1))
+    print(f"\nNota Média Geral por UF ({origem}):")
+    print(agregados['por_uf'].medias()['NOTA_MEDIA_GERAL'].sort_values(ascending=False).round(1))
+
+def ufs_das_regioes(regioes):
+    """UFs das regiões pedidas (None quando não há restrição de região)."""
+    if regioes is None:
+        return None
+    desconhecidas = set(regioes) - set(ORDEM_REGIOES)
+    if desconhecidas:
+        raise ValueError(f"Regiões desconhecidas: {sorted(desconhecidas)}. Use: {ORDEM_REGIOES}")
+    return [uf for uf, regiao in MAPA_REGIOES.items() if regiao in regioes]
+
+def pasta_do_recorte(pasta, regioes=None, dependencias=None):
+    """
+    Pasta de saída de um recorte (subpasta `<regioes>-<dependencias>`, ex: 'Sul_Sudeste-todas', 'todas-4').
 
-     # 1. HISTOGRAMA
-    print("[1/8] Gerando: Histograma das Notas por Região...")
-    plt.figure(figsize=(12, 7)); sns.histplot(data=df.rename(columns={'REGIAO': 'Região'}), x='NOTA_MEDIA_GERAL', hue='Região', element='step', common_norm=False, linewidth=2); plt.title('Histograma: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Contagem de Estudantes'); plt.savefig(os.path.join(graficos_path, '01_histograma_desempenho_regiao.png'), dpi=300, bbox_inches='tight'); plt.show()
+    Sem recorte, mantém a pasta de referência, como `anos.pasta_do_ano` faz para o ano padrão.
+    """
+    if regioes is None and dependencias is None:
+        return pasta
+    nome_regioes = '_'.join(regioes) if regioes is not None else 'todas'
+    nome_dependencias = '_'.join(str(d) for d in dependencias) if dependencias is not None else 'todas'
+    return os.path.join(pasta, f'{nome_regioes}-{nome_dependencias}')
 
-    # 2. BOXPLOT
-    print("[2/8] Gerando: Boxplot do Desempenho por Região...")
-    plt.figure(figsize=(12, 8)); sns.boxplot(data=df, x='REGIAO', y='NOTA_MEDIA_GERAL'); plt.title('Boxplot: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Região'); plt.ylabel('Nota Média Geral'); plt.savefig(os.path.join(graficos_path, '02_boxplot_desempenho_regiao.png'), dpi=300, bbox_inches='tight'); plt.show()
+# Mapeia nomes técnicos das colunas de notas para nomes completos, usados no heatmap.
+MAPA_NOMES_COMPLETOS = {
+    'NU_NOTA_CN': 'Ciências da Natureza',
+    'NU_NOTA_CH': 'Ciências Humanas',
+    'NU_NOTA_LC': 'Linguagens e Códigos',
+    'NU_NOTA_MT': 'Matemática',
+    'NU_NOTA_REDACAO': 'Redação'
+}
+# Estilo visual dos gráficos do tema (argumentos de sns.set_theme).
+ESTILO = {'style': 'whitegrid', 'palette': 'viridis'}
 
-   
-    # 4. GRÁFICO DE BARRAS
-    print("[4/8] Gerando: Gráfico de Barras das Médias...")
-    media_regiao = df.groupby('REGIAO', observed=True)[['NOTA_MEDIA_GERAL', 'NU_NOTA_REDACAO']].mean(); ax = media_regiao.plot(kind='bar', figsize=(10, 7), rot=0, title='Gráfico de Barras: Médias por Região', colormap='plasma'); plt.xlabel('Região'); plt.ylabel('Nota Média'); plt.legend(['Média Geral', 'Redação']); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '04_barras_medias_regiao.png'), dpi=300, bbox_inches='tight'); plt.show()
+# --- Funções de Desenho dos Gráficos ---
+# Cada função recebe apenas os dados de que precisa e desenha na figura atual; `renderizacao.renderizar`
+# salva o PNG. Assim cada gráfico pode ser gerado em outro processo.
 
-    # 5. GRÁFICO DE LINHAS
-    print("[5/8] Gerando: Gráfico de Linhas (média por estado)...")
-    media_uf = df.groupby('SG_UF_PROVA')['NOTA_MEDIA_GERAL'].mean().sort_values(ascending=False); plt.figure(figsize=(18, 8)); media_uf.plot(kind='line', style='-o', title='Gráfico de Linhas: Desempenho Médio por UF da Prova'); plt.xlabel('Unidade da Federação'); plt.ylabel('Nota Média Geral'); plt.xticks(rotation=45, ha='right'); plt.grid(True, linestyle='--'); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '05_linhas_desempenho_uf.png'), dpi=300, bbox_inches='tight'); plt.show()
+def histograma_desempenho_regiao(histograma):
+    plt.figure(figsize=(12, 7)); desenhar_histograma(histograma, ORDEM_REGIOES, 'Região', n_faixas=60, element='step', linewidth=2); plt.title('Histograma: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Contagem de Estudantes')
 
-    # 6. HEATMAP DE CORRELAÇÃO
-    print("[6/8] Gerando: Heatmap das Médias Regionais...")
+def boxplot_desempenho_regiao(quantis):
+    plt.figure(figsize=(12, 8)); desenhar_boxplot(quantis, ORDEM_REGIOES); plt.title('Boxplot: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Região'); plt.ylabel('Nota Média Geral')
 
-    # Calcula a média das notas por região
-    heatmap_data = df.groupby('REGIAO', observed=True)[notas_cols].mean()
+def dispersao_media_redacao(histograma_2d):
+    fig = plt.figure(figsize=(15, 9)); desenhar_densidade_2d(histograma_2d, ORDEM_REGIOES, fig=fig); fig.suptitle('Densidade: Nota Média Geral vs. Redação por Região', fontsize=16); fig.supxlabel('Nota Média Geral'); fig.supylabel('Nota da Redação')
 
+def barras_medias_regiao(media_regiao):
+    ax = media_regiao.plot(kind='bar', figsize=(10, 7), rot=0, title='Gráfico de Barras: Médias por Região', colormap='plasma'); plt.xlabel('Região'); plt.ylabel('Nota Média'); plt.legend(['Média Geral', 'Redação']); plt.tight_layout()
 
-    mapa_nomes_completos = {
-        'NU_NOTA_CN': 'Ciências da Natureza',
-        'NU_NOTA_CH': 'Ciências Humanas',
-        'NU_NOTA_LC': 'Linguagens e Códigos',
-        'NU_NOTA_MT': 'Matemática',
-        'NU_NOTA_REDACAO': 'Redação'
-    }
-    # Aplica a renomeação
-    heatmap_data.rename(columns=mapa_nomes_completos, inplace=True)
+def linhas_desempenho_uf(media_uf):
+    plt.figure(figsize=(18, 8)); media_uf.plot(kind='line', style='-o', title='Gráfico de Linhas: Desempenho Médio por UF da Prova'); plt.xlabel('Unidade da Federação'); plt.ylabel('Nota Média Geral'); plt.xticks(rotation=45, ha='right'); plt.grid(True, linestyle='--'); plt.tight_layout()
 
-    # Gera o heatmap com os novos nomes
+def heatmap_medias_regionais(heatmap_data):
+    # Gera o heatmap com os nomes completos das áreas
     plt.figure(figsize=(12, 7)) # Aumentei um pouco a largura para os novos rótulos
     sns.heatmap(heatmap_data, annot=True, cmap='cividis', fmt='.1f', linewidths=.5)
     plt.title('Heatmap: Desempenho Médio por Área e Região', fontsize=16)
     plt.xlabel('Área do Conhecimento', fontsize=12)
     plt.ylabel('Região', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
 
+def densidade_notas_regiao(curvas):
+    plt.figure(figsize=(12, 7)); desenhar_densidades(curvas, 'Região'); plt.title('Densidade: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Densidade')
 
-    plt.xticks(rotation=45, ha='right')
+def barras_empilhadas_desempenho(composicao):
+    ax = composicao.plot(kind='bar', stacked=True, figsize=(12, 8), colormap='YlGnBu'); plt.title('Barras Empilhadas: Composição das Faixas de Desempenho por Região (%)', fontsize=16); plt.xlabel('Região'); plt.ylabel('Percentual de Estudantes (%)'); plt.xticks(rotation=0); plt.legend(title='Faixa de Desempenho', bbox_to_anchor=(1.02, 1)); plt.tight_layout()
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(graficos_path, '06_heatmap_medias_regionais.png'), dpi=300, bbox_inches='tight')
-    plt.show()
+def montar_graficos(df, cubo=None):
+    """
+    Calcula os agregados de cada gráfico do tema a partir dos dados já preparados por `preparar`.
+
+    Args:
+        df (pd.DataFrame): Dados preparados por `preparar`.
+        cubo (CuboMesclavel): Cubo pré-calculado do arquivo (`cubo.carregar_cubo`), usado no gráfico 8.
+            None monta o cubo de região e faixa de desempenho a partir de `df`.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    notas_cols = NOTAS_COLS
+    # --- Parte 3: Geração dos 8 Tipos de Gráficos ---
+    # Primeiro calcula os dados de cada gráfico; depois os gráficos são renderizados em paralelo.
+    # 3. Conta os pares (nota média geral, redação) de todos os participantes em células (5 pontos na média,
+    # 20 na redação), por região; o gráfico de dispersão é desenhado a partir dessas contagens, sem amostragem.
+    histograma_2d = histograma_2d_por_grupo(df['NOTA_MEDIA_GERAL'], df['NU_NOTA_REDACAO'], df['REGIAO'], largura_y=PASSO_REDACAO)
+    df_media = df[['REGIAO', 'NOTA_MEDIA_GERAL']]
+
+    # 1 e 7. Conta a nota média geral em faixas de 1 ponto por região, uma única vez;
+    # o histograma e as densidades são desenhados a partir dessas contagens.
+    histograma = histograma_por_grupo(df['NOTA_MEDIA_GERAL'], df['REGIAO'])
+    curvas = densidades(histograma, ORDEM_REGIOES)
+    # 2. Contagem de cada nota possível (passos de 0,1) por região, para o boxplot sem ordenação.
+    quantis = quantis_por_grupo(df['NOTA_MEDIA_GERAL'], df['REGIAO'])
+
+    # 4. Médias gerais e da redação por região.
+    media_regiao = df.groupby('REGIAO', observed=True)[['NOTA_MEDIA_GERAL', 'NU_NOTA_REDACAO']].mean()
+    # 5. Média por estado, em ordem decrescente.
+    media_uf = df.groupby('SG_UF_PROVA', observed=True)['NOTA_MEDIA_GERAL'].mean().sort_values(ascending=False)
+    # 6. Calcula a média das notas por região, com os nomes completos das áreas.
+    heatmap_data = df.groupby('REGIAO', observed=True)[notas_cols].mean().rename(columns=MAPA_NOMES_COMPLETOS)
+    # 8. Composição das faixas de desempenho dentro de cada região, a partir do cubo de contagens (região x faixa),
+    # com as faixas do cubo pré-calculado; sem ele (recortes e DataFrames recebidos), o cubo é montado aqui.
+    if cubo is None:
+        df['FAIXA_INSTITUCIONAL'] = pd.cut(df['NOTA_MEDIA_GERAL'], bins=FAIXAS_NOTA_INSTITUCIONAL, labels=ROTULOS_FAIXAS_INSTITUCIONAL)
+        cubo = CuboMesclavel.de_dataframe(df, ['REGIAO', 'FAIXA_INSTITUCIONAL'])
+    composicao = cubo.proporcoes('REGIAO', 'FAIXA_INSTITUCIONAL')
+
+    graficos = [
+        Grafico('01_histograma_desempenho_regiao.png', 'Histograma das Notas por Região', histograma_desempenho_regiao, histograma),
+        Grafico('02_boxplot_desempenho_regiao.png', 'Boxplot do Desempenho por Região', boxplot_desempenho_regiao, quantis),
+        Grafico('03_dispersao_media_redacao.png', 'Gráfico de Dispersão (Densidade 2D)', dispersao_media_redacao, histograma_2d),
+        Grafico('04_barras_medias_regiao.png', 'Gráfico de Barras das Médias', barras_medias_regiao, media_regiao),
+        Grafico('05_linhas_desempenho_uf.png', 'Gráfico de Linhas (média por estado)', linhas_desempenho_uf, media_uf),
+        Grafico('06_heatmap_medias_regionais.png', 'Heatmap das Médias Regionais', heatmap_medias_regionais, heatmap_data),
+        Grafico('07_densidade_notas_regiao.png', 'Gráfico de Densidade das Notas por Região', densidade_notas_regiao, curvas),
+        Grafico('08_barras_empilhadas_desempenho.png', 'Gráfico de Barras Empilhadas', barras_empilhadas_desempenho, composicao),
+    ]
+    return graficos
 
-    # 7. GRÁFICO DE DENSIDADE (KDE)
-    print("[7/8] Gerando: Gráfico de Densidade das Notas por Região...")
+@rastrear_tema('instucional')
+def main(df=None, interativo=False, processos=None, forcar=False, regioes=None, dependencias=None, anos=None):
+    """
+    Executa a análise institucional.
 
-    plt.figure(figsize=(12, 7)); sns.kdeplot(data=df.rename(columns={'REGIAO': 'Região'}), x='NOTA_MEDIA_GERAL', hue='Região', fill=True, common_norm=False); plt.title('Densidade: Distribuição da Nota Média Geral por Região', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Densidade'); plt.savefig(os.path.join(graficos_path, '07_densidade_notas_regiao.png'), dpi=300, bbox_inches='tight'); plt.show()
+    Args:
+        df (pd.DataFrame): Dados de RESULTADOS já filtrados por `limpeza.filtrar_presentes`.
+            Se None, os dados são carregados e filtrados a partir do cache colunar.
+        interativo (bool): Se True, exibe cada gráfico na tela (renderização sequencial).
+        processos (int): Processos usados na renderização dos gráficos (None = um por núcleo).
+        forcar (bool): Se True, renderiza todos os gráficos, mesmo os que não mudaram desde a última execução.
+        regioes (list): Se informado (e df for None), analisa só essas regiões, lendo apenas as partições
+            das suas UFs (ver `particoes.py`).
+        dependencias (list): Se informado (e df for None), analisa só as escolas com esses códigos de
+            TP_DEPENDENCIA_ADM_ESC, lendo apenas as partições correspondentes.
+        anos (list): Anos analisados (None = 2024, gráficos na pasta do tema). Cada ano lê os seus
+            arquivos (ex: RESULTADOS_2023.csv) e grava os gráficos em `graficos_institucional/<ano>/`.
 
-    # 8. GRÁFICO DE BARRAS EMPILHADAS
-    print("[8/8] Gerando: Gráfico de Barras Empilhadas...")
+    Com `regioes` ou `dependencias`, os gráficos (e o manifesto) vão para uma subpasta do recorte
+    (ex: `graficos_institucional/Sul-todas/`, ver `pasta_do_recorte`), sem sobrescrever os nacionais.
+    """
+    # Vários anos: o tema é executado uma vez para cada ano (ver `anos.executar_anos`).
+    if anos is not None and len(anos) > 1:
+        return executar_anos(main, anos, interativo=interativo, processos=processos, forcar=forcar,
+                             regioes=regioes, dependencias=dependencias)
+    ano = anos[0] if anos else None
 
-    bins_desempenho = [0, 500, 600, 700, 1000]; labels_desempenho = ['Regular (<500)', 'Bom (500-600)', 'Muito Bom (600-700)', 'Excelente (>700)']; df['FAIXA_DESEMPENHO'] = pd.cut(df['NOTA_MEDIA_GERAL'], bins=bins_desempenho, labels=labels_desempenho); composicao = df.groupby('REGIAO', observed=True)['FAIXA_DESEMPENHO'].value_counts(normalize=True).unstack().fillna(0) * 100; ax = composicao.plot(kind='bar', stacked=True, figsize=(12, 8), colormap='YlGnBu'); plt.title('Barras Empilhadas: Composição das Faixas de Desempenho por Região (%)', fontsize=16); plt.xlabel('Região'); plt.ylabel('Percentual de Estudantes (%)'); plt.xticks(rotation=0); plt.legend(title='Faixa de Desempenho', bbox_to_anchor=(1.02, 1)); plt.tight_layout(); plt.savefig(os.path.join(graficos_path, '08_barras_empilhadas_desempenho.png'), dpi=300, bbox_inches='tight'); plt.show()
+    # --- Configuração Inicial ---
+    arquivo = arquivo_do_ano(ARQUIVO, ano)
+    # Cria a pasta para salvar os gráficos (recortes em uma subpasta própria)
+    graficos_path = pasta_do_ano('graficos_institucional', ano)
+    if df is None:
+        graficos_path = pasta_do_recorte(graficos_path, regioes, dependencias)
+    os.makedirs(graficos_path, exist_ok=True)
+
+    # --- Parte 1: Carregando Dados ---
+    # Execução completa do arquivo (sem recorte): a composição por faixa sai do cubo pré-calculado.
+    completo = df is None and regioes is None and dependencias is None
+    if df is None:
+        print("\n--- Parte 1: Carregando Dados ---")
+        try:
+            # Carrega do cache colunar apenas as colunas especificadas, já filtradas por presença em
+            # todas as provas, redação válida e notas preenchidas (filtro guardado em `cache_filtros`),
+            # mapeadas do disco sem cópia (`colunas_mapeadas`).
+            with etapa('carregar', arquivo=arquivo, filtro='presentes', regioes=regioes, dependencias=dependencias) as medicao:
+                if regioes is None and dependencias is None:
+                    df = abrir_colunas(arquivo, COLUNAS, 'presentes')
+                else:
+                    # Recorte por região ou tipo de escola: só as partições correspondentes são lidas.
+                    df = filtrar_presentes(carregar_particoes(COLUNAS, ufs_das_regioes(regioes), dependencias, arquivo))
+                medicao.linhas_saida = len(df)
+            print(f"Dados carregados com sucesso: {len(df)} registros válidos.")
+        except Exception as e:
+            print(f"ERRO ao carregar CSV: {e}")
+            return
+
+    # --- Parte 2: Limpeza e Preparação dos Dados ---
+    print("\n--- Parte 2: Limpando e preparando os dados ---")
+    # Remove linhas sem UF e cria a nota média geral e a região de cada estudante.
+    df = medir('preparar', preparar, df)
+
+    print(f"Total de registros válidos para análise: {len(df)}")
+    if df.empty: return
 
-    
-     # 3. GRÁFICO DE DISPERSÃO (Puro)
-    print("[3/8] Gerando: Gráfico de Dispersão puro...")
-    plt.figure(figsize=(12, 8)); sns.scatterplot(data=df_sample.rename(columns={'REGIAO': 'Região'}), x='NOTA_MEDIA_GERAL', y='NU_NOTA_REDACAO', hue='Região', alpha=0.3, s=20); plt.title('Dispersão: Nota Média Geral vs. Redação por Região (Amostra)', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Nota da Redação'); plt.legend(title='Região'); plt.savefig(os.path.join(graficos_path, '03_dispersao_media_redacao.png'), dpi=300, bbox_inches='tight'); plt.show()
+    cubo = None
+    if completo:
+        with etapa('carregar_cubo', arquivo=arquivo):
+            cubo = carregar_cubo(arquivo)
+    graficos = medir('agregar', montar_graficos, df, cubo)
+    renderizar_graficos(graficos, graficos_path, ESTILO, interativo, processos, forcar)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**argumentos_linha_comando(recortes=True))
@@ -0,0 +1,163 @@
+"""## Tema Itens
+
+**Pergunta de Pesquisa:** Quais itens das provas objetivas do ENEM 2024 foram mais difíceis, quais discriminam melhor os participantes e como as alternativas erradas (distratores) atraíram as respostas?
+"""
+
+#@title Código do Tema Itens
+# --- Importação de Bibliotecas ---
+import os
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+from anos import arquivo_do_ano, executar_anos, pasta_do_ano
+from cache_colunar import carregar_colunas
+from estatisticas_itens import ALTERNATIVAS, ARQUIVO_SAIDA, EstatisticasItens, calcular_estatisticas
+from indice_itens import carregar_indice
+from rastreamento import etapa, medir, rastrear_tema
+from renderizacao import Grafico, argumentos_linha_comando, renderizar_graficos
+from respostas import ARQUIVO_ITENS, AREAS
+
+# Arquivo e colunas usadas (respostas, caderno e nota de cada área, e a língua estrangeira de LC).
+# Sem um DataFrame já carregado, o tema lê o arquivo em blocos: as strings de respostas nunca ficam todas na memória.
+ARQUIVO = 'RESULTADOS_2024.csv'
+COLUNAS = ['TP_LINGUA'] + [f'{prefixo}_{area}' for area in AREAS for prefixo in ['CO_PROVA', 'TX_RESPOSTAS', 'NU_NOTA']]
+# Nomes das áreas nos gráficos.
+MAPA_AREAS = {'CN': 'Ciências da Natureza', 'CH': 'Ciências Humanas', 'LC': 'Linguagens e Códigos', 'MT': 'Matemática'}
+# Ponto-bisserial abaixo deste valor indica item com baixa discriminação.
+LIMITE_BISSERIAL = 0.2
+# Estilo visual dos gráficos do tema (argumentos de sns.set_theme).
+ESTILO = {'style': 'whitegrid', 'palette': 'deep'}
+
+def preparar(df, ano=None):
+    """
+    Calcula as estatísticas dos itens a partir de RESULTADOS já carregados em memória (um único bloco).
+
+    Args:
+        df (pd.DataFrame): Dados de RESULTADOS com as colunas de COLUNAS.
+        ano (int): Ano dos dados, que define os itens das provas (None = 2024).
+
+    Returns:
+        pd.DataFrame: Uma linha por item (ver `estatisticas_itens.EstatisticasItens.tabela`), com a coluna AREA.
+    """
+    itens = carregar_colunas(arquivo_do_ano(ARQUIVO_ITENS, ano))
+    indice = carregar_indice(ano)
+    tabelas = []
+    for area in AREAS:
+        agregado = EstatisticasItens(area, indice)
+        agregado.atualizar(df)
+        tabelas.append(agregado.tabela(itens))
+    return nomear_areas(pd.concat(tabelas, ignore_index=True))
+
+def nomear_areas(tabela):
+    """Remove os itens sem respostas e acrescenta o nome da área (AREA) à tabela de estatísticas."""
+    tabela = tabela[tabela['N'] > 0].copy()
+    tabela['AREA'] = pd.Categorical(tabela['SG_AREA'].map(MAPA_AREAS), categories=[MAPA_AREAS[a] for a in AREAS])
+    return tabela.reset_index(drop=True)
+
+# --- Funções de Desenho dos Gráficos ---
+# Cada função recebe apenas os dados de que precisa e desenha na figura atual; `renderizacao.renderizar`
+# salva o PNG. Assim cada gráfico pode ser gerado em outro processo.
+
+def histograma_p_valor(df):
+    plt.figure(figsize=(10, 6)); sns.histplot(data=df, x='P_VALOR', hue='AREA', bins=20, binrange=(0, 1), multiple='stack')
+    plt.title('Distribuição da Proporção de Acertos dos Itens', fontsize=16); plt.xlabel('Proporção de Acertos (p-valor)'); plt.ylabel('Número de Itens')
+    plt.tight_layout()
+
+def dispersao_p_valor_bisserial(df):
+    plt.figure(figsize=(10, 7)); sns.scatterplot(data=df, x='P_VALOR', y='PONTO_BISSERIAL', hue='AREA', alpha=0.8)
+    plt.axhline(LIMITE_BISSERIAL, color='red', linestyle='--', label=f'Ponto-bisserial = {LIMITE_BISSERIAL}')
+    plt.title('Dificuldade x Discriminação dos Itens', fontsize=16); plt.xlabel('Proporção de Acertos (p-valor)'); plt.ylabel('Correlação Ponto-Bisserial')
+    plt.legend(); plt.tight_layout()
+
+def dispersao_p_valor_tri(df):
+    plt.figure(figsize=(10, 7)); sns.scatterplot(data=df, x='NU_PARAM_B', y='P_VALOR', hue='AREA', alpha=0.8)
+    plt.title('Dificuldade na TRI (parâmetro b) x Proporção de Acertos', fontsize=16); plt.xlabel('Parâmetro b (TRI)'); plt.ylabel('Proporção de Acertos (p-valor)')
+    plt.tight_layout()
+
+def barras_menor_bisserial(dados):
+    plt.figure(figsize=(10, 8)); sns.barplot(data=dados, x='PONTO_BISSERIAL', y='ITEM', hue='AREA', dodge=False)
+    plt.axvline(LIMITE_BISSERIAL, color='red', linestyle='--')
+    plt.title('Itens com Menor Discriminação (Ponto-Bisserial)', fontsize=16); plt.xlabel('Correlação Ponto-Bisserial'); plt.ylabel('Item (área)')
+    plt.tight_layout()
+
+def barras_distratores(dados):
+    ax = dados.plot(kind='barh', stacked=True, figsize=(12, 8), colormap='tab10')
+    ax.set(title='Alternativas Marcadas nos Itens Mais Difíceis (%)', xlabel='Percentual de Participantes (%)', ylabel='Item (gabarito)')
+    plt.legend(title='Alternativa', bbox_to_anchor=(1.02, 1)); plt.tight_layout()
+
+def boxplot_p_valor_area(df):
+    plt.figure(figsize=(10, 6)); sns.boxplot(data=df, x='AREA', y='P_VALOR', hue='AREA', legend=False)
+    plt.title('Proporção de Acertos dos Itens por Área', fontsize=16); plt.xlabel('Área'); plt.ylabel('Proporção de Acertos (p-valor)')
+    plt.tight_layout()
+
+def montar_graficos(df):
+    """
+    Calcula os dados de cada gráfico a partir da tabela de estatísticas dos itens.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    validos = df[df['IN_ITEM_ABAN'] != 1]
+    rotulo = validos['CO_ITEM'].astype(str) + ' (' + validos['SG_AREA'] + ')'
+
+    # Gráfico 4: os 15 itens (não anulados) com menor ponto-bisserial.
+    menor_bisserial = validos.assign(ITEM=rotulo).nsmallest(15, 'PONTO_BISSERIAL')[['ITEM', 'AREA', 'PONTO_BISSERIAL']]
+
+    # Gráfico 5: alternativas marcadas nos 10 itens com menor proporção de acertos.
+    dificeis = validos.assign(ITEM=validos['CO_ITEM'].astype(str) + ' (' + validos['TX_GABARITO'] + ')').nsmallest(10, 'P_VALOR')
+    colunas_pct = [f'PCT_{a}' for a in ALTERNATIVAS if dificeis[f'PCT_{a}'].sum() > 0]
+    distratores = dificeis.set_index('ITEM')[colunas_pct].rename(columns=lambda c: c.replace('PCT_', '').title())
+
+    dados_dispersao = validos[['AREA', 'P_VALOR', 'PONTO_BISSERIAL', 'NU_PARAM_B']]
+    graficos = [
+        Grafico('01_histograma_p_valor.png', 'Histograma', histograma_p_valor, dados_dispersao),
+        Grafico('02_dispersao_p_valor_bisserial.png', 'Gráfico de Dispersão', dispersao_p_valor_bisserial, dados_dispersao),
+        Grafico('03_dispersao_p_valor_tri.png', 'Gráfico de Dispersão', dispersao_p_valor_tri, dados_dispersao),
+        Grafico('04_barras_menor_bisserial.png', 'Gráfico de Barras', barras_menor_bisserial, menor_bisserial),
+        Grafico('05_barras_distratores.png', 'Gráfico de Barras Empilhadas', barras_distratores, distratores),
+        Grafico('06_boxplot_p_valor_area.png', 'Boxplot', boxplot_p_valor_area, dados_dispersao),
+    ]
+    return graficos
+
+@rastrear_tema('itens')
+def main(df=None, interativo=False, processos=None, forcar=False, anos=None):
+    """
+    Executa a análise dos itens.
+
+    Args:
+        df (pd.DataFrame): Dados de RESULTADOS já carregados (com as colunas de COLUNAS). Se None, o arquivo
+            é lido em blocos e a memória usada não depende do número de participantes.
+        interativo (bool): Se True, exibe cada gráfico na tela (renderização sequencial).
+        processos (int): Processos usados na renderização dos gráficos (None = um por núcleo).
+        forcar (bool): Se True, renderiza todos os gráficos, mesmo os que não mudaram desde a última execução.
+        anos (list): Anos analisados (None = 2024, gráficos na pasta do tema). Cada ano lê os seus
+            arquivos (ex: RESULTADOS_2023.csv e ITENS_PROVA_2023.csv) e grava os gráficos em `graficos_itens/<ano>/`.
+    """
+    # Vários anos: o tema é executado uma vez para cada ano (ver `anos.executar_anos`).
+    if anos is not None and len(anos) > 1:
+        return executar_anos(main, anos, interativo=interativo, processos=processos, forcar=forcar)
+    ano = anos[0] if anos else None
+
+    graficos_path = pasta_do_ano('graficos_itens', ano)
+    os.makedirs(graficos_path, exist_ok=True)
+
+    if df is None:
+        # Leitura em blocos e estatísticas dos itens em uma única passada.
+        with etapa('preparar', arquivo=arquivo_do_ano(ARQUIVO, ano)) as medicao:
+            tabela = nomear_areas(calcular_estatisticas(ano=ano))
+            medicao.linhas_saida = len(tabela)
+    else:
+        tabela = medir('preparar', preparar, df, ano)
+    print(f"Estatísticas calculadas para {len(tabela)} itens.")
+    if tabela.empty: return
+
+    # A tabela completa (p-valor, ponto-bisserial e distratores de cada item) fica junto dos gráficos.
+    tabela.drop(columns='AREA').to_csv(os.path.join(graficos_path, arquivo_do_ano(ARQUIVO_SAIDA, ano)), sep=';', index=False,
+                                       float_format='%.4f')
+
+    graficos = medir('agregar', montar_graficos, tabela)
+    renderizar_graficos(graficos, graficos_path, ESTILO, interativo, processos, forcar)
+
+
+if __name__ == "__main__":
+    main(**argumentos_linha_comando())
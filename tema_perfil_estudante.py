@@ -5,95 +5,206 @@
 
 #@title Código do Tema Perfil do Estudante
 # --- Importação de Bibliotecas ---
-import pandas as pd
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from agregacao_streaming import CuboMesclavel
+from anos import arquivo_do_ano, executar_anos, pasta_do_ano
+from colunas_mapeadas import abrir_colunas
+from cubo import carregar_cubo
+from esquema import ROTULOS, decodificar
+from histogramas import desenhar_densidades, kde_em_grade
+from rastreamento import etapa, medir, rastrear_tema
+from renderizacao import Grafico, argumentos_linha_comando, renderizar_graficos
+
+# Arquivo e colunas de perfil demográfico necessárias (o orquestrador usa essas listas para carregar cada arquivo uma única vez).
+ARQUIVO = 'PARTICIPANTES_2024.csv'
+COLUNAS = ['TP_FAIXA_ETARIA', 'TP_SEXO', 'TP_ESTADO_CIVIL', 'TP_ST_CONCLUSAO']
+
+# Dicionários para traduzir os códigos em textos legíveis (definidos no esquema central).
+MAPA_SEXO = ROTULOS['TP_SEXO']
+MAPA_IDADE = ROTULOS['TP_FAIXA_ETARIA']
+MAPA_CONCLUSAO = ROTULOS['TP_ST_CONCLUSAO']
+MAPA_ESTADO_CIVIL = ROTULOS['TP_ESTADO_CIVIL']
+# Estilo visual dos gráficos do tema (argumentos de sns.set_theme).
+ESTILO = {'style': 'whitegrid', 'palette': 'viridis'}
+# Dimensões do cubo do tema (o mesmo cuboide do cubo de PARTICIPANTES em `cubo.py`).
+DIMENSOES_CUBO = ['Faixa Etária', 'Sexo', 'Situação Conclusão', 'Estado Civil']
+# Passo da grade da densidade de idade (em códigos de TP_FAIXA_ETARIA).
+PASSO_DENSIDADE = 0.05
+
+# --- Funções de Desenho dos Gráficos ---
+# Cada função recebe apenas os dados de que precisa e desenha na figura atual; `renderizacao.renderizar`
+# salva o PNG. Assim cada gráfico pode ser gerado em outro processo.
+
+def histograma_faixa_etaria(idade_sexo):
+    plt.figure(figsize=(12, 7)); sns.histplot(data=idade_sexo, x='TP_FAIXA_ETARIA', weights='n', bins=len(MAPA_IDADE), discrete=True, hue='Sexo'); plt.title('Histograma: Distribuição de Inscritos por Faixa Etária', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Contagem de Inscritos'); plt.xticks(ticks=list(MAPA_IDADE.keys()), labels=MAPA_IDADE.values(), rotation=45, ha='right')
+
+def violino_idade_conclusao(df):
+    plt.figure(figsize=(12, 8)); sns.violinplot(data=df, x='Situação Conclusão', y='TP_FAIXA_ETARIA'); plt.title('Violino: Distribuição de Idade por Situação de Conclusão do EM', fontsize=16); plt.xlabel('Situação de Conclusão'); plt.ylabel('Faixa Etária'); plt.yticks(ticks=list(MAPA_IDADE.keys()), labels=MAPA_IDADE.values())
+
+def stripplot_idade_civil_sexo(df):
+    plt.figure(figsize=(16, 9)) # Aumentei um pouco o tamanho para acomodar a legenda
+    sns.stripplot(data=df, x='Faixa Etária', y='Estado Civil', hue='Sexo', jitter=0.3, alpha=0.5, dodge=True)
+    plt.title('Dispersão: Relação entre Idade, Estado Civil e Sexo', fontsize=16)
+    plt.xlabel('Faixa Etária', fontsize=12)
+    plt.ylabel('Estado Civil', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.legend(title='Sexo', bbox_to_anchor=(1.02, 1), loc='upper left')
+    plt.tight_layout(rect=[0, 0, 0.9, 1])
 
-def main():
+def barras_perfil_demografico(contagens):
+    fig, ax = plt.subplots(1, 2, figsize=(18, 7))
+    # Barras das contagens já calculadas, no lugar de `sns.countplot` sobre as linhas.
+    for eixo, (coluna, titulo) in zip(ax, [('Sexo', 'Contagem por Sexo'), ('Situação Conclusão', 'Contagem por Situação de Conclusão do EM')]):
+        n = contagens[coluna]
+        sns.barplot(ax=eixo, x=n.index, y=n.to_numpy(), color=sns.color_palette()[0]).set_title(titulo); eixo.set_ylabel('count')
+    fig.suptitle('Gráfico de Barras: Perfil Geral dos Inscritos', fontsize=16)
+
+def linhas_proporcao_sexo_idade(comp_sexo_idade):
+    comp_sexo_idade.plot(kind='line', style='-o', figsize=(12, 7)); plt.title('Linhas: Proporção de Sexo por Faixa Etária (%)', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Percentual de Inscritos (%)'); plt.grid(True, linestyle='--')
+
+def heatmap_civil_conclusao(heatmap_data):
+    plt.figure(figsize=(10, 7)); sns.heatmap(heatmap_data, annot=True, fmt='d', cmap='cividis'); plt.title('Heatmap: Contagem por Estado Civil e Situação de Conclusão', fontsize=16)
+
+def densidade_idade_sexo(curvas):
+    plt.figure(figsize=(12, 7)); desenhar_densidades(curvas, titulo_legenda='Sexo'); plt.title('Densidade: Distribuição de Idade dos Inscritos por Sexo', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Densidade'); plt.xticks(ticks=list(MAPA_IDADE.keys()), labels=MAPA_IDADE.values(), rotation=45, ha='right')
+
+def barras_empilhadas_conclusao_idade(comp_conclusao_idade):
+    comp_conclusao_idade.plot(kind='bar', stacked=True, figsize=(14, 8), colormap='YlGnBu'); plt.title('Barras Empilhadas: Composição da Situação de Conclusão por Faixa Etária (%)', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Percentual de Inscritos (%)'); plt.legend(title='Situação de Conclusão', bbox_to_anchor=(1.02, 1))
+
+def preparar(df):
+    """
+    Decodifica as colunas de perfil de PARTICIPANTES.
+
+    Cria as colunas descritivas Sexo, Faixa Etária, Situação Conclusão e Estado Civil (categóricas)
+    e remove as linhas com códigos inválidos.
+
+    Returns:
+        pd.DataFrame: Novo DataFrame com as colunas do tema e as colunas derivadas.
+    """
+    # Trabalha sobre as colunas do tema, sem alterar o DataFrame recebido (que pode ser compartilhado com outros temas).
+    df = df[COLUNAS].copy()
+    # Cria as colunas descritivas como categorias, direto dos códigos (sem colunas intermediárias de texto).
+    df['Sexo'] = decodificar(df['TP_SEXO'])
+    df['Faixa Etária'] = decodificar(df['TP_FAIXA_ETARIA'])
+    df['Situação Conclusão'] = decodificar(df['TP_ST_CONCLUSAO'])
+    df['Estado Civil'] = decodificar(df['TP_ESTADO_CIVIL'])
+    # Remove qualquer linha que tenha valores nulos após o mapeamento (ex: códigos inválidos).
+    df.dropna(inplace=True)
+    return df
+
+def montar_graficos(df, cubo=None):
+    """
+    Calcula os agregados de cada gráfico do tema a partir dos dados já preparados por `preparar`.
+
+    Args:
+        df (pd.DataFrame): Dados preparados por `preparar`.
+        cubo (CuboMesclavel): Cubo pré-calculado do arquivo (`cubo.carregar_cubo`). None monta o cubo
+            das dimensões do tema a partir de `df`.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    # --- Parte 3: Geração dos 8 Gráficos de Perfil ---
+    # Primeiro calcula os dados de cada gráfico; depois os gráficos são renderizados em paralelo.
+    # As contagens por idade, sexo, conclusão e estado civil são feitas uma única vez (cubo); as proporções
+    # e o heatmap são recortes do cubo, sem novos agrupamentos sobre as linhas. O cubo do arquivo é restrito
+    # às linhas com as quatro dimensões preenchidas, as mesmas que `preparar` mantém.
+    if cubo is None:
+        cubo = CuboMesclavel.de_dataframe(df, DIMENSOES_CUBO)
+    cubo = cubo.recortar({d: list(cubo.dimensoes[d].categories) for d in DIMENSOES_CUBO})
+    comp_sexo_idade = cubo.proporcoes('Faixa Etária', 'Sexo')
+    heatmap_data = cubo.tabela('Estado Civil', 'Situação Conclusão')
+    comp_conclusao_idade = cubo.proporcoes('Faixa Etária', 'Situação Conclusão')
+
+    # 1 e 7. Contagens por faixa etária (no eixo x, pelo código de TP_FAIXA_ETARIA) e sexo: o histograma
+    # é ponderado pelas contagens e a densidade é a KDE dessas contagens, com cada curva proporcional ao
+    # tamanho do grupo (como o `sns.kdeplot` com hue).
+    idade_sexo = cubo.contagens(['Sexo', 'Faixa Etária'], observadas=False)
+    codigos_idade = {rotulo: codigo for codigo, rotulo in MAPA_IDADE.items()}
+    tabela_idade_sexo = idade_sexo.reset_index()
+    tabela_idade_sexo['TP_FAIXA_ETARIA'] = tabela_idade_sexo.pop('Faixa Etária').map(codigos_idade).astype(int)
+    # Os códigos são valores discretos: as contagens vão para uma grade fina, cada uma exatamente no seu
+    # código, para que a banda (regra de Scott, bem menor que 1) não seja limitada pela largura da faixa.
+    por_sexo = idade_sexo.unstack()
+    posicoes = np.array([codigos_idade[rotulo] for rotulo in por_sexo.columns])
+    inicio = posicoes.min() - PASSO_DENSIDADE / 2
+    indices = np.rint((posicoes - posicoes.min()) / PASSO_DENSIDADE).astype(int)
+    curvas = {}
+    for sexo, contagens in por_sexo.iterrows():
+        if contagens.sum() > 0:
+            grade = np.zeros(indices.max() + 1)
+            grade[indices] = contagens.to_numpy()
+            x, y = kde_em_grade(grade, inicio, PASSO_DENSIDADE, ajuste=0.5)
+            curvas[sexo] = (x, y * contagens.sum() / por_sexo.to_numpy().sum())
+    # 4. Contagens por sexo e por situação de conclusão.
+    contagens_perfil = {d: cubo.contagens(d, observadas=False) for d in ['Sexo', 'Situação Conclusão']}
+
+    graficos = [
+        Grafico('01_histograma_faixa_etaria.png', 'Histograma da Faixa Etária', histograma_faixa_etaria, tabela_idade_sexo),
+        Grafico('02_violino_idade_conclusao.png', 'Gráfico de Violino', violino_idade_conclusao, df[['Situação Conclusão', 'TP_FAIXA_ETARIA']]),
+        Grafico('03_stripplot_idade_civil_sexo.png', 'Gráfico de Dispersão (Stripplot)', stripplot_idade_civil_sexo,
+                df[['Faixa Etária', 'Estado Civil', 'Sexo']]),
+        Grafico('04_barras_perfil_demografico.png', 'Gráfico de Barras do Perfil Demográfico', barras_perfil_demografico, contagens_perfil),
+        Grafico('05_linhas_proporcao_sexo_idade.png', 'Gráfico de Linhas (Proporção de Sexo por Idade)', linhas_proporcao_sexo_idade, comp_sexo_idade),
+        Grafico('06_heatmap_civil_conclusao.png', 'Heatmap (Estado Civil vs Situação de Conclusão)', heatmap_civil_conclusao, heatmap_data),
+        Grafico('07_densidade_idade_sexo.png', 'Gráfico de Densidade da Faixa Etária', densidade_idade_sexo, curvas),
+        Grafico('08_barras_empilhadas_conclusao_idade.png', 'Gráfico de Barras Empilhadas', barras_empilhadas_conclusao_idade, comp_conclusao_idade),
+    ]
+    return graficos
+
+@rastrear_tema('perfil_estudante')
+def main(df=None, interativo=False, processos=None, forcar=False, anos=None):
+    """
+    Executa a análise do perfil do estudante.
+
+    Args:
+        df (pd.DataFrame): Dados de PARTICIPANTES já carregados. Se None, são lidos do cache colunar.
+        interativo (bool): Se True, exibe cada gráfico na tela (renderização sequencial).
+        processos (int): Processos usados na renderização dos gráficos (None = um por núcleo).
+        forcar (bool): Se True, renderiza todos os gráficos, mesmo os que não mudaram desde a última execução.
+        anos (list): Anos analisados (None = 2024, gráficos na pasta do tema). Cada ano lê os seus
+            arquivos (ex: PARTICIPANTES_2023.csv) e grava os gráficos em `graficos_perfil_estudante/<ano>/`.
+    """
+    # Vários anos: o tema é executado uma vez para cada ano (ver `anos.executar_anos`).
+    if anos is not None and len(anos) > 1:
+        return executar_anos(main, anos, interativo=interativo, processos=processos, forcar=forcar)
+    ano = anos[0] if anos else None
 
     # --- Configuração Inicial ---
-    dados_path = 'DADOS'
-    participantes_file = os.path.join(dados_path, 'PARTICIPANTES_2024.csv')
-    sns.set_theme(style="whitegrid", palette="viridis") # Estilo visual dos gráficos
-    
     # Cria a pasta para salvar os gráficos
-    graficos_path = 'graficos_perfil_estudante'
+    graficos_path = pasta_do_ano('graficos_perfil_estudante', ano)
     os.makedirs(graficos_path, exist_ok=True)
 
     # --- Carregamento dos Dados ---
-    # Carrega apenas as colunas de perfil demográfico necessárias para otimizar.
-    cols_perfil = ['TP_FAIXA_ETARIA', 'TP_SEXO', 'TP_ESTADO_CIVIL', 'TP_ST_CONCLUSAO']
-    try:
-        df = pd.read_csv(participantes_file, encoding='latin1', delimiter=';', usecols=cols_perfil)
-        print(f"Dados de perfil carregados com sucesso: {len(df)} registros.")
-    except Exception as e:
-        print(f"ERRO ao carregar o arquivo de participantes: {e}")
-        return
+    # Execução completa do arquivo: as contagens dos gráficos saem do cubo pré-calculado.
+    completo = df is None
+    if df is None:
+        # Carrega apenas as colunas de perfil demográfico necessárias para otimizar.
+        try:
+            with etapa('carregar', arquivo=arquivo_do_ano(ARQUIVO, ano)) as medicao:
+                df = abrir_colunas(arquivo_do_ano(ARQUIVO, ano), COLUNAS)
+                medicao.linhas_saida = len(df)
+            print(f"Dados de perfil carregados com sucesso: {len(df)} registros.")
+        except Exception as e:
+            print(f"ERRO ao carregar o arquivo de participantes: {e}")
+            return
 
     # --- Parte 2: Decodificação e Preparação dos Dados ---
-    # Dicionários para traduzir os códigos em textos legíveis.
-    mapa_sexo = {'F': 'Feminino', 'M': 'Masculino'}
-    mapa_idade = {1: '<17', 2: '17', 3: '18', 4: '19', 5: '20', 6: '21', 7: '22', 8: '23', 9: '24', 10: '25', 11: '26-30', 12: '31-35', 13: '36-40', 14: '>40'}
-    mapa_conclusao = {1: 'Já concluí', 2: 'Estou cursando', 3: 'Cursando após concluir', 4: 'Não concluí'}
-    mapa_estado_civil = {0: 'Não inf.', 1: 'Solteiro(a)', 2: 'Casado(a)', 3: 'Divorciado(a)', 4: 'Viúvo(a)'}
-
-    # Aplica os mapas para criar as novas colunas descritivas.
-    df['Sexo'] = df['TP_SEXO'].map(mapa_sexo)
-    df['Faixa Etária'] = pd.Categorical(df['TP_FAIXA_ETARIA'].map(mapa_idade), categories=mapa_idade.values(), ordered=True)
-    df['Situação Conclusão'] = df['TP_ST_CONCLUSAO'].map(mapa_conclusao)
-    df['Estado Civil'] = df['TP_ESTADO_CIVIL'].map(mapa_estado_civil)
-    # Remove qualquer linha que tenha valores nulos após o mapeamento (ex: códigos inválidos).
-    df.dropna(inplace=True)
+    df = medir('preparar', preparar, df)
 
     print(f"Total de registros válidos para a análise de perfil: {len(df)}")
     if df.empty: return
 
-    # --- Parte 3: Geração dos 8 Gráficos de Perfil ---
-
-     # 1. HISTOGRAMA (sem alterações)
-    print("[1/8] Gerando: Histograma da Faixa Etária...")
-    plt.figure(figsize=(12, 7)); sns.histplot(data=df, x='TP_FAIXA_ETARIA', bins=len(mapa_idade), discrete=True, hue='Sexo'); plt.title('Histograma: Distribuição de Inscritos por Faixa Etária', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Contagem de Inscritos'); plt.xticks(ticks=list(mapa_idade.keys()), labels=mapa_idade.values(), rotation=45, ha='right'); plt.savefig(os.path.join(graficos_path, '01_histograma_faixa_etaria.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 2. GRÁFICO DE VIOLINO (sem alterações)
-    print("[2/8] Gerando: Gráfico de Violino...")
-    plt.figure(figsize=(12, 8)); sns.violinplot(data=df, x='Situação Conclusão', y='TP_FAIXA_ETARIA'); plt.title('Violino: Distribuição de Idade por Situação de Conclusão do EM', fontsize=16); plt.xlabel('Situação de Conclusão'); plt.ylabel('Faixa Etária'); plt.yticks(ticks=list(mapa_idade.keys()), labels=mapa_idade.values()); plt.savefig(os.path.join(graficos_path, '02_violino_idade_conclusao.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 3. GRÁFICO DE DISPERSÃO (STRIPPLOT) (COM A LEGENDA CORRIGIDA)
-    
-    # 4. GRÁFICO DE BARRAS (sem alterações)
-    print("[4/8] Gerando: Gráfico de Barras do Perfil Demográfico...")
-    fig, ax = plt.subplots(1, 2, figsize=(18, 7)); sns.countplot(ax=ax[0], data=df, x='Sexo').set_title('Contagem por Sexo'); sns.countplot(ax=ax[1], data=df, x='Situação Conclusão').set_title('Contagem por Situação de Conclusão do EM'); fig.suptitle('Gráfico de Barras: Perfil Geral dos Inscritos', fontsize=16); plt.savefig(os.path.join(graficos_path, '04_barras_perfil_demografico.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 5. GRÁFICO DE LINHAS (sem alterações)
-    print("[5/8] Gerando: Gráfico de Linhas (Proporção de Sexo por Idade)...")
-    comp_sexo_idade = df.groupby('Faixa Etária', observed=True)['Sexo'].value_counts(normalize=True).unstack().fillna(0) * 100; comp_sexo_idade.plot(kind='line', style='-o', figsize=(12, 7)); plt.title('Linhas: Proporção de Sexo por Faixa Etária (%)', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Percentual de Inscritos (%)'); plt.grid(True, linestyle='--'); plt.savefig(os.path.join(graficos_path, '05_linhas_proporcao_sexo_idade.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 6. HEATMAP (sem alterações)
-    print("[6/8] Gerando: Heatmap (Estado Civil vs Situação de Conclusão)...")
-    heatmap_data = pd.crosstab(df['Estado Civil'], df['Situação Conclusão']); plt.figure(figsize=(10, 7)); sns.heatmap(heatmap_data, annot=True, fmt='d', cmap='cividis'); plt.title('Heatmap: Contagem por Estado Civil e Situação de Conclusão', fontsize=16); plt.savefig(os.path.join(graficos_path, '06_heatmap_civil_conclusao.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 7. GRÁFICO DE DENSIDADE (KDE) (sem alterações)
-    print("[7/8] Gerando: Gráfico de Densidade da Faixa Etária...")
-    plt.figure(figsize=(12, 7)); sns.kdeplot(data=df, x='TP_FAIXA_ETARIA', hue='Sexo', fill=True, bw_adjust=0.5); plt.title('Densidade: Distribuição de Idade dos Inscritos por Sexo', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Densidade'); plt.xticks(ticks=list(mapa_idade.keys()), labels=mapa_idade.values(), rotation=45, ha='right'); plt.savefig(os.path.join(graficos_path, '07_densidade_idade_sexo.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    # 8. GRÁFICO DE BARRAS EMPILHADAS (sem alterações)
-    print("[8/8] Gerando: Gráfico de Barras Empilhadas...")
-    comp_conclusao_idade = df.groupby('Faixa Etária', observed=True)['Situação Conclusão'].value_counts(normalize=True).unstack().fillna(0) * 100; comp_conclusao_idade.plot(kind='bar', stacked=True, figsize=(14, 8), colormap='YlGnBu'); plt.title('Barras Empilhadas: Composição da Situação de Conclusão por Faixa Etária (%)', fontsize=16); plt.xlabel('Faixa Etária'); plt.ylabel('Percentual de Inscritos (%)'); plt.legend(title='Situação de Conclusão', bbox_to_anchor=(1.02, 1)); plt.savefig(os.path.join(graficos_path, '08_barras_empilhadas_conclusao_idade.png'), dpi=300, bbox_inches='tight'); plt.show()
-
-    print("[3/8] Gerando: Gráfico de Dispersão (Stripplot)...")
-    plt.figure(figsize=(16, 9)) # Aumentei um pouco o tamanho para acomodar a legenda
-    sns.stripplot(data=df, x='Faixa Etária', y='Estado Civil', hue='Sexo', jitter=0.3, alpha=0.5, dodge=True)
-    plt.title('Dispersão: Relação entre Idade, Estado Civil e Sexo', fontsize=16)
-    plt.xlabel('Faixa Etária', fontsize=12)
-    plt.ylabel('Estado Civil', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.legend(title='Sexo', bbox_to_anchor=(1.02, 1), loc='upper left')
-    plt.tight_layout(rect=[0, 0, 0.9, 1])
-    plt.savefig(os.path.join(graficos_path, '03_stripplot_idade_civil_sexo.png'), dpi=300, bbox_inches='tight')
-    plt.show()
+    cubo = None
+    if completo:
+        with etapa('carregar_cubo', arquivo=arquivo_do_ano(ARQUIVO, ano)):
+            cubo = carregar_cubo(arquivo_do_ano(ARQUIVO, ano))
+    graficos = medir('agregar', montar_graficos, df, cubo)
+    renderizar_graficos(graficos, graficos_path, ESTILO, interativo, processos, forcar)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**argumentos_linha_comando())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gráficos de tendência entre anos do ENEM, a partir dos agregados parciais de cada ano.
+
+Para cada ano, os agregados em blocos dos temas institucional (notas por região) e
+acadêmico (notas por tipo de escola) são calculados uma única vez e guardados em
+`DADOS/.cache/parciais` (ver `anos.parcial_do_ano`). Acrescentar um ano calcula só o
+agregado desse ano; os gráficos de tendência e o resumo do período inteiro são montados
+mesclando os agregados já guardados, sem reler os microdados dos outros anos.
+
+Uso:
+    python tendencias.py                        # todos os anos com RESULTADOS_<ano>.csv na pasta DADOS
+    python tendencias.py --anos 2022 2023 2024
+"""
+
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import agregacao_streaming
+import cache_colunar
+import derivacao
+import esquema
+import limpeza
+import tema_academico
+import tema_instucional
+from agregacao_streaming import HistogramaMesclavel
+from anos import anos_disponiveis, combinar_anos, ingerir, parciais_por_ano, versao_codigo
+from esquema import ORDEM_ESCOLAS, ORDEM_REGIOES
+from histogramas import densidades, desenhar_densidades
+from limpeza import NOTAS_COLS
+from renderizacao import Grafico, renderizar_graficos
+
+GRAFICOS_PATH = 'graficos_tendencias'
+# Estilo visual dos gráficos (argumentos de sns.set_theme).
+ESTILO = {'style': 'whitegrid', 'palette': 'deep'}
+MAPA_NOMES_NOTAS = tema_instucional.MAPA_NOMES_COMPLETOS
+# Módulos usados no cálculo dos agregados parciais (além do tema): a versão do código de todos
+# eles entra na chave do cache, para que um agregado antigo (ou que não possa mais ser lido) não
+# seja reaproveitado depois de uma mudança em qualquer um.
+MODULOS_AGREGADOS = (limpeza, agregacao_streaming, derivacao, esquema, cache_colunar)
+
+
+def agregados_por_ano(anos):
+    """
+    Agregados parciais de cada ano (calculados só para os anos que ainda não estão no cache).
+
+    Returns:
+        dict: {'instucional': {ano: agregados}, 'academico': {ano: agregados}}.
+    """
+    temas = {'instucional': tema_instucional, 'academico': tema_academico}
+    return {nome: parciais_por_ano(nome, lambda ano, tema=tema: tema.estatisticas_streaming(ano=ano), tema.ARQUIVO,
+                                   anos, versao_codigo(tema, *MODULOS_AGREGADOS))
+            for nome, tema in temas.items()}
+
+
+def medias_nacionais(por_regiao):
+    """Médias do país a partir das somas e contagens por região de um ano."""
+    return por_regiao.parciais['soma'].sum() / por_regiao.parciais['n'].sum()
+
+
+# --- Funções de Desenho dos Gráficos ---
+
+def linhas_medias_areas(medias):
+    ax = medias.plot(kind='line', style='-o', figsize=(12, 7))
+    ax.set(title='Nota Média por Área do Conhecimento ao Longo dos Anos', xlabel='Ano', ylabel='Nota Média')
+    ax.set_xticks(medias.index); plt.legend(title='Área'); plt.tight_layout()
+
+def linhas_media_regiao(medias):
+    ax = medias.plot(kind='line', style='-o', figsize=(12, 7), colormap='viridis')
+    ax.set(title='Nota Média Geral por Região ao Longo dos Anos', xlabel='Ano', ylabel='Nota Média Geral')
+    ax.set_xticks(medias.index); plt.legend(title='Região'); plt.tight_layout()
+
+def linhas_media_escola(medias):
+    ax = medias.plot(kind='line', style='-o', figsize=(12, 7), colormap='plasma')
+    ax.set(title='Nota Média Geral por Tipo de Escola ao Longo dos Anos', xlabel='Ano', ylabel='Nota Média Geral')
+    ax.set_xticks(medias.index); plt.legend(title='Tipo de Escola'); plt.tight_layout()
+
+def barras_participantes(contagens):
+    ax = contagens.plot(kind='bar', figsize=(10, 6), rot=0, color='steelblue')
+    ax.set(title='Participantes com Todas as Notas por Ano', xlabel='Ano', ylabel='Participantes'); plt.tight_layout()
+
+def densidade_nota_ano(curvas):
+    plt.figure(figsize=(12, 7)); desenhar_densidades(curvas, 'Ano', palette='viridis', fill=False)
+    plt.title('Densidade da Nota Média Geral por Ano', fontsize=16); plt.xlabel('Nota Média Geral'); plt.ylabel('Densidade')
+
+
+def montar_graficos(parciais):
+    """
+    Calcula os dados dos gráficos de tendência a partir dos agregados parciais de cada ano.
+
+    Returns:
+        list: Tarefas `Grafico`, prontas para `renderizacao.renderizar_graficos`.
+    """
+    institucional, academico = parciais['instucional'], parciais['academico']
+    anos = list(institucional)
+    medias_areas = pd.DataFrame({ano: medias_nacionais(a['por_regiao'])[NOTAS_COLS] for ano, a in institucional.items()}).T
+    medias_regiao = pd.DataFrame({ano: a['por_regiao'].medias()['NOTA_MEDIA_GERAL'] for ano, a in institucional.items()}).T
+    medias_escola = pd.DataFrame({ano: a['por_escola'].medias()['NOTA_MEDIA_GERAL'] for ano, a in academico.items()}).T
+    contagens = pd.Series({ano: int(a['por_regiao'].parciais['n']['NOTA_MEDIA_GERAL'].sum())
+                           for ano, a in institucional.items()})
+
+    # Histograma de cada ano (todas as regiões somadas) em um único histograma com um grupo por ano.
+    por_ano = HistogramaMesclavel(0, 1000, 10)
+    for ano, a in institucional.items():
+        por_ano.contagens[str(ano)] = sum(a['histograma'].contagens.values())
+    curvas = densidades(por_ano, [str(ano) for ano in anos])
+
+    return [
+        Grafico('01_linhas_medias_areas.png', 'Médias por Área ao Longo dos Anos', linhas_medias_areas,
+                medias_areas.rename(columns=MAPA_NOMES_NOTAS)),
+        Grafico('02_linhas_media_regiao.png', 'Média por Região ao Longo dos Anos', linhas_media_regiao,
+                medias_regiao[[r for r in ORDEM_REGIOES if r in medias_regiao]]),
+        Grafico('03_linhas_media_escola.png', 'Média por Tipo de Escola ao Longo dos Anos', linhas_media_escola,
+                medias_escola[[e for e in ORDEM_ESCOLAS if e in medias_escola]]),
+        Grafico('04_barras_participantes.png', 'Participantes por Ano', barras_participantes, contagens),
+        Grafico('05_densidade_nota_ano.png', 'Densidade da Nota Média Geral por Ano', densidade_nota_ano, curvas),
+    ]
+
+
+def main():
+    """Ingere os anos novos, atualiza os agregados por ano e gera os gráficos de tendência."""
+    parser = argparse.ArgumentParser(description='Gráficos de tendência entre anos do ENEM.')
+    parser.add_argument('--anos', nargs='+', type=int, default=None, help='anos analisados (padrão: todos em DADOS)')
+    parser.add_argument('--processos', type=int, default=None, help='processos usados na renderização')
+    parser.add_argument('--forcar', action='store_true', help='renderiza todos os gráficos, mesmo os que não mudaram')
+    args = parser.parse_args()
+
+    anos = sorted(args.anos or anos_disponiveis())
+    if not anos:
+        print("Nenhum arquivo RESULTADOS_<ano>.csv encontrado na pasta 'DADOS'.")
+        return
+    print(f"Anos analisados: {', '.join(map(str, anos))}")
+    ingerir(anos)
+    parciais = agregados_por_ano(anos)
+
+    # Resumo do período inteiro: mescla dos agregados de cada ano, sem reler os dados.
+    periodo = combinar_anos(parciais['instucional'])
+    print(f"\nMédias por Região no período {anos[0]}-{anos[-1]}:")
+    print(periodo['por_regiao'].medias().round(1).to_string())
+
+    os.makedirs(GRAFICOS_PATH, exist_ok=True)
+    renderizar_graficos(montar_graficos(parciais), GRAFICOS_PATH, ESTILO, processos=args.processos, forcar=args.forcar)
+
+
+if __name__ == "__main__":
+    main()
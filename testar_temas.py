@@ -68,7 +68,7 @@ def main():
         return
     
     # Lista de temas disponíveis
-    temas = ['desempenho', 'academico', 'perfil_estudante', 'instucional', 'socieconomico']
+    temas = ['desempenho', 'academico', 'perfil_estudante', 'instucional', 'socieconomico', 'itens']
     
     print("Temas disponíveis:")
     for i, tema in enumerate(temas, 1):
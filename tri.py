@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estimação da proficiência pela Teoria de Resposta ao Item (modelo logístico de 3 parâmetros).
+
+`ITENS_PROVA_2024.csv` traz, para cada item de cada prova (CO_PROVA), a posição no
+caderno, o gabarito e os parâmetros a (discriminação), b (dificuldade) e c (acerto ao
+acaso). Aqui as respostas de cada participante (TX_RESPOSTAS_*) são comparadas com o
+gabarito do seu caderno e a proficiência é estimada por EAP (média a posteriori) em uma
+grade de quadratura com priori normal padrão.
+
+O cálculo é vetorizado: as respostas viram uma matriz de acertos (`respostas.py`),
+os participantes são agrupados por caderno (e língua estrangeira, em LC) e a
+log-verossimilhança de todos os pontos da grade sai de duas multiplicações de matrizes.
+Os dados são lidos em blocos, então a memória não depende do número de participantes.
+
+Uso:
+    python tri.py                          # estima as 4 áreas e mede a vazão (participantes/s)
+    python tri.py --areas MT --tamanho-bloco 200000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import TAMANHO_BLOCO, ler_em_blocos
+from indice_itens import carregar_indice
+from respostas import decodificar_acertos, linhas_por_grupo, tabela_grupos
+
+ARQUIVO = 'RESULTADOS_2024.csv'
+AREAS = ['CN', 'CH', 'LC', 'MT']
+
+# Grade de quadratura da proficiência (escala padronizada, média 0 e desvio 1).
+PONTOS_QUADRATURA = np.linspace(-4, 4, 41)
+# Escala do ENEM: proficiência padronizada multiplicada por 100 e somada a 500.
+MEDIA_ENEM, DESVIO_ENEM = 500.0, 100.0
+
+
+def log_verossimilhanca(acertos, a, b, c, validos, pontos=PONTOS_QUADRATURA):
+    """
+    Log-verossimilhança do padrão de acertos em cada ponto da grade, pelo modelo 3PL.
+
+    Args:
+        acertos (np.ndarray): Matriz (participantes x itens) com 1 para acerto e 0 para erro.
+        a, b, c (np.ndarray): Parâmetros dos itens.
+        validos (np.ndarray): Itens usados no cálculo (os anulados ficam de fora).
+        pontos (np.ndarray): Grade de quadratura.
+
+    Returns:
+        np.ndarray: Matriz (participantes x pontos da grade).
+    """
+    a, b, c = a[validos], b[validos], c[validos]
+    p = c[:, None] + (1 - c[:, None]) / (1 + np.exp(-a[:, None] * (pontos[None, :] - b[:, None])))
+    p = np.clip(p, 1e-10, 1 - 1e-10)
+    log_p, log_q = np.log(p), np.log1p(-p)
+    x = acertos[:, validos].astype(np.float64)
+    # sum_i x_i log p_i + (1 - x_i) log q_i  =  x @ (log p - log q) + sum_i log q_i
+    return x @ (log_p - log_q) + log_q.sum(axis=0)
+
+
+def eap(log_vero, pontos=PONTOS_QUADRATURA):
+    """
+    Estimativa EAP (média a posteriori) e desvio-padrão a posteriori, com priori normal padrão.
+
+    Returns:
+        tuple: (theta, desvio), arrays com uma posição por participante.
+    """
+    log_post = log_vero - 0.5 * pontos[None, :] ** 2
+    post = np.exp(log_post - log_post.max(axis=1, keepdims=True))
+    post /= post.sum(axis=1, keepdims=True)
+    theta = post @ pontos
+    desvio = np.sqrt(np.maximum(post @ pontos ** 2 - theta ** 2, 0))
+    return theta, desvio
+
+
+def estimar_bloco(bloco, area, tabela):
+    """
+    Estima a proficiência dos participantes de um bloco em uma área.
+
+    Args:
+        bloco (pd.DataFrame): Linhas de RESULTADOS com CO_PROVA_<area>, TX_RESPOSTAS_<area> e TP_LINGUA.
+        area (str): Área do conhecimento.
+        tabela (dict): Saída de `respostas.tabela_grupos`.
+
+    Returns:
+        pd.DataFrame: THETA, ERRO_PADRAO e NOTA_TRI (escala do ENEM), com o índice do bloco.
+            Participantes sem respostas ou com caderno desconhecido ficam com NaN.
+    """
+    theta = np.full(len(bloco), np.nan)
+    desvio = np.full(len(bloco), np.nan)
+    acertos, grupo = decodificar_acertos(bloco, area, tabela)
+    # Dentro de um grupo (caderno e língua) os itens e os parâmetros são os mesmos.
+    for g, linhas in linhas_por_grupo(grupo).items():
+        log_vero = log_verossimilhanca(acertos[linhas], tabela['a'][g], tabela['b'][g], tabela['c'][g],
+                                       tabela['valido'][g])
+        theta[linhas], desvio[linhas] = eap(log_vero)
+    return pd.DataFrame({'THETA': theta, 'ERRO_PADRAO': desvio, 'NOTA_TRI': MEDIA_ENEM + DESVIO_ENEM * theta},
+                        index=bloco.index)
+
+
+def estimar_proficiencias(area, tamanho_bloco=TAMANHO_BLOCO, indice=None):
+    """
+    Estima a proficiência de todos os participantes em uma área, lendo RESULTADOS em blocos.
+
+    Args:
+        area (str): 'CN', 'CH', 'LC' ou 'MT'.
+        tamanho_bloco (int): Linhas lidas por vez.
+        indice (dict): Índice dos itens (None usa `indice_itens.carregar_indice`).
+
+    Returns:
+        tuple: (DataFrame com THETA, ERRO_PADRAO, NOTA_TRI e NU_NOTA_<area>; dict com a vazão medida).
+    """
+    indice = carregar_indice() if indice is None else indice
+    tabela = tabela_grupos(indice, area)
+    colunas = [f'CO_PROVA_{area}', f'TX_RESPOSTAS_{area}', f'NU_NOTA_{area}'] + (['TP_LINGUA'] if area == 'LC' else [])
+    partes = []
+    inicio = time.perf_counter()
+    tempo_calculo = 0.0
+    linha = 0
+    for bloco in ler_em_blocos(ARQUIVO, colunas, tamanho_bloco):
+        # O índice de cada bloco recomeça do zero; a posição no arquivo identifica o participante.
+        bloco.index = pd.RangeIndex(linha, linha + len(bloco))
+        linha += len(bloco)
+        inicio_bloco = time.perf_counter()
+        resultado = estimar_bloco(bloco, area, tabela)
+        tempo_calculo += time.perf_counter() - inicio_bloco
+        resultado[f'NU_NOTA_{area}'] = bloco[f'NU_NOTA_{area}']
+        partes.append(resultado.astype('float32'))
+    df = pd.concat(partes) if partes else pd.DataFrame(columns=['THETA', 'ERRO_PADRAO', 'NOTA_TRI', f'NU_NOTA_{area}'])
+    estimados = int(df['THETA'].notna().sum())
+    vazao = {
+        'area': area,
+        'participantes': estimados,
+        'tempo_total_s': round(time.perf_counter() - inicio, 3),
+        'tempo_calculo_s': round(tempo_calculo, 3),
+        'participantes_por_s': round(estimados / tempo_calculo) if tempo_calculo > 0 else None,
+    }
+    return df, vazao
+
+
+def main():
+    """Estima as proficiências das áreas pedidas e mostra a vazão e a concordância com as notas oficiais."""
+    parser = argparse.ArgumentParser(description='Estimação da proficiência (TRI, 3PL, EAP).')
+    parser.add_argument('--areas', nargs='+', choices=AREAS, default=AREAS)
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO,
+                        help=f'linhas de RESULTADOS lidas por vez (padrão: {TAMANHO_BLOCO})')
+    args = parser.parse_args()
+
+    indice = carregar_indice()
+    for area in args.areas:
+        df, vazao = estimar_proficiencias(area, args.tamanho_bloco, indice)
+        validos = df.dropna(subset=['NOTA_TRI', f'NU_NOTA_{area}'])
+        correlacao = validos['NOTA_TRI'].corr(validos[f'NU_NOTA_{area}']) if len(validos) > 1 else float('nan')
+        print(f"{area}: {vazao['participantes']} participantes em {vazao['tempo_calculo_s']:.2f} s de cálculo "
+              f"({vazao['participantes_por_s']} participantes/s; {vazao['tempo_total_s']:.2f} s com a leitura) | "
+              f"correlação com NU_NOTA_{area}: {correlacao:.4f}")
+
+
+if __name__ == "__main__":
+    main()